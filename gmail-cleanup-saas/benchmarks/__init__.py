@@ -0,0 +1 @@
+"""Benchmarks for gmail_cleanup against a fake Gmail API."""
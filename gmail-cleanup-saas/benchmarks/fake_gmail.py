@@ -0,0 +1,1085 @@
+"""In-process fake of the Gmail API, for benchmarking GmailClient and up.
+
+FakeGmailService stands in for the object returned by
+``googleapiclient.discovery.build('gmail', 'v1')``: the same resource
+methods, request objects with ``execute()``, and batch HTTP requests. Every
+call is counted and charged Gmail quota units, and the fake can add
+per-request latency, enforce the per-user rate limit and inject 429 errors.
+The mailbox itself is synthetic, generated from a seed.
+"""
+
+import base64
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import BatchError, HttpError
+
+
+# Quota units charged per method, from the Gmail API usage limits
+QUOTA_UNITS = {
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.modify': 5,
+    'messages.batchModify': 50,
+    'messages.trash': 5,
+    'messages.untrash': 5,
+    'messages.delete': 10,
+    'messages.batchDelete': 50,
+    'threads.list': 10,
+    'threads.get': 10,
+    'threads.modify': 10,
+    'threads.trash': 10,
+    'threads.untrash': 10,
+    'threads.delete': 20,
+    'labels.list': 1,
+    'labels.get': 1,
+    'labels.create': 5,
+    'history.list': 2,
+    'getProfile': 1,
+    'watch': 100,
+    'stop': 50,
+}
+
+# Per-user limit on quota units per second
+DEFAULT_QUOTA_PER_SECOND = 250
+
+# googleapiclient refuses batches larger than this
+MAX_BATCH_SIZE = 100
+
+SYSTEM_LABELS = [
+    'INBOX', 'UNREAD', 'STARRED', 'IMPORTANT', 'SENT', 'DRAFT', 'SPAM', 'TRASH',
+    'CATEGORY_PERSONAL', 'CATEGORY_SOCIAL', 'CATEGORY_PROMOTIONS',
+    'CATEGORY_UPDATES', 'CATEGORY_FORUMS',
+]
+
+
+def http_error(status: int, reason: str, message: str) -> HttpError:
+    """Build an HttpError shaped like a Gmail API error response."""
+    resp = httplib2.Response({'status': status, 'content-type': 'application/json'})
+    resp.reason = reason
+    content = json.dumps({
+        'error': {
+            'code': status,
+            'message': message,
+            'errors': [{'reason': reason, 'message': message}],
+        }
+    }).encode('utf-8')
+    return HttpError(resp, content, uri='https://gmail.googleapis.com/gmail/v1/users/me')
+
+
+class FakeMessage:
+    """One message of the synthetic mailbox."""
+
+    __slots__ = (
+        'id', 'thread_id', 'labels', 'sender', 'recipient', 'subject',
+        'snippet', 'body', 'date_ms', 'size', 'has_attachment',
+    )
+
+    def __init__(
+        self,
+        id: str,
+        thread_id: str,
+        labels: List[str],
+        sender: str,
+        recipient: str,
+        subject: str,
+        body: str,
+        date_ms: int,
+        size: int,
+        has_attachment: bool = False
+    ):
+        self.id = id
+        self.thread_id = thread_id
+        self.labels = labels
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.snippet = body[:100]
+        self.body = body
+        self.date_ms = date_ms
+        self.size = size
+        self.has_attachment = has_attachment
+
+    def resource(self, format: str = 'full', metadata_headers: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Render the message as a users.messages resource."""
+        result = {
+            'id': self.id,
+            'threadId': self.thread_id,
+            'labelIds': list(self.labels),
+            'snippet': self.snippet,
+            'sizeEstimate': self.size,
+            'internalDate': str(self.date_ms),
+        }
+        if format == 'minimal':
+            return result
+
+        date = datetime.fromtimestamp(self.date_ms / 1000, tz=timezone.utc)
+        headers = [
+            {'name': 'From', 'value': self.sender},
+            {'name': 'To', 'value': self.recipient},
+            {'name': 'Subject', 'value': self.subject},
+            {'name': 'Date', 'value': format_datetime(date)},
+        ]
+
+        if format == 'metadata':
+            if metadata_headers:
+                wanted = {name.lower() for name in metadata_headers}
+                headers = [h for h in headers if h['name'].lower() in wanted]
+            result['payload'] = {'mimeType': 'multipart/mixed', 'headers': headers}
+            return result
+
+        parts = [{
+            'partId': '0',
+            'mimeType': 'text/plain',
+            'filename': '',
+            'body': {
+                'size': len(self.body),
+                'data': base64.urlsafe_b64encode(self.body.encode('utf-8')).decode('ascii'),
+            },
+        }]
+        if self.has_attachment:
+            parts.append({
+                'partId': '1',
+                'mimeType': 'application/pdf',
+                'filename': 'attachment.pdf',
+                'body': {'attachmentId': f'att-{self.id}', 'size': self.size},
+            })
+        result['payload'] = {'mimeType': 'multipart/mixed', 'headers': headers, 'parts': parts}
+        return result
+
+
+# Sender profiles for generated mail: (weight, addresses, category, subjects,
+# body, chance of staying in the inbox, chance of being unread)
+_PROFILES = [
+    (18, ['news@newsletter.example.com', 'digest@news.example.org', 'weekly@updates.example.net'],
+     'CATEGORY_PROMOTIONS', ['Weekly digest #{n}', 'This week in tech', 'Your {month} newsletter'],
+     'Top stories this week. To stop receiving these emails, unsubscribe here.', 0.5, 0.6),
+    (14, ['deals@shop.example.com', 'offers@store.example.com', 'sale@outlet.example.com'],
+     'CATEGORY_PROMOTIONS', ['{n}% off everything', 'Limited time offer inside', 'Last chance: sale ends tonight'],
+     'Limited time offer! Act now to save. Unsubscribe from promotional mail.', 0.4, 0.7),
+    (12, ['alerts@notifications.example.com', 'no-reply@accounts.example.com'],
+     'CATEGORY_UPDATES', ['New sign-in to your account', 'Your weekly activity report', 'Security alert'],
+     'We noticed a new sign-in. This is an automated notification.', 0.6, 0.4),
+    (8, ['notification@facebook.com', 'notify@twitter.com', 'messages-noreply@linkedin.com'],
+     'CATEGORY_SOCIAL', ['{name} commented on your post', 'You have {n} new notifications', 'New connection request'],
+     'You have a new notification. View it on the site.', 0.5, 0.6),
+    (10, ['noreply@github.com', 'noreply@ci.example.dev', 'builds@noreply.example.io'],
+     'CATEGORY_UPDATES', ['[repo] Build #{n} passed', '[repo] Pull request #{n} merged', 'Deployment finished'],
+     'Automated message. Do not reply to this email.', 0.5, 0.5),
+    (6, ['orders@shop.example.com', 'billing@payments.example.com'],
+     'CATEGORY_UPDATES', ['Your receipt for order #{n}', 'Invoice {n} is available', 'Order confirmation #{n}'],
+     'Thank you for your purchase. Your receipt and invoice are attached.', 0.4, 0.2),
+    (22, [], 'CATEGORY_PERSONAL', ['Re: plans for {month}', 'Photos from the weekend', 'Quick question', 'Catching up'],
+     'Hi, hope you are well. Let me know what you think.', 0.8, 0.15),
+    (10, [], None, ['Re: project update', 'Meeting notes {month}', 'Q{q} planning', 'Review request'],
+     'Please see the notes below and the attached document.', 0.7, 0.2),
+]
+
+_FIRST_NAMES = ['alex', 'sam', 'jordan', 'taylor', 'casey', 'morgan', 'riley', 'jamie', 'drew', 'quinn']
+_MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+           'September', 'October', 'November', 'December']
+
+
+class FakeMailbox:
+    """Messages, labels and history of one fake Gmail account.
+
+    All mutation goes through this class under one lock; searches are cached
+    until the mailbox next changes.
+    """
+
+    def __init__(self, email: str = 'me@example.com', now: Optional[datetime] = None):
+        self.email = email
+        self.now = now or datetime.now(timezone.utc)
+        self.messages: Dict[str, FakeMessage] = {}
+        self.threads: Dict[str, List[str]] = {}
+        self.labels: Dict[str, Dict[str, Any]] = {
+            label_id: {'id': label_id, 'name': label_id, 'type': 'system'} for label_id in SYSTEM_LABELS
+        }
+        self.history: List[Dict[str, Any]] = []
+        self.history_id = 1000
+        self.first_history_id = self.history_id
+        self._sorted: Optional[Tuple[List[FakeMessage], List[int]]] = None
+        self._version = 0
+        self._search_cache: Dict[Tuple[str, bool, bool], Tuple[int, List[str]]] = {}
+        self._next_label = 1
+        self._lock = threading.RLock()
+
+    # Setup
+
+    def copy(self) -> 'FakeMailbox':
+        """Independent copy, so every benchmark run starts from the same state."""
+        with self._lock:
+            clone = FakeMailbox(email=self.email, now=self.now)
+            clone.labels = {label_id: dict(label) for label_id, label in self.labels.items()}
+            clone._next_label = self._next_label
+            clone.history = list(self.history)
+            clone.history_id = self.history_id
+            clone.first_history_id = self.first_history_id
+            for message in self._ordered()[0]:
+                clone.messages[message.id] = FakeMessage(
+                    message.id, message.thread_id, list(message.labels), message.sender,
+                    message.recipient, message.subject, message.body, message.date_ms,
+                    message.size, message.has_attachment
+                )
+            clone.threads = {thread_id: list(ids) for thread_id, ids in self.threads.items()}
+            return clone
+
+    def add_label(self, name: str) -> str:
+        """Create a user label and return its ID."""
+        with self._lock:
+            for label in self.labels.values():
+                if label['name'].lower() == name.lower():
+                    raise http_error(409, 'duplicate', 'Label name exists or conflicts')
+            label_id = f'Label_{self._next_label}'
+            self._next_label += 1
+            self.labels[label_id] = {'id': label_id, 'name': name, 'type': 'user'}
+            self._changed()
+            return label_id
+
+    def add_message(self, message: FakeMessage, record_history: bool = True) -> None:
+        """Add a message, e.g. a newly delivered one."""
+        with self._lock:
+            self.messages[message.id] = message
+            self.threads.setdefault(message.thread_id, []).append(message.id)
+            self._sorted = None
+            if record_history:
+                self._record({'messagesAdded': [{'message': self._history_ref(message)}]})
+            self._changed()
+
+    # Queries
+
+    def search(self, query: str, threads: bool = False, include_spam_trash: bool = False) -> List[str]:
+        """Message (or thread) IDs matching a query, newest first.
+
+        The query is evaluated outside the lock, over a snapshot, so
+        concurrent searches run in parallel as they would against Gmail.
+        """
+        key = (query or '', threads, include_spam_trash)
+        with self._lock:
+            cached = self._search_cache.get(key)
+            if cached and cached[0] == self._version:
+                return cached[1]
+            version = self._version
+            ordered, keys = self._ordered()
+            predicate = compile_query(query or '', self, include_spam_trash)
+
+        # Only scan the messages inside the query's date range
+        low, high = query_date_bounds(query or '', self.now)
+        start = bisect.bisect_left(keys, -high) if high is not None else 0
+        end = bisect.bisect_right(keys, -low) if low is not None else len(keys)
+
+        matched = [message for message in ordered[start:end] if predicate(message)]
+        if threads:
+            ids = list(dict.fromkeys(message.thread_id for message in matched))
+        else:
+            ids = [message.id for message in matched]
+
+        with self._lock:
+            if self._version == version:
+                self._search_cache[key] = (version, ids)
+        return ids
+
+    def _ordered(self) -> Tuple[List[FakeMessage], List[int]]:
+        """Messages newest first, with their negated dates for bisecting."""
+        if self._sorted is None:
+            ordered = sorted(self.messages.values(), key=lambda message: message.date_ms, reverse=True)
+            self._sorted = (ordered, [-message.date_ms for message in ordered])
+        return self._sorted
+
+    def get(self, message_id: str) -> FakeMessage:
+        message = self.messages.get(message_id)
+        if message is None:
+            raise http_error(404, 'notFound', 'Requested entity was not found.')
+        return message
+
+    def thread_messages(self, thread_id: str) -> List[FakeMessage]:
+        ids = self.threads.get(thread_id)
+        if not ids:
+            raise http_error(404, 'notFound', 'Requested entity was not found.')
+        return [self.messages[message_id] for message_id in ids]
+
+    def resolve_label(self, token: str) -> Optional[str]:
+        """Resolve a label as written in a search query to its ID."""
+        normalized = _normalize_label(token)
+        for label_id, label in self.labels.items():
+            if _normalize_label(label['name']) == normalized or _normalize_label(label_id) == normalized:
+                return label_id
+        return None
+
+    # Mutation
+
+    def modify(self, message_ids: Iterable[str], add: Iterable[str] = (), remove: Iterable[str] = ()) -> None:
+        """Add and remove labels on messages, like messages.batchModify."""
+        add, remove = list(add or []), list(remove or [])
+        with self._lock:
+            for label_id in add + remove:
+                if label_id not in self.labels:
+                    raise http_error(400, 'invalidArgument', f'Invalid label: {label_id}')
+
+            for message_id in message_ids:
+                message = self.messages.get(message_id)
+                if message is None:
+                    continue
+                added = [label for label in add if label not in message.labels]
+                removed = [label for label in remove if label in message.labels and label not in add]
+                if not added and not removed:
+                    continue
+                message.labels = [label for label in message.labels if label not in removed] + added
+                if added:
+                    self._record({'labelsAdded': [{'message': self._history_ref(message), 'labelIds': added}]})
+                if removed:
+                    self._record({'labelsRemoved': [{'message': self._history_ref(message), 'labelIds': removed}]})
+            self._changed()
+
+    def delete(self, message_ids: Iterable[str]) -> None:
+        """Permanently delete messages."""
+        with self._lock:
+            for message_id in message_ids:
+                message = self.messages.pop(message_id, None)
+                if message is None:
+                    continue
+                self._sorted = None
+                thread = self.threads[message.thread_id]
+                thread.remove(message_id)
+                if not thread:
+                    del self.threads[message.thread_id]
+                self._record({'messagesDeleted': [{'message': self._history_ref(message)}]})
+            self._changed()
+
+    def history_since(self, start_history_id: int) -> List[Dict[str, Any]]:
+        """History records after a history ID, like history.list."""
+        with self._lock:
+            if start_history_id < self.first_history_id:
+                raise http_error(404, 'notFound', 'Requested entity was not found.')
+            return [record for record in self.history if int(record['id']) > start_history_id]
+
+    def _record(self, change: Dict[str, Any]) -> None:
+        self.history_id += 1
+        change['id'] = str(self.history_id)
+        self.history.append(change)
+
+    @staticmethod
+    def _history_ref(message: FakeMessage) -> Dict[str, Any]:
+        return {'id': message.id, 'threadId': message.thread_id, 'labelIds': list(message.labels)}
+
+    def _changed(self) -> None:
+        self._version += 1
+
+
+def generate_mailbox(
+    size: int,
+    seed: int = 0,
+    now: Optional[datetime] = None,
+    years: float = 5.0,
+    email: str = 'me@example.com'
+) -> FakeMailbox:
+    """Generate a synthetic mailbox.
+
+    The mix of newsletters, promotions, notifications, social and automated
+    mail, receipts and personal threads, the long tail of personal senders
+    and the skew towards recent mail are loosely modeled on a real inbox.
+    The same size and seed always produce the same mailbox.
+
+    Args:
+        size: Number of messages
+        seed: Random seed
+        now: Time the mailbox is generated at (defaults to now)
+        years: Age of the oldest messages
+        email: Account address
+
+    Returns:
+        FakeMailbox with the messages and a few user labels
+    """
+    rng = random.Random(seed)
+    mailbox = FakeMailbox(email=email, now=now)
+    now_ms = int(mailbox.now.timestamp() * 1000)
+    max_age_ms = int(years * 365 * 86400 * 1000)
+
+    receipts_label = mailbox.add_label('Receipts')
+    work_label = mailbox.add_label('Work')
+    mailbox.add_label('Travel')
+
+    personal_senders = [
+        f'{rng.choice(_FIRST_NAMES)}.{rng.randint(1, 999)}@{rng.choice(["gmail.com", "example.org", "mail.example.net"])}'
+        for _ in range(max(10, size // 50))
+    ]
+    colleagues = [f'{name}@corp.example.com' for name in _FIRST_NAMES]
+    weights = [profile[0] for profile in _PROFILES]
+
+    # Ages skew recent: exponential with a 400 day mean, capped at `years`
+    ages = sorted((min(int(rng.expovariate(1 / 400) * 86400 * 1000), max_age_ms) for _ in range(size)), reverse=True)
+    open_threads: Dict[str, List[str]] = {}
+
+    for index, age_ms in enumerate(ages):
+        profile = rng.choices(_PROFILES, weights)[0]
+        _, addresses, category, subjects, body, inbox_rate, unread_rate = profile
+
+        if addresses:
+            sender = rng.choice(addresses)
+        elif category == 'CATEGORY_PERSONAL':
+            sender = rng.choice(personal_senders)
+        else:
+            sender = rng.choice(colleagues)
+
+        subject = rng.choice(subjects).format(
+            n=rng.randint(1, 9999), month=rng.choice(_MONTHS), q=rng.randint(1, 4),
+            name=rng.choice(_FIRST_NAMES).title()
+        )
+
+        message_id = f'{0x18000000000 + index * 7919:016x}'
+        # Conversations continue existing threads; bulk mail rarely does
+        thread_id = message_id
+        if not addresses and open_threads.get(sender) and rng.random() < 0.4:
+            thread_id = open_threads[sender][-1]
+        open_threads.setdefault(sender, []).append(thread_id)
+
+        labels = []
+        if rng.random() < inbox_rate:
+            labels.append('INBOX')
+        if rng.random() < unread_rate * (1.5 if age_ms < 30 * 86400 * 1000 else 0.5):
+            labels.append('UNREAD')
+        if category:
+            labels.append(category)
+        if 'receipt' in body and rng.random() < 0.5:
+            labels.append(receipts_label)
+        if sender in colleagues and rng.random() < 0.6:
+            labels.append(work_label)
+        if rng.random() < 0.02:
+            labels.append('STARRED')
+
+        has_attachment = rng.random() < (0.6 if 'attached' in body else 0.03)
+        size_bytes = int(rng.lognormvariate(9.5, 0.8))
+        if has_attachment:
+            size_bytes += int(rng.lognormvariate(13.5, 1.2))
+
+        mailbox.add_message(FakeMessage(
+            id=message_id,
+            thread_id=thread_id,
+            labels=labels,
+            sender=f'{sender.split("@")[0].title()} <{sender}>',
+            recipient=email,
+            subject=subject,
+            body=body,
+            date_ms=now_ms - age_ms,
+            size=size_bytes,
+            has_attachment=has_attachment
+        ), record_history=False)
+
+    mailbox.first_history_id = mailbox.history_id
+    return mailbox
+
+
+# Query evaluation
+
+_TOKEN = re.compile(r'-(?=\S)|[{}()]|[^\s{}()"]*"[^"]*"?|[^\s{}()"]+')
+
+_SIZE_UNITS = {'k': 1024, 'm': 1024 * 1024}
+_AGE_UNITS = {'d': 1, 'm': 30, 'y': 365}
+
+
+def _normalize_label(name: str) -> str:
+    return re.sub(r'[\s/_-]+', '-', name.strip('"').casefold())
+
+
+def _parse_size(value: str) -> int:
+    value = value.lower()
+    if value and value[-1] in _SIZE_UNITS:
+        return int(float(value[:-1]) * _SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def _parse_date_ms(value: str) -> int:
+    if value.isdigit():
+        return int(value) * 1000
+    date = datetime.strptime(value.replace('-', '/'), '%Y/%m/%d').replace(tzinfo=timezone.utc)
+    return int(date.timestamp() * 1000)
+
+
+def query_date_bounds(query: str, now: datetime) -> Tuple[Optional[int], Optional[int]]:
+    """Date range (epoch ms, inclusive) that every match of a query lies in.
+
+    Only date operators that apply to the whole query count: those outside
+    groups, not negated and not part of an OR.
+    """
+    tokens = _TOKEN.findall(query)
+    now_ms = int(now.timestamp() * 1000)
+    low: Optional[int] = None
+    high: Optional[int] = None
+    depth = 0
+
+    for index, token in enumerate(tokens):
+        if token in ('(', '{'):
+            depth += 1
+            continue
+        if token in (')', '}'):
+            depth = max(0, depth - 1)
+            continue
+        if depth or (index and tokens[index - 1] in ('-', 'OR')):
+            continue
+        if index + 1 < len(tokens) and tokens[index + 1] == 'OR':
+            continue
+
+        operator, _, value = token.partition(':')
+        operator = operator.lower()
+        try:
+            if operator in ('after', 'newer'):
+                bound, is_low = _parse_date_ms(value), True
+            elif operator in ('before', 'older'):
+                bound, is_low = _parse_date_ms(value), False
+            elif operator in ('older_than', 'newer_than'):
+                days = int(value[:-1]) * _AGE_UNITS.get(value[-1].lower(), 1)
+                bound, is_low = now_ms - days * 86400 * 1000, operator == 'newer_than'
+            else:
+                continue
+        except ValueError:
+            continue
+
+        if is_low:
+            low = bound if low is None else max(low, bound)
+        else:
+            high = bound if high is None else min(high, bound)
+
+    return low, high
+
+
+def compile_query(query: str, mailbox: FakeMailbox, include_spam_trash: bool = False) -> Callable[[FakeMessage], bool]:
+    """Compile a Gmail search query into a predicate over messages.
+
+    Supports the operators GmailClient and RulesEngine produce: from:, to:,
+    subject:, label:, category:, in:, is:, has:attachment, older_than:,
+    newer_than:, after:, before:, size:/larger:/smaller:, quoted phrases
+    and words, ``-`` negation, ``OR``, ``{}`` groups and parentheses.
+    Unknown operators match nothing, like Gmail.
+    """
+    tokens = _TOKEN.findall(query)
+    now_ms = int(mailbox.now.timestamp() * 1000)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_sequence(end: Optional[str], combine: Callable) -> Callable:
+        items = []
+        while peek() is not None and peek() != end:
+            items.append(parse_or())
+        if end is not None and peek() == end:
+            take()
+        return lambda m: combine(item(m) for item in items) if items else True
+
+    def parse_or() -> Callable:
+        alternatives = [parse_unary()]
+        while peek() == 'OR':
+            take()
+            if peek() is None:
+                break
+            alternatives.append(parse_unary())
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return lambda m: any(alternative(m) for alternative in alternatives)
+
+    def parse_unary() -> Callable:
+        token = take()
+        if token == '-':
+            if peek() is None:
+                return lambda m: True
+            inner = parse_unary()
+            return lambda m: not inner(m)
+        if token == '(':
+            return parse_sequence(')', all)
+        if token == '{':
+            return parse_sequence('}', any)
+        if token in (')', '}'):
+            return lambda m: True
+        return parse_term(token)
+
+    def parse_term(token: str) -> Callable:
+        operator, _, value = token.partition(':')
+        if not value or operator.startswith('"'):
+            phrase = token.strip('"').casefold()
+            return lambda m: phrase in m.subject.casefold() or phrase in m.body.casefold()
+
+        operator = operator.lower()
+        value = value.strip('"')
+        folded = value.casefold()
+
+        if operator == 'from':
+            return lambda m: folded in m.sender.casefold()
+        if operator == 'to':
+            return lambda m: folded in m.recipient.casefold()
+        if operator == 'subject':
+            return lambda m: folded in m.subject.casefold()
+        if operator in ('label', 'in', 'category'):
+            if operator == 'in' and folded == 'anywhere':
+                return lambda m: True
+            name = f'category_{folded}' if operator == 'category' else value
+            label_id = mailbox.resolve_label(name)
+            return lambda m: label_id is not None and label_id in m.labels
+        if operator == 'is':
+            label_id = {'unread': 'UNREAD', 'starred': 'STARRED', 'important': 'IMPORTANT'}.get(folded)
+            if folded == 'read':
+                return lambda m: 'UNREAD' not in m.labels
+            return lambda m: label_id is not None and label_id in m.labels
+        if operator == 'has':
+            return lambda m: folded == 'attachment' and m.has_attachment
+        if operator in ('older_than', 'newer_than'):
+            days = int(value[:-1]) * _AGE_UNITS.get(value[-1].lower(), 1)
+            cutoff = now_ms - days * 86400 * 1000
+            if operator == 'older_than':
+                return lambda m: m.date_ms < cutoff
+            return lambda m: m.date_ms > cutoff
+        if operator in ('after', 'before', 'older', 'newer'):
+            cutoff = _parse_date_ms(value)
+            if operator in ('after', 'newer'):
+                return lambda m: m.date_ms >= cutoff
+            return lambda m: m.date_ms < cutoff
+        if operator in ('size', 'larger'):
+            limit = _parse_size(value)
+            return lambda m: m.size > limit
+        if operator == 'smaller':
+            limit = _parse_size(value)
+            return lambda m: m.size < limit
+        return lambda m: False
+
+    predicate = parse_sequence(None, all)
+
+    # Like Gmail, searches leave out spam and trash unless they ask for them
+    lowered = query.lower()
+    if include_spam_trash or any(
+        term in lowered for term in ('in:trash', 'in:spam', 'in:anywhere', 'label:trash', 'label:spam')
+    ):
+        return predicate
+    return lambda m: 'TRASH' not in m.labels and 'SPAM' not in m.labels and predicate(m)
+
+
+# API surface
+
+class FakeRequest:
+    """A prepared API call, executed on demand like an HttpRequest."""
+
+    def __init__(self, service: 'FakeGmailService', method: str, handler: Callable[[], Any]):
+        self.service = service
+        self.method = method
+        self.handler = handler
+
+    def execute(self, http: Any = None, num_retries: int = 0) -> Any:
+        self.service._round_trip(1)
+        self.service._charge(self.method)
+        return self.service._serve(self.handler)
+
+
+class FakeBatch:
+    """A batch HTTP request: one round trip carrying several calls."""
+
+    def __init__(self, service: 'FakeGmailService', callback: Optional[Callable] = None):
+        self.service = service
+        self.callback = callback
+        self._requests: List[Tuple[str, FakeRequest, Optional[Callable]]] = []
+
+    def add(self, request: FakeRequest, callback: Optional[Callable] = None, request_id: Optional[str] = None) -> None:
+        if len(self._requests) >= MAX_BATCH_SIZE:
+            raise BatchError(f'Exceeded maximum calls({MAX_BATCH_SIZE}) in a single batch request.')
+        self._requests.append((request_id or str(len(self._requests) + 1), request, callback))
+
+    def execute(self, http: Any = None) -> None:
+        if not self._requests:
+            return
+        self.service._round_trip(len(self._requests), batch=True)
+
+        for request_id, request, callback in self._requests:
+            response, exception = None, None
+            try:
+                self.service._charge(request.method)
+                response = self.service._serve(request.handler)
+            except HttpError as e:
+                exception = e
+            for handler in (callback, self.callback):
+                if handler is not None:
+                    handler(request_id, response, exception)
+
+
+class FakeGmailService:
+    """Drop-in replacement for the Gmail API service object.
+
+    Counters (``calls``, ``http_requests``, ``batched_requests``,
+    ``quota_units``, ``rate_limited``) record every call the client makes;
+    snapshot() returns them as a dictionary. ``server_seconds`` is the time
+    the fake itself spent answering calls (searching the mailbox, rendering
+    resources), excluding simulated latency, so it can be told apart from
+    time spent in the client.
+    """
+
+    def __init__(
+        self,
+        mailbox: FakeMailbox,
+        latency: float = 0.0,
+        batch_item_latency: float = 0.0,
+        error_rate: float = 0.0,
+        quota_per_second: Optional[float] = None,
+        seed: int = 0
+    ):
+        """Create the service.
+
+        Args:
+            mailbox: Mailbox to serve
+            latency: Seconds added to every HTTP round trip
+            batch_item_latency: Extra seconds per call inside a batch request
+            error_rate: Fraction of calls failing with a 429 rateLimitExceeded
+            quota_per_second: Enforce this per-user quota limit, failing calls
+                over it with 429 (e.g. DEFAULT_QUOTA_PER_SECOND); unlimited if None
+            seed: Seed for error injection
+        """
+        self.mailbox = mailbox
+        self.latency = latency
+        self.batch_item_latency = batch_item_latency
+        self.error_rate = error_rate
+        self.quota_per_second = quota_per_second
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window: Deque[Tuple[float, int]] = deque()
+        self._window_units = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero the call counters."""
+        with self._lock:
+            self.calls: Counter = Counter()
+            self.http_requests = 0
+            self.batched_requests = 0
+            self.quota_units = 0
+            self.rate_limited = 0
+            self.server_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current call counters."""
+        with self._lock:
+            return {
+                'calls': dict(sorted(self.calls.items())),
+                'api_calls': sum(self.calls.values()),
+                'http_requests': self.http_requests,
+                'batched_requests': self.batched_requests,
+                'quota_units': self.quota_units,
+                'rate_limited': self.rate_limited,
+                'server_seconds': self.server_seconds,
+            }
+
+    def _round_trip(self, calls: int, batch: bool = False) -> None:
+        with self._lock:
+            self.http_requests += 1
+            if batch:
+                self.batched_requests += calls
+        delay = self.latency + (self.batch_item_latency * calls if batch else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _charge(self, method: str) -> None:
+        """Count a call and charge its quota, raising 429 when over the limit."""
+        units = QUOTA_UNITS.get(method, 5)
+        with self._lock:
+            self.calls[method] += 1
+
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.rate_limited += 1
+                raise http_error(429, 'rateLimitExceeded', 'Rate Limit Exceeded')
+
+            if self.quota_per_second:
+                now = time.monotonic()
+                while self._window and self._window[0][0] <= now - 1.0:
+                    self._window_units -= self._window.popleft()[1]
+                if self._window_units + units > self.quota_per_second:
+                    self.rate_limited += 1
+                    raise http_error(429, 'rateLimitExceeded', 'User-rate limit exceeded')
+                self._window.append((now, units))
+                self._window_units += units
+
+            self.quota_units += units
+
+    def _serve(self, handler: Callable[[], Any]) -> Any:
+        """Run a call's handler, accounting the time it takes."""
+        start = time.perf_counter()
+        try:
+            return handler()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.server_seconds += elapsed
+
+    def _request(self, method: str, handler: Callable[[], Any]) -> FakeRequest:
+        return FakeRequest(self, method, handler)
+
+    def users(self) -> '_Users':
+        return _Users(self)
+
+    def new_batch_http_request(self, callback: Optional[Callable] = None) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+
+def _page(ids: List[str], page_token: Optional[str], max_results: Optional[int]) -> Tuple[List[str], Optional[str]]:
+    start = int(page_token or 0)
+    end = start + min(max_results or 100, 500)
+    return ids[start:end], (str(end) if end < len(ids) else None)
+
+
+class _Users:
+    def __init__(self, service: FakeGmailService):
+        self.service = service
+        self.mailbox = service.mailbox
+
+    def messages(self) -> '_Messages':
+        return _Messages(self.service)
+
+    def threads(self) -> '_Threads':
+        return _Threads(self.service)
+
+    def labels(self) -> '_Labels':
+        return _Labels(self.service)
+
+    def history(self) -> '_History':
+        return _History(self.service)
+
+    def getProfile(self, userId: str, **kwargs) -> FakeRequest:
+        def handler():
+            return {
+                'emailAddress': self.mailbox.email,
+                'messagesTotal': len(self.mailbox.messages),
+                'threadsTotal': len(self.mailbox.threads),
+                'historyId': str(self.mailbox.history_id),
+            }
+        return self.service._request('getProfile', handler)
+
+    def watch(self, userId: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def handler():
+            expiration = self.mailbox.now + timedelta(days=7)
+            return {'historyId': str(self.mailbox.history_id), 'expiration': str(int(expiration.timestamp() * 1000))}
+        return self.service._request('watch', handler)
+
+    def stop(self, userId: str, **kwargs) -> FakeRequest:
+        return self.service._request('stop', lambda: None)
+
+
+class _Messages:
+    def __init__(self, service: FakeGmailService):
+        self.service = service
+        self.mailbox = service.mailbox
+
+    def list(
+        self,
+        userId: str,
+        q: Optional[str] = None,
+        maxResults: Optional[int] = None,
+        pageToken: Optional[str] = None,
+        includeSpamTrash: bool = False,
+        fields: Optional[str] = None,
+        **kwargs
+    ) -> FakeRequest:
+        def handler():
+            ids = self.mailbox.search(q or '', include_spam_trash=includeSpamTrash)
+            page, next_token = _page(ids, pageToken, maxResults)
+            ids_only = fields is not None and 'threadId' not in fields
+            result: Dict[str, Any] = {}
+            if page:
+                result['messages'] = [
+                    {'id': message_id} if ids_only
+                    else {'id': message_id, 'threadId': self.mailbox.messages[message_id].thread_id}
+                    for message_id in page
+                ]
+            if next_token:
+                result['nextPageToken'] = next_token
+            if fields is None or 'resultSizeEstimate' in fields:
+                result['resultSizeEstimate'] = len(ids)
+            return result
+        return self.service._request('messages.list', handler)
+
+    def get(
+        self,
+        userId: str,
+        id: str,
+        format: str = 'full',
+        metadataHeaders: Optional[List[str]] = None,
+        fields: Optional[str] = None,
+        **kwargs
+    ) -> FakeRequest:
+        def handler():
+            return self.mailbox.get(id).resource(format, metadataHeaders)
+        return self.service._request('messages.get', handler)
+
+    def batchModify(self, userId: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def handler():
+            if len(body.get('ids', [])) > 1000:
+                raise http_error(400, 'invalidArgument', 'Too many ids; at most 1000 allowed')
+            self.mailbox.modify(body.get('ids', []), body.get('addLabelIds', []), body.get('removeLabelIds', []))
+            return None
+        return self.service._request('messages.batchModify', handler)
+
+    def modify(self, userId: str, id: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def handler():
+            self.mailbox.get(id)
+            self.mailbox.modify([id], body.get('addLabelIds', []), body.get('removeLabelIds', []))
+            return self.mailbox.get(id).resource('minimal')
+        return self.service._request('messages.modify', handler)
+
+    def trash(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        def handler():
+            self.mailbox.get(id)
+            self.mailbox.modify([id], ['TRASH'])
+            return self.mailbox.get(id).resource('minimal')
+        return self.service._request('messages.trash', handler)
+
+    def untrash(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        def handler():
+            self.mailbox.get(id)
+            self.mailbox.modify([id], remove=['TRASH'])
+            return self.mailbox.get(id).resource('minimal')
+        return self.service._request('messages.untrash', handler)
+
+    def delete(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        def handler():
+            self.mailbox.get(id)
+            self.mailbox.delete([id])
+            return None
+        return self.service._request('messages.delete', handler)
+
+    def batchDelete(self, userId: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def handler():
+            self.mailbox.delete(body.get('ids', []))
+            return None
+        return self.service._request('messages.batchDelete', handler)
+
+
+class _Threads:
+    def __init__(self, service: FakeGmailService):
+        self.service = service
+        self.mailbox = service.mailbox
+
+    def list(
+        self,
+        userId: str,
+        q: Optional[str] = None,
+        maxResults: Optional[int] = None,
+        pageToken: Optional[str] = None,
+        includeSpamTrash: bool = False,
+        fields: Optional[str] = None,
+        **kwargs
+    ) -> FakeRequest:
+        def handler():
+            ids = self.mailbox.search(q or '', threads=True, include_spam_trash=includeSpamTrash)
+            page, next_token = _page(ids, pageToken, maxResults)
+            result: Dict[str, Any] = {}
+            if page:
+                result['threads'] = [{'id': thread_id} for thread_id in page]
+            if next_token:
+                result['nextPageToken'] = next_token
+            if fields is None or 'resultSizeEstimate' in fields:
+                result['resultSizeEstimate'] = len(ids)
+            return result
+        return self.service._request('threads.list', handler)
+
+    def get(
+        self,
+        userId: str,
+        id: str,
+        format: str = 'full',
+        metadataHeaders: Optional[List[str]] = None,
+        **kwargs
+    ) -> FakeRequest:
+        def handler():
+            messages = self.mailbox.thread_messages(id)
+            return {'id': id, 'messages': [m.resource(format, metadataHeaders) for m in messages]}
+        return self.service._request('threads.get', handler)
+
+    def _modify_thread(self, method: str, thread_id: str, add: Iterable[str] = (), remove: Iterable[str] = ()) -> FakeRequest:
+        def handler():
+            messages = self.mailbox.thread_messages(thread_id)
+            self.mailbox.modify([m.id for m in messages], add, remove)
+            return {'id': thread_id}
+        return self.service._request(method, handler)
+
+    def modify(self, userId: str, id: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        return self._modify_thread('threads.modify', id, body.get('addLabelIds', []), body.get('removeLabelIds', []))
+
+    def trash(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        return self._modify_thread('threads.trash', id, ['TRASH'])
+
+    def untrash(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        return self._modify_thread('threads.untrash', id, remove=['TRASH'])
+
+    def delete(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        def handler():
+            messages = self.mailbox.thread_messages(id)
+            self.mailbox.delete([m.id for m in messages])
+            return None
+        return self.service._request('threads.delete', handler)
+
+
+class _Labels:
+    def __init__(self, service: FakeGmailService):
+        self.service = service
+        self.mailbox = service.mailbox
+
+    def list(self, userId: str, **kwargs) -> FakeRequest:
+        return self.service._request('labels.list', lambda: {'labels': [dict(label) for label in self.mailbox.labels.values()]})
+
+    def get(self, userId: str, id: str, **kwargs) -> FakeRequest:
+        def handler():
+            label = self.mailbox.labels.get(id)
+            if label is None:
+                raise http_error(404, 'notFound', 'Requested entity was not found.')
+            ids = [m for m in self.mailbox.messages.values() if id in m.labels]
+            return dict(label, messagesTotal=len(ids), messagesUnread=sum('UNREAD' in m.labels for m in ids))
+        return self.service._request('labels.get', handler)
+
+    def create(self, userId: str, body: Dict[str, Any], **kwargs) -> FakeRequest:
+        def handler():
+            label_id = self.mailbox.add_label(body['name'])
+            return dict(self.mailbox.labels[label_id])
+        return self.service._request('labels.create', handler)
+
+
+_HISTORY_KEYS = {
+    'messageAdded': 'messagesAdded',
+    'messageDeleted': 'messagesDeleted',
+    'labelAdded': 'labelsAdded',
+    'labelRemoved': 'labelsRemoved',
+}
+
+
+class _History:
+    def __init__(self, service: FakeGmailService):
+        self.service = service
+        self.mailbox = service.mailbox
+
+    def list(
+        self,
+        userId: str,
+        startHistoryId: str,
+        historyTypes: Optional[List[str]] = None,
+        labelId: Optional[str] = None,
+        maxResults: Optional[int] = None,
+        pageToken: Optional[str] = None,
+        **kwargs
+    ) -> FakeRequest:
+        def handler():
+            records = self.mailbox.history_since(int(startHistoryId))
+            if historyTypes:
+                wanted = {_HISTORY_KEYS.get(kind, kind) for kind in historyTypes}
+                records = [r for r in records if wanted & set(r)]
+            start = int(pageToken or 0)
+            end = start + min(maxResults or 100, 500)
+            result: Dict[str, Any] = {'history': records[start:end], 'historyId': str(self.mailbox.history_id)}
+            if end < len(records):
+                result['nextPageToken'] = str(end)
+            return result
+        return self.service._request('history.list', handler)
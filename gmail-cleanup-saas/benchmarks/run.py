@@ -0,0 +1,195 @@
+"""Run the benchmark scenarios and report timings and API call counts.
+
+Usage (from the project root):
+
+    python -m benchmarks.run --messages 10000 --output results.json
+    python -m benchmarks.run --compare baseline.json
+"""
+
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+
+from .scenarios import SCENARIOS, BenchmarkConfig, Workload
+
+# Counters compared against a baseline; any increase is a regression
+CALL_METRICS = ('api_calls', 'http_requests', 'quota_units')
+
+
+def run_scenario(workload: Workload, name: str, repeat: int) -> Dict[str, Any]:
+    """Time a scenario over several runs, each on a fresh mailbox copy.
+
+    Args:
+        workload: Workload providing environments
+        name: Scenario name
+        repeat: Number of timed runs
+
+    Returns:
+        Timings, the call counters of the last run and the scenario's result
+    """
+    wall_times, cpu_times = [], []
+    stats: Dict[str, Any] = {}
+    result: Dict[str, Any] = {}
+
+    for _ in range(repeat):
+        env = workload.environment()
+        measured = SCENARIOS[name](env)
+        env.service.reset_stats()
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = measured()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+        stats = env.service.snapshot()
+
+    return {
+        'wall_seconds': {
+            'min': min(wall_times),
+            'median': statistics.median(wall_times),
+            'max': max(wall_times),
+        },
+        'cpu_seconds': statistics.median(cpu_times),
+        'repeat': repeat,
+        **stats,
+        'result': result,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    time_tolerance: Optional[float] = None
+) -> Tuple[List[str], List[str]]:
+    """Compare results against a baseline run.
+
+    Args:
+        current: Results of this run
+        baseline: Results loaded from a previous run
+        time_tolerance: Allowed relative increase of median wall time; times
+            aren't compared if None
+
+    Returns:
+        Tuple of (regressions, notes)
+    """
+    regressions, notes = [], []
+
+    for key in ('messages', 'seed', 'latency', 'error_rate', 'quota_per_second'):
+        if current['config'].get(key) != baseline.get('config', {}).get(key):
+            notes.append(f"config.{key} differs from the baseline; counts may not be comparable")
+
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            notes.append(f"{name}: not in baseline")
+            continue
+
+        for metric in CALL_METRICS:
+            if result[metric] > before.get(metric, 0):
+                regressions.append(f"{name}: {metric} {before.get(metric, 0)} -> {result[metric]}")
+
+        if time_tolerance is not None:
+            old, new = before['wall_seconds']['median'], result['wall_seconds']['median']
+            if old and new > old * (1 + time_tolerance):
+                regressions.append(f"{name}: median wall time {old:.3f}s -> {new:.3f}s")
+
+    return regressions, notes
+
+
+@click.command()
+@click.option('--messages', '-n', type=int, default=10000, help='Size of the synthetic mailbox')
+@click.option('--seed', type=int, default=0, help='Random seed for the mailbox and error injection')
+@click.option('--scenario', '-s', 'names', multiple=True, type=click.Choice(sorted(SCENARIOS)),
+              help='Scenario to run (repeatable; default: all)')
+@click.option('--repeat', '-r', type=int, default=3, help='Timed runs per scenario')
+@click.option('--latency-ms', type=float, default=0.0, help='Latency added to every HTTP round trip')
+@click.option('--batch-item-latency-ms', type=float, default=0.0, help='Extra latency per call in a batch request')
+@click.option('--error-rate', type=float, default=0.0, help='Fraction of calls failing with 429')
+@click.option('--quota', 'quota_per_second', type=float, help='Enforce this many quota units per second (Gmail: 250)')
+@click.option('--rules', type=int, default=200, help='Rules in the rules_load and rules_compile scenarios')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write JSON results to this file')
+@click.option('--compare', 'baseline_file', type=click.Path(exists=True, dir_okay=False),
+              help='Fail if API call counts exceed those of this earlier results file')
+@click.option('--time-tolerance', type=float, help='Also fail if median wall time grows by more than this fraction')
+@click.option('--verbose', '-v', is_flag=True, help='Show library logging')
+def main(
+    messages: int,
+    seed: int,
+    names: Tuple[str, ...],
+    repeat: int,
+    latency_ms: float,
+    batch_item_latency_ms: float,
+    error_rate: float,
+    quota_per_second: Optional[float],
+    rules: int,
+    output: Optional[str],
+    baseline_file: Optional[str],
+    time_tolerance: Optional[float],
+    verbose: bool
+):
+    """Benchmark gmail_cleanup against an in-process fake Gmail API."""
+    logging.basicConfig(level=logging.INFO if verbose else logging.CRITICAL, format="%(levelname)s %(name)s: %(message)s")
+
+    config = BenchmarkConfig(
+        messages=messages,
+        seed=seed,
+        latency=latency_ms / 1000,
+        batch_item_latency=batch_item_latency_ms / 1000,
+        error_rate=error_rate,
+        quota_per_second=quota_per_second,
+        rules=rules
+    )
+
+    click.echo(f"Generating mailbox of {messages} messages...", err=True)
+    workload = Workload(config)
+
+    results: Dict[str, Any] = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {**config.__dict__, 'latency_ms': latency_ms},
+        'scenarios': {},
+    }
+
+    try:
+        for name in names or sorted(SCENARIOS):
+            click.echo(f"Running {name}...", err=True)
+            outcome = run_scenario(workload, name, repeat)
+            results['scenarios'][name] = outcome
+            click.echo(
+                f"  {outcome['wall_seconds']['median']:.3f}s median, "
+                f"{outcome['api_calls']} calls, {outcome['http_requests']} HTTP requests, "
+                f"{outcome['quota_units']} quota units",
+                err=True
+            )
+    finally:
+        workload.close()
+
+    report = json.dumps(results, indent=2, default=str)
+    if output:
+        with open(output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        click.echo(report)
+
+    if baseline_file:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        regressions, notes = compare(results, baseline, time_tolerance)
+        for note in notes:
+            click.echo(f"note: {note}", err=True)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+        click.echo("No regressions against baseline", err=True)
+
+
+if __name__ == '__main__':
+    main()
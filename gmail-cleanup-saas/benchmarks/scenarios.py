@@ -0,0 +1,343 @@
+"""Benchmark scenarios for the processing path, API endpoints and rules.
+
+Each scenario is a setup function registered with @scenario. It receives a
+fresh Environment and returns the callable to time, which returns a small
+dictionary describing what it did (messages matched, rules loaded...).
+"""
+
+import asyncio
+import json
+import tempfile
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gmail_cleanup.core.client import GmailClient
+from gmail_cleanup.core.processor import EmailProcessor, ProcessingResult
+from gmail_cleanup.rules.engine import RulesEngine
+from gmail_cleanup.rules.matcher import compile_rules
+from gmail_cleanup.rules.models import Rule
+from gmail_cleanup.rules.templates import RuleTemplates
+
+from .fake_gmail import FakeGmailService, FakeMailbox, generate_mailbox
+
+
+@dataclass
+class BenchmarkConfig:
+    """Settings shared by every scenario of a benchmark run."""
+    messages: int = 10000
+    seed: int = 0
+    latency: float = 0.0
+    batch_item_latency: float = 0.0
+    error_rate: float = 0.0
+    quota_per_second: Optional[float] = None
+    rules: int = 200
+
+
+class Environment:
+    """A fake account with a client and rules engine, set up for one run."""
+
+    def __init__(self, mailbox: FakeMailbox, config: BenchmarkConfig, workdir: Path):
+        self.config = config
+        self.workdir = workdir
+        self.service = FakeGmailService(
+            mailbox,
+            latency=config.latency,
+            batch_item_latency=config.batch_item_latency,
+            error_rate=config.error_rate,
+            quota_per_second=config.quota_per_second,
+            seed=config.seed
+        )
+        self.client = GmailClient(None, service=self.service)
+        self.rules_engine = RulesEngine()
+
+    def add_template_rules(self) -> List[Rule]:
+        """Load one rule per built-in template into the rules engine."""
+        for template in RuleTemplates.get_all_templates():
+            self.rules_engine.add_rule(RuleTemplates.create_rule_from_template(template['id']))
+        return self.rules_engine.get_rules()
+
+
+class Workload:
+    """Generates the synthetic mailbox once and hands out fresh copies."""
+
+    def __init__(self, config: BenchmarkConfig):
+        self.config = config
+        self.mailbox = generate_mailbox(config.messages, seed=config.seed, now=datetime.now(timezone.utc))
+        self._tmp = tempfile.TemporaryDirectory(prefix='gmail-cleanup-bench-')
+
+    def environment(self) -> Environment:
+        """Create an environment over an unmodified copy of the mailbox."""
+        return Environment(self.mailbox.copy(), self.config, Path(self._tmp.name))
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
+SCENARIOS: Dict[str, Callable[[Environment], Callable[[], Dict[str, Any]]]] = {}
+
+
+def scenario(name: str):
+    """Register a scenario setup function under a name."""
+    def decorator(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return decorator
+
+
+def benchmark_rules(count: int) -> List[Rule]:
+    """Generate distinct rules by customizing the built-in templates."""
+    templates = RuleTemplates.get_all_templates()
+    rules = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        rule = RuleTemplates.create_rule_from_template(
+            template['id'],
+            name=f"{template['name']} #{i}",
+            criteria_older_than_days=30 + i
+        )
+        rules.append(rule)
+    return rules
+
+
+def _summarize(results: List[ProcessingResult]) -> Dict[str, Any]:
+    return {
+        'rules': len(results),
+        'matched': sum(r.stats.total_messages for r in results),
+        'succeeded': sum(r.batch_result.succeeded for r in results),
+        'failed': sum(r.batch_result.failed for r in results),
+    }
+
+
+# Rules
+
+@scenario('rules_load')
+def rules_load(env: Environment):
+    """Parse and validate a rules file."""
+    path = env.workdir / f'rules-{env.config.rules}.json'
+    if not path.exists():
+        engine = RulesEngine()
+        for rule in benchmark_rules(env.config.rules):
+            engine.add_rule(rule)
+        engine.save_rules_to_file(str(path))
+
+    def run():
+        engine = RulesEngine(str(path))
+        return {'rules': len(engine.get_rules())}
+    return run
+
+
+@scenario('rules_compile')
+def rules_compile(env: Environment):
+    """Build Gmail queries and compile rules for local matching."""
+    rules = benchmark_rules(env.config.rules)
+    engine = env.rules_engine
+    # Load the label registry up front, as a long-running process would have
+    env.client.label_registry.resolve_id('INBOX')
+
+    def run():
+        queries = [engine.build_gmail_query(rule.criteria) for rule in rules]
+        compiled = compile_rules(rules, env.client.label_registry.resolve_id, engine.build_gmail_query)
+        return {'rules': len(compiled), 'local': sum(c.is_local for c in compiled), 'queries': len(set(queries))}
+    return run
+
+
+# Processing
+
+@scenario('process_all_rules')
+def process_all_rules(env: Environment):
+    """Run every template rule, one after another, applying the actions."""
+    env.add_template_rules()
+    processor = EmailProcessor(env.client, env.rules_engine)
+
+    def run():
+        try:
+            return _summarize(asyncio.run(processor.process_all_rules()))
+        finally:
+            processor.close()
+    return run
+
+
+@scenario('process_all_rules_dry_run')
+def process_all_rules_dry_run(env: Environment):
+    """Count what every template rule would change."""
+    env.add_template_rules()
+    processor = EmailProcessor(env.client, env.rules_engine)
+
+    def run():
+        try:
+            return _summarize(asyncio.run(processor.process_all_rules(dry_run=True)))
+        finally:
+            processor.close()
+    return run
+
+
+@scenario('process_rules_single_pass')
+def process_rules_single_pass(env: Environment):
+    """Run every template rule in one pass, as the scheduler does."""
+    rules = env.add_template_rules()
+    processor = EmailProcessor(env.client, env.rules_engine)
+
+    def run():
+        try:
+            return _summarize(asyncio.run(processor.process_rules(rules)))
+        finally:
+            processor.close()
+    return run
+
+
+@scenario('analyze_mailbox')
+def analyze_mailbox(env: Environment):
+    """Analyze the whole mailbox."""
+    processor = EmailProcessor(env.client, env.rules_engine)
+
+    def run():
+        try:
+            analysis = asyncio.run(processor.analyze_mailbox(max_messages=None))
+            return {'messages': analysis.get('total_messages', 0)}
+        finally:
+            processor.close()
+    return run
+
+
+# API endpoints
+
+@scenario('api_search')
+def api_search(env: Environment):
+    """POST /api/analysis/search for a page of 100 messages."""
+    from gmail_cleanup.api.models import SearchMessagesRequest
+    from gmail_cleanup.api.routers.analysis import search_messages
+
+    request = SearchMessagesRequest(query='category:promotions', max_results=100)
+
+    def run():
+        response = asyncio.run(search_messages(
+            request=request,
+            gmail_client=env.client,
+            rules_engine=env.rules_engine,
+            current_user={'email': env.service.mailbox.email}
+        ))
+        return {'messages': response.result_count}
+    return run
+
+
+@scenario('api_preview_rule')
+def api_preview_rule(env: Environment):
+    """POST /api/analysis/preview-rule for a newsletter rule."""
+    from gmail_cleanup.api.routers.analysis import preview_rule_results
+
+    rule_data = {'criteria': {'has_words': 'unsubscribe', 'older_than_days': 30}}
+
+    def run():
+        response = asyncio.run(preview_rule_results(
+            rule_data=rule_data,
+            max_results=50,
+            gmail_client=env.client,
+            rules_engine=env.rules_engine,
+            current_user={'email': env.service.mailbox.email}
+        ))
+        return {'matches': response['total_matches'], 'samples': response['sample_count']}
+    return run
+
+
+def _asgi_request(
+    app,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]] = None,
+    query_string: str = '',
+    accept_encoding: str = 'gzip'
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Send one request through an ASGI app in-process.
+
+    Returns:
+        Status code, response headers and the body as sent (still compressed)
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query_string.encode(),
+        'headers': [
+            (b'host', b'bench'), (b'accept-encoding', accept_encoding.encode()),
+            (b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode()),
+        ],
+        'client': ('127.0.0.1', 0), 'server': ('bench', 80),
+    }
+    response: Dict[str, Any] = {'body': b''}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {'type': 'http.disconnect'}
+        received = True
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    asyncio.run(app(scope, receive, send))
+    return response['status'], response['headers'], response['body']
+
+
+def _api_app(env: Environment):
+    """The FastAPI app with authentication and clients bound to the environment."""
+    from gmail_cleanup.api import dependencies
+    from gmail_cleanup.api.main import app
+
+    async def current_user():
+        return {'email': env.service.mailbox.email}
+
+    async def gmail_client():
+        return env.client
+
+    app.dependency_overrides = {
+        dependencies.get_current_user: current_user,
+        dependencies.require_gmail_client: gmail_client,
+        dependencies.get_authenticated_rules_engine: lambda: env.rules_engine,
+    }
+    return app
+
+
+def _payload_sizes(headers: Dict[str, str], body: bytes) -> Dict[str, int]:
+    """JSON size of a response and the bytes actually sent."""
+    if headers.get('content-encoding') == 'gzip':
+        size = len(zlib.decompress(body, 47))
+    elif headers.get('content-encoding') == 'br':
+        import brotli
+        size = len(brotli.decompress(body))
+    else:
+        size = len(body)
+    return {'json_bytes': size, 'sent_bytes': len(body)}
+
+
+@scenario('api_search_response')
+def api_search_response(env: Environment):
+    """POST /api/analysis/search for 500 messages through the app, gzip accepted."""
+    app = _api_app(env)
+    body = {'query': 'in:anywhere', 'max_results': 500}
+
+    def run():
+        status, headers, content = _asgi_request(app, 'POST', '/api/analysis/search', body)
+        return {'status': status, **_payload_sizes(headers, content)}
+    return run
+
+
+@scenario('api_list_rules')
+def api_list_rules(env: Environment):
+    """GET /api/rules/ for a page of 1000 rules through the app, gzip accepted."""
+    app = _api_app(env)
+    for rule in benchmark_rules(1000):
+        env.rules_engine.add_rule(rule)
+
+    def run():
+        status, headers, content = _asgi_request(app, 'GET', '/api/rules/', query_string='limit=1000')
+        return {'status': status, **_payload_sizes(headers, content)}
+    return run
@@ -4,8 +4,21 @@ __version__ = "0.1.0"
 __author__ = "Your Name"
 __description__ = "Modern email cleanup and management tool"
 
-from .core.processor import EmailProcessor
-from .core.client import GmailClient
-from .rules.engine import RulesEngine
+__all__ = ["EmailProcessor", "GmailClient", "RulesEngine"]
 
-__all__ = ["EmailProcessor", "GmailClient", "RulesEngine"]
\ No newline at end of file
+# Exports are imported on first access, so that importing a submodule (the
+# CLI, the rules) doesn't load the Google API client
+_EXPORTS = {
+    "EmailProcessor": ".core.processor",
+    "GmailClient": ".core.client",
+    "RulesEngine": ".rules.engine",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -9,8 +9,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from ..auth.oauth import CredentialsManager, GoogleAuthManager
 from ..core.client import GmailClient
+from ..core.journal import ActionJournal
 from ..rules.engine import RulesEngine
 from .models import ErrorResponse
+from .ratelimit import RateLimiter, RateLimitStore
 
 logger = logging.getLogger(__name__)
 
@@ -42,12 +44,15 @@ def get_gmail_client() -> Optional[GmailClient]:
         if not credentials_manager.is_authenticated():
             return None
         
-        if _gmail_client is None:
-            auth_manager = credentials_manager.get_auth_manager()
-            credentials = auth_manager.get_credentials()
-            
-            if credentials and credentials.valid:
-                _gmail_client = GmailClient(credentials)
+        # Credentials are refreshed in place, so the client only needs
+        # rebuilding after signing in again
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials(interactive=False)
+        
+        if credentials is None:
+            return None
+        if _gmail_client is None or _gmail_client.credentials is not credentials:
+            _gmail_client = GmailClient(credentials)
             
         return _gmail_client
     
@@ -56,6 +61,11 @@ def get_gmail_client() -> Optional[GmailClient]:
         return None
 
 
+def get_action_journal() -> ActionJournal:
+    """Get the undo journal kept in the configuration directory, as the CLI does."""
+    return ActionJournal(str(get_credentials_manager().config_dir / 'journal.jsonl'))
+
+
 def get_rules_engine() -> RulesEngine:
     """Get rules engine instance."""
     global _rules_engine
@@ -171,48 +181,31 @@ async def validate_pagination(
     return {"page": page, "per_page": per_page}
 
 
-# Rate limiting (placeholder - implement with Redis in production)
-class RateLimiter:
-    """Simple in-memory rate limiter for development."""
-    
-    def __init__(self):
-        self._requests = {}
-    
-    def is_allowed(self, key: str, limit: int, window: int = 60) -> bool:
-        """Check if request is allowed under rate limit."""
-        import time
-        
-        now = time.time()
-        window_start = now - window
-        
-        if key not in self._requests:
-            self._requests[key] = []
-        
-        # Clean old requests
-        self._requests[key] = [
-            req_time for req_time in self._requests[key] 
-            if req_time > window_start
-        ]
-        
-        if len(self._requests[key]) >= limit:
-            return False
-        
-        self._requests[key].append(now)
-        return True
+# Rate limiting (counts are kept in memory unless another store is configured)
+_rate_limiter = RateLimiter()
 
 
-_rate_limiter = RateLimiter()
+def get_rate_limiter() -> RateLimiter:
+    """Get rate limiter instance."""
+    return _rate_limiter
+
+
+def configure_rate_limiter(store: RateLimitStore) -> None:
+    """Keep request counts in another store, e.g. Redis shared by several workers."""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(store)
 
 
 async def rate_limit(
     current_user: Dict[str, Any] = Depends(get_current_user),
+    limiter: RateLimiter = Depends(get_rate_limiter),
     limit: int = 100,
     window: int = 60
 ):
     """Apply rate limiting based on user email."""
     user_email = current_user.get('email', 'anonymous')
     
-    if not _rate_limiter.is_allowed(user_email, limit, window):
+    if not limiter.is_allowed(user_email, limit, window):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Rate limit exceeded. Max {limit} requests per {window} seconds."
@@ -5,15 +5,18 @@ from contextlib import asynccontextmanager
 from typing import List
 
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from .routers import auth, rules, processing, analysis
 from .dependencies import get_current_user, get_gmail_client, get_rules_engine
 from .models import UserResponse
+from .responses import CompressionMiddleware, JSONResponse
 from ..core.client import GmailClient
+from ..core.metrics import REGISTRY
 from ..rules.engine import RulesEngine
 
 # Configure logging
@@ -40,7 +43,9 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Routes with a response model may still be serialized by Pydantic directly
+    default_response_class=Default(JSONResponse)
 )
 
 # CORS middleware
@@ -52,6 +57,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (Brotli if installed, else gzip)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(rules.router, prefix="/api/rules", tags=["rules"])
@@ -78,6 +86,15 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Gmail API call and processing stage metrics in Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/api/user/profile")
 async def get_user_profile(current_user: dict = Depends(get_current_user)) -> UserResponse:
     """Get current user profile information."""
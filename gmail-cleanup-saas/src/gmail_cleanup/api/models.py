@@ -5,7 +5,7 @@ from datetime import datetime
 from enum import Enum
 
 from pydantic import BaseModel, Field, field_validator
-from ..rules.models import ActionType
+from ..rules.models import ActionType, Granularity
 
 
 # Request/Response Models
@@ -49,6 +49,7 @@ class RuleCriteriaRequest(BaseModel):
     labels: Optional[List[str]] = None
     exclude_labels: Optional[List[str]] = None
     from_domain: Optional[str] = None
+    from_domains: Optional[List[str]] = None
     size_larger_than: Optional[int] = Field(None, ge=0)
     size_smaller_than: Optional[int] = Field(None, ge=0)
     has_words: Optional[str] = None
@@ -90,6 +91,8 @@ class RuleCreateRequest(BaseModel):
     max_messages: Optional[int] = Field(None, ge=1)
     dry_run: bool = False
     schedule: Optional[RuleScheduleRequest] = None
+    granularity: Granularity = Granularity.MESSAGE
+    category: Optional[str] = Field(None, max_length=50)
 
 
 class RuleUpdateRequest(BaseModel):
@@ -103,6 +106,8 @@ class RuleUpdateRequest(BaseModel):
     max_messages: Optional[int] = Field(None, ge=1)
     dry_run: Optional[bool] = None
     schedule: Optional[RuleScheduleRequest] = None
+    granularity: Optional[Granularity] = None
+    category: Optional[str] = Field(None, max_length=50)
 
 
 class RuleResponse(BaseModel):
@@ -121,12 +126,24 @@ class RuleResponse(BaseModel):
     updated_at: Optional[datetime]
     last_run_at: Optional[datetime]
     stats: Dict[str, Any]
+    granularity: Granularity = Granularity.MESSAGE
+    category: Optional[str] = None
 
 
 class RuleListResponse(BaseModel):
     """Response for listing rules."""
     rules: List[RuleResponse]
-    total: int
+    total: int  # Rules matching the filters, across all pages
+    next_cursor: Optional[str] = None
+
+
+class BulkRulesResponse(BaseModel):
+    """Result of a bulk rule change."""
+    created: List[str]
+    updated: List[str]
+    deleted: List[str]
+    total: int  # Rules in the rule set afterwards
+    validate_only: bool = False
 
 
 # Processing Models
@@ -145,9 +162,9 @@ class ProcessingStatsResponse(BaseModel):
     successful_operations: int
     failed_operations: int
     skipped_messages: int
-    start_time: Optional[datetime]
-    end_time: Optional[datetime]
-    duration_seconds: Optional[float]
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
     success_rate: float
 
 
@@ -170,13 +187,15 @@ class ProcessingResultResponse(BaseModel):
     message: str
     results: List[RuleExecutionResponse]
     overall_stats: ProcessingStatsResponse
+    # Journal run to pass to undo; None for dry runs and runs without changes
+    run_id: Optional[str] = None
 
 
 # Analysis Models
 
 class AnalysisRequest(BaseModel):
     """Request for mailbox analysis."""
-    max_messages: Optional[int] = Field(1000, ge=100, le=10000)
+    max_messages: Optional[int] = Field(1000, ge=100)  # None analyzes the whole mailbox
     include_suggestions: bool = True
 
 
@@ -194,10 +213,56 @@ class AnalysisResponse(BaseModel):
     old_messages: int
     unique_senders: int
     top_sender_domains: List[SenderAnalysis]
+    age_buckets: Dict[str, int] = Field(default_factory=dict)
+    size_histogram: Dict[str, int] = Field(default_factory=dict)
+    total_size_bytes: int = 0
     analysis_date: datetime
     suggestions: Optional[List[Dict[str, Any]]] = None
 
 
+class AnalyticsReportRequest(BaseModel):
+    """Request for a whole-mailbox analytics report."""
+    max_messages: Optional[int] = Field(None, ge=1)  # None crawls the whole mailbox
+    query: str = ""
+    top_n: int = Field(25, ge=1, le=500)
+
+
+class DomainStorage(BaseModel):
+    """Storage cost of a sender domain."""
+    domain: str
+    messages: int
+    size_bytes: int
+    unread: int
+    storage_share: float
+
+
+class LabelCoverage(BaseModel):
+    """Share of messages carrying a label."""
+    label: str
+    messages: int
+    size_bytes: int
+    coverage: float
+
+
+class MonthlyVolume(BaseModel):
+    """Messages per month for the top sender domains."""
+    months: List[str]
+    domains: Dict[str, List[int]]
+
+
+class AnalyticsReportResponse(BaseModel):
+    """Whole-mailbox analytics report response."""
+    total_messages: int
+    total_size_bytes: int
+    unique_domains: int
+    domains: List[DomainStorage]
+    monthly_volume: MonthlyVolume
+    labels: List[LabelCoverage]
+    age_buckets: Dict[str, int]
+    size_histogram: Dict[str, int]
+    analysis_date: datetime
+
+
 # Template Models
 
 class TemplateResponse(BaseModel):
@@ -225,31 +290,53 @@ class CreateRuleFromTemplateRequest(BaseModel):
 
 # Search Models
 
+class MessageField(str, Enum):
+    """Message fields a search can return."""
+    ID = "id"
+    THREAD_ID = "thread_id"
+    SENDER = "sender"
+    RECIPIENT = "recipient"
+    SUBJECT = "subject"
+    DATE = "date"
+    LABELS = "labels"
+    SNIPPET = "snippet"
+    IS_UNREAD = "is_unread"
+
+
 class SearchMessagesRequest(BaseModel):
     """Request to search messages."""
     query: Optional[str] = None
     criteria: Optional[RuleCriteriaRequest] = None
     max_results: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None
+    # Accepted in place of cursor, for clients of the page-token API
     page_token: Optional[str] = None
+    # Fields to return for each message (all by default); id and thread_id
+    # alone need no message fetch
+    fields: Optional[List[MessageField]] = None
+    # Respond with NDJSON lines, written as message details arrive
+    stream: bool = False
 
 
 class MessageSummary(BaseModel):
-    """Summary of an email message."""
+    """Summary of an email message; fields not requested are omitted."""
     id: str
-    thread_id: str
-    sender: str
-    recipient: str
-    subject: str
-    date: Optional[datetime]
-    labels: List[str]
-    snippet: str
-    is_unread: bool
+    thread_id: Optional[str] = None
+    sender: Optional[str] = None
+    recipient: Optional[str] = None
+    subject: Optional[str] = None
+    date: Optional[datetime] = None
+    labels: Optional[List[str]] = None
+    snippet: Optional[str] = None
+    is_unread: Optional[bool] = None
 
 
 class SearchMessagesResponse(BaseModel):
     """Search messages response."""
     messages: List[MessageSummary]
-    next_page_token: Optional[str]
+    next_cursor: Optional[str] = None
+    # Same as next_cursor, for clients of the page-token API
+    next_page_token: Optional[str] = None
     result_count: int
     estimated_total: int
 
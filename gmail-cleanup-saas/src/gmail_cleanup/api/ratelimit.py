@@ -0,0 +1,188 @@
+"""Request rate limiting with sliding window counters."""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+# Keys the in-memory store keeps before evicting the least recently used
+DEFAULT_MAX_KEYS = 100000
+
+
+def _window_allows(previous: int, current: int, limit: int, elapsed: float) -> bool:
+    """Whether one more request fits under the limit.
+
+    Estimates the requests in the sliding window from two fixed-window
+    counts, weighting the previous window by how much of it the sliding
+    window still covers.
+
+    Args:
+        previous: Requests counted in the previous fixed window
+        current: Requests counted so far in the current fixed window
+        limit: Requests allowed per window
+        elapsed: Fraction of the current fixed window that has passed
+    """
+    return previous * (1.0 - elapsed) + current + 1 <= limit
+
+
+class RateLimitStore(ABC):
+    """Backend keeping the request counts of a RateLimiter."""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float, now: float) -> bool:
+        """Count a request for a key if the limit allows it.
+
+        Args:
+            key: Client the limit applies to, e.g. a user's email
+            limit: Requests allowed per window
+            window: Window length in seconds
+            now: Current time in seconds since the epoch
+
+        Returns:
+            True if the request is allowed (and was counted)
+        """
+
+
+class _Counts:
+    """Fixed-window counts of one key."""
+
+    __slots__ = ('window', 'index', 'previous', 'current')
+
+    def __init__(self, window: float, index: int):
+        self.window = window
+        self.index = index
+        self.previous = 0
+        self.current = 0
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Counts kept in this process, shared by every limiter using the store.
+
+    Each key holds two counters. Keys are kept in least recently used
+    order; keys idle for two windows are evicted as other keys are hit,
+    and the least recently used keys beyond ``max_keys`` are dropped.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS):
+        """Initialize the store.
+
+        Args:
+            max_keys: Most keys kept at once
+        """
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys: 'OrderedDict[str, _Counts]' = OrderedDict()
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> bool:
+        index = int(now // window)
+        with self._lock:
+            counts = self._keys.get(key)
+            if counts is None or counts.window != window:
+                counts = self._keys[key] = _Counts(window, index)
+            else:
+                self._keys.move_to_end(key)
+
+            if counts.index != index:
+                counts.previous = counts.current if counts.index == index - 1 else 0
+                counts.current = 0
+                counts.index = index
+
+            allowed = _window_allows(counts.previous, counts.current, limit, now / window - index)
+            if allowed:
+                counts.current += 1
+
+            self._evict(now)
+            return allowed
+
+    def _evict(self, now: float) -> None:
+        """Drop idle keys from the least recently used end; call with the lock held."""
+        while self._keys:
+            counts = next(iter(self._keys.values()))
+            idle = (counts.index + 2) * counts.window <= now
+            if not idle and len(self._keys) <= self.max_keys:
+                break
+            self._keys.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Counts kept in Redis, shared by every worker process.
+
+    Each key uses two counters that expire with their window. Works with
+    any client implementing redis-py's ``mget`` and ``pipeline``, such as
+    a local stand-in. Concurrent workers may overshoot the limit by a few
+    requests, since the check and the increment are separate commands.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: str = 'redis://localhost:6379/0',
+        prefix: str = 'gmail-cleanup:ratelimit'
+    ):
+        """Initialize the store.
+
+        Args:
+            client: Redis client to use instead of connecting to ``url``
+            url: Redis server URL
+            prefix: Prefix of the counter keys
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError(
+                    "redis is required for the Redis rate limit store. "
+                    "Install with: pip install gmail-cleanup[web]"
+                )
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> bool:
+        index = int(now // window)
+        current_key = f"{self.prefix}:{key}:{window:g}:{index}"
+        previous_key = f"{self.prefix}:{key}:{window:g}:{index - 1}"
+
+        previous, current = self.client.mget(previous_key, current_key)
+        if not _window_allows(int(previous or 0), int(current or 0), limit, now / window - index):
+            return False
+
+        pipeline = self.client.pipeline()
+        pipeline.incr(current_key)
+        pipeline.expire(current_key, math.ceil(window * 2))
+        pipeline.execute()
+        return True
+
+
+class RateLimiter:
+    """Sliding window rate limiter.
+
+    Approximates a sliding window from the counts of the current and
+    previous fixed windows, so each check costs the same and each key
+    takes constant memory however many requests it makes.
+    """
+
+    def __init__(
+        self,
+        store: Optional[RateLimitStore] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Initialize the limiter.
+
+        Args:
+            store: Where request counts are kept (this process's memory by
+                default)
+            clock: Current time in seconds since the epoch
+        """
+        self.store = store if store is not None else MemoryRateLimitStore()
+        self._clock = clock
+
+    def is_allowed(self, key: str, limit: int, window: int = 60) -> bool:
+        """Check if request is allowed under rate limit."""
+        return self.store.hit(key, limit, window, self._clock())
@@ -0,0 +1,180 @@
+"""JSON rendering and response compression for the API."""
+
+import zlib
+from typing import Any, Iterable, Optional
+
+from fastapi.responses import JSONResponse as _JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+DEFAULT_MINIMUM_SIZE = 1024
+
+# Content types never compressed, e.g. because each event must arrive at once
+_EXCLUDED_TYPES = ('text/event-stream',)
+
+
+class JSONResponse(_JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    Falls back to the standard library encoder otherwise, so the output is
+    the same JSON either way.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Get the codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class _Compressor:
+    """Incremental gzip or Brotli encoder."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing it so the client can decode it right away."""
+        if self.encoding == 'br':
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._gzip.compress(data)
+        return output + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress responses with Brotli or gzip, as the client accepts.
+
+    Brotli is preferred when the brotli package is installed. Responses
+    below ``minimum_size``, already encoded, or of an excluded type pass
+    through unchanged. Streaming responses are compressed chunk by chunk,
+    each chunk flushed so NDJSON lines still arrive as they are produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_types: Iterable[str] = _EXCLUDED_TYPES
+    ):
+        """Initialize the middleware.
+
+        Args:
+            app: Application to wrap
+            minimum_size: Smallest response body compressed, in bytes
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: Brotli quality (0-11); 4 compresses better than
+                gzip at similar speed
+            excluded_types: Content type prefixes sent uncompressed
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_types = tuple(excluded_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingSender(self, send, encoding)
+        await self.app(scope, receive, responder)
+
+    @staticmethod
+    def choose_encoding(accept_encoding: str) -> Optional[str]:
+        """Pick the content coding for an Accept-Encoding header, if any."""
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+
+class _CompressingSender:
+    """ASGI send wrapper compressing one response."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str):
+        self.middleware = middleware
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start['headers'])
+            content_type = headers.get('content-type', '')
+            if ('content-encoding' in headers
+                    or content_type.startswith(self.middleware.excluded_types)
+                    or (not more_body and len(body) < self.middleware.minimum_size)):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            body = self.compressor.compress(body, final=not more_body)
+            if more_body:
+                del headers['Content-Length']
+            else:
+                headers['Content-Length'] = str(len(body))
+            await self.send(self.start)
+        else:
+            body = self.compressor.compress(body, final=not more_body)
+
+        await self.send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
@@ -1,17 +1,24 @@
 """Email analysis API routes."""
 
+import asyncio
+import base64
+import binascii
+import json
 import logging
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, AsyncIterator, Deque, Optional, Set, Tuple
 from datetime import datetime
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from ..dependencies import require_gmail_client, get_authenticated_rules_engine, get_current_user
 from ..models import (
     AnalysisRequest, AnalysisResponse, SenderAnalysis,
+    AnalyticsReportRequest, AnalyticsReportResponse,
     SearchMessagesRequest, SearchMessagesResponse, MessageSummary
 )
-from ...core.client import GmailClient
+from ...core.client import GmailClient, EmailMessage
 from ...core.processor import EmailProcessor
 from ...rules.engine import RulesEngine
 
@@ -19,6 +26,18 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Gmail page size behind search cursors; cursors count offsets into these pages
+SEARCH_PAGE_SIZE = 500
+
+# Batch HTTP calls for message details in flight per search
+SEARCH_DETAIL_CONCURRENCY = 4
+
+# Message fields present in the search listing itself
+_LISTED_FIELDS = {'id', 'thread_id'}
+
+# Header fetched for each message field that comes from one
+_FIELD_HEADERS = {'sender': 'From', 'recipient': 'To', 'subject': 'Subject'}
+
 
 @router.post("/mailbox", response_model=AnalysisResponse)
 async def analyze_mailbox(
@@ -74,6 +93,9 @@ async def analyze_mailbox(
             old_messages=analysis_data.get('old_messages', 0),
             unique_senders=analysis_data.get('unique_senders', 0),
             top_sender_domains=top_senders,
+            age_buckets=analysis_data.get('age_buckets', {}),
+            size_histogram=analysis_data.get('size_histogram', {}),
+            total_size_bytes=analysis_data.get('total_size_bytes', 0),
             analysis_date=datetime.now(),
             suggestions=suggestions
         )
@@ -88,14 +110,77 @@ async def analyze_mailbox(
         )
 
 
-@router.post("/search", response_model=SearchMessagesResponse)
+@router.post("/report", response_model=AnalyticsReportResponse)
+async def analytics_report(
+    request: AnalyticsReportRequest,
+    gmail_client: GmailClient = Depends(require_gmail_client),
+    rules_engine: RulesEngine = Depends(get_authenticated_rules_engine),
+    current_user: dict = Depends(get_current_user)
+):
+    """Build a whole-mailbox storage and volume report."""
+    try:
+        processor = EmailProcessor(
+            gmail_client=gmail_client,
+            rules_engine=rules_engine
+        )
+        
+        try:
+            report = await processor.build_analytics_report(
+                max_messages=request.max_messages,
+                query=request.query,
+                top_n=request.top_n
+            )
+        finally:
+            processor.close()
+        
+        if 'error' in report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=report['error']
+            )
+        
+        logger.info(
+            f"Built analytics report for user {current_user.get('email')}: "
+            f"{report['total_messages']} messages"
+        )
+        
+        summary = report['summary']
+        return AnalyticsReportResponse(
+            total_messages=report['total_messages'],
+            total_size_bytes=report['total_size_bytes'],
+            unique_domains=report['unique_domains'],
+            domains=report['domains'],
+            monthly_volume=report['monthly_volume'],
+            labels=report['labels'],
+            age_buckets=summary.get('age_buckets', {}),
+            size_histogram=summary.get('size_histogram', {}),
+            analysis_date=datetime.now()
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Analytics report error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build analytics report"
+        )
+
+
+@router.post("/search", response_model=SearchMessagesResponse, response_model_exclude_unset=True)
 async def search_messages(
     request: SearchMessagesRequest,
     gmail_client: GmailClient = Depends(require_gmail_client),
     rules_engine: RulesEngine = Depends(get_authenticated_rules_engine),
     current_user: dict = Depends(get_current_user)
 ):
-    """Search messages using query or criteria."""
+    """Search messages using query or criteria.
+    
+    Returns a page of up to max_results messages and a cursor for the next
+    page. Details are fetched in batches, and only for the requested
+    fields; with stream set, messages are written as NDJSON lines as each
+    batch arrives, followed by a line describing the page.
+    """
     try:
         # Build search query
         if request.query:
@@ -112,31 +197,24 @@ async def search_messages(
                 detail="Either 'query' or 'criteria' must be provided"
             )
         
+        fields = {field.value for field in request.fields} if request.fields else None
+        
         # Search messages
-        search_result = gmail_client.search_messages(
-            query=search_query,
-            max_results=request.max_results,
-            page_token=request.page_token
+        loop = asyncio.get_event_loop()
+        refs, next_cursor, estimated_total = await loop.run_in_executor(
+            None, _list_page, gmail_client, search_query, request.cursor or request.page_token, request.max_results
         )
+        batches = _iter_summaries(gmail_client, refs, fields)
         
-        # Get message details for first batch
-        messages = []
-        message_ids = [msg['id'] for msg in search_result.get('messages', [])]
+        if request.stream:
+            return StreamingResponse(
+                _stream_page(batches, next_cursor, estimated_total),
+                media_type="application/x-ndjson"
+            )
         
-        for message_id in message_ids:
-            message_details = gmail_client.get_message_details(message_id)
-            if message_details:
-                messages.append(MessageSummary(
-                    id=message_details.id,
-                    thread_id=message_details.thread_id,
-                    sender=message_details.sender,
-                    recipient=message_details.recipient,
-                    subject=message_details.subject,
-                    date=message_details.date,
-                    labels=message_details.labels,
-                    snippet=message_details.snippet,
-                    is_unread=message_details.is_unread
-                ))
+        messages = []
+        async for batch in batches:
+            messages.extend(batch)
         
         logger.info(
             f"Search returned {len(messages)} messages for user {current_user.get('email')} "
@@ -145,9 +223,10 @@ async def search_messages(
         
         return SearchMessagesResponse(
             messages=messages,
-            next_page_token=search_result.get('nextPageToken'),
+            next_cursor=next_cursor,
+            next_page_token=next_cursor,
             result_count=len(messages),
-            estimated_total=search_result.get('resultSizeEstimate', 0)
+            estimated_total=estimated_total
         )
     
     except HTTPException:
@@ -160,6 +239,151 @@ async def search_messages(
         )
 
 
+def _encode_cursor(page_token: Optional[str], offset: int) -> str:
+    """Encode a position in the search results as an opaque cursor."""
+    payload = json.dumps({'p': page_token, 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """Decode a cursor to (Gmail page token, offset into that page).
+    
+    Anything that isn't a cursor is taken as a Gmail page token.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return data['p'], int(data['o'])
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return cursor, 0
+
+
+def _list_page(
+    gmail_client: GmailClient,
+    query: str,
+    cursor: Optional[str],
+    size: int
+) -> Tuple[List[Dict[str, str]], Optional[str], int]:
+    """List the message IDs of one page of results.
+    
+    Gmail is always listed in pages of SEARCH_PAGE_SIZE, so a cursor's
+    offset stays valid whatever page size the caller asks for next.
+    
+    Returns:
+        Tuple of (message references with id and threadId, cursor of the
+        next page or None, Gmail's estimate of the total)
+    """
+    page_token, offset = _decode_cursor(cursor) if cursor else (None, 0)
+    refs: List[Dict[str, str]] = []
+    estimated_total = None
+    
+    while True:
+        result = gmail_client.search_messages(query, max_results=SEARCH_PAGE_SIZE, page_token=page_token)
+        if estimated_total is None:
+            estimated_total = result.get('resultSizeEstimate', 0)
+        
+        listed = result.get('messages', [])
+        taken = listed[offset:offset + size - len(refs)]
+        refs.extend(taken)
+        offset += len(taken)
+        
+        if offset < len(listed):
+            return refs, _encode_cursor(page_token, offset), estimated_total
+        if not result.get('nextPageToken'):
+            return refs, None, estimated_total
+        
+        page_token, offset = result['nextPageToken'], 0
+        if len(refs) >= size:
+            return refs, _encode_cursor(page_token, 0), estimated_total
+
+
+def _summary(message: EmailMessage, fields: Optional[Set[str]]) -> MessageSummary:
+    """Build a message summary holding only the requested fields."""
+    values = {
+        'id': message.id,
+        'thread_id': message.thread_id,
+        'sender': message.sender,
+        'recipient': message.recipient,
+        'subject': message.subject,
+        'date': message.date,
+        'labels': message.labels,
+        'snippet': message.snippet,
+        'is_unread': message.is_unread
+    }
+    if fields is not None:
+        values = {name: value for name, value in values.items() if name == 'id' or name in fields}
+    return MessageSummary(**values)
+
+
+async def _iter_summaries(
+    gmail_client: GmailClient,
+    refs: List[Dict[str, str]],
+    fields: Optional[Set[str]]
+) -> AsyncIterator[List[MessageSummary]]:
+    """Fetch message details in batches, yielding each batch in order.
+    
+    Several batches are in flight at once. Nothing is fetched if the
+    requested fields all come from the search listing.
+    """
+    if fields is not None and fields <= _LISTED_FIELDS:
+        yield [
+            MessageSummary(**({'id': ref['id'], 'thread_id': ref.get('threadId')}
+                              if 'thread_id' in fields else {'id': ref['id']}))
+            for ref in refs
+        ]
+        return
+    
+    headers = None
+    if fields is not None:
+        headers = ['Date'] + [header for field, header in _FIELD_HEADERS.items() if field in fields]
+    
+    loop = asyncio.get_event_loop()
+    ids = [ref['id'] for ref in refs]
+    size = gmail_client.METADATA_BATCH_SIZE
+    pending: Deque[asyncio.Future] = deque()
+    
+    for i in range(0, len(ids), size):
+        pending.append(loop.run_in_executor(
+            None, gmail_client.get_messages_metadata, ids[i:i + size], headers
+        ))
+        if len(pending) >= SEARCH_DETAIL_CONCURRENCY:
+            yield [_summary(message, fields) for message in await pending.popleft()]
+    
+    while pending:
+        yield [_summary(message, fields) for message in await pending.popleft()]
+
+
+async def _stream_page(
+    batches: AsyncIterator[List[MessageSummary]],
+    next_cursor: Optional[str],
+    estimated_total: int
+) -> AsyncIterator[str]:
+    """Write a page of search results as NDJSON.
+    
+    Each message is a {"type": "message"} line; the last line is a
+    {"type": "page"} line with the next cursor, or {"type": "error"} if
+    fetching failed part way.
+    """
+    count = 0
+    try:
+        async for batch in batches:
+            count += len(batch)
+            yield ''.join(
+                json.dumps({'type': 'message', 'message': summary.model_dump(mode='json', exclude_unset=True)}) + '\n'
+                for summary in batch
+            )
+    except Exception as e:
+        logger.error(f"Search stream error: {e}")
+        yield json.dumps({'type': 'error', 'detail': "Failed to fetch message details"}) + '\n'
+        return
+    
+    yield json.dumps({
+        'type': 'page',
+        'next_cursor': next_cursor,
+        'result_count': count,
+        'estimated_total': estimated_total
+    }) + '\n'
+
+
 @router.get("/labels")
 async def list_labels(
     gmail_client: GmailClient = Depends(require_gmail_client),
@@ -3,14 +3,17 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Query
 
-from ..dependencies import require_gmail_client, get_authenticated_rules_engine, get_current_user
+from ..dependencies import (
+    require_gmail_client, get_authenticated_rules_engine, get_current_user, get_action_journal
+)
 from ..models import (
     ProcessRulesRequest, ProcessingResultResponse, RuleExecutionResponse,
     ProcessingStatsResponse, BatchOperationRequest, BatchOperationResponse
 )
 from ...core.client import GmailClient
+from ...core.journal import ActionJournal
 from ...core.processor import EmailProcessor
 from ...rules.engine import RulesEngine
 
@@ -24,14 +27,20 @@ async def process_rules(
     request: ProcessRulesRequest,
     gmail_client: GmailClient = Depends(require_gmail_client),
     rules_engine: RulesEngine = Depends(get_authenticated_rules_engine),
+    journal: ActionJournal = Depends(get_action_journal),
     current_user: dict = Depends(get_current_user)
 ):
-    """Process email rules."""
+    """Process email rules.
+    
+    Changes are journaled; the response's ``run_id`` can be undone with
+    ``gmail-cleanup undo``.
+    """
     try:
         # Create email processor
         processor = EmailProcessor(
             gmail_client=gmail_client,
-            rules_engine=rules_engine
+            rules_engine=rules_engine,
+            journal=journal
         )
         
         # Process rules
@@ -47,7 +56,9 @@ async def process_rules(
                     )
                 rules_to_process.append(rule)
             
-            # Process each rule individually
+            # Process each rule individually, journaled as one run
+            run_id = ActionJournal.new_run_id()
+            run_ids = set()
             results = []
             overall_stats = ProcessingStatsResponse(
                 total_messages=0,
@@ -62,13 +73,16 @@ async def process_rules(
                 result = await processor.process_rule(
                     rule=rule,
                     dry_run=request.dry_run,
-                    max_messages=request.max_messages_per_rule
+                    max_messages=request.max_messages_per_rule,
+                    run_id=run_id
                 )
+                if result.run_id and result.batch_result.succeeded:
+                    run_ids.add(result.run_id)
                 
                 execution_result = RuleExecutionResponse(
                     rule_id=result.rule.id,
                     rule_name=result.rule.name,
-                    matched_count=len(result.matched_messages),
+                    matched_count=result.stats.total_messages,
                     processed_count=result.batch_result.processed,
                     success_count=result.batch_result.succeeded,
                     error_count=result.batch_result.failed,
@@ -91,6 +105,10 @@ async def process_rules(
                 max_messages_per_rule=request.max_messages_per_rule
             )
             
+            run_ids = {
+                result.run_id for result in processing_results
+                if result.run_id and result.batch_result.succeeded
+            }
             results = []
             overall_stats = ProcessingStatsResponse(
                 total_messages=0,
@@ -105,7 +123,7 @@ async def process_rules(
                 execution_result = RuleExecutionResponse(
                     rule_id=result.rule.id,
                     rule_name=result.rule.name,
-                    matched_count=len(result.matched_messages),
+                    matched_count=result.stats.total_messages,
                     processed_count=result.batch_result.processed,
                     success_count=result.batch_result.succeeded,
                     error_count=result.batch_result.failed,
@@ -140,7 +158,8 @@ async def process_rules(
             success=success,
             message=message,
             results=results,
-            overall_stats=overall_stats
+            overall_stats=overall_stats,
+            run_id=next(iter(run_ids), None)
         )
     
     except HTTPException:
@@ -156,10 +175,16 @@ async def process_rules(
 @router.post("/rules/validate")
 async def validate_rules(
     request: ProcessRulesRequest,
+    exact: bool = Query(False, description="Count matches exactly instead of estimating"),
     gmail_client: GmailClient = Depends(require_gmail_client),
-    rules_engine: RulesEngine = Depends(get_authenticated_rules_engine)
+    rules_engine: RulesEngine = Depends(get_authenticated_rules_engine),
+    journal: ActionJournal = Depends(get_action_journal)
 ):
-    """Validate rules without executing them (dry run with analysis)."""
+    """Validate rules without executing them (dry run with analysis).
+    
+    Match counts come from sampled pages with a confidence band by default,
+    or are counted exactly with ``exact=true``.
+    """
     try:
         # Force dry run for validation
         request.dry_run = True
@@ -167,7 +192,8 @@ async def validate_rules(
         # Create email processor
         processor = EmailProcessor(
             gmail_client=gmail_client,
-            rules_engine=rules_engine
+            rules_engine=rules_engine,
+            journal=journal
         )
         
         if request.rule_ids:
@@ -183,39 +209,28 @@ async def validate_rules(
         else:
             rules_to_validate = rules_engine.get_enabled_rules()
         
+        # Count every rule's matches in one parallel pass instead of
+        # reporting Gmail's resultSizeEstimate
+        estimates = await processor.estimate_rules(rules_to_validate, exact=exact)
+        
         validation_results = []
         
         for rule in rules_to_validate:
-            try:
-                # Build query to test syntax
-                query = rules_engine.build_gmail_query(rule.criteria)
-                
-                # Test search (limited to 10 results for validation)
-                search_result = gmail_client.search_messages(
-                    query=query,
-                    max_results=10
-                )
-                
-                validation_results.append({
-                    'rule_id': rule.id,
-                    'rule_name': rule.name,
-                    'valid': True,
-                    'query': query,
-                    'sample_matches': len(search_result.get('messages', [])),
-                    'estimated_total': search_result.get('resultSizeEstimate', 0),
-                    'errors': []
-                })
-                
-            except Exception as e:
-                validation_results.append({
-                    'rule_id': rule.id,
-                    'rule_name': rule.name,
-                    'valid': False,
-                    'query': '',
-                    'sample_matches': 0,
-                    'estimated_total': 0,
-                    'errors': [str(e)]
-                })
+            estimate = estimates[rule.id]
+            valid = estimate.error is None
+            
+            validation_results.append({
+                'rule_id': rule.id,
+                'rule_name': rule.name,
+                'valid': valid,
+                'query': estimate.query,
+                'sample_matches': min(estimate.count, 10),
+                'estimated_total': estimate.count,
+                'estimate_low': estimate.low,
+                'estimate_high': estimate.high,
+                'exact': estimate.exact,
+                'errors': [] if valid else [estimate.error]
+            })
         
         # Clean up processor
         processor.close()
@@ -1,62 +1,176 @@
 """Rules management API routes."""
 
+import base64
+import binascii
+import bisect
+import json
 import logging
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 import uuid
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 
 from ..dependencies import get_authenticated_rules_engine, get_current_user, validate_rule_id
 from ..models import (
-    RuleCreateRequest, RuleUpdateRequest, RuleResponse, RuleListResponse,
+    RuleCreateRequest, RuleUpdateRequest, RuleResponse, RuleListResponse, BulkRulesResponse,
     TemplateResponse, TemplateListResponse, CreateRuleFromTemplateRequest,
     ErrorResponse
 )
-from ...rules.engine import RulesEngine, RuleValidationError
-from ...rules.models import Rule, RuleCriteria, RuleAction, ActionType
+from ...rules.engine import RulesEngine, RuleValidationError, BulkOperationError, parse_rule_operations
+from ...rules.models import Rule, RuleCriteria, RuleAction, RuleSchedule, ActionType
 from ...rules.templates import RuleTemplates
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Distinguishes this process's rule set revisions from another's in ETags
+_ETAG_PREFIX = uuid.uuid4().hex[:8]
+
+# Let clients cache rule lists but revalidate them on every use
+_CACHE_HEADERS = {'Cache-Control': 'private, no-cache'}
+
+
+def _rule_response(rule: Rule) -> RuleResponse:
+    """Convert a rule to its API representation."""
+    return RuleResponse(
+        id=rule.id,
+        name=rule.name,
+        description=rule.description,
+        criteria=rule.criteria.to_dict(),
+        action=rule.action.to_dict(),
+        enabled=rule.enabled,
+        priority=rule.priority,
+        max_messages=rule.max_messages,
+        dry_run=rule.dry_run,
+        schedule=rule.schedule.to_dict() if rule.schedule else None,
+        created_at=rule.created_at,
+        updated_at=rule.updated_at,
+        last_run_at=rule.last_run_at,
+        stats=rule.stats,
+        granularity=rule.granularity,
+        category=rule.category
+    )
+
+
+def _rules_etag(rules_engine: RulesEngine) -> str:
+    """ETag of the rule set; changes with every change to any rule."""
+    return f'W/"{_ETAG_PREFIX}-{rules_engine.revision}"'
+
+
+def _sort_key(rule: Rule, field: str) -> Tuple[Any, ...]:
+    """Sort key of a rule, unique thanks to the trailing rule ID.
+    
+    Keys hold only JSON types, so they can be stored in cursors; rules
+    missing a timestamp sort first.
+    """
+    if field == 'name':
+        return (rule.name.casefold(), rule.id)
+    if field == 'priority':
+        return (rule.priority, rule.id)
+    
+    value = getattr(rule, field)
+    return (value is not None, value.timestamp() if value is not None else 0.0, rule.id)
+
+
+def _encode_cursor(sort: str, key: Tuple[Any, ...]) -> str:
+    """Encode the sort key of a page's last rule as an opaque cursor."""
+    payload = json.dumps({'s': sort, 'k': key}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str) -> Tuple[Any, ...]:
+    """Decode a cursor to the sort key that the next page starts after.
+    
+    Raises:
+        HTTPException: If the cursor is invalid or was made for another sort
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        cursor_sort, key = data['s'], tuple(data['k'])
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor was created with a different sort"
+        )
+    return key
+
 
 @router.get("/", response_model=RuleListResponse)
 async def list_rules(
+    request: Request,
+    response: Response,
     enabled_only: bool = Query(False, description="Return only enabled rules"),
+    enabled: Optional[bool] = Query(None, description="Filter by enabled state"),
+    action: Optional[ActionType] = Query(None, description="Filter by action type"),
+    category: Optional[str] = Query(None, description="Filter by template category"),
+    name_prefix: Optional[str] = Query(None, description="Filter by name prefix (case-insensitive)"),
+    sort: str = Query(
+        "-priority",
+        pattern=r'^-?(priority|name|created_at|updated_at|last_run_at)$',
+        description="Sort field; prefix with '-' for descending order"
+    ),
+    limit: int = Query(100, ge=1, le=1000, description="Rules per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     rules_engine: RulesEngine = Depends(get_authenticated_rules_engine)
 ):
-    """List all rules for the authenticated user."""
+    """List rules for the authenticated user, one page at a time.
+    
+    The response carries an ETag that changes with any change to the rule
+    set; send it back in If-None-Match to get an empty 304 response while
+    nothing has changed.
+    """
     try:
+        etag = _rules_etag(rules_engine)
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag, **_CACHE_HEADERS})
+        
+        field = sort.lstrip('-')
+        descending = sort.startswith('-')
+        after = _decode_cursor(cursor, sort) if cursor else None
+        
         if enabled_only:
-            rules = rules_engine.get_enabled_rules()
+            enabled = True
+        prefix = name_prefix.casefold() if name_prefix else None
+        
+        rules = [
+            rule for rule in rules_engine.get_rules()
+            if (enabled is None or rule.enabled == enabled)
+            and (action is None or rule.action.type == action)
+            and (category is None or rule.category == category)
+            and (prefix is None or rule.name.casefold().startswith(prefix))
+        ]
+        
+        keyed = sorted(((_sort_key(rule, field), rule) for rule in rules), key=lambda item: item[0])
+        keys = [key for key, _ in keyed]
+        
+        # Only the rules of the requested page are converted
+        if descending:
+            end = bisect.bisect_left(keys, after) if after is not None else len(keyed)
+            page = keyed[max(0, end - limit):end][::-1]
+            more = end > limit
         else:
-            rules = rules_engine.get_rules()
-        
-        rule_responses = []
-        for rule in rules:
-            rule_responses.append(RuleResponse(
-                id=rule.id,
-                name=rule.name,
-                description=rule.description,
-                criteria=rule.criteria.to_dict(),
-                action=rule.action.to_dict(),
-                enabled=rule.enabled,
-                priority=rule.priority,
-                max_messages=rule.max_messages,
-                dry_run=rule.dry_run,
-                schedule=rule.schedule.to_dict() if rule.schedule else None,
-                created_at=rule.created_at,
-                updated_at=rule.updated_at,
-                last_run_at=rule.last_run_at,
-                stats=rule.stats
-            ))
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            page = keyed[start:start + limit]
+            more = start + limit < len(keyed)
+        
+        response.headers['ETag'] = etag
+        response.headers.update(_CACHE_HEADERS)
         
         return RuleListResponse(
-            rules=rule_responses,
-            total=len(rule_responses)
+            rules=[_rule_response(rule) for _, rule in page],
+            total=len(rules),
+            next_cursor=_encode_cursor(sort, page[-1][0]) if page and more else None
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"List rules error: {e}")
         raise HTTPException(
@@ -87,7 +201,9 @@ async def create_rule(
             priority=request.priority,
             max_messages=request.max_messages,
             dry_run=request.dry_run,
-            schedule=None  # TODO: Implement schedule conversion
+            schedule=RuleSchedule.from_dict(request.schedule.dict()) if request.schedule else None,
+            granularity=request.granularity,
+            category=request.category
         )
         
         # Add rule to engine
@@ -99,22 +215,7 @@ async def create_rule(
         
         logger.info(f"Created rule: {rule.name} (ID: {rule.id})")
         
-        return RuleResponse(
-            id=rule.id,
-            name=rule.name,
-            description=rule.description,
-            criteria=rule.criteria.to_dict(),
-            action=rule.action.to_dict(),
-            enabled=rule.enabled,
-            priority=rule.priority,
-            max_messages=rule.max_messages,
-            dry_run=rule.dry_run,
-            schedule=rule.schedule.to_dict() if rule.schedule else None,
-            created_at=rule.created_at,
-            updated_at=rule.updated_at,
-            last_run_at=rule.last_run_at,
-            stats=rule.stats
-        )
+        return _rule_response(rule)
     
     except RuleValidationError as e:
         raise HTTPException(
@@ -129,6 +230,63 @@ async def create_rule(
         )
 
 
+@router.post("/bulk", response_model=BulkRulesResponse)
+async def bulk_rules(
+    request: Request,
+    validate_only: bool = Query(False, description="Validate the operations without applying them"),
+    rules_engine: RulesEngine = Depends(get_authenticated_rules_engine),
+    current_user: dict = Depends(get_current_user)
+):
+    """Create, update and delete many rules in one request.
+    
+    The body is a JSON array of operations or NDJSON with one per line,
+    e.g. {"op": "create", "rule": {...}}, {"op": "update", "id": "...",
+    "rule": {"enabled": false}} or {"op": "delete", "id": "..."}; an entry
+    without "op" is a rule to upsert. Operations are all validated first
+    and applied together, and the rules file is written once. If any is
+    invalid, nothing changes and the response lists every error.
+    """
+    try:
+        body = await request.body()
+        operations = parse_rule_operations(body.decode('utf-8'))
+        
+        changes = rules_engine.apply_operations(operations, dry_run=validate_only)
+        
+        # Save to file if configured
+        if rules_engine.rules_file and operations and not validate_only:
+            rules_engine.save_rules_to_file()
+        
+        logger.info(
+            f"Bulk rule change for user {current_user.get('email')}: {len(changes.created)} created, "
+            f"{len(changes.updated)} updated, {len(changes.deleted)} deleted"
+        )
+        
+        return BulkRulesResponse(
+            created=changes.created,
+            updated=changes.updated,
+            deleted=changes.deleted,
+            total=len(rules_engine.get_rules()),
+            validate_only=validate_only
+        )
+    
+    except BulkOperationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid operations; no rules were changed", "errors": e.errors}
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid request body: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Bulk rules error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to apply rule operations"
+        )
+
+
 @router.get("/{rule_id}", response_model=RuleResponse)
 async def get_rule(
     rule_id: str = Depends(validate_rule_id),
@@ -144,22 +302,7 @@ async def get_rule(
                 detail="Rule not found"
             )
         
-        return RuleResponse(
-            id=rule.id,
-            name=rule.name,
-            description=rule.description,
-            criteria=rule.criteria.to_dict(),
-            action=rule.action.to_dict(),
-            enabled=rule.enabled,
-            priority=rule.priority,
-            max_messages=rule.max_messages,
-            dry_run=rule.dry_run,
-            schedule=rule.schedule.to_dict() if rule.schedule else None,
-            created_at=rule.created_at,
-            updated_at=rule.updated_at,
-            last_run_at=rule.last_run_at,
-            stats=rule.stats
-        )
+        return _rule_response(rule)
     
     except HTTPException:
         raise
@@ -198,10 +341,12 @@ async def update_rule(
             priority=request.priority if request.priority is not None else existing_rule.priority,
             max_messages=request.max_messages if request.max_messages is not None else existing_rule.max_messages,
             dry_run=request.dry_run if request.dry_run is not None else existing_rule.dry_run,
-            schedule=existing_rule.schedule,  # TODO: Implement schedule updates
+            schedule=RuleSchedule.from_dict(request.schedule.dict()) if request.schedule else existing_rule.schedule,
             created_at=existing_rule.created_at,
             last_run_at=existing_rule.last_run_at,
-            stats=existing_rule.stats
+            stats=existing_rule.stats,
+            granularity=request.granularity if request.granularity is not None else existing_rule.granularity,
+            category=request.category if request.category is not None else existing_rule.category
         )
         
         # Update rule in engine
@@ -219,22 +364,7 @@ async def update_rule(
         
         logger.info(f"Updated rule: {updated_rule.name} (ID: {rule_id})")
         
-        return RuleResponse(
-            id=updated_rule.id,
-            name=updated_rule.name,
-            description=updated_rule.description,
-            criteria=updated_rule.criteria.to_dict(),
-            action=updated_rule.action.to_dict(),
-            enabled=updated_rule.enabled,
-            priority=updated_rule.priority,
-            max_messages=updated_rule.max_messages,
-            dry_run=updated_rule.dry_run,
-            schedule=updated_rule.schedule.to_dict() if updated_rule.schedule else None,
-            created_at=updated_rule.created_at,
-            updated_at=updated_rule.updated_at,
-            last_run_at=updated_rule.last_run_at,
-            stats=updated_rule.stats
-        )
+        return _rule_response(updated_rule)
     
     except HTTPException:
         raise
@@ -348,22 +478,7 @@ async def create_rule_from_template(
         
         logger.info(f"Created rule from template {template_id}: {rule.name}")
         
-        return RuleResponse(
-            id=rule.id,
-            name=rule.name,
-            description=rule.description,
-            criteria=rule.criteria.to_dict(),
-            action=rule.action.to_dict(),
-            enabled=rule.enabled,
-            priority=rule.priority,
-            max_messages=rule.max_messages,
-            dry_run=rule.dry_run,
-            schedule=rule.schedule.to_dict() if rule.schedule else None,
-            created_at=rule.created_at,
-            updated_at=rule.updated_at,
-            last_run_at=rule.last_run_at,
-            stats=rule.stats
-        )
+        return _rule_response(rule)
     
     except ValueError as e:
         raise HTTPException(
@@ -1,20 +1,157 @@
-"""Google OAuth2 authentication for Gmail API."""
+"""Google OAuth2 authentication for Gmail API.
+
+The Google auth and API client libraries are imported where they are first
+needed, so commands that never talk to Google start quickly.
+"""
+
+from __future__ import annotations
 
 import os
 import json
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable
 from pathlib import Path
+from datetime import datetime, timedelta, timezone
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 logger = logging.getLogger(__name__)
 
 
+def _refresh_request():
+    """Create the transport request used to refresh credentials."""
+    from google.auth.transport.requests import Request
+    return Request()
+
+
+class CredentialHolder:
+    """In-memory credentials for one account, shared by every caller.
+    
+    The token file is read once, on first use. Credentials are refreshed
+    ahead of expiry, and concurrent callers needing a refresh share a
+    single one (single-flight). Callers holding a token that is still valid
+    never wait for a refresh in progress. The token file is written only
+    after a refresh actually happened.
+    """
+    
+    # Refresh this long before expiry; google-auth itself treats tokens as
+    # expired 3m45s early, so this keeps transports from refreshing on their own
+    REFRESH_MARGIN = timedelta(minutes=5)
+    
+    def __init__(
+        self,
+        load: Callable[[], Optional[Credentials]],
+        save: Callable[[Credentials], None],
+        refresh_request: Optional[Callable[[], Any]] = None
+    ):
+        """Initialize credential holder.
+        
+        Args:
+            load: Callable reading stored credentials (None if there are none)
+            save: Callable storing credentials after a refresh
+            refresh_request: Factory for the transport request used to refresh
+        """
+        self._load = load
+        self._save = save
+        self._refresh_request = refresh_request or _refresh_request
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._credentials: Optional[Credentials] = None
+        self._loaded = False
+        self._saved_token: Optional[str] = None
+        self.refresh_count = 0
+    
+    def _due(self, credentials: Credentials) -> bool:
+        """Whether credentials should be refreshed now."""
+        if not credentials.token:
+            return True
+        if credentials.expiry is None:
+            return False
+        # google-auth keeps expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return credentials.expiry - self.REFRESH_MARGIN <= now
+    
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._credentials = self._load()
+                self._saved_token = self._credentials.token if self._credentials else None
+                self._loaded = True
+    
+    def get(self, force_refresh: bool = False) -> Optional[Credentials]:
+        """Get the current credentials, refreshing them if due.
+        
+        Args:
+            force_refresh: Refresh even if the token isn't close to expiry
+            
+        Returns:
+            Credentials, or None if there are none or they can't be refreshed
+        """
+        if not self._loaded:
+            self._ensure_loaded()
+        
+        credentials = self._credentials
+        if credentials is None:
+            return None
+        
+        if not force_refresh and not self._due(credentials):
+            if credentials.token != self._saved_token:
+                # Refreshed by an HTTP transport; keep the token file current
+                self._store(credentials)
+            return credentials
+        
+        token = credentials.token
+        if credentials.valid and not force_refresh:
+            # Due soon but still usable: don't wait for a refresh in progress
+            if not self._refresh_lock.acquire(blocking=False):
+                return credentials
+        else:
+            self._refresh_lock.acquire()
+        
+        try:
+            current = self._credentials
+            if current is not credentials or (current is not None and current.token != token):
+                # Replaced or refreshed by another caller while this one waited
+                return current
+            return self._refresh(current)
+        finally:
+            self._refresh_lock.release()
+    
+    def _refresh(self, credentials: Credentials) -> Optional[Credentials]:
+        """Refresh credentials in place; must be called with the refresh lock held."""
+        if not credentials.refresh_token:
+            logger.warning("Credentials expire soon and have no refresh token")
+            return credentials if credentials.valid else None
+        
+        try:
+            credentials.refresh(self._refresh_request())
+        except Exception as e:
+            logger.error(f"Failed to refresh credentials: {e}")
+            return credentials if credentials.valid else None
+        
+        self.refresh_count += 1
+        self._store(credentials)
+        logger.info("Credentials refreshed successfully")
+        return credentials
+    
+    def _store(self, credentials: Credentials) -> None:
+        self._saved_token = credentials.token
+        self._save(credentials)
+    
+    def set(self, credentials: Optional[Credentials]) -> None:
+        """Replace the held credentials, e.g. after signing in or out.
+        
+        The caller is responsible for storing them.
+        """
+        with self._lock:
+            self._credentials = credentials
+            self._saved_token = credentials.token if credentials else None
+            self._loaded = True
+
+
 class GoogleAuthManager:
     """Manages Google OAuth2 authentication for Gmail API."""
     
@@ -23,6 +160,9 @@ class GoogleAuthManager:
         'https://www.googleapis.com/auth/gmail.readonly'
     ]
     
+    # Seconds to reuse the profile returned by get_user_info()
+    USER_INFO_TTL = 300.0
+    
     def __init__(
         self,
         client_config: Optional[Dict[str, Any]] = None,
@@ -47,7 +187,9 @@ class GoogleAuthManager:
         else:
             self.token_file = token_file
         
-        self._credentials: Optional[Credentials] = None
+        self._holder = CredentialHolder(self._load_credentials, self._save_credentials)
+        self._user_info: Optional[Dict[str, Any]] = None
+        self._user_info_at = 0.0
     
     @classmethod
     def from_client_secrets_file(
@@ -89,37 +231,35 @@ class GoogleAuthManager:
             token_file=token_file
         )
     
-    def get_credentials(self, force_refresh: bool = False) -> Optional[Credentials]:
+    def get_credentials(
+        self,
+        force_refresh: bool = False,
+        interactive: bool = True
+    ) -> Optional[Credentials]:
         """Get valid credentials, refreshing if necessary.
         
+        The token file is read once; afterwards credentials come from memory
+        and are refreshed shortly before they expire.
+        
         Args:
             force_refresh: Force credential refresh even if valid
+            interactive: Start the browser sign-in flow if there are no
+                usable credentials
             
         Returns:
             Valid Credentials object or None if authentication fails
         """
-        if self._credentials and not force_refresh and self._credentials.valid:
-            return self._credentials
-        
-        # Try to load existing credentials
-        self._credentials = self._load_credentials()
-        
-        if self._credentials:
-            # Refresh if expired
-            if self._credentials.expired and self._credentials.refresh_token:
-                try:
-                    self._credentials.refresh(Request())
-                    self._save_credentials(self._credentials)
-                    logger.info("Credentials refreshed successfully")
-                except Exception as e:
-                    logger.error(f"Failed to refresh credentials: {e}")
-                    self._credentials = None
-        
-        # If still no valid credentials, start OAuth flow
-        if not self._credentials or not self._credentials.valid:
-            self._credentials = self._authenticate_user()
-        
-        return self._credentials
+        credentials = self._holder.get(force_refresh=force_refresh)
+        if credentials is not None and credentials.valid:
+            return credentials
+        
+        if not interactive:
+            return None
+        
+        credentials = self._authenticate_user()
+        self._holder.set(credentials)
+        self._user_info = None
+        return credentials
     
     def _load_credentials(self) -> Optional[Credentials]:
         """Load credentials from token file.
@@ -130,6 +270,8 @@ class GoogleAuthManager:
         if not os.path.exists(self.token_file):
             return None
         
+        from google.oauth2.credentials import Credentials
+        
         try:
             with open(self.token_file, 'r') as f:
                 token_data = json.load(f)
@@ -163,7 +305,8 @@ class GoogleAuthManager:
                 'token_uri': credentials.token_uri,
                 'client_id': credentials.client_id,
                 'client_secret': credentials.client_secret,
-                'scopes': credentials.scopes
+                'scopes': credentials.scopes,
+                'expiry': credentials.expiry.isoformat() + 'Z' if credentials.expiry else None
             }
             
             with open(self.token_file, 'w') as f:
@@ -183,6 +326,8 @@ class GoogleAuthManager:
         Returns:
             Credentials object or None if authentication fails
         """
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        
         try:
             if self.client_config:
                 flow = InstalledAppFlow.from_client_config(
@@ -220,8 +365,11 @@ class GoogleAuthManager:
         if not credentials:
             return False
         
+        from googleapiclient.errors import HttpError
+        from ..core.discovery import build_gmail_service
+        
         try:
-            service = build('gmail', 'v1', credentials=credentials)
+            service = build_gmail_service(credentials)
             
             # Make a simple API call to test connection
             profile = service.users().getProfile(userId='me').execute()
@@ -247,7 +395,6 @@ class GoogleAuthManager:
             
             if credentials and credentials.token:
                 # Revoke token with Google
-                revoke = Request()
                 revoke_url = f"https://oauth2.googleapis.com/revoke?token={credentials.token}"
                 
                 import urllib.request
@@ -260,7 +407,8 @@ class GoogleAuthManager:
                 os.remove(self.token_file)
                 logger.info("Local token file deleted")
             
-            self._credentials = None
+            self._holder.set(None)
+            self._user_info = None
             return True
             
         except Exception as e:
@@ -270,23 +418,34 @@ class GoogleAuthManager:
     def get_user_info(self) -> Optional[Dict[str, Any]]:
         """Get authenticated user information.
         
+        The profile is cached for USER_INFO_TTL seconds, so the API's
+        per-request user lookup doesn't cost a Gmail call each time.
+        
         Returns:
             Dict with user info or None if not authenticated
         """
-        credentials = self.get_credentials()
+        credentials = self.get_credentials(interactive=False)
         if not credentials:
             return None
         
+        if self._user_info is not None and time.monotonic() - self._user_info_at < self.USER_INFO_TTL:
+            return self._user_info
+        
+        from googleapiclient.errors import HttpError
+        from ..core.discovery import build_gmail_service
+        
         try:
-            service = build('gmail', 'v1', credentials=credentials)
+            service = build_gmail_service(credentials)
             profile = service.users().getProfile(userId='me').execute()
             
-            return {
+            self._user_info = {
                 'email': profile.get('emailAddress'),
                 'messages_total': profile.get('messagesTotal', 0),
                 'threads_total': profile.get('threadsTotal', 0),
                 'history_id': profile.get('historyId')
             }
+            self._user_info_at = time.monotonic()
+            return self._user_info
             
         except HttpError as e:
             logger.error(f"Failed to get user info: {e}")
@@ -295,10 +454,12 @@ class GoogleAuthManager:
     def is_authenticated(self) -> bool:
         """Check if user is currently authenticated.
         
+        Never starts the sign-in flow or reads the token file more than once.
+        
         Returns:
             True if authenticated with valid credentials
         """
-        credentials = self.get_credentials()
+        credentials = self.get_credentials(interactive=False)
         return credentials is not None and credentials.valid
 
 
@@ -1,20 +1,25 @@
-"""Gmail Cleanup CLI application."""
+"""Gmail Cleanup CLI application.
+
+Modules that load the Google API client are imported inside the commands
+that call the API, so offline commands (rules, templates, journal) start
+quickly.
+"""
 
 import logging
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import click
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich import print as rprint
 
 from ..auth.oauth import CredentialsManager, AuthenticationError
-from ..core.client import GmailClient
-from ..core.processor import EmailProcessor
+from ..core.journal import ActionJournal
+from ..core.metrics import REGISTRY, MetricsRegistry
 from ..rules.engine import RulesEngine, RuleValidationError
 from ..rules.templates import RuleTemplates
 
@@ -32,11 +37,95 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _spinner():
+    """Progress display with a spinner, for API work of unknown length."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console
+    )
+
+
+def _open_journal(credentials_manager: CredentialsManager) -> ActionJournal:
+    """Open the undo journal kept in the configuration directory."""
+    return ActionJournal(str(credentials_manager.config_dir / 'journal.jsonl'))
+
+
+def _print_profile(metrics: MetricsRegistry, wall_seconds: float) -> None:
+    """Print where a command spent its time: Gmail API calls and processing stages."""
+    calls = metrics.counters('gmail_api_calls_total')
+    if not calls:
+        rprint(f"[dim]Profile: {wall_seconds:.2f}s, no Gmail API calls[/dim]")
+        return
+    
+    quota = {dict(k)['method']: v for k, v in metrics.counters('gmail_api_quota_units_total').items()}
+    retries = {dict(k)['method']: v for k, v in metrics.counters('gmail_api_retries_total').items()}
+    batch_sizes = {dict(k)['method']: h for k, h in metrics.histograms('gmail_api_batch_size').items()}
+    
+    counts = {}
+    errors = {}
+    for key, value in calls.items():
+        labels = dict(key)
+        counts[labels['method']] = counts.get(labels['method'], 0) + value
+        if labels['status'] != 'ok':
+            errors[labels['method']] = errors.get(labels['method'], 0) + value
+    
+    table = Table(title=f"Gmail API Calls ({wall_seconds:.2f}s wall time)")
+    table.add_column("Method", style="green", no_wrap=True)
+    table.add_column("Calls", justify="right", style="cyan")
+    table.add_column("Errors", justify="right", style="red")
+    table.add_column("Retries", justify="right", style="yellow")
+    table.add_column("Batch", justify="right")
+    table.add_column("Quota", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("p95", justify="right")
+    
+    latencies = metrics.histograms('gmail_api_call_duration_seconds')
+    for key, histogram in sorted(latencies.items(), key=lambda item: -item[1].sum):
+        method = dict(key)['method']
+        sizes = batch_sizes.get(method)
+        table.add_row(
+            method,
+            str(int(counts.get(method, 0))),
+            str(int(errors.get(method, 0))),
+            str(int(retries.get(method, 0))),
+            f"{sizes.mean:.0f}" if sizes else "-",
+            str(int(quota.get(method, 0))),
+            f"{histogram.sum:.2f}s",
+            f"{histogram.quantile(0.95) * 1000:.0f}ms"
+        )
+    console.print(table)
+    
+    stages = metrics.histograms('gmail_cleanup_stage_duration_seconds')
+    if stages:
+        table = Table(title="Processing Stages")
+        table.add_column("Stage", style="green")
+        table.add_column("Count", justify="right", style="cyan")
+        table.add_column("Total", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("Max", justify="right")
+        
+        for key, histogram in sorted(stages.items()):
+            table.add_row(
+                dict(key)['stage'],
+                str(histogram.count),
+                f"{histogram.sum:.3f}s",
+                f"{histogram.quantile(0.95):.3f}s",
+                f"{histogram.max:.3f}s"
+            )
+        console.print(table)
+    
+    total_quota = int(sum(quota.values()))
+    rprint(f"[dim]{int(sum(counts.values()))} API calls, {total_quota} quota units[/dim]")
+
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
 @click.option('--config-dir', help='Configuration directory path')
+@click.option('--profile', is_flag=True, help='Print Gmail API call and processing stage timings on exit')
 @click.pass_context
-def app(ctx, verbose: bool, config_dir: Optional[str]):
+def app(ctx, verbose: bool, config_dir: Optional[str], profile: bool):
     """Gmail Cleanup - Modern email management tool."""
     
     # Ensure context object exists
@@ -48,6 +137,10 @@ def app(ctx, verbose: bool, config_dir: Optional[str]):
     
     # Setup configuration directory
     ctx.obj['config_dir'] = config_dir
+    
+    if profile:
+        start = time.perf_counter()
+        ctx.call_on_close(lambda: _print_profile(REGISTRY, time.perf_counter() - start))
 
 
 # Authentication commands
@@ -94,11 +187,7 @@ def login(ctx):
     try:
         credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _spinner() as progress:
             task = progress.add_task("Authenticating...", total=None)
             
             success = credentials_manager.authenticate()
@@ -286,6 +375,205 @@ def delete(ctx, rule_id: str, file: Optional[str]):
         sys.exit(1)
 
 
+@rules.command(name='import')
+@click.argument('source', type=click.File('r'))
+@click.option('--file', '-f', required=True, help='Rules file to update (created if missing)')
+@click.option('--dry-run', is_flag=True, help='Validate the operations without saving')
+@click.pass_context
+def import_rules(ctx, source, file: str, dry_run: bool):
+    """Apply many rule changes at once from SOURCE ('-' for stdin).
+    
+    SOURCE is a JSON array or NDJSON of operations such as
+    {"op": "create", "rule": {...}}, {"op": "update", "id": "...", "rule": {...}}
+    and {"op": "delete", "id": "..."}, or an exported rules file. Entries
+    without "op" are upserted. Nothing is saved unless every operation is
+    valid.
+    """
+    try:
+        from ..rules.engine import BulkOperationError, parse_rule_operations
+        
+        rules_engine = RulesEngine(file if Path(file).exists() else None)
+        operations = parse_rule_operations(source.read())
+        
+        try:
+            changes = rules_engine.apply_operations(operations, dry_run=dry_run)
+        except BulkOperationError as e:
+            table = Table(title=f"Invalid Operations ({len(e.errors)})")
+            table.add_column("#", justify="right", style="cyan")
+            table.add_column("Op", style="yellow")
+            table.add_column("Rule ID")
+            table.add_column("Error", style="red")
+            
+            for error in e.errors[:50]:
+                table.add_row(str(error['index']), str(error['op']), str(error['id'] or ''), error['error'])
+            
+            console.print(table)
+            rprint("[red]✗[/red] No rules were changed")
+            sys.exit(1)
+        
+        summary = (
+            f"{len(changes.created)} created, {len(changes.updated)} updated, "
+            f"{len(changes.deleted)} deleted"
+        )
+        
+        if dry_run:
+            rprint(f"[green]✓[/green] {len(operations)} operations are valid: {summary}")
+            return
+        
+        if operations:
+            rules_engine.save_rules_to_file(file)
+        
+        rprint(f"[green]✓[/green] Applied {len(operations)} operations: {summary}")
+    
+    except ValueError as e:
+        rprint(f"[red]✗[/red] Invalid operations file: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Failed to import rules: {e}")
+        sys.exit(1)
+
+
+@rules.command()
+@click.argument('report', type=click.File('r'))
+@click.option('--file', '-f', help='Rules file checked for duplicates and updated by --apply')
+@click.option('--policies', type=click.Path(exists=True), help='JSON file of domain policies (default: built-in policies)')
+@click.option('--output', '-o', help="Write the rules as NDJSON operations for 'rules import'")
+@click.option('--apply', 'apply_rules', is_flag=True, help='Add the rules to the rules file')
+@click.option('--top', 'top_n', type=int, default=25, help='Number of rules to show')
+@click.pass_context
+def generate(ctx, report, file: Optional[str], policies: Optional[str], output: Optional[str],
+             apply_rules: bool, top_n: int):
+    """Generate rules for every sender domain in an analytics REPORT.
+    
+    REPORT is the JSON written by 'analyze report --all-domains --output',
+    or a list of its domain rows ('-' for stdin). Each domain is checked
+    against the policies' volume, unread ratio and age thresholds, and the
+    rules are shown with the quota units one run is projected to cost.
+    """
+    try:
+        import json
+        from ..rules.generator import DomainPolicy, RuleGenerator
+        
+        if apply_rules and not file:
+            rprint("[red]✗[/red] --apply needs a rules file (--file)")
+            sys.exit(1)
+        
+        domain_policies = None
+        if policies:
+            with open(policies) as f:
+                domain_policies = [DomainPolicy.from_dict(policy) for policy in json.load(f)]
+        
+        rules_engine = RulesEngine(file if file and Path(file).exists() else None)
+        generator = RuleGenerator(domain_policies, rules_engine)
+        result = generator.generate(json.load(report))
+        
+        table = Table(title=f"Generated Rules ({len(result.rules)})")
+        table.add_column("Rule", style="green")
+        table.add_column("Query", style="cyan")
+        table.add_column("Action", style="yellow")
+        table.add_column("Messages", justify="right")
+        table.add_column("Quota", justify="right")
+        
+        for generated in result.rules[:top_n]:
+            table.add_row(
+                generated.rule.name,
+                rules_engine.build_gmail_query(generated.rule.criteria),
+                generated.rule.action.type.value,
+                f"~{generated.estimated_messages}",
+                str(generated.quota_units)
+            )
+        
+        console.print(table)
+        rprint(
+            f"{result.domains} domains: {len(result.rules)} rules, {result.merged} merged, "
+            f"{result.combined} folded into combined rules, {result.duplicates} already in the rules file"
+        )
+        rprint(f"Projected cost of one run: ~{result.estimated_messages} messages, {result.quota_units} quota units")
+        
+        if output:
+            with open(output, 'w') as f:
+                for operation in result.operations():
+                    f.write(json.dumps(operation, default=str) + "\n")
+            rprint(f"[green]✓[/green] Operations written to {output}")
+        
+        if result.stale:
+            rprint(f"{len(result.stale)} earlier generated rules are replaced and will be deleted")
+        
+        if apply_rules and (result.rules or result.stale):
+            changes = rules_engine.apply_operations(result.operations())
+            rules_engine.save_rules_to_file(file)
+            rprint(
+                f"[green]✓[/green] {len(changes.created)} rules added, "
+                f"{len(changes.updated)} updated, {len(changes.deleted)} deleted in {file}"
+            )
+    
+    except (ValueError, KeyError) as e:
+        rprint(f"[red]✗[/red] Invalid report or policies: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Failed to generate rules: {e}")
+        sys.exit(1)
+
+
+@rules.command(name='analyze')
+@click.option('--file', '-f', required=True, help='Rules file path')
+@click.option('--fix', is_flag=True, help='Delete duplicate and subsumed rules, disable dead ones')
+@click.option('--include-disabled', is_flag=True, help='Also analyze disabled rules')
+@click.pass_context
+def analyze_rules(ctx, file: str, fix: bool, include_disabled: bool):
+    """Find duplicate, redundant and conflicting rules without searching Gmail.
+    
+    Each redundant rule costs a full search per run. With --fix, duplicate
+    and subsumed rules are deleted, and rules that can never find anything
+    (shadowed by a deleting rule, or with impossible criteria) are disabled.
+    Conflicts are only reported.
+    """
+    try:
+        from ..rules.analyzer import CONFLICT, RuleAnalyzer
+        
+        rules_engine = RulesEngine(file)
+        analysis = RuleAnalyzer(include_disabled=include_disabled).analyze(rules_engine.get_rules())
+        
+        if not analysis.findings:
+            rprint(f"[green]✓[/green] No redundant or conflicting rules among {analysis.rules} rules")
+            return
+        
+        names = {rule.id: rule.name for rule in rules_engine.get_rules()}
+        table = Table(title=f"Rule Analysis ({analysis.rules} rules)")
+        table.add_column("Finding", style="yellow")
+        table.add_column("Rule", style="green")
+        table.add_column("Details")
+        
+        for finding in analysis.findings:
+            table.add_row(
+                finding.kind,
+                names.get(finding.rule_id, finding.rule_id),
+                finding.message
+            )
+        
+        console.print(table)
+        
+        redundant = analysis.redundant_rule_ids
+        rprint(
+            f"{len(redundant)} redundant rules (one search each per run), "
+            f"{len(analysis.by_kind(CONFLICT))} conflicts"
+        )
+        
+        if fix and redundant:
+            changes = rules_engine.apply_operations(analysis.merge_operations())
+            rules_engine.save_rules_to_file(file)
+            rprint(
+                f"[green]✓[/green] Deleted {len(changes.deleted)} rules and "
+                f"disabled {len(changes.updated)} in {file}"
+            )
+        elif redundant:
+            rprint("[dim]Run with --fix to remove them[/dim]")
+    
+    except Exception as e:
+        rprint(f"[red]✗[/red] Failed to analyze rules: {e}")
+        sys.exit(1)
+
+
 @rules.command()
 def templates():
     """List available rule templates."""
@@ -319,6 +607,72 @@ def templates():
         sys.exit(1)
 
 
+@rules.command()
+@click.option('--file', '-f', help='Rules file path')
+@click.option('--exact', is_flag=True, help='Count matches exactly instead of estimating')
+@click.pass_context
+def estimate(ctx, file: Optional[str], exact: bool):
+    """Preview how many messages each enabled rule would match."""
+    try:
+        # Check authentication
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        
+        if not credentials_manager.is_authenticated():
+            rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
+            sys.exit(1)
+        
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        
+        # Setup components
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials()
+        gmail_client = GmailClient(credentials)
+        rules_engine = RulesEngine(file)
+        
+        processor = EmailProcessor(gmail_client, rules_engine)
+        enabled_rules = rules_engine.get_enabled_rules()
+        
+        import asyncio
+        with console.status(f"{'Counting' if exact else 'Estimating'} matches for {len(enabled_rules)} rules..."):
+            estimates = asyncio.run(processor.estimate_rules(enabled_rules, exact=exact))
+        
+        processor.close()
+        
+        table = Table(title=f"Rule Matches ({'Exact' if exact else 'Estimated'})")
+        table.add_column("Rule", style="green")
+        table.add_column("Matches", justify="right", style="cyan")
+        table.add_column("Range", justify="right", style="yellow")
+        table.add_column("API Calls", justify="right")
+        
+        total_calls = 0
+        for rule in enabled_rules:
+            result = estimates[rule.id]
+            total_calls += result.list_calls + result.get_calls
+            
+            if result.error:
+                table.add_row(rule.name, "[red]error[/red]", "", "")
+                continue
+            
+            table.add_row(
+                rule.name,
+                str(result.count) if result.exact else f"~{result.count}",
+                "exact" if result.exact else f"{result.low}-{result.high}",
+                str(result.list_calls + result.get_calls)
+            )
+        
+        console.print(table)
+        rprint(f"API calls: {total_calls}")
+    
+    except AuthenticationError as e:
+        rprint(f"[red]✗[/red] Authentication error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Estimate failed: {e}")
+        logger.exception("Estimate error")
+        sys.exit(1)
+
+
 # Processing commands
 @app.group()
 def run():
@@ -342,13 +696,16 @@ def all(ctx, rules_file: Optional[str], dry_run: bool, rule_id: Optional[str], m
             rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
             sys.exit(1)
         
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        
         # Setup components
         auth_manager = credentials_manager.get_auth_manager()
         credentials = auth_manager.get_credentials()
         gmail_client = GmailClient(credentials)
         rules_engine = RulesEngine(rules_file)
         
-        processor = EmailProcessor(gmail_client, rules_engine)
+        processor = EmailProcessor(gmail_client, rules_engine, journal=_open_journal(credentials_manager))
         
         # Add progress callback
         def progress_callback(stats):
@@ -356,11 +713,7 @@ def all(ctx, rules_file: Optional[str], dry_run: bool, rule_id: Optional[str], m
         
         processor.add_progress_callback(progress_callback)
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _spinner() as progress:
             task = progress.add_task(
                 f"{'Analyzing' if dry_run else 'Processing'} rules...",
                 total=None
@@ -409,14 +762,14 @@ def all(ctx, rules_file: Optional[str], dry_run: bool, rule_id: Optional[str], m
             
             table.add_row(
                 result.rule.name[:30] + "..." if len(result.rule.name) > 30 else result.rule.name,
-                str(len(result.matched_messages)),
+                str(result.stats.total_messages),
                 str(result.batch_result.processed),
                 str(result.batch_result.succeeded),
                 str(result.batch_result.failed),
                 duration
             )
             
-            total_matched += len(result.matched_messages)
+            total_matched += result.stats.total_messages
             total_processed += result.batch_result.processed
             total_succeeded += result.batch_result.succeeded
             total_failed += result.batch_result.failed
@@ -433,6 +786,10 @@ def all(ctx, rules_file: Optional[str], dry_run: bool, rule_id: Optional[str], m
         if total_failed > 0:
             rprint(f"\n[yellow]⚠[/yellow] Some operations failed. Check logs for details.")
         
+        run_ids = {result.run_id for result in results if result.run_id and result.batch_result.succeeded}
+        for run_id in sorted(run_ids):
+            rprint(f"\nTo revert these changes, run: gmail-cleanup undo {run_id}")
+        
         # Cleanup
         processor.close()
     
@@ -445,6 +802,405 @@ def all(ctx, rules_file: Optional[str], dry_run: bool, rule_id: Optional[str], m
         sys.exit(1)
 
 
+@run.command()
+@click.argument('config_dirs', nargs=-1)
+@click.option('--accounts', 'accounts_file', type=click.Path(exists=True, dir_okay=False),
+              help='JSON file listing account configuration directories')
+@click.option('--rules-file', '-f', help='Rules file for accounts without their own')
+@click.option('--workers', type=int, default=16, help='Gmail API requests in flight across all accounts')
+@click.option('--account-workers', type=int, default=4, help='Worker threads per account')
+@click.option('--quota', type=float, default=250.0, help='Quota units per second per account')
+@click.option('--dry-run', is_flag=True, help='Show what would be done without executing')
+@click.option('--max-messages', type=int, help='Limit messages per rule')
+@click.pass_context
+def fleet(
+    ctx,
+    config_dirs: Tuple[str, ...],
+    accounts_file: Optional[str],
+    rules_file: Optional[str],
+    workers: int,
+    account_workers: int,
+    quota: float,
+    dry_run: bool,
+    max_messages: Optional[int]
+):
+    """Run all enabled rules for several accounts at once.
+    
+    Each CONFIG_DIR is an account's configuration directory, authenticated
+    with 'gmail-cleanup --config-dir CONFIG_DIR auth login'. An account runs
+    the rules file set for it in --accounts, else --rules-file, else the
+    rules.json in its directory.
+    """
+    try:
+        from ..core.fleet import Account, FleetRunner, load_accounts
+        
+        accounts = load_accounts(accounts_file) if accounts_file else []
+        accounts.extend(Account(config_dir=config_dir) for config_dir in config_dirs)
+        if not accounts:
+            rprint("[red]✗[/red] No accounts given. Pass configuration directories or --accounts.")
+            sys.exit(1)
+        
+        runner = FleetRunner(
+            accounts,
+            max_workers=workers,
+            workers_per_account=account_workers,
+            quota_per_second=quota,
+            rules_file=rules_file
+        )
+        
+        start = time.perf_counter()
+        with _spinner() as progress:
+            task = progress.add_task(
+                f"{'Analyzing' if dry_run else 'Processing'} {len(accounts)} accounts...",
+                total=None
+            )
+            
+            import asyncio
+            account_results = asyncio.run(runner.run(
+                dry_run=dry_run,
+                max_messages_per_rule=max_messages
+            ))
+            
+            progress.update(task, completed=True)
+        wall_seconds = time.perf_counter() - start
+        
+        # Display results
+        table = Table(title=f"Fleet Processing Results ({'Dry Run' if dry_run else 'Executed'})")
+        table.add_column("Account", style="cyan")
+        table.add_column("Rule", style="green")
+        table.add_column("Matched", justify="right", style="cyan")
+        table.add_column("Processed", justify="right", style="yellow")
+        table.add_column("Succeeded", justify="right", style="green")
+        table.add_column("Failed", justify="right", style="red")
+        table.add_column("Duration", justify="right")
+        
+        for account_result in account_results:
+            name = account_result.account.name
+            if account_result.error:
+                table.add_row(name, f"[red]{account_result.error[:40]}[/red]", "", "", "", "", "")
+            for result in account_result.results:
+                duration = f"{result.stats.duration:.2f}s" if result.stats.duration else "N/A"
+                table.add_row(
+                    name,
+                    result.rule.name[:30] + "..." if len(result.rule.name) > 30 else result.rule.name,
+                    str(result.stats.total_messages),
+                    str(result.batch_result.processed),
+                    str(result.batch_result.succeeded),
+                    str(result.batch_result.failed),
+                    duration
+                )
+        
+        console.print(table)
+        
+        # Per-account summary
+        summary = Table(title="Accounts")
+        summary.add_column("Account", style="cyan")
+        summary.add_column("Status")
+        summary.add_column("Matched", justify="right", style="cyan")
+        summary.add_column("Succeeded", justify="right", style="green")
+        summary.add_column("Failed", justify="right", style="red")
+        summary.add_column("Quota Wait", justify="right")
+        summary.add_column("Duration", justify="right")
+        
+        total_matched = 0
+        total_succeeded = 0
+        total_failed = 0
+        
+        for account_result in account_results:
+            matched = sum(result.stats.total_messages for result in account_result.results)
+            succeeded = sum(result.batch_result.succeeded for result in account_result.results)
+            failed = sum(result.batch_result.failed for result in account_result.results)
+            summary.add_row(
+                account_result.account.name,
+                "[green]✓ Done[/green]" if account_result.succeeded else "[red]✗ Failed[/red]",
+                str(matched),
+                str(succeeded),
+                str(failed),
+                f"{account_result.quota_wait:.2f}s",
+                f"{account_result.duration:.2f}s"
+            )
+            total_matched += matched
+            total_succeeded += succeeded
+            total_failed += failed
+        
+        console.print(summary)
+        
+        # Summary
+        failed_accounts = [r for r in account_results if not r.succeeded]
+        account_seconds = sum(r.duration for r in account_results)
+        rprint(f"\n[bold]Summary:[/bold]")
+        rprint(f"Accounts: {len(account_results) - len(failed_accounts)} of {len(account_results)} completed")
+        rprint(f"Total matched: {total_matched}")
+        rprint(f"Total succeeded: [green]{total_succeeded}[/green]")
+        rprint(f"Total failed: [red]{total_failed}[/red]")
+        rprint(f"Wall time: {wall_seconds:.2f}s (accounts took {account_seconds:.2f}s combined)")
+        
+        if total_failed > 0:
+            rprint(f"\n[yellow]⚠[/yellow] Some operations failed. Check logs for details.")
+        
+        for account_result in account_results:
+            for run_id in account_result.run_ids:
+                rprint(
+                    f"\nTo revert {account_result.account.name}, run: "
+                    f"gmail-cleanup --config-dir {account_result.account.config_dir} undo {run_id}"
+                )
+        
+        if failed_accounts:
+            sys.exit(1)
+    
+    except Exception as e:
+        rprint(f"[red]✗[/red] Fleet processing failed: {e}")
+        logger.exception("Fleet processing error")
+        sys.exit(1)
+
+
+# Scheduler daemon
+@app.command()
+@click.option('--rules-file', '-f', help='Rules file path')
+@click.option('--dry-run', is_flag=True, help='Show what would be done without executing')
+@click.option('--window', type=float, default=60.0, help='Run rules due within this many seconds together')
+@click.pass_context
+def daemon(ctx, rules_file: Optional[str], dry_run: bool, window: float):
+    """Run scheduled rules as they come due."""
+    try:
+        # Check authentication
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        
+        if not credentials_manager.is_authenticated():
+            rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
+            sys.exit(1)
+        
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        from ..core.scheduler import RuleScheduler
+        
+        # Setup components
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials()
+        gmail_client = GmailClient(credentials)
+        rules_engine = RulesEngine(rules_file)
+        
+        processor = EmailProcessor(gmail_client, rules_engine, journal=_open_journal(credentials_manager))
+        scheduler = RuleScheduler(processor, rules_engine, window=window, dry_run=dry_run)
+        scheduler.schedule_all()
+        
+        table = Table(title="Scheduled Rules")
+        table.add_column("Rule", style="green")
+        table.add_column("Frequency", style="cyan")
+        table.add_column("Next Run", style="yellow")
+        
+        for due, rule in scheduler.upcoming():
+            table.add_row(rule.name, rule.schedule.frequency, due.strftime('%Y-%m-%d %H:%M'))
+        
+        console.print(table)
+        
+        if not len(scheduler):
+            rprint("[yellow]No enabled rules have a schedule.[/yellow] Checking the rules file for changes.")
+        
+        rprint(f"[green]Scheduler running{' (dry run)' if dry_run else ''}[/green]")
+        rprint("Press Ctrl+C to stop")
+        
+        import asyncio
+        try:
+            asyncio.run(scheduler.run_forever())
+        except KeyboardInterrupt:
+            rprint("\nScheduler stopped")
+        finally:
+            processor.close()
+    
+    except AuthenticationError as e:
+        rprint(f"[red]✗[/red] Authentication error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Scheduler failed: {e}")
+        logger.exception("Scheduler error")
+        sys.exit(1)
+
+
+@app.command()
+@click.option('--rules-file', '-f', help='Rules file path')
+@click.option('--topic', help='Pub/Sub topic to register with Gmail (projects/<p>/topics/<t>)')
+@click.option('--subscription', help='Pull notifications from this Pub/Sub subscription')
+@click.option('--push-port', type=int, help='Receive Pub/Sub push requests on this port')
+@click.option('--push-host', default='127.0.0.1', help='Interface for --push-port')
+@click.option('--notify-file', help='Read notifications appended to this JSON-lines file')
+@click.option('--dry-run', is_flag=True, help='Show what would be done without executing')
+@click.pass_context
+def watch(
+    ctx,
+    rules_file: Optional[str],
+    topic: Optional[str],
+    subscription: Optional[str],
+    push_port: Optional[int],
+    push_host: str,
+    notify_file: Optional[str],
+    dry_run: bool
+):
+    """Process new mail as Gmail push notifications arrive."""
+    sources = [source for source in (subscription, push_port, notify_file) if source]
+    if len(sources) != 1:
+        rprint("[red]✗[/red] Choose exactly one of --subscription, --push-port or --notify-file")
+        sys.exit(1)
+    
+    try:
+        # Check authentication
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        
+        if not credentials_manager.is_authenticated():
+            rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
+            sys.exit(1)
+        
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        from ..core.watch import MailboxWatcher, FileSubscriber, HTTPPushSubscriber, PubSubSubscriber
+        
+        # Setup components
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials()
+        gmail_client = GmailClient(credentials)
+        rules_engine = RulesEngine(rules_file)
+        
+        processor = EmailProcessor(gmail_client, rules_engine, journal=_open_journal(credentials_manager))
+        
+        if subscription:
+            subscriber = PubSubSubscriber(subscription)
+        elif push_port:
+            subscriber = HTTPPushSubscriber(push_host, push_port)
+        else:
+            subscriber = FileSubscriber(notify_file)
+        
+        watcher = MailboxWatcher(
+            processor,
+            subscriber,
+            topic_name=topic,
+            state_file=str(credentials_manager.config_dir / 'watch-state.json'),
+            dry_run=dry_run
+        )
+        
+        rprint(f"[green]Watching for new mail{' (dry run)' if dry_run else ''}[/green]")
+        rprint("Press Ctrl+C to stop")
+        
+        import asyncio
+        try:
+            asyncio.run(watcher.run_forever())
+        except KeyboardInterrupt:
+            rprint("\nWatcher stopped")
+        finally:
+            processor.close()
+    
+    except AuthenticationError as e:
+        rprint(f"[red]✗[/red] Authentication error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Watcher failed: {e}")
+        logger.exception("Watcher error")
+        sys.exit(1)
+
+
+# Undo journal
+@app.command()
+@click.option('--limit', type=int, default=20, help='Number of most recent runs to show')
+@click.pass_context
+def journal(ctx, limit: int):
+    """List journaled runs that can be undone."""
+    try:
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        runs = _open_journal(credentials_manager).runs()[-limit:]
+        
+        if not runs:
+            rprint("[yellow]No runs recorded in the journal[/yellow]")
+            return
+        
+        table = Table(title="Journaled Runs")
+        table.add_column("Run ID", style="cyan")
+        table.add_column("Started", style="yellow")
+        table.add_column("Rules", style="green")
+        table.add_column("Changed", justify="right")
+        table.add_column("Deleted", justify="right", style="red")
+        table.add_column("Undone")
+        
+        for run in reversed(runs):
+            table.add_row(
+                run.run_id,
+                run.started_at.strftime('%Y-%m-%d %H:%M'),
+                ", ".join(run.rule_names),
+                str(run.changed),
+                str(run.irreversible),
+                run.undone_at.strftime('%Y-%m-%d %H:%M') if run.undone_at else ""
+            )
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]✗[/red] Failed to read journal: {e}")
+        sys.exit(1)
+
+
+@app.command()
+@click.argument('run_id')
+@click.option('--dry-run', is_flag=True, help='Show what would be restored without executing')
+@click.option('--force', is_flag=True, help='Undo a run again even if it was already undone')
+@click.pass_context
+def undo(ctx, run_id: str, dry_run: bool, force: bool):
+    """Revert the label changes, archiving and trashing of a run."""
+    try:
+        # Check authentication
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        
+        if not credentials_manager.is_authenticated():
+            rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
+            sys.exit(1)
+        
+        action_journal = _open_journal(credentials_manager)
+        run = action_journal.get_run(run_id)
+        if not run:
+            rprint(f"[red]✗[/red] Run not found in journal: {run_id}")
+            sys.exit(1)
+        
+        if run.undone_at and not force:
+            rprint(f"[red]✗[/red] Run {run_id} was already undone at {run.undone_at:%Y-%m-%d %H:%M}. Use --force to undo it again.")
+            sys.exit(1)
+        
+        rprint(f"Run {run_id}: {run.changed} changes by {', '.join(run.rule_names) or 'unknown rules'}")
+        if run.irreversible:
+            rprint(f"[yellow]⚠[/yellow] {run.irreversible} items were permanently deleted and can't be restored")
+        
+        if not dry_run and not click.confirm("Revert these changes?"):
+            return
+        
+        from ..core.client import GmailClient
+        
+        # Setup components
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials()
+        gmail_client = GmailClient(credentials)
+        
+        with _spinner() as progress:
+            task = progress.add_task("Restoring messages...", total=None)
+            result = action_journal.undo(gmail_client, run_id, dry_run=dry_run)
+            progress.update(task, completed=True)
+        
+        skipped_labels = action_journal.missing_labels(gmail_client, run_id)
+        if skipped_labels:
+            rprint(f"[yellow]⚠[/yellow] Labels deleted since the run are skipped: {', '.join(skipped_labels)}")
+        
+        restorable = result.processed - run.irreversible
+        if dry_run:
+            rprint(f"[bold]Would restore {restorable} items[/bold]")
+        else:
+            rprint(f"[green]✓[/green] Restored {result.succeeded} of {restorable} items")
+            if result.failed > run.irreversible:
+                rprint(f"[yellow]⚠[/yellow] {result.failed - run.irreversible} items failed. Check logs for details.")
+    
+    except AuthenticationError as e:
+        rprint(f"[red]✗[/red] Authentication error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        rprint(f"[red]✗[/red] Undo failed: {e}")
+        logger.exception("Undo error")
+        sys.exit(1)
+
+
 # Analysis commands
 @app.group()
 def analyze():
@@ -454,8 +1210,9 @@ def analyze():
 
 @analyze.command()
 @click.option('--max-messages', type=int, default=1000, help='Maximum messages to analyze')
+@click.option('--all', 'full_mailbox', is_flag=True, help='Analyze the whole mailbox')
 @click.pass_context
-def mailbox(ctx, max_messages: int):
+def mailbox(ctx, max_messages: int, full_mailbox: bool):
     """Analyze mailbox and provide insights."""
     try:
         # Check authentication
@@ -465,6 +1222,9 @@ def mailbox(ctx, max_messages: int):
             rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
             sys.exit(1)
         
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        
         # Setup components
         auth_manager = credentials_manager.get_auth_manager()
         credentials = auth_manager.get_credentials()
@@ -473,15 +1233,13 @@ def mailbox(ctx, max_messages: int):
         
         processor = EmailProcessor(gmail_client, rules_engine)
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _spinner() as progress:
             task = progress.add_task("Analyzing mailbox...", total=None)
             
             import asyncio
-            analysis = asyncio.run(processor.analyze_mailbox(max_messages=max_messages))
+            analysis = asyncio.run(processor.analyze_mailbox(
+                max_messages=None if full_mailbox else max_messages
+            ))
             
             progress.update(task, completed=True)
         
@@ -491,6 +1249,16 @@ def mailbox(ctx, max_messages: int):
         rprint(f"Unread messages: {analysis.get('unread_messages', 0)}")
         rprint(f"Old messages (>1 year): {analysis.get('old_messages', 0)}")
         rprint(f"Unique senders: {analysis.get('unique_senders', 0)}")
+        rprint(f"Total size: {analysis.get('total_size_bytes', 0) / (1024 * 1024):.1f} MB")
+        if analysis.get('missing_messages'):
+            rprint(f"[yellow]⚠[/yellow] {analysis['missing_messages']} messages couldn't be fetched and aren't counted")
+        
+        # Age distribution
+        age_buckets = analysis.get('age_buckets', {})
+        if age_buckets:
+            rprint(f"\n[bold]Message Age:[/bold]")
+            for bucket, count in age_buckets.items():
+                rprint(f"  {bucket}: {count}")
         
         # Top sender domains
         top_senders = analysis.get('top_sender_domains', [])
@@ -526,6 +1294,100 @@ def mailbox(ctx, max_messages: int):
         sys.exit(1)
 
 
+@analyze.command()
+@click.option('--max-messages', type=int, help='Limit the crawl to N messages (default: whole mailbox)')
+@click.option('--query', '-q', default='', help='Gmail search query selecting messages')
+@click.option('--top', 'top_n', type=int, default=25, help='Number of sender domains to report')
+@click.option('--output', '-o', help='Write the full report as JSON to this file')
+@click.option('--all-domains', is_flag=True, help="Include every sender domain in the JSON report, for 'rules generate'")
+@click.pass_context
+def report(ctx, max_messages: Optional[int], query: str, top_n: int, output: Optional[str], all_domains: bool):
+    """Build a whole-mailbox storage and volume report."""
+    try:
+        # Check authentication
+        credentials_manager = CredentialsManager(ctx.obj.get('config_dir'))
+        
+        if not credentials_manager.is_authenticated():
+            rprint("[red]✗[/red] Not authenticated. Run 'gmail-cleanup auth login' first.")
+            sys.exit(1)
+        
+        from ..core.client import GmailClient
+        from ..core.processor import EmailProcessor
+        
+        # Setup components
+        auth_manager = credentials_manager.get_auth_manager()
+        credentials = auth_manager.get_credentials()
+        gmail_client = GmailClient(credentials)
+        rules_engine = RulesEngine()
+        
+        processor = EmailProcessor(gmail_client, rules_engine)
+        
+        with _spinner() as progress:
+            task = progress.add_task("Crawling mailbox metadata...", total=None)
+            
+            import asyncio
+            analytics = asyncio.run(processor.build_analytics_report(
+                max_messages=max_messages,
+                query=query,
+                top_n=top_n,
+                all_domains=all_domains
+            ))
+            
+            progress.update(task, completed=True)
+        
+        processor.close()
+        
+        if 'error' in analytics:
+            rprint(f"[yellow]{analytics['error']}[/yellow]")
+            return
+        
+        if output:
+            import json
+            with open(output, 'w') as f:
+                json.dump(analytics, f, indent=2, default=str)
+            rprint(f"[green]✓[/green] Report written to {output}")
+        
+        rprint(f"[bold]Mailbox Analytics Report[/bold]")
+        rprint(f"Messages: {analytics['total_messages']}")
+        rprint(f"Total size: {analytics['total_size_bytes'] / (1024 * 1024):.1f} MB")
+        rprint(f"Sender domains: {analytics['unique_domains']}")
+        if analytics.get('missing_messages'):
+            rprint(f"[yellow]⚠[/yellow] {analytics['missing_messages']} messages couldn't be fetched and aren't counted")
+        
+        table = Table(title="Storage by Sender Domain")
+        table.add_column("Domain", style="cyan")
+        table.add_column("Messages", justify="right", style="green")
+        table.add_column("Size (MB)", justify="right", style="yellow")
+        table.add_column("Storage", justify="right")
+        table.add_column("Unread", justify="right", style="red")
+        
+        for row in analytics['domains'][:top_n]:
+            table.add_row(
+                row['domain'],
+                str(row['messages']),
+                f"{row['size_bytes'] / (1024 * 1024):.1f}",
+                f"{row['storage_share']:.1f}%",
+                str(row['unread'])
+            )
+        
+        console.print(table)
+        
+        table = Table(title="Label Coverage")
+        table.add_column("Label", style="cyan")
+        table.add_column("Messages", justify="right", style="green")
+        table.add_column("Coverage", justify="right", style="yellow")
+        
+        for row in analytics['labels'][:15]:
+            table.add_row(row['label'], str(row['messages']), f"{row['coverage']:.1f}%")
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]✗[/red] Report failed: {e}")
+        logger.exception("Report error")
+        sys.exit(1)
+
+
 # Web server command
 @app.command()
 @click.option('--host', default='localhost', help='Host to bind to')
@@ -0,0 +1,249 @@
+"""Streaming aggregation of message metadata for mailbox analysis."""
+
+import hashlib
+import heapq
+import math
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from datetime import datetime, timezone
+
+from .client import EmailMessage
+
+
+# Age buckets as (label, upper bound in days); None means unbounded
+AGE_BUCKETS: List[Tuple[str, Optional[int]]] = [
+    ('<1w', 7),
+    ('1w-1m', 30),
+    ('1m-6m', 182),
+    ('6m-1y', 365),
+    ('1y-2y', 730),
+    ('>2y', None),
+]
+
+# Size buckets as (label, upper bound in bytes); None means unbounded
+SIZE_BUCKETS: List[Tuple[str, Optional[int]]] = [
+    ('<10KB', 10 * 1024),
+    ('10KB-100KB', 100 * 1024),
+    ('100KB-1MB', 1024 * 1024),
+    ('1MB-10MB', 10 * 1024 * 1024),
+    ('>10MB', None),
+]
+
+
+def extract_domain(sender: str) -> Optional[str]:
+    """Extract the lower-cased domain from a From header value.
+
+    Args:
+        sender: Raw sender header, e.g. 'Name <user@example.com>'
+
+    Returns:
+        Domain string or None if the sender has no address
+    """
+    if '@' not in sender:
+        return None
+    return sender.split('@')[-1].strip('> ').lower() or None
+
+
+def to_utc(value: datetime) -> datetime:
+    """Normalize a datetime to UTC, treating naive values as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class SpaceSaving:
+    """Bounded heavy-hitters counter using the Space-Saving algorithm.
+
+    Keeps at most ``capacity`` keys. When a new key arrives and the table is
+    full, the key with the smallest count is evicted and the newcomer inherits
+    its count, so reported counts over-estimate by at most ``error(key)``.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """Initialize the counter.
+
+        Args:
+            capacity: Maximum number of keys tracked at once
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Count ``count`` occurrences of ``key``."""
+        self.total += count
+
+        if key in self._counts:
+            self._counts[key] += count
+            heapq.heappush(self._heap, (self._counts[key], key))
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+        else:
+            min_key, min_count = self._pop_min()
+            del self._counts[min_key]
+            del self._errors[min_key]
+            self._counts[key] = min_count + count
+            self._errors[key] = min_count
+            heapq.heappush(self._heap, (self._counts[key], key))
+
+        # Drop stale heap entries once they dominate the heap
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        """Pop the tracked key with the smallest current count."""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return key, count
+
+    def count(self, key: str) -> int:
+        """Get the (over-)estimated count for a key, 0 if untracked."""
+        return self._counts.get(key, 0)
+
+    def error(self, key: str) -> int:
+        """Get the maximum over-estimation for a tracked key."""
+        return self._errors.get(key, 0)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        """Get the ``n`` most frequent keys as (key, count) tuples."""
+        return heapq.nlargest(n, self._counts.items(), key=lambda x: x[1])
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class HyperLogLog:
+    """Fixed-memory cardinality estimator."""
+
+    def __init__(self, precision: int = 12):
+        """Initialize the estimator.
+
+        Args:
+            precision: Number of index bits; uses 2**precision bytes
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+        self.precision = precision
+        self._m = 1 << precision
+        self._registers = bytearray(self._m)
+
+    def add(self, key: str) -> None:
+        """Add a key to the set."""
+        value = int.from_bytes(
+            hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(),
+            'big'
+        )
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def cardinality(self) -> int:
+        """Estimate the number of distinct keys added."""
+        m = self._m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small sets
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+
+class MailboxAggregator:
+    """Incremental aggregator over message metadata.
+
+    Messages are consumed one at a time and only running counts are kept, so
+    memory use is bounded by ``top_k`` regardless of mailbox size.
+    """
+
+    def __init__(self, top_k: int = 1000, now: Optional[datetime] = None):
+        """Initialize the aggregator.
+
+        Args:
+            top_k: Number of sender domains tracked by the heavy-hitters sketch
+            now: Reference time for age buckets (defaults to current UTC time)
+        """
+        self.now = to_utc(now) if now else datetime.now(timezone.utc)
+        self.total_messages = 0
+        self.unread_messages = 0
+        self.total_size_bytes = 0
+        self.undated_messages = 0
+        self.domains = SpaceSaving(top_k)
+        self.unique_domains = HyperLogLog()
+        self.age_buckets: Dict[str, int] = {label: 0 for label, _ in AGE_BUCKETS}
+        self.size_histogram: Dict[str, int] = {label: 0 for label, _ in SIZE_BUCKETS}
+
+    def add(self, message: EmailMessage) -> None:
+        """Consume a single message."""
+        self.total_messages += 1
+
+        domain = extract_domain(message.sender)
+        if domain:
+            self.domains.add(domain)
+            self.unique_domains.add(domain)
+
+        if message.is_unread:
+            self.unread_messages += 1
+
+        if message.date:
+            age_days = (self.now - to_utc(message.date)).days
+            self.age_buckets[self._bucket(AGE_BUCKETS, age_days)] += 1
+        else:
+            self.undated_messages += 1
+
+        size = message.size_estimate or 0
+        self.total_size_bytes += size
+        self.size_histogram[self._bucket(SIZE_BUCKETS, size)] += 1
+
+    def add_many(self, messages: Iterable[EmailMessage]) -> None:
+        """Consume an iterable of messages."""
+        for message in messages:
+            self.add(message)
+
+    @staticmethod
+    def _bucket(buckets: List[Tuple[str, Optional[int]]], value: int) -> str:
+        """Find the label of the bucket containing ``value``."""
+        for label, upper in buckets:
+            if upper is None or value < upper:
+                return label
+        return buckets[-1][0]
+
+    @property
+    def old_messages(self) -> int:
+        """Number of messages older than one year."""
+        return self.age_buckets['1y-2y'] + self.age_buckets['>2y']
+
+    def to_dict(self, top_n: int = 20) -> Dict[str, Any]:
+        """Summarize the aggregated counts.
+
+        Args:
+            top_n: Number of top sender domains to include
+
+        Returns:
+            Dictionary with analysis results
+        """
+        return {
+            "total_messages": self.total_messages,
+            "unread_messages": self.unread_messages,
+            "old_messages": self.old_messages,
+            "top_sender_domains": self.domains.top(top_n),
+            "unique_senders": self.unique_domains.cardinality(),
+            "age_buckets": dict(self.age_buckets),
+            "size_histogram": dict(self.size_histogram),
+            "total_size_bytes": self.total_size_bytes,
+            "undated_messages": self.undated_messages,
+        }
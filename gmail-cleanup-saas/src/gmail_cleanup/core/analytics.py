@@ -0,0 +1,235 @@
+"""Whole-mailbox analytics over a MessageTable."""
+
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Iterable, Optional
+
+from .client import EmailMessage
+from .aggregator import extract_domain
+from .storage import MessageTable
+
+
+def _month_label(month: int) -> Optional[str]:
+    """Format a YYYYMM month column value as YYYY-MM."""
+    return f"{month // 100:04d}-{month % 100:02d}" if month else None
+
+
+class MailboxAnalytics:
+    """Whole-mailbox report builders over a MessageTable.
+
+    Messages are stored once, in the table. The only extra state is two
+    derived columns (sender domain index and YYYYMM month), filled in for
+    rows appended since the last report, so a single metadata crawl
+    serves every breakdown as well as any later row-level work.
+    """
+
+    def __init__(self, table: Optional[MessageTable] = None):
+        """Initialize analytics over a table.
+
+        Args:
+            table: Message table to report on (an empty one is created if None)
+        """
+        self.table = table if table is not None else MessageTable()
+
+        self.domains: List[str] = []
+        self._domain_index: Dict[str, int] = {}
+        self._sender_domains: Dict[str, int] = {}
+
+        # Derived columns, one entry per table row
+        self.domain_idx = array('I')
+        self.month = array('I')  # YYYYMM, 0 when undated
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _domain_id(self, domain: str) -> int:
+        """Intern a domain and return its column index."""
+        index = self._domain_index.get(domain)
+        if index is None:
+            index = len(self.domains)
+            self._domain_index[domain] = index
+            self.domains.append(domain)
+        return index
+
+    def add(self, message: EmailMessage) -> None:
+        """Append a message to the table."""
+        self.table.add(message)
+
+    def add_many(self, messages: Iterable[EmailMessage]) -> None:
+        """Append an iterable of messages to the table."""
+        self.table.add_many(messages)
+
+    def _sync(self) -> None:
+        """Derive the domain and month columns of rows added since the last call."""
+        table = self.table
+        for index in range(len(self.domain_idx), len(table)):
+            sender = table.senders[index]
+            domain_id = self._sender_domains.get(sender)
+            if domain_id is None:
+                domain_id = self._domain_id(extract_domain(sender) or '')
+                self._sender_domains[sender] = domain_id
+            self.domain_idx.append(domain_id)
+
+            timestamp = table.timestamps[index]
+            if timestamp != timestamp:
+                self.month.append(0)
+            else:
+                date = datetime.fromtimestamp(timestamp, timezone.utc)
+                self.month.append(date.year * 100 + date.month)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Export the columns as NumPy arrays.
+
+        Returns:
+            Dictionary of column name to array, plus the domain lookup table
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        self._sync()
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError(
+                "NumPy is required for array export. "
+                "Install with: pip install gmail-cleanup[analytics]"
+            )
+
+        return {
+            'domain_idx': np.frombuffer(self.domain_idx, dtype=np.uint32),
+            'month': np.frombuffer(self.month, dtype=np.uint32),
+            'size': np.frombuffer(self.table.sizes, dtype=np.uint64),
+            'unread': np.frombuffer(self.table.unread, dtype=np.uint8),
+            'domains': np.array(self.domains, dtype=object),
+        }
+
+    def domain_table(self) -> List[Dict[str, Any]]:
+        """Per-domain message counts, storage cost and date range, largest first.
+
+        Months are YYYY-MM strings, None for a domain with no dated messages.
+        """
+        self._sync()
+        count = [0] * len(self.domains)
+        size = [0] * len(self.domains)
+        unread = [0] * len(self.domains)
+        oldest = [0] * len(self.domains)
+        newest = [0] * len(self.domains)
+
+        for index, message_size, is_unread, month in zip(
+            self.domain_idx, self.table.sizes, self.table.unread, self.month
+        ):
+            count[index] += 1
+            size[index] += message_size
+            unread[index] += is_unread
+            if month:
+                if not oldest[index] or month < oldest[index]:
+                    oldest[index] = month
+                if month > newest[index]:
+                    newest[index] = month
+
+        total_size = sum(size) or 1
+        table = [
+            {
+                'domain': domain,
+                'messages': count[i],
+                'size_bytes': size[i],
+                'unread': unread[i],
+                'storage_share': round(size[i] / total_size * 100, 2),
+                'oldest_month': _month_label(oldest[i]),
+                'newest_month': _month_label(newest[i]),
+            }
+            for i, domain in enumerate(self.domains)
+            if domain
+        ]
+        return sorted(table, key=lambda row: row['size_bytes'], reverse=True)
+
+    def monthly_volume(self, domains: Iterable[str]) -> Dict[str, Any]:
+        """Messages per month for the given domains.
+
+        Args:
+            domains: Domains to break down
+
+        Returns:
+            Dictionary with a sorted 'months' axis and per-domain count series
+        """
+        self._sync()
+        wanted = {self._domain_index[d]: d for d in domains if d in self._domain_index}
+        counts: Dict[int, Dict[int, int]] = {index: {} for index in wanted}
+        months = set()
+
+        for index, month in zip(self.domain_idx, self.month):
+            if index in counts and month:
+                series = counts[index]
+                series[month] = series.get(month, 0) + 1
+                months.add(month)
+
+        axis = sorted(months)
+        return {
+            'months': [_month_label(m) for m in axis],
+            'domains': {
+                wanted[index]: [series.get(m, 0) for m in axis]
+                for index, series in counts.items()
+            },
+        }
+
+    def label_coverage(self) -> List[Dict[str, Any]]:
+        """Share of messages and storage carrying each label."""
+        # Rows with the same label set share a mask, so total per mask first
+        by_mask: Dict[int, List[int]] = {}
+        for mask, size in zip(self.table.label_masks, self.table.sizes):
+            totals = by_mask.get(mask)
+            if totals is None:
+                totals = by_mask[mask] = [0, 0]
+            totals[0] += 1
+            totals[1] += size
+
+        label_table = self.table.label_table
+        label_totals: Dict[str, List[int]] = {
+            label: [0, 0] for label in label_table.labels((1 << len(label_table)) - 1)
+        }
+        for mask, (messages, size) in by_mask.items():
+            for label in label_table.labels(mask):
+                label_totals[label][0] += messages
+                label_totals[label][1] += size
+
+        total = len(self) or 1
+        return sorted(
+            (
+                {
+                    'label': label,
+                    'messages': messages,
+                    'size_bytes': size,
+                    'coverage': round(messages / total * 100, 2),
+                }
+                for label, (messages, size) in label_totals.items()
+                if messages
+            ),
+            key=lambda row: row['messages'],
+            reverse=True
+        )
+
+    def report(self, top_n: int = 25, all_domains: bool = False) -> Dict[str, Any]:
+        """Build the full analytics report.
+
+        Args:
+            top_n: Number of domains to include in the storage and volume tables
+            all_domains: Also include every domain's row under 'all_domains',
+                e.g. for RuleGenerator
+
+        Returns:
+            Dictionary with storage, volume and label breakdowns
+        """
+        domains = self.domain_table()
+        top_domains = domains[:top_n]
+
+        report = {
+            'total_messages': len(self),
+            'total_size_bytes': sum(self.table.sizes),
+            'unique_domains': len(domains),
+            'domains': top_domains,
+            'monthly_volume': self.monthly_volume(row['domain'] for row in top_domains),
+            'labels': self.label_coverage(),
+        }
+        if all_domains:
+            report['all_domains'] = domains
+        return report
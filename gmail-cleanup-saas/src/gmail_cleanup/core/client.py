@@ -1,17 +1,114 @@
 """Gmail client for secure email operations."""
 
 import logging
-from typing import List, Optional, Dict, Any
+import random
+import sys
+import threading
+import time
+from typing import List, Optional, Dict, Any, Iterable, Union, Tuple, Callable
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 
-from google.auth.transport.requests import Request
+import google_auth_httplib2
+import httplib2
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from .discovery import build_gmail_service
+from .labels import LabelRegistry
+from .metrics import REGISTRY, CallRecord, MetricsRegistry
+from .quota import QUOTA_UNITS, QuotaLimiter
+
 logger = logging.getLogger(__name__)
 
+# 403 reasons that mean "slow down" rather than "forbidden"
+_RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+
+
+@lru_cache(maxsize=8192)
+def parse_header_date(date_str: str) -> Optional[datetime]:
+    """Parse an RFC 2822 Date header to a timezone-aware datetime.
+    
+    Handles trailing comments such as "(UTC)" and obsolete zone names.
+    Headers without a usable zone are assumed to be UTC. Results are cached,
+    since bulk mail repeats the same header strings.
+    
+    Args:
+        date_str: Date header value
+        
+    Returns:
+        Parsed datetime or None if parsing fails
+    """
+    if not date_str:
+        return None
+    
+    try:
+        parsed = parsedate_to_datetime(date_str.strip())
+    except (TypeError, ValueError, IndexError):
+        parsed = None
+    
+    if parsed is None:
+        logger.warning(f"Could not parse date: {date_str}")
+        return None
+    
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_internal_date(internal_date: Optional[Union[str, int]]) -> Optional[datetime]:
+    """Convert Gmail's internalDate (epoch milliseconds) to a UTC datetime.
+    
+    Args:
+        internal_date: Value of the message resource's internalDate field
+        
+    Returns:
+        Datetime or None if the value is missing or invalid
+    """
+    if internal_date is None:
+        return None
+    
+    try:
+        return datetime.fromtimestamp(int(internal_date) / 1000, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def parse_message_dates(resources: Iterable[Dict[str, Any]]) -> List[Optional[datetime]]:
+    """Resolve timestamps for a batch of message resources.
+    
+    Uses internalDate where present and falls back to the Date header,
+    parsing each distinct header string only once.
+    
+    Args:
+        resources: Gmail message resources (metadata or full format)
+        
+    Returns:
+        List of datetimes (or None) in input order
+    """
+    dates: List[Optional[datetime]] = []
+    fallback: Dict[str, List[int]] = {}
+    
+    for resource in resources:
+        date = parse_internal_date(resource.get('internalDate'))
+        if date is None:
+            header = next(
+                (h['value'] for h in resource.get('payload', {}).get('headers', [])
+                 if h['name'] == 'Date'),
+                ''
+            )
+            fallback.setdefault(header, []).append(len(dates))
+        dates.append(date)
+    
+    for header, positions in fallback.items():
+        date = parse_header_date(header)
+        for position in positions:
+            dates[position] = date
+    
+    return dates
+
 
 @dataclass
 class EmailMessage:
@@ -25,6 +122,7 @@ class EmailMessage:
     labels: List[str]
     snippet: str
     is_unread: bool
+    size_estimate: int = 0
 
 
 @dataclass
@@ -41,28 +139,144 @@ class GmailClient:
     
     SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
     
-    def __init__(self, credentials: Credentials):
+    # Gmail recommends at most 50 requests per batch HTTP call
+    METADATA_BATCH_SIZE = 50
+    METADATA_HEADERS = ['From', 'To', 'Subject', 'Date']
+    
+    # Rate limit and server errors are retried with exponential backoff
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 1.0
+    
+    def __init__(
+        self,
+        credentials: Optional[Credentials],
+        service: Optional[Any] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        quota: Optional[QuotaLimiter] = None,
+        concurrency: Optional[threading.Semaphore] = None
+    ):
         """Initialize Gmail client with OAuth2 credentials.
         
         Args:
             credentials: Google OAuth2 credentials
+            service: Already-built Gmail API service to use instead of
+                connecting with the credentials (e.g. the fake service used
+                by the benchmarks)
+            metrics: Registry recording every API call (the process-wide
+                registry by default)
+            quota: Limiter every call takes its quota units from before
+                being sent, keeping the account under its quota
+            concurrency: Semaphore held while a request is in flight,
+                shared by clients that split one worker budget
         """
         self.credentials = credentials
-        self.service = None
-        self._connect()
+        self.service = service
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.quota = quota
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._call_hooks: List[Callable[[CallRecord], None]] = [self.metrics.record_call]
+        self.label_registry = LabelRegistry(lambda: self.service, execute=self._execute)
+        if service is None:
+            self._connect()
     
     def _connect(self) -> None:
-        """Establish connection to Gmail API."""
+        """Establish connection to Gmail API.
+        
+        Expired credentials aren't refreshed here; the HTTP transport
+        refreshes them on first use, and callers sharing credentials
+        through GoogleAuthManager get them refreshed ahead of expiry.
+        """
         try:
-            if self.credentials.expired and self.credentials.refresh_token:
-                self.credentials.refresh(Request())
-            
-            self.service = build('gmail', 'v1', credentials=self.credentials)
+            self.service = build_gmail_service(self.credentials)
             logger.info("Successfully connected to Gmail API")
         except Exception as e:
             logger.error(f"Failed to connect to Gmail API: {e}")
             raise
     
+    def add_call_hook(self, hook: Callable[[CallRecord], None]) -> None:
+        """Add a function to call after every Gmail API call.
+        
+        Hooks run on the thread that made the call and receive a CallRecord
+        with the method, latency, quota units, retries and batch size.
+        
+        Args:
+            hook: Function to call with each CallRecord
+        """
+        self._call_hooks.append(hook)
+    
+    def _execute(self, request, method: str, batch_size: int = 1, batched: bool = False) -> Any:
+        """Execute an API request, retrying transient errors and reporting the call.
+        
+        Every Gmail API call goes through here, so call hooks see all of
+        them. Requests run on the calling thread's HTTP connection. Each
+        attempt first takes its quota units from the quota limiter, if
+        any, and holds the concurrency semaphore only while in flight, so
+        backoff and quota waits don't use up the shared worker budget.
+        
+        Args:
+            request: API request or batch HTTP request
+            method: API method, e.g. 'messages.list'
+            batch_size: Requests in the batch, or IDs in a bulk call
+            batched: Whether ``request`` is a batch HTTP request, which is
+                charged the quota of each request it carries
+            
+        Returns:
+            Response of the request
+        """
+        units = QUOTA_UNITS.get(method, 5) * (batch_size if batched else 1)
+        retries = 0
+        status = None
+        start = time.perf_counter()
+        
+        try:
+            while True:
+                if self.quota is not None:
+                    self.quota.acquire(units)
+                try:
+                    if self.concurrency is None:
+                        return request.execute(http=self._thread_http())
+                    with self.concurrency:
+                        return request.execute(http=self._thread_http())
+                except HttpError as e:
+                    if retries >= self.MAX_RETRIES or not self._is_retryable(e):
+                        raise
+                    retries += 1
+                    delay = self.RETRY_BACKOFF * 2 ** (retries - 1) * random.uniform(0.5, 1.5)
+                    logger.warning(f"{method} failed with {e.resp.status}, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        except HttpError as e:
+            status = e.resp.status
+            raise
+        except Exception:
+            status = 0
+            raise
+        finally:
+            self._notify_call(CallRecord(
+                method=method,
+                latency=time.perf_counter() - start,
+                quota_units=units,
+                retries=retries,
+                batch_size=batch_size,
+                status=status
+            ))
+    
+    def _is_retryable(self, error: HttpError) -> bool:
+        """Whether a failed call is worth retrying after a pause."""
+        status = error.resp.status
+        if status in self.RETRY_STATUSES:
+            return True
+        return status == 403 and any(reason in (error.content or b'') for reason in _RATE_LIMIT_REASONS)
+    
+    def _notify_call(self, call: CallRecord) -> None:
+        """Pass a finished call to every call hook."""
+        for hook in self._call_hooks:
+            try:
+                hook(call)
+            except Exception as e:
+                logger.warning(f"Call hook failed: {e}")
+    
     def search_messages(
         self, 
         query: str, 
@@ -71,6 +285,8 @@ class GmailClient:
     ) -> Dict[str, Any]:
         """Search for messages using Gmail search syntax.
         
+        Safe to call from several threads at once.
+        
         Args:
             query: Gmail search query
             max_results: Maximum number of results to return
@@ -80,12 +296,12 @@ class GmailClient:
             Dictionary with messages and next page token
         """
         try:
-            result = self.service.users().messages().list(
+            result = self._execute(self.service.users().messages().list(
                 userId='me',
                 q=query,
                 maxResults=max_results,
                 pageToken=page_token
-            ).execute()
+            ), 'messages.list')
             
             messages = result.get('messages', [])
             next_page_token = result.get('nextPageToken')
@@ -101,6 +317,54 @@ class GmailClient:
             logger.error(f"Failed to search messages: {e}")
             raise
     
+    def list_ids(
+        self,
+        query: str,
+        page_token: Optional[str] = None,
+        max_results: int = 500,
+        threads: bool = False
+    ) -> Tuple[List[str], Optional[str]]:
+        """Fetch one page of matching IDs, requesting only the ID fields.
+        
+        Lighter than search_messages() for counting and sampling, and safe
+        to call from several threads at once.
+        
+        Args:
+            query: Gmail search query
+            page_token: Token for pagination
+            max_results: Page size (at most 500)
+            threads: List threads instead of messages
+            
+        Returns:
+            Tuple of (IDs on the page, next page token or None)
+        """
+        key = 'threads' if threads else 'messages'
+        resource = self.service.users().threads() if threads else self.service.users().messages()
+        
+        result = self._execute(resource.list(
+            userId='me',
+            q=query,
+            maxResults=max_results,
+            pageToken=page_token,
+            fields=f'{key}/id,nextPageToken'
+        ), f'{key}.list')
+        
+        return [item['id'] for item in result.get(key, [])], result.get('nextPageToken')
+    
+    def get_internal_date(self, message_id: str) -> Optional[datetime]:
+        """Get the receive time of a message, requesting only that field.
+        
+        Args:
+            message_id: Gmail message ID
+            
+        Returns:
+            UTC datetime or None if unavailable
+        """
+        result = self._execute(self.service.users().messages().get(
+            userId='me', id=message_id, format='minimal', fields='internalDate'
+        ), 'messages.get')
+        return parse_internal_date(result.get('internalDate'))
+    
     def get_message_details(self, message_id: str) -> Optional[EmailMessage]:
         """Get detailed information about a specific message.
         
@@ -111,32 +375,166 @@ class GmailClient:
             EmailMessage object or None if not found
         """
         try:
-            result = self.service.users().messages().get(
+            result = self._execute(self.service.users().messages().get(
                 userId='me',
                 id=message_id,
                 format='metadata',
-                metadataHeaders=['From', 'To', 'Subject', 'Date']
-            ).execute()
-            
-            headers = {h['name']: h['value'] for h in result['payload']['headers']}
-            labels = result.get('labelIds', [])
-            
-            return EmailMessage(
-                id=result['id'],
-                thread_id=result['threadId'],
-                sender=headers.get('From', ''),
-                recipient=headers.get('To', ''),
-                subject=headers.get('Subject', ''),
-                date=self._parse_date(headers.get('Date', '')),
-                labels=labels,
-                snippet=result.get('snippet', ''),
-                is_unread='UNREAD' in labels
-            )
+                metadataHeaders=self.METADATA_HEADERS
+            ), 'messages.get')
+            
+            return self._message_from_metadata(result)
             
         except HttpError as e:
             logger.error(f"Failed to get message details for {message_id}: {e}")
             return None
     
+    def get_messages_metadata(
+        self,
+        message_ids: List[str],
+        headers: Optional[List[str]] = None
+    ) -> List[EmailMessage]:
+        """Get metadata for many messages using batched HTTP requests.
+        
+        Safe to call from several threads at once; each thread uses its own
+        HTTP connection.
+        
+        Args:
+            message_ids: List of Gmail message IDs
+            headers: Headers to fetch (From, To, Subject and Date by
+                default); fields of headers not fetched are left empty
+            
+        Returns:
+            List of EmailMessage objects, in input order, for messages found
+        """
+        messages, _ = self.fetch_messages_metadata(message_ids, headers)
+        return messages
+    
+    def fetch_messages_metadata(
+        self,
+        message_ids: List[str],
+        headers: Optional[List[str]] = None
+    ) -> Tuple[List[EmailMessage], List[str]]:
+        """Get metadata for many messages, reporting the ones that failed.
+        
+        Gmail rate limits the requests inside a batch individually, so a
+        batch can succeed while some of its requests return 429. Requests
+        failing with a retryable error are sent again in new batches with
+        exponential backoff, up to MAX_RETRIES rounds.
+        
+        Args:
+            message_ids: List of Gmail message IDs
+            headers: Headers to fetch (From, To, Subject and Date by default)
+            
+        Returns:
+            Tuple of the EmailMessage objects found, in input order, and the
+            IDs that still failed; messages deleted meanwhile are in neither
+        """
+        resources: Dict[str, Dict[str, Any]] = {}
+        retry: List[str] = []
+        failed: List[str] = []
+        
+        def _callback(request_id, response, exception):
+            if exception is None:
+                resources[request_id] = response
+            elif isinstance(exception, HttpError) and self._is_retryable(exception):
+                retry.append(request_id)
+            elif not (isinstance(exception, HttpError) and exception.resp.status == 404):
+                logger.error(f"Failed to get message details for {request_id}: {exception}")
+                failed.append(request_id)
+        
+        pending = list(message_ids)
+        for attempt in range(self.MAX_RETRIES + 1):
+            if attempt:
+                delay = self.RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"{len(pending)} metadata requests were rate limited, retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+            
+            for i in range(0, len(pending), self.METADATA_BATCH_SIZE):
+                batch_ids = pending[i:i + self.METADATA_BATCH_SIZE]
+                batch = self.service.new_batch_http_request(callback=_callback)
+                
+                for message_id in batch_ids:
+                    batch.add(
+                        self.service.users().messages().get(
+                            userId='me',
+                            id=message_id,
+                            format='metadata',
+                            metadataHeaders=headers or self.METADATA_HEADERS
+                        ),
+                        request_id=message_id
+                    )
+                
+                try:
+                    self._execute(batch, 'messages.get', len(batch_ids), batched=True)
+                except HttpError as e:
+                    logger.error(f"Batch metadata request failed: {e}")
+                    failed.extend(batch_ids)
+            
+            pending, retry = retry, []
+            if not pending:
+                break
+        
+        missing = failed + pending
+        if missing:
+            logger.error(f"Could not get metadata for {len(missing)} of {len(message_ids)} messages")
+        
+        found = [resources[i] for i in message_ids if i in resources]
+        dates = parse_message_dates(found)
+        messages = [
+            self._message_from_metadata(resource, date)
+            for resource, date in zip(found, dates)
+        ]
+        return messages, missing
+    
+    def _message_from_metadata(
+        self,
+        result: Dict[str, Any],
+        date: Optional[datetime] = None
+    ) -> EmailMessage:
+        """Build an EmailMessage from a metadata-format message resource.
+        
+        Args:
+            result: Gmail message resource
+            date: Pre-resolved timestamp; resolved from the resource if None
+        """
+        headers = {h['name']: h['value'] for h in result['payload']['headers']}
+        # Labels and senders repeat across a mailbox; share one copy of each
+        labels = [sys.intern(label) for label in result.get('labelIds', [])]
+        
+        if date is None:
+            date = (parse_internal_date(result.get('internalDate'))
+                    or self._parse_date(headers.get('Date', '')))
+        
+        return EmailMessage(
+            id=result['id'],
+            thread_id=result['threadId'],
+            sender=sys.intern(headers.get('From', '')),
+            recipient=sys.intern(headers.get('To', '')),
+            subject=headers.get('Subject', ''),
+            date=date,
+            labels=labels,
+            snippet=result.get('snippet', ''),
+            is_unread='UNREAD' in labels,
+            size_estimate=result.get('sizeEstimate', 0)
+        )
+    
+    def _thread_http(self) -> Optional[google_auth_httplib2.AuthorizedHttp]:
+        """Get an authorized HTTP connection owned by the calling thread.
+        
+        httplib2 connections are not thread-safe, so concurrent batch calls
+        each need their own.
+        """
+        if self.credentials is None:
+            return None
+        
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+    
     def mark_messages_read(self, message_ids: List[str]) -> BatchResult:
         """Mark messages as read.
         
@@ -170,16 +568,19 @@ class GmailClient:
     def add_labels(self, message_ids: List[str], labels: List[str]) -> BatchResult:
         """Add labels to messages.
         
+        Labels may be given by name or ID; names that don't exist yet are
+        created.
+        
         Args:
             message_ids: List of message IDs
-            labels: List of labels to add
+            labels: List of label names or IDs to add
             
         Returns:
             BatchResult with operation statistics
         """
         return self._batch_modify_labels(
             message_ids=message_ids,
-            add_labels=labels,
+            add_labels=self.resolve_label_ids(labels, create_missing=True),
             remove_labels=[]
         )
     
@@ -188,7 +589,7 @@ class GmailClient:
         
         Args:
             message_ids: List of message IDs  
-            labels: List of labels to remove
+            labels: List of label names or IDs to remove
             
         Returns:
             BatchResult with operation statistics
@@ -196,9 +597,51 @@ class GmailClient:
         return self._batch_modify_labels(
             message_ids=message_ids,
             add_labels=[],
-            remove_labels=labels
+            remove_labels=self.resolve_label_ids(labels)
+        )
+    
+    def modify_labels(
+        self,
+        message_ids: List[str],
+        add_labels: Optional[List[str]] = None,
+        remove_labels: Optional[List[str]] = None
+    ) -> BatchResult:
+        """Add and remove labels in the same batchModify calls.
+        
+        Unlike add_labels(), unknown labels are dropped rather than created.
+        
+        Args:
+            message_ids: List of message IDs
+            add_labels: Label names or IDs to add
+            remove_labels: Label names or IDs to remove
+        
+        Returns:
+            BatchResult with operation statistics
+        """
+        return self._batch_modify_labels(
+            message_ids=message_ids,
+            add_labels=self.resolve_label_ids(add_labels or []),
+            remove_labels=self.resolve_label_ids(remove_labels or [])
         )
     
+    def resolve_label_ids(self, labels: List[str], create_missing: bool = False) -> List[str]:
+        """Resolve label names or IDs to IDs using the cached label registry.
+        
+        Args:
+            labels: Label names or IDs
+            create_missing: Create user labels for unknown names
+            
+        Returns:
+            List of label IDs; unresolvable labels are dropped with a warning
+        """
+        resolved = self.label_registry.resolve_ids(labels, create_missing=create_missing)
+        
+        for label in labels:
+            if label not in resolved:
+                logger.warning(f"Unknown label: {label}")
+        
+        return [resolved[label] for label in labels if label in resolved]
+    
     def _batch_modify_labels(
         self,
         message_ids: List[str],
@@ -234,10 +677,11 @@ class GmailClient:
                     'removeLabelIds': remove_labels
                 }
                 
-                self.service.users().messages().batchModify(
-                    userId='me',
-                    body=body
-                ).execute()
+                self._execute(
+                    self.service.users().messages().batchModify(userId='me', body=body),
+                    'messages.batchModify',
+                    len(batch_ids)
+                )
                 
                 succeeded += len(batch_ids)
                 logger.info(f"Successfully modified {len(batch_ids)} messages")
@@ -270,10 +714,10 @@ class GmailClient:
         
         for message_id in message_ids:
             try:
-                self.service.users().messages().delete(
-                    userId='me',
-                    id=message_id
-                ).execute()
+                self._execute(
+                    self.service.users().messages().delete(userId='me', id=message_id),
+                    'messages.delete'
+                )
                 succeeded += 1
                 
             except HttpError as e:
@@ -290,6 +734,158 @@ class GmailClient:
             errors=errors
         )
     
+    def search_threads(
+        self,
+        query: str,
+        max_results: int = 500,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Search for threads using Gmail search syntax.
+        
+        Args:
+            query: Gmail search query
+            max_results: Maximum number of results to return
+            page_token: Token for pagination
+            
+        Returns:
+            Dictionary with threads and next page token
+        """
+        try:
+            result = self._execute(self.service.users().threads().list(
+                userId='me',
+                q=query,
+                maxResults=max_results,
+                pageToken=page_token
+            ), 'threads.list')
+            
+            threads = result.get('threads', [])
+            
+            logger.info(f"Found {len(threads)} threads for query: {query}")
+            return {
+                'threads': threads,
+                'nextPageToken': result.get('nextPageToken'),
+                'resultSizeEstimate': result.get('resultSizeEstimate', 0)
+            }
+            
+        except HttpError as e:
+            logger.error(f"Failed to search threads: {e}")
+            raise
+    
+    def modify_threads(
+        self,
+        thread_ids: List[str],
+        add_labels: Optional[List[str]] = None,
+        remove_labels: Optional[List[str]] = None,
+        create_missing: bool = True
+    ) -> BatchResult:
+        """Modify labels on every message of the given threads.
+        
+        Args:
+            thread_ids: List of thread IDs
+            add_labels: Label names or IDs to add
+            remove_labels: Label names or IDs to remove
+            create_missing: Create user labels for unknown names to add;
+                otherwise they are dropped, as in modify_labels()
+            
+        Returns:
+            BatchResult with operation statistics
+        """
+        body = {
+            'addLabelIds': self.resolve_label_ids(add_labels or [], create_missing=create_missing),
+            'removeLabelIds': self.resolve_label_ids(remove_labels or [])
+        }
+        
+        return self._batch_thread_requests(
+            thread_ids,
+            lambda threads, thread_id: threads.modify(userId='me', id=thread_id, body=body),
+            'modify'
+        )
+    
+    def mark_threads_read(self, thread_ids: List[str]) -> BatchResult:
+        """Mark every message of the given threads as read."""
+        return self.modify_threads(thread_ids, remove_labels=['UNREAD'])
+    
+    def trash_threads(self, thread_ids: List[str]) -> BatchResult:
+        """Move threads to trash.
+        
+        Args:
+            thread_ids: List of thread IDs to trash
+            
+        Returns:
+            BatchResult with operation statistics
+        """
+        return self._batch_thread_requests(
+            thread_ids,
+            lambda threads, thread_id: threads.trash(userId='me', id=thread_id),
+            'trash'
+        )
+    
+    def permanently_delete_threads(self, thread_ids: List[str]) -> BatchResult:
+        """Permanently delete threads.
+        
+        Args:
+            thread_ids: List of thread IDs to delete permanently
+            
+        Returns:
+            BatchResult with operation statistics
+        """
+        return self._batch_thread_requests(
+            thread_ids,
+            lambda threads, thread_id: threads.delete(userId='me', id=thread_id),
+            'delete'
+        )
+    
+    def _batch_thread_requests(self, thread_ids: List[str], make_request, operation: str) -> BatchResult:
+        """Run one per-thread request for each ID using batched HTTP calls.
+        
+        The threads API has no bulk endpoint, so requests are grouped into
+        batch HTTP calls of METADATA_BATCH_SIZE.
+        
+        Args:
+            thread_ids: List of thread IDs
+            make_request: Callable (threads resource, thread ID) -> request
+            operation: Operation name for log and error messages
+            
+        Returns:
+            BatchResult with operation statistics
+        """
+        if not thread_ids:
+            return BatchResult(0, 0, 0, [])
+        
+        succeeded = 0
+        errors = []
+        
+        def _callback(request_id, response, exception):
+            nonlocal succeeded
+            if exception is not None:
+                errors.append(f"Thread {operation} failed for {request_id}: {exception}")
+            else:
+                succeeded += 1
+        
+        for i in range(0, len(thread_ids), self.METADATA_BATCH_SIZE):
+            batch_ids = thread_ids[i:i + self.METADATA_BATCH_SIZE]
+            batch = self.service.new_batch_http_request(callback=_callback)
+            threads = self.service.users().threads()
+            
+            for thread_id in batch_ids:
+                batch.add(make_request(threads, thread_id), request_id=thread_id)
+            
+            try:
+                self._execute(batch, f'threads.{operation}', len(batch_ids), batched=True)
+            except HttpError as e:
+                errors.append(f"Thread batch {operation} failed: {e}")
+        
+        for error in errors:
+            logger.error(error)
+        logger.info(f"Thread {operation}: {succeeded} succeeded, {len(thread_ids) - succeeded} failed")
+        
+        return BatchResult(
+            processed=len(thread_ids),
+            succeeded=succeeded,
+            failed=len(thread_ids) - succeeded,
+            errors=errors
+        )
+    
     def get_labels(self) -> List[Dict[str, Any]]:
         """Get all available labels.
         
@@ -297,40 +893,122 @@ class GmailClient:
             List of label dictionaries
         """
         try:
-            result = self.service.users().labels().list(userId='me').execute()
-            return result.get('labels', [])
+            result = self._execute(self.service.users().labels().list(userId='me'), 'labels.list')
+            labels = result.get('labels', [])
+            self.label_registry.update(labels)
+            return labels
         except HttpError as e:
             logger.error(f"Failed to get labels: {e}")
             return []
     
-    def _parse_date(self, date_str: str) -> Optional[datetime]:
-        """Parse email date string to datetime object.
+    def get_profile(self) -> Dict[str, Any]:
+        """Get the mailbox profile (address, totals and current history ID).
+        
+        Returns:
+            Profile dictionary from users.getProfile
+        """
+        try:
+            return self._execute(self.service.users().getProfile(userId='me'), 'getProfile')
+        except HttpError as e:
+            logger.error(f"Failed to get profile: {e}")
+            raise
+    
+    def watch(
+        self,
+        topic_name: str,
+        label_ids: Optional[List[str]] = None,
+        label_filter_behavior: str = 'include'
+    ) -> Dict[str, Any]:
+        """Start push notifications for mailbox changes.
+        
+        Gmail publishes a message to the Pub/Sub topic whenever the mailbox
+        changes. A watch expires after seven days and should be renewed daily.
         
         Args:
-            date_str: Email date string
+            topic_name: Full Pub/Sub topic name, e.g. 'projects/p/topics/t'
+            label_ids: Only notify for changes to these labels
+            label_filter_behavior: 'include' or 'exclude' the given labels
             
         Returns:
-            Parsed datetime or None if parsing fails
+            Dictionary with the current 'historyId' and 'expiration' (epoch ms)
         """
-        if not date_str:
-            return None
+        body: Dict[str, Any] = {'topicName': topic_name}
+        if label_ids:
+            body['labelIds'] = label_ids
+            body['labelFilterBehavior'] = label_filter_behavior
         
-        # Try different date formats
-        formats = [
-            '%a, %d %b %Y %H:%M:%S %z',
-            '%a, %d %b %Y %H:%M:%S %Z',
-            '%d %b %Y %H:%M:%S %z',
-            '%a, %d %b %Y %H:%M:%S',
-        ]
+        try:
+            result = self._execute(self.service.users().watch(userId='me', body=body), 'watch')
+            logger.info(f"Watching mailbox via {topic_name} (historyId {result.get('historyId')})")
+            return result
+        except HttpError as e:
+            logger.error(f"Failed to start watch: {e}")
+            raise
+    
+    def stop_watch(self) -> None:
+        """Stop push notifications for the mailbox."""
+        try:
+            self._execute(self.service.users().stop(userId='me'), 'stop')
+            logger.info("Stopped mailbox watch")
+        except HttpError as e:
+            logger.error(f"Failed to stop watch: {e}")
+            raise
+    
+    def list_history(
+        self,
+        start_history_id: Union[str, int],
+        history_types: Optional[List[str]] = None,
+        label_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get every mailbox change since a history ID.
         
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str.strip(), fmt)
-            except ValueError:
-                continue
+        Args:
+            start_history_id: History ID to list changes after
+            history_types: Change types to include, e.g. ['messageAdded']
+            label_id: Only return changes to messages with this label
+            
+        Returns:
+            Dictionary with the 'history' records and the latest 'historyId'
+            
+        Raises:
+            HttpError: With status 404 if ``start_history_id`` is too old
+        """
+        records: List[Dict[str, Any]] = []
+        history_id = str(start_history_id)
+        page_token = None
         
-        logger.warning(f"Could not parse date: {date_str}")
-        return None
+        while True:
+            kwargs: Dict[str, Any] = {
+                'userId': 'me',
+                'startHistoryId': str(start_history_id),
+                'pageToken': page_token,
+            }
+            if history_types:
+                kwargs['historyTypes'] = history_types
+            if label_id:
+                kwargs['labelId'] = label_id
+            
+            result = self._execute(self.service.users().history().list(**kwargs), 'history.list')
+            records.extend(result.get('history', []))
+            history_id = result.get('historyId', history_id)
+            
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        
+        logger.debug(f"Fetched {len(records)} history records since {start_history_id}")
+        return {'history': records, 'historyId': history_id}
+    
+    def _parse_date(self, date_str: str) -> Optional[datetime]:
+        """Parse email date string to datetime object.
+        
+        Args:
+            date_str: Email date string
+            
+        Returns:
+            Parsed timezone-aware datetime or None if parsing fails
+        """
+        return parse_header_date(date_str)
     
     def build_search_query(
         self,
@@ -0,0 +1,53 @@
+"""Gmail API service construction from a cached discovery document."""
+
+import json
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# build_from_document() adds standard parameters to the document it is
+# given; the additions are the same every time, but mustn't run concurrently
+_build_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def gmail_discovery_document() -> Optional[Dict[str, Any]]:
+    """Load and parse the Gmail discovery document once per process.
+
+    Uses the copy bundled with google-api-python-client, so building a
+    service needs no network request.
+
+    Returns:
+        Parsed discovery document, or None if the installed client library
+        doesn't bundle one
+    """
+    from googleapiclient import discovery_cache
+
+    document = discovery_cache.get_static_doc('gmail', 'v1')
+    if document is None:
+        logger.warning("No bundled Gmail discovery document; falling back to discovery requests")
+        return None
+    return json.loads(document)
+
+
+def build_gmail_service(credentials: Any = None, http: Any = None) -> Any:
+    """Build a Gmail API service without parsing the discovery document again.
+
+    Args:
+        credentials: Google OAuth2 credentials
+        http: HTTP object to use instead of credentials
+
+    Returns:
+        Gmail API service resource
+    """
+    from googleapiclient.discovery import build, build_from_document
+
+    document = gmail_discovery_document()
+    if document is None:
+        return build('gmail', 'v1', credentials=credentials, http=http, cache_discovery=False)
+
+    with _build_lock:
+        return build_from_document(document, credentials=credentials, http=http)
@@ -0,0 +1,432 @@
+"""Match counts for rule queries without listing every result."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
+from datetime import datetime, timedelta, timezone
+
+from .client import GmailClient
+from ..rules.models import Rule, Granularity
+
+logger = logging.getLogger(__name__)
+
+
+# No mail predates Gmail; used as the lower bound of the oldest time slice
+GMAIL_EPOCH = datetime(2004, 4, 1, tzinfo=timezone.utc)
+
+# Time slices are bounded at these ages (days); denser for recent mail
+SLICE_AGES_DAYS = [7, 30, 91, 182, 365, 730, 1461, 2922]
+
+# (after, before) bounds of a time slice; None means unbounded
+TimeSlice = Tuple[Optional[datetime], Optional[datetime]]
+
+
+@dataclass
+class MatchEstimate:
+    """Number of messages (or threads) matching a query.
+
+    ``count`` is exact when ``exact`` is set; otherwise it is a point
+    estimate within the band [``low``, ``high``].
+    """
+    query: str
+    count: int
+    low: int
+    high: int
+    exact: bool
+    list_calls: int = 0
+    get_calls: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+def time_slices(now: datetime, ages_days: Iterable[int] = SLICE_AGES_DAYS) -> List[TimeSlice]:
+    """Split all time into slices, newest first.
+
+    Args:
+        now: Upper bound of the newest bounded slice
+        ages_days: Slice boundaries as ages in days, ascending
+
+    Returns:
+        List of (after, before) bounds; the newest slice has no upper bound
+        (so mail arriving meanwhile isn't missed) and the oldest no lower one
+    """
+    boundaries = [now - timedelta(days=days) for days in ages_days]
+    slices: List[TimeSlice] = []
+    before = None
+    for after in boundaries:
+        slices.append((after, before))
+        before = after
+    slices.append((None, before))
+    return slices
+
+
+def slice_query(query: str, after: Optional[datetime], before: Optional[datetime]) -> str:
+    """Restrict a Gmail query to a time slice."""
+    parts = [f"({query})"] if query else []
+    if after is not None:
+        parts.append(f"after:{int(after.timestamp())}")
+    if before is not None:
+        parts.append(f"before:{int(before.timestamp())}")
+    return ' '.join(parts)
+
+
+class MatchEstimator:
+    """Counts query matches in parallel without holding result IDs.
+
+    Exact mode reads the first page of each query; only queries with more
+    matches than fit on it are split into time slices, each paged through
+    concurrently, keeping only a running count. Fast mode reads one page
+    per query; queries with more matches than fit on a page are
+    extrapolated from the receive times of sampled results in each older
+    slice. Thread counts are bounded by the matching messages instead.
+    The work for many queries is submitted together, so a large rule set
+    is counted in roughly the time of its largest query.
+    """
+
+    def __init__(
+        self,
+        gmail_client: GmailClient,
+        max_workers: int = 8,
+        now: Optional[datetime] = None
+    ):
+        """Initialize the estimator.
+
+        Args:
+            gmail_client: Gmail API client
+            max_workers: Maximum number of concurrent API calls
+            now: Fixed reference time (defaults to the time of each call)
+        """
+        self.gmail_client = gmail_client
+        self._now = now
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._totals: Optional[Dict[str, int]] = None
+
+    @property
+    def now(self) -> datetime:
+        """Reference time for time slices."""
+        return self._now or datetime.now(timezone.utc)
+
+    def close(self) -> None:
+        """Shut down the worker threads."""
+        self.executor.shutdown(wait=True)
+
+    def _mailbox_total(self, threads: bool) -> Optional[int]:
+        """Total messages (or threads) in the mailbox; caps estimates."""
+        if self._totals is None:
+            try:
+                profile = self.gmail_client.get_profile()
+                self._totals = {
+                    'messages': int(profile.get('messagesTotal', 0)),
+                    'threads': int(profile.get('threadsTotal', 0)),
+                }
+            except Exception as e:
+                logger.warning(f"Could not read mailbox totals: {e}")
+                self._totals = {}
+        return self._totals.get('threads' if threads else 'messages') or None
+
+    def count(self, query: str, threads: bool = False, limit: Optional[int] = None) -> MatchEstimate:
+        """Count the matches of a single query exactly.
+
+        Args:
+            query: Gmail search query
+            threads: Count threads instead of messages
+            limit: Stop counting once this many matches are found
+
+        Returns:
+            Exact MatchEstimate (capped at ``limit``)
+        """
+        return self.estimate_queries([(query, threads)], exact=True, limit=limit)[0]
+
+    def estimate(self, query: str, threads: bool = False) -> MatchEstimate:
+        """Estimate the matches of a single query from sampled pages."""
+        return self.estimate_queries([(query, threads)])[0]
+
+    def estimate_rules(
+        self,
+        rules: List[Rule],
+        build_query: Callable[[Rule], str],
+        exact: bool = False
+    ) -> Dict[str, MatchEstimate]:
+        """Count the matches of many rules at once.
+
+        Args:
+            rules: Rules to count
+            build_query: Builds a rule's Gmail search query, e.g.
+                EmailProcessor._build_search_query
+            exact: Count exactly instead of estimating
+
+        Returns:
+            Mapping of rule ID to its MatchEstimate
+        """
+        queries = [
+            (build_query(rule), rule.granularity == Granularity.THREAD)
+            for rule in rules
+        ]
+        # Rules sharing a query share its count
+        unique = list(dict.fromkeys(queries))
+        estimates = dict(zip(unique, self.estimate_queries(unique, exact=exact)))
+        return {rule.id: estimates[key] for rule, key in zip(rules, queries)}
+
+    def estimate_queries(
+        self,
+        queries: List[Tuple[str, bool]],
+        exact: bool = False,
+        limit: Optional[int] = None
+    ) -> List[MatchEstimate]:
+        """Count the matches of many queries at once.
+
+        Args:
+            queries: (query, threads) tuples
+            exact: Count exactly instead of estimating
+            limit: Exact mode only; stop counting once this many matches are
+                found (pages sequentially, newest first)
+
+        Returns:
+            List of MatchEstimate, in input order
+        """
+        if exact:
+            return self._count_exact(queries, limit)
+        return self._estimate_fast(queries)
+
+    def _count_exact(self, queries: List[Tuple[str, bool]], limit: Optional[int]) -> List[MatchEstimate]:
+        # Phase 1: the first page of every query; most rules fit on one page
+        first_pages = [
+            self.executor.submit(self.gmail_client.list_ids, query, threads=threads)
+            for query, threads in queries
+        ]
+
+        # Phase 2: count the rest of each query with more than one page
+        slices = time_slices(self.now)
+        pending: List[Tuple[int, list, Optional[Exception]]] = []
+        for (query, threads), future in zip(queries, first_pages):
+            try:
+                ids, page_token = future.result()
+            except Exception as e:
+                pending.append((0, [], e))
+                continue
+
+            if not page_token or (limit and len(ids) >= limit):
+                pending.append((len(ids), [], None))
+            elif limit or threads:
+                # A thread can match in several slices, and a limit needs
+                # newest-first paging; keep paging in a single sequence
+                remaining = limit - len(ids) if limit else None
+                pending.append((len(ids), [
+                    self.executor.submit(self._count_pages, query, threads, remaining, page_token)
+                ], None))
+            else:
+                # Recount the whole query in time slices, paged concurrently
+                pending.append((0, [
+                    self.executor.submit(self._count_pages, slice_query(query, after, before), threads, None)
+                    for after, before in slices
+                ], None))
+
+        results = []
+        for (query, _), (total, query_futures, error) in zip(queries, pending):
+            calls = 1
+            try:
+                if error is not None:
+                    raise error
+                for future in query_futures:
+                    count, pages = future.result()
+                    total += count
+                    calls += pages
+            except Exception as e:
+                logger.error(f"Failed to count matches for query '{query}': {e}")
+                results.append(MatchEstimate(query, 0, 0, 0, False, calls, error=str(e)))
+                continue
+
+            if limit:
+                total = min(total, limit)
+            results.append(MatchEstimate(query, total, total, total, True, calls))
+        return results
+
+    def _count_pages(
+        self,
+        query: str,
+        threads: bool,
+        limit: Optional[int],
+        page_token: Optional[str] = None
+    ) -> Tuple[int, int]:
+        """Page through a query, returning (match count, list calls)."""
+        count, calls = 0, 0
+        while True:
+            ids, page_token = self.gmail_client.list_ids(query, page_token=page_token, threads=threads)
+            calls += 1
+            count += len(ids)
+            if not page_token or (limit and count >= limit):
+                return count, calls
+
+    def _estimate_fast(self, queries: List[Tuple[str, bool]]) -> List[MatchEstimate]:
+        # Phase 1: the newest page of every query; most rules fit on one page
+        first_pages = [
+            self.executor.submit(self._sample_slice, query, threads, None, None)
+            for query, threads in queries
+        ]
+
+        # Phase 2: sample the slices older than each full first page
+        pending: List[Tuple[Dict[str, Any], list]] = []
+        thread_fallbacks: Dict[int, str] = {}
+        for index, ((query, threads), future) in enumerate(zip(queries, first_pages)):
+            try:
+                first = future.result()
+            except Exception as e:
+                logger.error(f"Failed to estimate matches for query '{query}': {e}")
+                pending.append(({'error': str(e)}, []))
+                continue
+
+            older = []
+            if not first['complete'] and threads:
+                # A thread spans many dates, so thread pages can't be
+                # extrapolated by time; bound them by the matching messages
+                thread_fallbacks[index] = query
+            elif not first['complete'] and first['oldest'] is not None:
+                older = [
+                    self.executor.submit(self._sample_slice, query, threads, after, before)
+                    for after, before in self._slices_before(first['oldest'])
+                ]
+                # The first page is exact back to its oldest result
+                first = dict(first, low=first['seen'], high=first['seen'], estimate=first['seen'])
+            pending.append((first, older))
+
+        message_estimates = dict(zip(
+            thread_fallbacks,
+            self._estimate_fast([(query, False) for query in thread_fallbacks.values()])
+        )) if thread_fallbacks else {}
+
+        results = []
+        for index, ((query, threads), (first, older)) in enumerate(zip(queries, pending)):
+            if 'error' in first:
+                results.append(MatchEstimate(query, 0, 0, 0, False, error=first['error']))
+                continue
+
+            if index in message_estimates:
+                results.append(self._bound_threads(query, first, message_estimates[index]))
+                continue
+
+            samples = [first]
+            try:
+                samples.extend(future.result() for future in older)
+            except Exception as e:
+                logger.error(f"Failed to estimate matches for query '{query}': {e}")
+                results.append(MatchEstimate(query, 0, 0, 0, False, error=str(e)))
+                continue
+
+            results.append(self._combine(query, threads, samples))
+        return results
+
+    def _bound_threads(self, query: str, first: Dict[str, Any], messages: MatchEstimate) -> MatchEstimate:
+        """Estimate a thread count from the count of matching messages.
+
+        Every matching thread holds at least one matching message, so the
+        message estimate is an upper bound; the thread page read so far is
+        the lower bound.
+        """
+        if messages.error:
+            return MatchEstimate(query, 0, 0, 0, False, error=messages.error)
+
+        high = messages.high
+        total = self._mailbox_total(threads=True)
+        if total:
+            high = min(high, total)
+        high = max(high, first['seen'])
+
+        return MatchEstimate(
+            query=query,
+            count=min(messages.count, high),
+            low=first['seen'],
+            high=high,
+            exact=False,
+            list_calls=first['list_calls'] + messages.list_calls,
+            get_calls=first['get_calls'] + messages.get_calls
+        )
+
+    def _slices_before(self, oldest: datetime) -> List[TimeSlice]:
+        """Time slices covering everything older than ``oldest``."""
+        slices = []
+        for after, before in time_slices(self.now):
+            if after is not None and after >= oldest:
+                continue
+            if before is None or before > oldest:
+                before = oldest
+            slices.append((after, before))
+        return slices
+
+    def _sample_slice(
+        self,
+        query: str,
+        threads: bool,
+        after: Optional[datetime],
+        before: Optional[datetime]
+    ) -> Dict[str, Any]:
+        """Read one page of a time slice and extrapolate its total.
+
+        The receive times of the middle and last result on a full page give
+        the match rate over the two halves of the page; extrapolating over
+        the rest of the slice with the lower and higher rate bounds the
+        estimate, and the overall rate gives the point estimate.
+        """
+        ids, next_token = self.gmail_client.list_ids(
+            slice_query(query, after, before), threads=threads
+        )
+        seen = len(ids)
+        sample = {
+            'seen': seen, 'estimate': seen, 'low': seen, 'high': seen,
+            'complete': not next_token, 'oldest': None, 'list_calls': 1, 'get_calls': 0,
+        }
+        if not next_token or threads:
+            return sample
+
+        middle = self.gmail_client.get_internal_date(ids[seen // 2 - 1])
+        oldest = self.gmail_client.get_internal_date(ids[-1])
+        sample['get_calls'] = 2
+        if middle is None or oldest is None:
+            sample['high'] = None  # Unbounded
+            return sample
+
+        newest = before or self.now
+        start = after or GMAIL_EPOCH
+        remaining = max((oldest - start).total_seconds(), 0.0)
+
+        def _rate(count: int, span: timedelta) -> float:
+            return count / max(span.total_seconds(), 1.0)
+
+        overall = _rate(seen, newest - oldest)
+        rates = (_rate(seen // 2, newest - middle), _rate(seen - seen // 2, middle - oldest))
+
+        sample.update(
+            oldest=oldest,
+            estimate=seen + overall * remaining,
+            low=seen + min(rates) * remaining,
+            high=seen + max(rates) * remaining,
+        )
+        return sample
+
+    def _combine(self, query: str, threads: bool, samples: List[Dict[str, Any]]) -> MatchEstimate:
+        """Sum slice samples into one estimate, capped by the mailbox size."""
+        exact = all(sample['complete'] for sample in samples)
+        estimate = sum(sample['estimate'] for sample in samples)
+        low = sum(sample['low'] for sample in samples)
+        bounded = all(sample['high'] is not None for sample in samples)
+        high = sum(sample['high'] for sample in samples) if bounded else estimate
+
+        if not exact:
+            total = self._mailbox_total(threads)
+            if total:
+                high = min(high, total) if bounded else max(total, estimate)
+                estimate = min(estimate, total)
+            low = min(low, estimate)
+
+        return MatchEstimate(
+            query=query,
+            count=int(round(estimate)),
+            low=int(low),
+            high=int(round(high)),
+            exact=exact,
+            list_calls=sum(sample['list_calls'] for sample in samples),
+            get_calls=sum(sample['get_calls'] for sample in samples)
+        )
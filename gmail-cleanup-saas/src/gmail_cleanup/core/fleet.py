@@ -0,0 +1,242 @@
+"""Run cleanup rules for several Gmail accounts at once."""
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import GmailClient
+from .journal import ActionJournal
+from .metrics import MetricsRegistry
+from .processor import EmailProcessor, ProcessingResult
+from .quota import DEFAULT_QUOTA_PER_SECOND, QuotaLimiter
+from ..auth.oauth import AuthenticationError, CredentialsManager
+from ..rules.engine import RulesEngine
+
+logger = logging.getLogger(__name__)
+
+# Builds an account's client; called with the account and GmailClient keyword arguments
+ClientFactory = Callable[..., GmailClient]
+
+
+@dataclass
+class Account:
+    """One account of a fleet, identified by its configuration directory.
+
+    Paths may start with ~. Unset limits fall back to the FleetRunner's
+    defaults.
+    """
+    config_dir: str
+    name: str = ''
+    rules_file: Optional[str] = None
+    quota_per_second: Optional[float] = None
+    max_workers: Optional[int] = None
+
+    def __post_init__(self):
+        self.config_dir = str(Path(self.config_dir).expanduser())
+        if self.rules_file:
+            self.rules_file = str(Path(self.rules_file).expanduser())
+        if not self.name:
+            self.name = Path(self.config_dir).name or self.config_dir
+
+    def resolve_rules_file(self, default: Optional[str] = None) -> Optional[str]:
+        """Get the rules file to run: the account's own, the fleet default,
+        or rules.json in the configuration directory if there is one."""
+        if self.rules_file:
+            return self.rules_file
+        if default:
+            return default
+        candidate = Path(self.config_dir) / 'rules.json'
+        return str(candidate) if candidate.exists() else None
+
+
+@dataclass
+class AccountResult:
+    """Outcome of running one account's rules."""
+    account: Account
+    results: List[ProcessingResult] = field(default_factory=list)
+    error: Optional[str] = None
+    duration: float = 0.0
+    # Seconds calls spent waiting for the account's quota
+    quota_wait: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    @property
+    def run_ids(self) -> List[str]:
+        """Journal run IDs of the changes made, for undo."""
+        return sorted({
+            result.run_id for result in self.results
+            if result.run_id and result.batch_result.succeeded
+        })
+
+
+def load_accounts(path: str) -> List[Account]:
+    """Load accounts from a JSON fleet file.
+
+    The file holds a list of accounts, or an object with an "accounts" list.
+    Each account is a configuration directory path or an object with the
+    fields of Account.
+
+    Args:
+        path: Fleet file path
+
+    Returns:
+        Accounts in file order
+
+    Raises:
+        ValueError: If an entry is not a path or account object
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    entries = data.get('accounts', []) if isinstance(data, dict) else data
+    accounts = []
+    for entry in entries:
+        if isinstance(entry, str):
+            accounts.append(Account(config_dir=entry))
+        elif isinstance(entry, dict) and entry.get('config_dir'):
+            accounts.append(Account(**entry))
+        else:
+            raise ValueError(f"Invalid account in {path}: {entry!r}")
+    return accounts
+
+
+def connect_account(account: Account, **options: Any) -> GmailClient:
+    """Build a client with an account's stored credentials.
+
+    Never starts the browser sign-in flow, since accounts run unattended.
+
+    Args:
+        account: Account to connect
+        **options: GmailClient keyword arguments
+
+    Returns:
+        Connected Gmail client
+
+    Raises:
+        AuthenticationError: If the account has no usable credentials
+    """
+    credentials_manager = CredentialsManager(account.config_dir)
+    credentials = credentials_manager.get_auth_manager().get_credentials(interactive=False)
+    if credentials is None:
+        raise AuthenticationError(
+            f"Not authenticated; run 'gmail-cleanup --config-dir {account.config_dir} auth login'"
+        )
+    return GmailClient(credentials, **options)
+
+
+class FleetRunner:
+    """Runs each account's rules concurrently under shared limits.
+
+    Every account gets its own quota limiter and worker threads, while a
+    semaphore shared by all accounts caps the Gmail API requests in flight
+    across the fleet. Accounts don't wait for each other, so a fleet run
+    takes about as long as its slowest account. A failing account is
+    reported in its result and doesn't stop the others.
+    """
+
+    def __init__(
+        self,
+        accounts: List[Account],
+        max_workers: int = 16,
+        workers_per_account: int = 4,
+        quota_per_second: float = DEFAULT_QUOTA_PER_SECOND,
+        rules_file: Optional[str] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        client_factory: Optional[ClientFactory] = None
+    ):
+        """Initialize the runner.
+
+        Args:
+            accounts: Accounts to run
+            max_workers: Most Gmail API requests in flight across all accounts
+            workers_per_account: Worker threads per account
+            quota_per_second: Quota units per second per account
+            rules_file: Rules file for accounts without their own
+            metrics: Registry recording API calls (the process-wide
+                registry by default)
+            client_factory: Function building an account's client, called
+                with the account and GmailClient keyword arguments
+                (connect_account by default)
+        """
+        self.accounts = accounts
+        self.max_workers = max_workers
+        self.workers_per_account = workers_per_account
+        self.quota_per_second = quota_per_second
+        self.rules_file = rules_file
+        self.metrics = metrics
+        self.client_factory = client_factory or connect_account
+        self.concurrency = threading.BoundedSemaphore(max_workers)
+
+    async def run(
+        self,
+        dry_run: bool = False,
+        max_messages_per_rule: Optional[int] = None
+    ) -> List[AccountResult]:
+        """Run every account's enabled rules.
+
+        Args:
+            dry_run: If True, only analyze without making changes
+            max_messages_per_rule: Limit number of messages processed per rule
+
+        Returns:
+            One result per account, in account order
+        """
+        logger.info(f"Running {len(self.accounts)} accounts with {self.max_workers} workers (dry_run={dry_run})")
+        return list(await asyncio.gather(*(
+            self._run_account(account, dry_run, max_messages_per_rule)
+            for account in self.accounts
+        )))
+
+    async def _run_account(
+        self,
+        account: Account,
+        dry_run: bool,
+        max_messages_per_rule: Optional[int]
+    ) -> AccountResult:
+        """Run one account's rules, capturing any failure in the result."""
+        result = AccountResult(account)
+        quota = QuotaLimiter(account.quota_per_second or self.quota_per_second)
+        processor: Optional[EmailProcessor] = None
+        start = time.perf_counter()
+        loop = asyncio.get_event_loop()
+
+        try:
+            options: Dict[str, Any] = {'quota': quota, 'concurrency': self.concurrency}
+            if self.metrics is not None:
+                options['metrics'] = self.metrics
+
+            # Loading credentials and building the service block
+            client = await loop.run_in_executor(
+                None, functools.partial(self.client_factory, account, **options)
+            )
+            rules_engine = RulesEngine(account.resolve_rules_file(self.rules_file))
+            processor = EmailProcessor(
+                client,
+                rules_engine,
+                max_workers=account.max_workers or self.workers_per_account,
+                journal=ActionJournal(str(Path(account.config_dir) / 'journal.jsonl'))
+            )
+            result.results = await processor.process_all_rules(
+                dry_run=dry_run,
+                max_messages_per_rule=max_messages_per_rule
+            )
+        except Exception as e:
+            logger.error(f"Account {account.name} failed: {e}")
+            result.error = str(e)
+        finally:
+            if processor is not None:
+                processor.close()
+            result.duration = time.perf_counter() - start
+            result.quota_wait = quota.waited
+
+        logger.info(f"Account {account.name} finished in {result.duration:.2f}s")
+        return result
@@ -0,0 +1,374 @@
+"""Append-only journal of rule actions, used to undo them."""
+
+import base64
+import json
+import logging
+import os
+import threading
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime
+
+if TYPE_CHECKING:
+    # Imported in undo(), so listing runs doesn't load the Google API client
+    from .client import GmailClient, BatchResult
+
+logger = logging.getLogger(__name__)
+
+
+# IDs per journal line, so a 100k-message run doesn't become one huge line
+CHUNK_SIZE = 5000
+
+MESSAGE = 'message'
+THREAD = 'thread'
+
+
+def encode_ids(ids: Iterable[str]) -> str:
+    """Compress a list of message or thread IDs to a base64 string."""
+    return base64.b64encode(zlib.compress('\n'.join(ids).encode('utf-8'), 9)).decode('ascii')
+
+
+def decode_ids(data: str) -> List[str]:
+    """Reverse encode_ids()."""
+    if not data:
+        return []
+    return zlib.decompress(base64.b64decode(data)).decode('utf-8').split('\n')
+
+
+@dataclass
+class JournalEntry:
+    """One chunk of IDs changed by a rule action during a run.
+
+    Labels are stored as IDs, so a later rename doesn't affect undo.
+    """
+    run_id: str
+    timestamp: datetime
+    ids: List[str]
+    granularity: str = MESSAGE
+    added_labels: List[str] = field(default_factory=list)
+    removed_labels: List[str] = field(default_factory=list)
+    deleted: bool = False
+    rule_id: Optional[str] = None
+    rule_name: Optional[str] = None
+
+    @property
+    def reversible(self) -> bool:
+        """Whether the change can be undone (permanent deletes can't)."""
+        return not self.deleted
+
+    def to_record(self) -> Dict:
+        """Convert to the JSON record written to the journal."""
+        return {
+            'kind': 'action',
+            'run_id': self.run_id,
+            'at': self.timestamp.isoformat(),
+            'rule_id': self.rule_id,
+            'rule': self.rule_name,
+            'granularity': self.granularity,
+            'added': self.added_labels,
+            'removed': self.removed_labels,
+            'deleted': self.deleted,
+            'count': len(self.ids),
+            'ids': encode_ids(self.ids)
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict) -> 'JournalEntry':
+        """Create an entry from a journal record."""
+        return cls(
+            run_id=record['run_id'],
+            timestamp=datetime.fromisoformat(record['at']),
+            ids=decode_ids(record['ids']),
+            granularity=record.get('granularity', MESSAGE),
+            added_labels=record.get('added', []),
+            removed_labels=record.get('removed', []),
+            deleted=record.get('deleted', False),
+            rule_id=record.get('rule_id'),
+            rule_name=record.get('rule')
+        )
+
+
+@dataclass
+class JournalRun:
+    """Summary of one run in the journal."""
+    run_id: str
+    started_at: datetime
+    finished_at: datetime
+    rule_names: List[str] = field(default_factory=list)
+    changed: int = 0
+    irreversible: int = 0
+    undone_at: Optional[datetime] = None
+
+
+@dataclass
+class UndoStep:
+    """One coalesced inverse change: the same labels added and removed on many IDs."""
+    granularity: str
+    add_labels: List[str]
+    remove_labels: List[str]
+    ids: List[str]
+
+
+class ActionJournal:
+    """Append-only JSON-lines journal of the changes made by each run.
+
+    Each line records one chunk of message (or thread) IDs, stored as a
+    zlib-compressed list, along with the label IDs the action added and
+    removed. Undoing a run computes the net inverse per ID and groups IDs
+    with the same inverse, so restoring a large run takes a handful of
+    batchModify calls per thousand messages.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the journal.
+
+        Args:
+            path: Journal file; created on first write
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_run_id() -> str:
+        """Generate a run ID that sorts by start time."""
+        return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def record(
+        self,
+        run_id: str,
+        ids: List[str],
+        added_labels: Optional[List[str]] = None,
+        removed_labels: Optional[List[str]] = None,
+        granularity: str = MESSAGE,
+        deleted: bool = False,
+        rule_id: Optional[str] = None,
+        rule_name: Optional[str] = None
+    ) -> int:
+        """Append the change made to a set of IDs.
+
+        Args:
+            run_id: Run the change belongs to
+            ids: Message IDs (thread IDs for thread granularity)
+            added_labels: Label IDs the action added
+            removed_labels: Label IDs the action removed
+            granularity: MESSAGE or THREAD
+            deleted: Whether the IDs were permanently deleted
+            rule_id: ID of the rule that made the change
+            rule_name: Name of the rule that made the change
+
+        Returns:
+            Number of journal lines written
+        """
+        if not ids:
+            return 0
+
+        now = datetime.now()
+        lines = []
+        for i in range(0, len(ids), CHUNK_SIZE):
+            entry = JournalEntry(
+                run_id=run_id,
+                timestamp=now,
+                ids=ids[i:i + CHUNK_SIZE],
+                granularity=granularity,
+                added_labels=list(added_labels or []),
+                removed_labels=list(removed_labels or []),
+                deleted=deleted,
+                rule_id=rule_id,
+                rule_name=rule_name
+            )
+            lines.append(json.dumps(entry.to_record()))
+
+        self._append(lines)
+        return len(lines)
+
+    def _append(self, lines: List[str]) -> None:
+        """Write lines to the end of the journal and sync them to disk."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(''.join(line + '\n' for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _records(self) -> Iterator[Dict]:
+        """Read the raw journal records, skipping unreadable lines."""
+        if not self.path.exists():
+            return
+
+        with open(self.path) as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Most likely a line cut short by a crash mid-write
+                    logger.warning(f"Skipping unreadable journal line {number} in {self.path}")
+
+    def entries(self, run_id: Optional[str] = None) -> Iterator[JournalEntry]:
+        """Iterate over journal entries in the order they were written.
+
+        Args:
+            run_id: Only return entries of this run
+
+        Returns:
+            Iterator of JournalEntry objects
+        """
+        for record in self._records():
+            if record.get('kind') != 'action':
+                continue
+            if run_id is not None and record.get('run_id') != run_id:
+                continue
+            yield JournalEntry.from_record(record)
+
+    def runs(self) -> List[JournalRun]:
+        """Summarize the runs in the journal, oldest first."""
+        runs: Dict[str, JournalRun] = {}
+
+        for record in self._records():
+            run_id = record.get('run_id')
+            at = datetime.fromisoformat(record['at'])
+
+            if record.get('kind') == 'undo':
+                if run_id in runs:
+                    runs[run_id].undone_at = at
+                continue
+
+            run = runs.get(run_id)
+            if run is None:
+                run = runs[run_id] = JournalRun(run_id=run_id, started_at=at, finished_at=at)
+            run.finished_at = at
+
+            name = record.get('rule')
+            if name and name not in run.rule_names:
+                run.rule_names.append(name)
+
+            if record.get('deleted'):
+                run.irreversible += record.get('count', 0)
+            else:
+                run.changed += record.get('count', 0)
+
+        return list(runs.values())
+
+    def get_run(self, run_id: str) -> Optional[JournalRun]:
+        """Find a run by its ID."""
+        return next((run for run in self.runs() if run.run_id == run_id), None)
+
+    def plan_undo(self, run_id: str) -> Tuple[List[UndoStep], int]:
+        """Work out the changes that reverse a run.
+
+        Entries are reversed newest first, so an ID touched by several rules
+        ends up with a single net change. IDs needing the same change are
+        grouped into one step.
+
+        Args:
+            run_id: Run to undo
+
+        Returns:
+            Tuple of (undo steps, number of permanently deleted IDs that
+            can't be restored)
+        """
+        inverse: Dict[Tuple[str, str], Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        irreversible = 0
+
+        for entry in reversed(list(self.entries(run_id))):
+            if not entry.reversible:
+                irreversible += len(entry.ids)
+                continue
+
+            # The inverse of the entry adds what it removed and vice versa
+            undo_add = frozenset(entry.removed_labels)
+            undo_remove = frozenset(entry.added_labels)
+            for item_id in entry.ids:
+                key = (entry.granularity, item_id)
+                add, remove = inverse.get(key, (frozenset(), frozenset()))
+                inverse[key] = ((add - undo_remove) | undo_add, (remove - undo_add) | undo_remove)
+
+        groups: Dict[Tuple[str, FrozenSet[str], FrozenSet[str]], List[str]] = {}
+        for (granularity, item_id), (add, remove) in inverse.items():
+            if add or remove:
+                groups.setdefault((granularity, add, remove), []).append(item_id)
+
+        steps = [
+            UndoStep(granularity, sorted(add), sorted(remove), ids)
+            for (granularity, add, remove), ids in groups.items()
+        ]
+        return steps, irreversible
+
+    def missing_labels(self, client: 'GmailClient', run_id: str) -> List[str]:
+        """Labels a run changed that no longer exist, so undo skips them.
+
+        Args:
+            client: Gmail client for the account the run was made on
+            run_id: Run to check
+
+        Returns:
+            Sorted label IDs
+        """
+        steps, _ = self.plan_undo(run_id)
+        return self._missing_labels(client, steps)
+
+    @staticmethod
+    def _missing_labels(client: 'GmailClient', steps: List[UndoStep]) -> List[str]:
+        recorded = {label for step in steps for label in step.add_labels + step.remove_labels}
+        return sorted(recorded - set(client.label_registry.resolve_ids(recorded)))
+
+    def undo(self, client: 'GmailClient', run_id: str, dry_run: bool = False) -> 'BatchResult':
+        """Reverse the changes a run made.
+
+        Message changes are replayed with batchModify, 1000 IDs per call;
+        thread changes with batched threads.modify requests. Labels deleted
+        since the run are skipped, not recreated, and listed in the errors.
+        The undo is recorded in the journal.
+
+        Args:
+            client: Gmail client for the account the run was made on
+            run_id: Run to undo
+            dry_run: Only count what would be restored
+
+        Returns:
+            BatchResult of the restore; permanently deleted IDs are counted
+            as failed
+        """
+        from .client import BatchResult
+
+        steps, irreversible = self.plan_undo(run_id)
+        total = sum(len(step.ids) for step in steps)
+
+        errors = []
+        if irreversible:
+            errors.append(f"{irreversible} permanently deleted items can't be restored")
+
+        # Labels deleted since the run can't be restored; never recreate them
+        skipped = self._missing_labels(client, steps)
+        if skipped:
+            errors.append(f"Skipped {len(skipped)} labels that no longer exist: {', '.join(skipped)}")
+
+        if dry_run:
+            return BatchResult(total + irreversible, total, irreversible, errors)
+
+        succeeded = 0
+        failed = irreversible
+        for step in steps:
+            if step.granularity == THREAD:
+                result = client.modify_threads(
+                    step.ids, step.add_labels, step.remove_labels, create_missing=False
+                )
+            else:
+                result = client.modify_labels(step.ids, step.add_labels, step.remove_labels)
+            succeeded += result.succeeded
+            failed += result.failed
+            errors.extend(result.errors)
+
+        self._append([json.dumps({
+            'kind': 'undo',
+            'run_id': run_id,
+            'at': datetime.now().isoformat(),
+            'restored': succeeded
+        })])
+
+        logger.info(f"Undid run {run_id}: {succeeded} restored, {failed} failed")
+        return BatchResult(total + irreversible, succeeded, failed, errors)
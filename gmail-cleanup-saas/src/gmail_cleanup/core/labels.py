@@ -0,0 +1,206 @@
+"""Label name/ID resolution for Gmail accounts."""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Dict, Any, Iterable, Callable
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+
+class LabelRegistry:
+    """Cached, thread-safe label name <-> ID map for one account.
+
+    The map is loaded lazily on first use and refreshed when it is older
+    than ``ttl`` seconds or when a lookup misses, so label actions resolve
+    human names without a labels.list call per operation.
+    """
+
+    # Gmail recommends at most 50 requests per batch HTTP call
+    CREATE_BATCH_SIZE = 50
+
+    def __init__(
+        self,
+        service_provider,
+        ttl: float = 300.0,
+        miss_refresh_interval: float = 10.0,
+        execute: Optional[Callable[..., Any]] = None
+    ):
+        """Initialize label registry.
+
+        Args:
+            service_provider: Callable returning the Gmail API service
+            ttl: Seconds before the cached map is considered stale
+            miss_refresh_interval: Minimum seconds between refreshes
+                triggered by unknown names
+            execute: Callable (request, method, batch_size, batched) that
+                executes API requests, e.g. GmailClient._execute() to have
+                them instrumented; requests are executed directly if None
+        """
+        self._service_provider = service_provider
+        self._execute = execute or (lambda request, *args, **kwargs: request.execute())
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._id_by_name: Dict[str, str] = {}
+        self._id_by_folded_name: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def _service(self):
+        return self._service_provider()
+
+    def _age(self) -> float:
+        """Seconds since the map was loaded (infinite if never)."""
+        if self._loaded_at is None:
+            return float('inf')
+        return time.monotonic() - self._loaded_at
+
+    def _is_stale(self) -> bool:
+        return self._age() > self.ttl
+
+    def update(self, labels: List[Dict[str, Any]]) -> None:
+        """Replace the cached map with a fresh labels.list result.
+
+        Args:
+            labels: Label dictionaries from labels.list
+        """
+        with self._lock:
+            self._by_id = {label['id']: label for label in labels}
+            self._id_by_name = {label['name']: label['id'] for label in labels}
+            self._id_by_folded_name = {
+                label['name'].casefold(): label['id'] for label in labels
+            }
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reload the label map from the API."""
+        result = self._execute(self._service.users().labels().list(userId='me'), 'labels.list')
+        self.update(result.get('labels', []))
+        logger.debug(f"Loaded {len(self._by_id)} labels")
+
+    def invalidate(self) -> None:
+        """Force a reload on next use."""
+        with self._lock:
+            self._loaded_at = None
+
+    def labels(self) -> List[Dict[str, Any]]:
+        """Get all cached label dictionaries, loading them if needed."""
+        with self._lock:
+            if self._is_stale():
+                self.refresh()
+            return list(self._by_id.values())
+
+    def _lookup(self, name_or_id: str) -> Optional[str]:
+        """Resolve against the current map without refreshing."""
+        if name_or_id in self._by_id:
+            return name_or_id
+        return (self._id_by_name.get(name_or_id)
+                or self._id_by_folded_name.get(name_or_id.casefold()))
+
+    def resolve_id(self, name_or_id: str) -> Optional[str]:
+        """Resolve a label name or ID to its ID.
+
+        Args:
+            name_or_id: Label name (e.g. 'Receipts') or ID (e.g. 'Label_12')
+
+        Returns:
+            Label ID or None if no such label exists
+        """
+        return self.resolve_ids([name_or_id]).get(name_or_id)
+
+    def resolve_ids(
+        self,
+        names: Iterable[str],
+        create_missing: bool = False
+    ) -> Dict[str, str]:
+        """Resolve several label names or IDs at once.
+
+        Unknown names trigger at most one refresh; if they are still
+        unknown and ``create_missing`` is set, they are created in batch.
+
+        Args:
+            names: Label names or IDs
+            create_missing: Create user labels for names that don't exist
+
+        Returns:
+            Mapping of each resolvable input to its label ID
+        """
+        names = list(dict.fromkeys(names))
+
+        with self._lock:
+            if self._is_stale():
+                self.refresh()
+
+            resolved = {name: self._lookup(name) for name in names}
+            missing = [name for name, label_id in resolved.items() if label_id is None]
+
+            if missing and self._age() > self.miss_refresh_interval:
+                self.refresh()
+                for name in missing:
+                    resolved[name] = self._lookup(name)
+                missing = [name for name in missing if resolved[name] is None]
+
+            if missing and create_missing:
+                resolved.update(self.create_labels(missing))
+
+        return {name: label_id for name, label_id in resolved.items() if label_id}
+
+    def create_labels(self, names: List[str]) -> Dict[str, str]:
+        """Create user labels using batched HTTP requests.
+
+        Args:
+            names: Names of labels to create
+
+        Returns:
+            Mapping of each created name to its new label ID
+        """
+        created: Dict[str, Dict[str, Any]] = {}
+
+        def _callback(request_id, response, exception):
+            if exception is not None:
+                logger.error(f"Failed to create label '{request_id}': {exception}")
+                return
+            created[request_id] = response
+
+        service = self._service
+        for i in range(0, len(names), self.CREATE_BATCH_SIZE):
+            chunk = names[i:i + self.CREATE_BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=_callback)
+            for name in chunk:
+                batch.add(
+                    service.users().labels().create(
+                        userId='me',
+                        body={
+                            'name': name,
+                            'labelListVisibility': 'labelShow',
+                            'messageListVisibility': 'show',
+                        }
+                    ),
+                    request_id=name
+                )
+            try:
+                self._execute(batch, 'labels.create', len(chunk), batched=True)
+            except HttpError as e:
+                logger.error(f"Batch label creation failed: {e}")
+
+        with self._lock:
+            for name, label in created.items():
+                self._by_id[label['id']] = label
+                self._id_by_name[name] = label['id']
+                self._id_by_folded_name[name.casefold()] = label['id']
+
+        if created:
+            logger.info(f"Created {len(created)} labels: {', '.join(created)}")
+        return {name: label['id'] for name, label in created.items()}
+
+    def name(self, label_id: str) -> Optional[str]:
+        """Get the display name of a label ID from the cached map."""
+        with self._lock:
+            if self._is_stale():
+                self.refresh()
+            label = self._by_id.get(label_id)
+            return label['name'] if label else None
@@ -0,0 +1,245 @@
+"""In-process metrics: Gmail API call instrumentation and processing stage timers."""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from a cached lookup to a slow batch call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Requests per call; batchModify takes up to 1000 IDs, batch HTTP calls 100
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class CallRecord:
+    """One Gmail API call, as seen by the call hooks.
+
+    A batch HTTP call is one record; ``batch_size`` is the number of
+    requests it carried and ``quota_units`` their combined cost.
+    """
+    method: str
+    latency: float
+    quota_units: int = 0
+    retries: int = 0
+    batch_size: int = 1
+    status: Optional[int] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status is None
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exported by Prometheus."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value; never above the largest observation
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Get (upper bound, observations at or below it), ending with +Inf."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and histograms.
+
+    Metric names follow Prometheus conventions (``_total`` for counters,
+    ``_seconds`` for durations) and render() produces the Prometheus text
+    exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+        """Register the type and help text of a metric.
+
+        Args:
+            name: Metric name
+            kind: 'counter' or 'histogram'
+            help_text: One-line description shown in the exposition
+            buckets: Bucket upper bounds for a histogram
+        """
+        with self._lock:
+            self._help[name] = (kind, help_text)
+            if buckets is not None:
+                self._buckets[name] = buckets
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Add to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record an observation in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Observe the wall time of a block in a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_call(self, call: CallRecord) -> None:
+        """Call hook recording a Gmail API call; installed on every GmailClient."""
+        status = 'ok' if call.succeeded else str(call.status)
+        self.inc('gmail_api_calls_total', method=call.method, status=status)
+        self.inc('gmail_api_quota_units_total', call.quota_units, method=call.method)
+        if call.retries:
+            self.inc('gmail_api_retries_total', call.retries, method=call.method)
+        self.observe('gmail_api_call_duration_seconds', call.latency, method=call.method)
+        self.observe('gmail_api_batch_size', call.batch_size, method=call.method)
+
+    def counters(self, name: str) -> Dict[Labels, float]:
+        """Get a copy of every series of a counter."""
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        """Get a copy of every series of a histogram."""
+        with self._lock:
+            result = {}
+            for key, histogram in self._histograms.get(name, {}).items():
+                copy = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.count, copy.sum, copy.max = histogram.count, histogram.sum, histogram.max
+                result[key] = copy
+            return result
+
+    def reset(self) -> None:
+        """Drop every recorded value, keeping the metric descriptions."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._histograms))
+            for name in names:
+                kind, help_text = self._help.get(
+                    name, ('histogram' if name in self._histograms else 'counter', '')
+                )
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+                for key, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+                for key, histogram in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in histogram.cumulative():
+                        le = '+Inf' if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _label_key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ''
+    escaped = (
+        (k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in key
+    )
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _describe_defaults(registry: MetricsRegistry) -> None:
+    registry.describe('gmail_api_calls_total', 'counter',
+                      'Gmail API calls (a batch HTTP call counts once) by method and status')
+    registry.describe('gmail_api_quota_units_total', 'counter',
+                      'Gmail API quota units spent by method')
+    registry.describe('gmail_api_retries_total', 'counter',
+                      'Gmail API calls retried after a rate limit or server error')
+    registry.describe('gmail_api_call_duration_seconds', 'histogram',
+                      'Gmail API call latency including retries')
+    registry.describe('gmail_api_batch_size', 'histogram',
+                      'Requests or IDs carried by each Gmail API call', BATCH_SIZE_BUCKETS)
+    registry.describe('gmail_cleanup_stage_duration_seconds', 'histogram',
+                      'Time spent in each processing stage (search, plan, apply)')
+
+
+def create_registry() -> MetricsRegistry:
+    """Create a registry with the library's metrics described."""
+    registry = MetricsRegistry()
+    _describe_defaults(registry)
+    return registry
+
+
+# Process-wide registry used by default by GmailClient and EmailProcessor
+REGISTRY = create_registry()
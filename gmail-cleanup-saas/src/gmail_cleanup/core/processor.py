@@ -2,17 +2,29 @@
 
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional, Callable, AsyncGenerator
-from dataclasses import dataclass
+import functools
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, AsyncGenerator, Iterator, Set, Tuple
+from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from datetime import datetime, timezone
 
 from .client import GmailClient, BatchResult, EmailMessage
+from .aggregator import MailboxAggregator
+from .analytics import MailboxAnalytics
+from .estimator import MatchEstimator, MatchEstimate
+from .journal import ActionJournal
+from .storage import LabelTable, MessageTable
 from ..rules.engine import RulesEngine, Rule
-from ..rules.models import RuleExecutionResult
+from ..rules.models import RuleExecutionResult, ActionType, Granularity
+from ..rules.matcher import compile_rules
 
 logger = logging.getLogger(__name__)
 
+# Query terms for system labels that have a dedicated search operator
+_LABEL_QUERY_TERMS = {'INBOX': 'in:inbox', 'UNREAD': 'is:unread'}
+
 
 @dataclass
 class ProcessingStats:
@@ -24,6 +36,8 @@ class ProcessingStats:
     skipped_messages: int = 0
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    # Seconds spent per stage: 'plan', 'search' and 'apply'
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
     
     @property
     def duration(self) -> Optional[float]:
@@ -48,6 +62,7 @@ class ProcessingResult:
     batch_result: BatchResult
     stats: ProcessingStats
     errors: List[str]
+    run_id: Optional[str] = None
 
 
 class EmailProcessor:
@@ -58,7 +73,8 @@ class EmailProcessor:
         gmail_client: GmailClient,
         rules_engine: RulesEngine,
         max_workers: int = 4,
-        batch_size: int = 100
+        batch_size: int = 100,
+        journal: Optional[ActionJournal] = None
     ):
         """Initialize email processor.
         
@@ -67,13 +83,17 @@ class EmailProcessor:
             rules_engine: Rules processing engine
             max_workers: Maximum number of worker threads
             batch_size: Number of messages to process in each batch
+            journal: Journal recording every change made, so runs can be undone
         """
         self.gmail_client = gmail_client
         self.rules_engine = rules_engine
+        self.journal = journal
+        self.metrics = gmail_client.metrics
         self.max_workers = max_workers
         self.batch_size = batch_size
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self._progress_callbacks: List[Callable[[ProcessingStats], None]] = []
+        self._match_estimator: Optional[MatchEstimator] = None
     
     def add_progress_callback(self, callback: Callable[[ProcessingStats], None]) -> None:
         """Add a callback function to receive processing progress updates.
@@ -91,6 +111,24 @@ class EmailProcessor:
             except Exception as e:
                 logger.warning(f"Progress callback failed: {e}")
     
+    @contextmanager
+    def _stage(self, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Time a processing stage into the stage duration histogram.
+        
+        Args:
+            name: Stage name ('plan', 'search' or 'apply')
+            timings: Per-stage seconds to add the time to, e.g. a
+                ProcessingStats.stage_seconds
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.observe('gmail_cleanup_stage_duration_seconds', elapsed, stage=name)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + elapsed
+    
     async def process_all_rules(
         self,
         dry_run: bool = False,
@@ -112,6 +150,7 @@ class EmailProcessor:
         
         logger.info(f"Processing {len(rules)} rules (dry_run={dry_run})")
         results = []
+        run_id = ActionJournal.new_run_id()
         
         for rule in rules:
             if not rule.enabled:
@@ -122,7 +161,8 @@ class EmailProcessor:
                 result = await self.process_rule(
                     rule=rule,
                     dry_run=dry_run,
-                    max_messages=max_messages_per_rule
+                    max_messages=max_messages_per_rule,
+                    run_id=run_id
                 )
                 results.append(result)
                 
@@ -144,7 +184,8 @@ class EmailProcessor:
         self,
         rule: Rule,
         dry_run: bool = False,
-        max_messages: Optional[int] = None
+        max_messages: Optional[int] = None,
+        run_id: Optional[str] = None
     ) -> ProcessingResult:
         """Process a single rule.
         
@@ -152,30 +193,48 @@ class EmailProcessor:
             rule: Rule to process
             dry_run: If True, only analyze without making changes
             max_messages: Limit number of messages to process
+            run_id: Journal run the changes belong to (a new run by default)
             
         Returns:
             ProcessingResult for the rule
         """
         stats = ProcessingStats(start_time=datetime.now())
         errors = []
+        run_id = run_id or ActionJournal.new_run_id()
         
         logger.info(f"Processing rule: {rule.name} (dry_run={dry_run})")
         
         try:
             # Build search query from rule criteria
-            query = self._build_search_query(rule)
+            with self._stage('plan', stats.stage_seconds):
+                query = self._build_search_query(rule)
             logger.debug(f"Search query for rule '{rule.name}': {query}")
             
-            # Search for matching messages
-            matched_messages = await self._search_messages_async(
-                query=query,
-                max_results=max_messages
-            )
+            threads = rule.granularity == Granularity.THREAD
+            
+            with self._stage('search', stats.stage_seconds):
+                if dry_run:
+                    # Only the number of matches is needed; count without listing
+                    estimate = await asyncio.get_event_loop().run_in_executor(
+                        self.executor,
+                        functools.partial(self.match_estimator.count, query, threads, max_messages)
+                    )
+                    if estimate.error:
+                        raise RuntimeError(estimate.error)
+                    matched_messages = []
+                    stats.total_messages = estimate.count
+                else:
+                    # Search for matching messages (or threads, for thread rules)
+                    matched_messages = await self._search_messages_async(
+                        query=query,
+                        max_results=max_messages,
+                        threads=threads
+                    )
+                    stats.total_messages = len(matched_messages)
             
-            stats.total_messages = len(matched_messages)
             logger.info(f"Rule '{rule.name}' matched {stats.total_messages} messages")
             
-            if not matched_messages:
+            if not stats.total_messages:
                 stats.end_time = datetime.now()
                 return ProcessingResult(
                     rule=rule,
@@ -196,7 +255,8 @@ class EmailProcessor:
                 )
                 stats.successful_operations = stats.total_messages
             else:
-                batch_result = await self._apply_rule_action(rule, matched_messages)
+                with self._stage('apply', stats.stage_seconds):
+                    batch_result = await self._apply_rule_action(rule, matched_messages, run_id)
                 stats.successful_operations = batch_result.succeeded
                 stats.failed_operations = batch_result.failed
                 errors.extend(batch_result.errors)
@@ -217,7 +277,8 @@ class EmailProcessor:
                 matched_messages=matched_messages,
                 batch_result=batch_result,
                 stats=stats,
-                errors=errors
+                errors=errors,
+                run_id=None if dry_run else run_id
             )
             
         except Exception as e:
@@ -234,167 +295,690 @@ class EmailProcessor:
                 errors=errors
             )
     
+    async def process_rules(
+        self,
+        rules: List[Rule],
+        dry_run: bool = False,
+        max_messages_per_rule: Optional[int] = None
+    ) -> List[ProcessingResult]:
+        """Process several rules together in a single pass.
+        
+        Rules with the same search query share one search, the remaining
+        searches run concurrently, and rules with identical actions are
+        applied with one set of modify calls over the union of their matches.
+        
+        Args:
+            rules: Rules to process
+            dry_run: If True, only analyze without making changes
+            max_messages_per_rule: Limit number of messages processed per rule
+                (defaults to each rule's own max_messages)
+            
+        Returns:
+            List of processing results, one per rule, in input order
+        """
+        start_time = datetime.now()
+        run_id = ActionJournal.new_run_id()
+        # Stages are shared by all rules, so every result reports the same times
+        timings: Dict[str, float] = {}
+        
+        # Share one search between rules with the same query and limit
+        searches: Dict[Tuple[str, Granularity, Optional[int]], List[Rule]] = {}
+        with self._stage('plan', timings):
+            for rule in rules:
+                key = (
+                    self._build_search_query(rule),
+                    rule.granularity,
+                    max_messages_per_rule or rule.max_messages
+                )
+                searches.setdefault(key, []).append(rule)
+        
+        logger.info(f"Processing {len(rules)} rules with {len(searches)} searches")
+        
+        with self._stage('search', timings):
+            outcomes = await asyncio.gather(
+                *(
+                    self._search_messages_async(
+                        query=query,
+                        max_results=limit,
+                        threads=granularity == Granularity.THREAD
+                    )
+                    for query, granularity, limit in searches
+                ),
+                return_exceptions=True
+            )
+        
+        matches: Dict[str, List[str]] = {}
+        errors: Dict[str, List[str]] = {rule.id: [] for rule in rules}
+        for key, outcome in zip(searches, outcomes):
+            for rule in searches[key]:
+                if isinstance(outcome, Exception):
+                    errors[rule.id].append(f"Rule processing failed: {outcome}")
+                    matches[rule.id] = []
+                else:
+                    matches[rule.id] = outcome
+        
+        # Apply each distinct action once over the union of its rules' matches
+        actions: Dict[Tuple[Any, ...], List[Rule]] = {}
+        for rule in rules:
+            if matches[rule.id] and not (dry_run or rule.dry_run):
+                signature = (
+                    rule.granularity,
+                    rule.action.type,
+                    tuple(rule.action.parameters.get('labels', []))
+                )
+                actions.setdefault(signature, []).append(rule)
+        
+        batch_results: Dict[str, BatchResult] = {}
+        for action_rules in actions.values():
+            # Journal each ID under the first of the rules that matched it
+            shares: List[Tuple[Rule, List[str]]] = []
+            assigned: Set[str] = set()
+            for rule in action_rules:
+                own = [message_id for message_id in matches[rule.id] if message_id not in assigned]
+                assigned.update(own)
+                shares.append((rule, own))
+            ids = [message_id for _, own in shares for message_id in own]
+            try:
+                with self._stage('apply', timings):
+                    combined = await self._apply_rule_action(action_rules[0], ids, run_id, shares)
+            except Exception as e:
+                logger.error(f"Failed to apply action for {len(action_rules)} rules: {e}")
+                combined = BatchResult(len(ids), 0, len(ids), [str(e)])
+            
+            for rule in action_rules:
+                batch_results[rule.id] = self._share_batch_result(combined, len(matches[rule.id]))
+        
+        end_time = datetime.now()
+        results = []
+        for rule in rules:
+            matched = matches[rule.id]
+            batch_result = batch_results.get(rule.id)
+            if batch_result is None:
+                # Dry run, or nothing matched
+                batch_result = BatchResult(len(matched), len(matched), 0, [])
+            
+            errors[rule.id].extend(batch_result.errors)
+            stats = ProcessingStats(
+                total_messages=len(matched),
+                processed_messages=batch_result.processed,
+                successful_operations=batch_result.succeeded,
+                failed_operations=batch_result.failed,
+                start_time=start_time,
+                end_time=end_time,
+                stage_seconds=dict(timings)
+            )
+            self._notify_progress(stats)
+            
+            results.append(ProcessingResult(
+                rule=rule,
+                matched_messages=matched,
+                batch_result=batch_result,
+                stats=stats,
+                errors=errors[rule.id],
+                run_id=run_id if rule.id in batch_results else None
+            ))
+        
+        return results
+    
+    async def process_messages(
+        self,
+        messages: List[EmailMessage],
+        dry_run: bool = False
+    ) -> List[ProcessingResult]:
+        """Run the enabled rules against a known set of messages.
+        
+        Rules are compiled and matched against the messages' metadata
+        locally; only rules with body criteria need a search, restricted to
+        the time range of the messages. Used for newly arrived mail.
+        
+        Args:
+            messages: Messages to process, with metadata
+            dry_run: If True, only analyze without making changes
+            
+        Returns:
+            Processing results for the rules that matched any message
+        """
+        with self._stage('plan'):
+            compiled = compile_rules(
+                self.rules_engine.get_enabled_rules(),
+                resolve_label=self._resolve_query_label,
+                build_query=self.rules_engine.build_gmail_query
+            )
+        now = datetime.now(timezone.utc)
+        run_id = ActionJournal.new_run_id()
+        results = []
+        
+        for compiled_rule in compiled:
+            rule = compiled_rule.rule
+            stats = ProcessingStats(start_time=datetime.now())
+            
+            try:
+                with self._stage('plan', stats.stage_seconds):
+                    matched = [
+                        m for m in messages
+                        if compiled_rule.matches(m, now) and self._would_change(rule, m)
+                    ]
+                
+                if matched and not compiled_rule.is_local:
+                    query = f"({compiled_rule.residual_query})"
+                    dates = [m.date for m in matched if m.date]
+                    if len(dates) == len(matched):
+                        oldest = min(date.timestamp() for date in dates)
+                        query += f" after:{int(oldest) - 1}"
+                    with self._stage('search', stats.stage_seconds):
+                        found = set(await self._search_messages_async(query=query))
+                    matched = [m for m in matched if m.id in found]
+                
+                if not matched:
+                    continue
+                
+                if rule.granularity == Granularity.THREAD:
+                    ids = list(dict.fromkeys(m.thread_id for m in matched))
+                else:
+                    ids = [m.id for m in matched]
+                
+                stats.total_messages = len(ids)
+                applied = not (dry_run or rule.dry_run)
+                if applied:
+                    with self._stage('apply', stats.stage_seconds):
+                        batch_result = await self._apply_rule_action(rule, ids, run_id)
+                else:
+                    batch_result = BatchResult(len(ids), len(ids), 0, [])
+                
+            except Exception as e:
+                error_msg = f"Rule processing failed: {e}"
+                logger.error(error_msg)
+                ids = []
+                applied = False
+                batch_result = BatchResult(0, 0, 0, [error_msg])
+            
+            stats.processed_messages = batch_result.processed
+            stats.successful_operations = batch_result.succeeded
+            stats.failed_operations = batch_result.failed
+            stats.end_time = datetime.now()
+            self._notify_progress(stats)
+            
+            logger.info(f"Rule '{rule.name}' matched {len(ids)} of {len(messages)} new messages")
+            results.append(ProcessingResult(
+                rule=rule,
+                matched_messages=ids,
+                batch_result=batch_result,
+                stats=stats,
+                errors=list(batch_result.errors),
+                run_id=run_id if applied else None
+            ))
+        
+        return results
+    
+    def _resolve_query_label(self, name: str) -> Optional[str]:
+        """Resolve a label as written in a Gmail query ('my-label') to its ID."""
+        registry = self.gmail_client.label_registry
+        return registry.resolve_id(name) or registry.resolve_id(name.replace('-', ' '))
+    
+    @staticmethod
+    def _share_batch_result(combined: BatchResult, count: int) -> BatchResult:
+        """Attribute part of a combined batch result to one rule.
+        
+        Args:
+            combined: Result of applying an action to several rules' matches
+            count: Number of messages the rule contributed
+            
+        Returns:
+            BatchResult for the rule, with failures distributed proportionally
+        """
+        if not combined.failed or not combined.processed:
+            return BatchResult(count, count, 0, [])
+        
+        failed = min(count, round(count * combined.failed / combined.processed))
+        return BatchResult(count, count - failed, failed, list(combined.errors))
+    
+    @property
+    def match_estimator(self) -> MatchEstimator:
+        """Estimator used for dry runs and rule previews (created on first use)."""
+        if self._match_estimator is None:
+            self._match_estimator = MatchEstimator(self.gmail_client, max_workers=self.max_workers * 2)
+        return self._match_estimator
+    
+    async def estimate_rules(
+        self,
+        rules: Optional[List[Rule]] = None,
+        exact: bool = False
+    ) -> Dict[str, MatchEstimate]:
+        """Count how many messages each rule would match, without listing them.
+        
+        Rules are counted with the same search query a run uses, so
+        messages the action would leave unchanged aren't counted.
+        
+        Args:
+            rules: Rules to count (defaults to all enabled rules)
+            exact: Count exactly instead of estimating from sampled pages
+            
+        Returns:
+            Mapping of rule ID to its MatchEstimate
+        """
+        if rules is None:
+            rules = self.rules_engine.get_enabled_rules()
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(
+                self.match_estimator.estimate_rules,
+                rules,
+                self._build_search_query,
+                exact=exact
+            )
+        )
+    
     async def _search_messages_async(
         self,
         query: str,
-        max_results: Optional[int] = None
+        max_results: Optional[int] = None,
+        threads: bool = False
     ) -> List[str]:
         """Asynchronously search for messages.
         
         Args:
             query: Gmail search query
             max_results: Maximum number of results
+            threads: Search threads instead of messages
             
         Returns:
-            List of message IDs
+            List of message IDs (thread IDs if ``threads`` is set)
+        """
+        all_messages = []
+        async for page_ids in self._iter_search_pages(query, max_results, threads):
+            all_messages.extend(page_ids)
+        return all_messages
+    
+    async def _iter_search_pages(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        threads: bool = False
+    ) -> AsyncGenerator[List[str], None]:
+        """Asynchronously yield pages of message IDs matching a query.
+        
+        Args:
+            query: Gmail search query
+            max_results: Maximum number of results across all pages
+            threads: List threads instead of messages
+            
+        Yields:
+            Lists of message IDs (or thread IDs), one per result page
         """
         loop = asyncio.get_event_loop()
+        search = self.gmail_client.search_threads if threads else self.gmail_client.search_messages
+        key = 'threads' if threads else 'messages'
+        page_token = None
+        fetched = 0
         
-        def _search():
-            all_messages = []
-            page_token = None
+        while True:
+            batch_limit = min(500, max_results - fetched) if max_results else 500
             
-            while True:
-                batch_limit = min(500, max_results - len(all_messages)) if max_results else 500
-                
-                result = self.gmail_client.search_messages(
+            result = await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    search,
                     query=query,
                     max_results=batch_limit,
                     page_token=page_token
                 )
-                
-                messages = result.get('messages', [])
-                all_messages.extend([msg['id'] for msg in messages])
-                
-                page_token = result.get('nextPageToken')
-                
-                if not page_token or (max_results and len(all_messages) >= max_results):
-                    break
+            )
             
-            return all_messages[:max_results] if max_results else all_messages
-        
-        return await loop.run_in_executor(self.executor, _search)
+            page_ids = [item['id'] for item in result.get(key, [])]
+            if max_results:
+                page_ids = page_ids[:max_results - fetched]
+            fetched += len(page_ids)
+            
+            if page_ids:
+                yield page_ids
+            
+            page_token = result.get('nextPageToken')
+            
+            if not page_token or (max_results and fetched >= max_results):
+                break
     
     def _build_search_query(self, rule: Rule) -> str:
         """Build Gmail search query from rule criteria.
         
+        Messages the rule's action would leave unchanged (e.g. already
+        archived messages for an archive rule) are excluded, which saves
+        modify calls and keeps the journal to real changes, so undoing a
+        run never touches messages it didn't change.
+        
         Args:
             rule: Rule containing search criteria
             
         Returns:
             Gmail search query string
         """
-        criteria = rule.criteria
-        
-        return self.gmail_client.build_search_query(
-            sender=criteria.get('from'),
-            recipient=criteria.get('to'),
-            subject=criteria.get('subject'),
-            has_words=criteria.get('has_words'),
-            exclude_words=criteria.get('exclude_words'),
-            older_than_days=criteria.get('older_than_days'),
-            newer_than_days=criteria.get('newer_than_days'),
-            is_unread=criteria.get('is_unread'),
-            has_attachment=criteria.get('has_attachment'),
-            labels=criteria.get('labels')
-        )
+        query = self.rules_engine.build_gmail_query(rule.criteria)
+        
+        added, removed = self._label_changes(rule)
+        # Trash is already left out of searches
+        absent = [f"-{self._label_term(label)}" for label in added if label != 'TRASH']
+        present = [self._label_term(label) for label in removed]
+        
+        for terms in (absent, present):
+            if len(terms) == 1:
+                query = f"{query} {terms[0]}"
+            elif terms:
+                # Any one of the labels still needing the change is enough
+                query = f"{query} {{{' '.join(terms)}}}"
+        
+        return query.strip()
+    
+    @staticmethod
+    def _label_term(label: str) -> str:
+        """Search term for a label name or system label ID."""
+        return _LABEL_QUERY_TERMS.get(label, f"label:{label.replace(' ', '-')}")
+    
+    @staticmethod
+    def _label_changes(rule: Rule) -> Tuple[List[str], List[str]]:
+        """Get the labels a rule's action adds and removes.
+        
+        Args:
+            rule: Rule whose action to inspect
+            
+        Returns:
+            Tuple of (labels added, labels removed), as names or system
+            label IDs; both are empty for permanent deletion
+        """
+        action = rule.action.type
+        labels = list(rule.action.parameters.get('labels', []))
+        
+        if action in (ActionType.DELETE, ActionType.MOVE_TO_TRASH):
+            return ['TRASH'], []
+        elif action == ActionType.MARK_READ:
+            return [], ['UNREAD']
+        elif action == ActionType.ADD_LABEL:
+            return labels, []
+        elif action == ActionType.REMOVE_LABEL:
+            return [], labels
+        elif action == ActionType.ARCHIVE:
+            return [], ['INBOX']
+        return [], []
+    
+    def _would_change(self, rule: Rule, message: EmailMessage) -> bool:
+        """Check whether a rule's action would change a message's labels.
+        
+        The local counterpart of the filter added by _build_search_query().
+        """
+        added, removed = self._label_changes(rule)
+        resolve = self.gmail_client.label_registry.resolve_id
+        
+        if added and all(resolve(label) in message.labels for label in added):
+            return False
+        if removed and not any(resolve(label) in message.labels for label in removed):
+            return False
+        return True
     
     async def _apply_rule_action(
         self,
         rule: Rule,
-        message_ids: List[str]
+        message_ids: List[str],
+        run_id: Optional[str] = None,
+        shares: Optional[List[Tuple[Rule, List[str]]]] = None
     ) -> BatchResult:
         """Apply rule action to messages.
         
+        With a journal configured, the change is recorded under ``run_id``.
+        
         Args:
             rule: Rule containing action to apply
-            message_ids: List of message IDs to process
+            message_ids: List of message IDs to process (thread IDs for
+                thread-granularity rules)
+            run_id: Journal run the change belongs to
+            shares: Rules with the same action sharing this call, each with
+                its share of ``message_ids``, to journal the change under
+                (all of it under ``rule`` if None)
             
         Returns:
             BatchResult with operation statistics
         """
         loop = asyncio.get_event_loop()
-        action = rule.action.lower()
+        action = rule.action.type
+        labels = rule.action.parameters.get('labels', [])
+        client = self.gmail_client
         
         def _apply_action():
-            if action == 'delete' or action == 'move_to_trash':
-                return self.gmail_client.move_to_trash(message_ids)
+            if rule.granularity == Granularity.THREAD:
+                return _apply_thread_action()
+            
+            if action in (ActionType.DELETE, ActionType.MOVE_TO_TRASH):
+                return client.move_to_trash(message_ids)
+            
+            elif action == ActionType.MARK_READ:
+                return client.mark_messages_read(message_ids)
+            
+            elif action == ActionType.ADD_LABEL:
+                return client.add_labels(message_ids, labels)
+            
+            elif action == ActionType.REMOVE_LABEL:
+                return client.remove_labels(message_ids, labels)
+            
+            elif action == ActionType.ARCHIVE:
+                return client.remove_labels(message_ids, ['INBOX'])
+            
+            elif action == ActionType.PERMANENT_DELETE:
+                return client.permanently_delete(message_ids)
+            
+            else:
+                raise ValueError(f"Unknown action: {action}")
+        
+        def _apply_thread_action():
+            if action in (ActionType.DELETE, ActionType.MOVE_TO_TRASH):
+                return client.trash_threads(message_ids)
             
-            elif action == 'mark_read':
-                return self.gmail_client.mark_messages_read(message_ids)
+            elif action == ActionType.MARK_READ:
+                return client.mark_threads_read(message_ids)
             
-            elif action == 'add_label':
-                labels = rule.action_params.get('labels', [])
-                return self.gmail_client.add_labels(message_ids, labels)
+            elif action == ActionType.ADD_LABEL:
+                return client.modify_threads(message_ids, add_labels=labels)
             
-            elif action == 'remove_label':
-                labels = rule.action_params.get('labels', [])
-                return self.gmail_client.remove_labels(message_ids, labels)
+            elif action == ActionType.REMOVE_LABEL:
+                return client.modify_threads(message_ids, remove_labels=labels)
             
-            elif action == 'permanent_delete':
-                return self.gmail_client.permanently_delete(message_ids)
+            elif action == ActionType.ARCHIVE:
+                return client.modify_threads(message_ids, remove_labels=['INBOX'])
+            
+            elif action == ActionType.PERMANENT_DELETE:
+                return client.permanently_delete_threads(message_ids)
             
             else:
                 raise ValueError(f"Unknown action: {action}")
         
-        return await loop.run_in_executor(self.executor, _apply_action)
+        def _apply_and_record():
+            result = _apply_action()
+            if self.journal and run_id and result.succeeded:
+                for owner, ids in shares or [(rule, message_ids)]:
+                    self._record_action(owner, ids, run_id, result)
+            return result
+        
+        return await loop.run_in_executor(self.executor, _apply_and_record)
+    
+    def _record_action(
+        self,
+        rule: Rule,
+        message_ids: List[str],
+        run_id: str,
+        result: BatchResult
+    ) -> None:
+        """Journal the change a rule's action made.
+        
+        IDs in failed chunks are recorded too; their inverse is a no-op.
+        
+        Args:
+            rule: Rule whose action was applied
+            message_ids: IDs the action was applied to
+            run_id: Journal run the change belongs to
+            result: Result of the action; journal errors are added to it
+        """
+        added, removed = self._label_changes(rule)
+        try:
+            self.journal.record(
+                run_id,
+                message_ids,
+                added_labels=self.gmail_client.resolve_label_ids(added),
+                removed_labels=self.gmail_client.resolve_label_ids(removed),
+                granularity=rule.granularity.value,
+                deleted=rule.action.type == ActionType.PERMANENT_DELETE,
+                rule_id=rule.id,
+                rule_name=rule.name
+            )
+        except OSError as e:
+            error_msg = f"Failed to journal changes of rule '{rule.name}': {e}"
+            logger.error(error_msg)
+            result.errors.append(error_msg)
     
     async def analyze_mailbox(
         self,
-        max_messages: Optional[int] = None
+        max_messages: Optional[int] = 1000,
+        query: str = "in:inbox OR in:sent"
     ) -> Dict[str, Any]:
         """Analyze mailbox to provide insights for rule creation.
         
+        Message metadata is streamed page by page into a MailboxAggregator,
+        so memory use stays constant regardless of mailbox size.
+        
         Args:
-            max_messages: Limit analysis to N messages
+            max_messages: Limit analysis to N messages (None for the whole mailbox)
+            query: Gmail search query selecting messages to analyze
             
         Returns:
             Dictionary with mailbox statistics and insights
         """
         logger.info("Starting mailbox analysis")
         
-        # Get recent messages for analysis
-        query = "in:inbox OR in:sent"
-        message_ids = await self._search_messages_async(
-            query=query,
-            max_results=max_messages or 1000
-        )
+        aggregator = MailboxAggregator()
+        missing = await self._crawl_metadata(query, max_messages, [aggregator])
+        
+        if not aggregator.total_messages:
+            return {"error": "No messages found for analysis"}
+        
+        analysis = self._summarize(aggregator)
+        analysis['missing_messages'] = missing
+        logger.info(f"Analyzed {aggregator.total_messages} messages")
+        
+        return analysis
+    
+    async def build_analytics_report(
+        self,
+        max_messages: Optional[int] = None,
+        query: str = "",
+        top_n: int = 25,
+        all_domains: bool = False
+    ) -> Dict[str, Any]:
+        """Build a whole-mailbox analytics report in a single metadata crawl.
+        
+        Args:
+            max_messages: Limit the crawl to N messages (None for the whole mailbox)
+            query: Gmail search query selecting messages ("" for all mail)
+            top_n: Number of sender domains in the storage and volume tables
+            all_domains: Also include every sender domain's row under 'all_domains'
+            
+        Returns:
+            Dictionary with the analysis summary plus storage, monthly volume
+            and label coverage breakdowns; 'missing_messages' counts messages
+            whose metadata couldn't be fetched and aren't in the numbers
+        """
+        logger.info("Starting analytics crawl")
         
-        if not message_ids:
+        aggregator = MailboxAggregator()
+        analytics = MailboxAnalytics()
+        missing = await self._crawl_metadata(query, max_messages, [aggregator, analytics])
+        
+        if not aggregator.total_messages:
             return {"error": "No messages found for analysis"}
         
-        # Analyze message details in batches
+        report = analytics.report(top_n=top_n, all_domains=all_domains)
+        report['summary'] = self._summarize(aggregator)
+        report['missing_messages'] = missing
+        logger.info(f"Built analytics report for {aggregator.total_messages} messages")
+        
+        return report
+    
+    async def load_message_table(
+        self,
+        query: str = "",
+        max_messages: Optional[int] = None
+    ) -> MessageTable:
+        """Load message metadata into a compact columnar table.
+        
+        Args:
+            query: Gmail search query selecting messages ("" for all mail)
+            max_messages: Limit to N messages (None for no limit)
+            
+        Returns:
+            MessageTable with labels encoded against the account's labels
+        """
         loop = asyncio.get_event_loop()
+        labels = await loop.run_in_executor(self.executor, self.gmail_client.get_labels)
         
-        def _get_message_batch(batch_ids):
-            messages = []
-            for msg_id in batch_ids:
-                msg = self.gmail_client.get_message_details(msg_id)
-                if msg:
-                    messages.append(msg)
-            return messages
+        table = MessageTable(LabelTable.from_labels(labels))
+        missing = await self._crawl_metadata(query, max_messages, [table])
         
-        # Process in smaller batches to avoid rate limits
-        all_messages = []
-        batch_size = 50
+        logger.info(f"Loaded {len(table)} messages into message table")
+        if missing:
+            logger.warning(f"{missing} messages are missing from the table")
+        return table
+    
+    async def _crawl_metadata(
+        self,
+        query: str,
+        max_messages: Optional[int],
+        sinks: List[Any]
+    ) -> int:
+        """Fetch metadata for matching messages and feed it to sinks.
         
-        for i in range(0, len(message_ids), batch_size):
-            batch_ids = message_ids[i:i + batch_size]
-            batch_messages = await loop.run_in_executor(
-                self.executor,
-                _get_message_batch,
-                batch_ids
-            )
-            all_messages.extend(batch_messages)
+        Result pages are listed sequentially while metadata batches are
+        fetched in parallel on the worker pool. Sinks are fed from the event
+        loop thread, so they need no locking.
+        
+        Args:
+            query: Gmail search query
+            max_messages: Limit the crawl to N messages (None for no limit)
+            sinks: Objects with an ``add_many(messages)`` method
             
-            # Brief pause to respect rate limits
-            await asyncio.sleep(0.1)
+        Returns:
+            Number of matching messages whose metadata couldn't be fetched
+        """
+        loop = asyncio.get_event_loop()
+        batch_size = self.gmail_client.METADATA_BATCH_SIZE
+        pending = set()
+        missing = 0
         
-        # Analyze the messages
-        analysis = self._analyze_messages(all_messages)
-        logger.info(f"Analyzed {len(all_messages)} messages")
+        def _feed(done):
+            nonlocal missing
+            for future in done:
+                messages, failed = future.result()
+                missing += len(failed)
+                for sink in sinks:
+                    sink.add_many(messages)
         
-        return analysis
+        async for page_ids in self._iter_search_pages(query, max_messages):
+            for i in range(0, len(page_ids), batch_size):
+                pending.add(loop.run_in_executor(
+                    self.executor,
+                    self.gmail_client.fetch_messages_metadata,
+                    page_ids[i:i + batch_size]
+                ))
+                
+                if len(pending) >= self.max_workers:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    _feed(done)
+        
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            _feed(done)
+        
+        if missing:
+            logger.warning(f"Metadata crawl is missing {missing} messages after retries")
+        return missing
     
     def _analyze_messages(self, messages: List[EmailMessage]) -> Dict[str, Any]:
         """Analyze messages to extract insights.
@@ -408,46 +992,27 @@ class EmailProcessor:
         if not messages:
             return {}
         
-        # Count messages by sender domain
-        sender_domains = {}
-        unread_count = 0
-        old_messages = 0  # Older than 1 year
-        
-        now = datetime.now()
-        one_year_ago = now.replace(year=now.year - 1)
-        
-        for msg in messages:
-            # Extract domain from sender
-            if '@' in msg.sender:
-                domain = msg.sender.split('@')[-1].strip('>')
-                sender_domains[domain] = sender_domains.get(domain, 0) + 1
-            
-            if msg.is_unread:
-                unread_count += 1
-            
-            if msg.date and msg.date < one_year_ago:
-                old_messages += 1
-        
-        # Sort sender domains by frequency
-        top_senders = sorted(
-            sender_domains.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:20]
-        
-        return {
-            "total_messages": len(messages),
-            "unread_messages": unread_count,
-            "old_messages": old_messages,
-            "top_sender_domains": top_senders,
-            "unique_senders": len(sender_domains),
-            "suggestions": self._generate_suggestions(
-                total=len(messages),
-                unread=unread_count,
-                old=old_messages,
-                top_senders=top_senders
-            )
-        }
+        aggregator = MailboxAggregator()
+        aggregator.add_many(messages)
+        return self._summarize(aggregator)
+    
+    def _summarize(self, aggregator: MailboxAggregator) -> Dict[str, Any]:
+        """Build the analysis result from aggregated counts.
+        
+        Args:
+            aggregator: Aggregator that has consumed the analyzed messages
+            
+        Returns:
+            Dictionary with analysis results and suggestions
+        """
+        analysis = aggregator.to_dict(top_n=20)
+        analysis["suggestions"] = self._generate_suggestions(
+            total=analysis["total_messages"],
+            unread=analysis["unread_messages"],
+            old=analysis["old_messages"],
+            top_senders=analysis["top_sender_domains"]
+        )
+        return analysis
     
     def _generate_suggestions(
         self,
@@ -524,4 +1089,6 @@ class EmailProcessor:
     def close(self) -> None:
         """Clean up resources."""
         if self.executor:
-            self.executor.shutdown(wait=True)
\ No newline at end of file
+            self.executor.shutdown(wait=True)
+        if self._match_estimator:
+            self._match_estimator.close()
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""Client-side limit on the Gmail API quota an account spends."""
+
+import threading
+import time
+from typing import Callable, Optional
+
+# Gmail's per-user limit on quota units per second
+DEFAULT_QUOTA_PER_SECOND = 250.0
+
+# Quota units charged per call, from the Gmail API usage limits
+QUOTA_UNITS = {
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.batchModify': 50,
+    'messages.delete': 10,
+    'threads.list': 10,
+    'threads.modify': 10,
+    'threads.trash': 10,
+    'threads.delete': 20,
+    'labels.list': 1,
+    'labels.create': 5,
+    'history.list': 2,
+    'getProfile': 1,
+    'watch': 100,
+    'stop': 50,
+}
+
+
+class QuotaLimiter:
+    """Token bucket of quota units for one account.
+
+    The bucket refills at ``units_per_second`` up to ``burst`` units. A
+    caller that finds too few units reserves them anyway and sleeps until
+    they have accrued, so waiting callers are served in arrival order and
+    the lock is never held while sleeping.
+    """
+
+    def __init__(
+        self,
+        units_per_second: float = DEFAULT_QUOTA_PER_SECOND,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """Initialize the limiter.
+
+        Args:
+            units_per_second: Sustained quota units per second
+            burst: Most units that can be spent at once after being idle
+                (one second's worth by default)
+            clock: Monotonic clock, in seconds
+            sleep: Function used to wait
+        """
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be positive")
+
+        self.units_per_second = units_per_second
+        self.burst = burst if burst is not None else units_per_second
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self.waited = 0.0
+
+    def acquire(self, units: float) -> float:
+        """Take quota units from the bucket, waiting until they are available.
+
+        Args:
+            units: Quota units the next call costs
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.units_per_second)
+            self._updated = now
+            self._tokens -= units
+            wait = -self._tokens / self.units_per_second if self._tokens < 0 else 0.0
+            self.waited += wait
+
+        if wait:
+            self._sleep(wait)
+        return wait
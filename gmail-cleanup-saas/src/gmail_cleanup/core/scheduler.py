@@ -0,0 +1,286 @@
+"""Scheduled rule execution."""
+
+import asyncio
+import calendar
+import heapq
+import itertools
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple, Callable
+from datetime import datetime, timedelta
+
+from ..rules.engine import RulesEngine
+from ..rules.models import Rule, RuleSchedule
+from .processor import EmailProcessor, ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+
+def next_run(schedule: RuleSchedule, after: datetime) -> Optional[datetime]:
+    """Compute the first scheduled run strictly after a given time.
+
+    Weekly schedules default to Monday and monthly schedules to the 1st;
+    a day of month past the end of a short month runs on its last day.
+
+    Args:
+        schedule: Rule schedule
+        after: Reference time (naive local time, like ``datetime.now()``)
+
+    Returns:
+        Next run time, or None if the schedule is disabled or has no frequency
+
+    Raises:
+        ValueError: If the frequency or time of day is invalid
+    """
+    if not schedule.enabled or not schedule.frequency:
+        return None
+
+    hour, minute = 0, 0
+    if schedule.time_of_day:
+        hour, minute = (int(part) for part in schedule.time_of_day.split(':'))
+
+    candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    if schedule.frequency == 'daily':
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        return candidate
+
+    if schedule.frequency == 'weekly':
+        weekday = schedule.day_of_week if schedule.day_of_week is not None else 0
+        candidate += timedelta(days=(weekday - candidate.weekday()) % 7)
+        if candidate <= after:
+            candidate += timedelta(days=7)
+        return candidate
+
+    if schedule.frequency == 'monthly':
+        day = schedule.day_of_month or 1
+        year, month = after.year, after.month
+        while True:
+            last_day = calendar.monthrange(year, month)[1]
+            candidate = candidate.replace(year=year, month=month, day=min(day, last_day))
+            if candidate > after:
+                return candidate
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    raise ValueError(f"Unknown schedule frequency: {schedule.frequency}")
+
+
+class RuleScheduler:
+    """Runs scheduled rules when they come due.
+
+    Next-run times live in a heap, so the scheduler sleeps exactly until the
+    earliest one. Every rule due within ``window`` seconds of that moment is
+    run in the same pass through EmailProcessor.process_rules, and each
+    rule's ``last_run_at`` and ``stats`` are then recorded and saved together.
+    """
+
+    def __init__(
+        self,
+        processor: EmailProcessor,
+        rules_engine: RulesEngine,
+        window: float = 60.0,
+        dry_run: bool = False,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            processor: Email processor used to run rules
+            rules_engine: Rules engine holding the scheduled rules
+            window: Rules due within this many seconds of each other run together
+            dry_run: If True, only analyze without making changes
+            clock: Function returning the current (naive local) time
+        """
+        self.processor = processor
+        self.rules_engine = rules_engine
+        self.window = timedelta(seconds=window)
+        self.dry_run = dry_run
+        self.clock = clock
+        self._queue: List[Tuple[datetime, int, str]] = []
+        self._counter = itertools.count()
+        self._rules_mtime: Optional[float] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def schedule_rule(
+        self,
+        rule: Rule,
+        now: Optional[datetime] = None,
+        after: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Queue the next run of a rule.
+
+        A rule that missed runs (e.g. while the daemon was stopped) comes due
+        immediately, once.
+
+        Args:
+            rule: Rule to schedule
+            now: Current time (defaults to the scheduler clock)
+            after: Schedule the first run after this time instead of after
+                the rule's last run
+
+        Returns:
+            Time the rule was queued for, or None if it is not scheduled
+        """
+        if not rule.enabled or rule.schedule is None:
+            return None
+
+        now = now or self.clock()
+        try:
+            due = next_run(rule.schedule, after or rule.last_run_at or now)
+        except ValueError as e:
+            logger.error(f"Invalid schedule for rule '{rule.name}': {e}")
+            return None
+
+        if due is None:
+            return None
+
+        heapq.heappush(self._queue, (due, next(self._counter), rule.id))
+        return due
+
+    def schedule_all(self, now: Optional[datetime] = None) -> None:
+        """Rebuild the queue from the rules engine."""
+        now = now or self.clock()
+        self._queue = []
+        for rule in self.rules_engine.get_enabled_rules():
+            self.schedule_rule(rule, now)
+
+        logger.info(f"Scheduled {len(self._queue)} rules")
+
+    def next_due(self) -> Optional[datetime]:
+        """Get the time of the earliest queued run."""
+        return self._queue[0][0] if self._queue else None
+
+    def upcoming(self) -> List[Tuple[datetime, Rule]]:
+        """List queued runs in order as (due time, rule) tuples."""
+        entries = []
+        for due, _, rule_id in sorted(self._queue):
+            rule = self.rules_engine.get_rule(rule_id)
+            if rule:
+                entries.append((due, rule))
+        return entries
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Rule]:
+        """Remove and return every rule due within the batching window.
+
+        Rules deleted or disabled since they were queued are dropped.
+
+        Args:
+            now: Current time (defaults to the scheduler clock)
+
+        Returns:
+            Rules to run now, highest priority first
+        """
+        horizon = (now or self.clock()) + self.window
+        rules = {}
+
+        while self._queue and self._queue[0][0] <= horizon:
+            _, _, rule_id = heapq.heappop(self._queue)
+            rule = self.rules_engine.get_rule(rule_id)
+            if rule and rule.enabled:
+                rules[rule.id] = rule
+
+        return sorted(rules.values(), key=lambda r: r.priority, reverse=True)
+
+    async def run_due(self, now: Optional[datetime] = None) -> List[ProcessingResult]:
+        """Run every rule that is due and queue their next runs.
+
+        Args:
+            now: Current time (defaults to the scheduler clock)
+
+        Returns:
+            Processing results of the rules that ran
+        """
+        rules = self.pop_due(now)
+        if not rules:
+            return []
+
+        logger.info(f"Running {len(rules)} scheduled rules: {', '.join(r.name for r in rules)}")
+        try:
+            results = await self.processor.process_rules(rules, dry_run=self.dry_run)
+        except Exception:
+            # Don't drop the rules from the queue; retry at their next slot
+            failed_at = self.clock()
+            for rule in rules:
+                self.schedule_rule(rule, failed_at, after=failed_at)
+            raise
+
+        finished = self.clock()
+        if not self.dry_run:
+            for result in results:
+                self.rules_engine.record_run(
+                    result.rule.id,
+                    run_at=finished,
+                    matched=result.stats.total_messages,
+                    succeeded=result.stats.successful_operations,
+                    failed=result.stats.failed_operations,
+                    duration=result.stats.duration
+                )
+
+            if self.rules_engine.rules_file:
+                self.rules_engine.save_rules_to_file()
+                self._rules_mtime = self._current_mtime()
+
+        for rule in rules:
+            self.schedule_rule(self.rules_engine.get_rule(rule.id) or rule, finished, after=finished)
+
+        return results
+
+    def _current_mtime(self) -> Optional[float]:
+        """Modification time of the rules file, if there is one."""
+        if not self.rules_engine.rules_file:
+            return None
+        try:
+            return Path(self.rules_engine.rules_file).stat().st_mtime
+        except OSError:
+            return None
+
+    def _reload_if_changed(self) -> None:
+        """Reload rules and rebuild the queue if the rules file was edited."""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._rules_mtime:
+            return
+
+        if self._rules_mtime is not None:
+            logger.info("Rules file changed, reloading schedule")
+            self.rules_engine.load_rules_from_file(self.rules_engine.rules_file)
+            self.schedule_all()
+        self._rules_mtime = mtime
+
+    async def run_forever(self, rescan_interval: float = 300.0) -> None:
+        """Run scheduled rules until stop() is called.
+
+        Args:
+            rescan_interval: Maximum seconds between checks of the rules file
+                for edits, so new or changed schedules are picked up
+        """
+        self._stop_event = asyncio.Event()
+        self._rules_mtime = self._current_mtime()
+        self.schedule_all()
+
+        while not self._stop_event.is_set():
+            due = self.next_due()
+            delay = rescan_interval
+            if due is not None:
+                delay = min(delay, max(0.0, (due - self.clock()).total_seconds()))
+
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+            try:
+                self._reload_if_changed()
+                await self.run_due()
+            except Exception as e:
+                logger.error(f"Scheduled run failed: {e}")
+
+    def stop(self) -> None:
+        """Ask run_forever() to return."""
+        if self._stop_event is not None:
+            self._stop_event.set()
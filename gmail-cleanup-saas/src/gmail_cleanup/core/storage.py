@@ -0,0 +1,266 @@
+"""Compact in-memory storage for large message metadata sets."""
+
+import sys
+from array import array
+from typing import Dict, Any, List, Optional, Iterable, Iterator
+from datetime import datetime, timezone
+
+from .client import EmailMessage
+
+
+class LabelTable:
+    """Assigns each label ID of an account a bit position.
+
+    Label sets are then stored as a single integer bitmask per message
+    instead of a list of repeated strings.
+    """
+
+    def __init__(self, label_ids: Optional[Iterable[str]] = None):
+        """Initialize the table.
+
+        Args:
+            label_ids: Known label IDs to register up front
+        """
+        self._bits: Dict[str, int] = {}
+        self._labels: List[str] = []
+
+        for label_id in label_ids or []:
+            self.bit(label_id)
+
+    @classmethod
+    def from_labels(cls, labels: List[Dict[str, Any]]) -> 'LabelTable':
+        """Create a table from a labels.list response.
+
+        Args:
+            labels: Label dictionaries as returned by GmailClient.get_labels()
+
+        Returns:
+            LabelTable with every account label registered
+        """
+        return cls(label['id'] for label in labels)
+
+    def bit(self, label_id: str) -> int:
+        """Get the bit position for a label, registering it if new."""
+        position = self._bits.get(label_id)
+        if position is None:
+            position = len(self._labels)
+            label_id = sys.intern(label_id)
+            self._bits[label_id] = position
+            self._labels.append(label_id)
+        return position
+
+    def mask(self, label_ids: Iterable[str]) -> int:
+        """Encode a collection of label IDs as a bitmask."""
+        mask = 0
+        for label_id in label_ids:
+            mask |= 1 << self.bit(label_id)
+        return mask
+
+    def query_mask(self, label_ids: Iterable[str]) -> int:
+        """Encode label IDs without registering unknown ones.
+
+        Unknown labels cannot be set on any stored message, so they are
+        simply left out of the mask.
+        """
+        mask = 0
+        for label_id in label_ids:
+            position = self._bits.get(label_id)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def labels(self, mask: int) -> List[str]:
+        """Decode a bitmask back into label IDs."""
+        result = []
+        position = 0
+        while mask:
+            if mask & 1:
+                result.append(self._labels[position])
+            mask >>= 1
+            position += 1
+        return result
+
+    def __contains__(self, label_id: str) -> bool:
+        return label_id in self._bits
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+
+class CompactMessage:
+    """Slotted, interned representation of message metadata."""
+
+    __slots__ = (
+        'id', 'thread_id', 'sender', 'recipient', 'subject',
+        'timestamp', 'label_mask', 'size_estimate', 'is_unread'
+    )
+
+    def __init__(
+        self,
+        id: str,
+        thread_id: str,
+        sender: str,
+        recipient: str,
+        subject: str,
+        timestamp: Optional[float],
+        label_mask: int,
+        size_estimate: int,
+        is_unread: bool
+    ):
+        self.id = id
+        self.thread_id = thread_id
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.timestamp = timestamp
+        self.label_mask = label_mask
+        self.size_estimate = size_estimate
+        self.is_unread = is_unread
+
+    @classmethod
+    def from_email_message(cls, message: EmailMessage, table: LabelTable) -> 'CompactMessage':
+        """Convert an EmailMessage, interning repeated strings.
+
+        Args:
+            message: Message to convert
+            table: Label table of the account the message belongs to
+
+        Returns:
+            CompactMessage with labels encoded against ``table``
+        """
+        return cls(
+            id=message.id,
+            thread_id=message.thread_id,
+            sender=sys.intern(message.sender),
+            recipient=sys.intern(message.recipient),
+            subject=message.subject,
+            timestamp=message.date.timestamp() if message.date else None,
+            label_mask=table.mask(message.labels),
+            size_estimate=message.size_estimate or 0,
+            is_unread=message.is_unread
+        )
+
+    @property
+    def date(self) -> Optional[datetime]:
+        """Message timestamp as a UTC datetime."""
+        if self.timestamp is None:
+            return None
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc)
+
+    def has_labels(self, mask: int) -> bool:
+        """Check whether the message carries every label in ``mask``."""
+        return self.label_mask & mask == mask
+
+    def to_email_message(self, table: LabelTable, snippet: str = '') -> EmailMessage:
+        """Expand back into a regular EmailMessage."""
+        return EmailMessage(
+            id=self.id,
+            thread_id=self.thread_id,
+            sender=self.sender,
+            recipient=self.recipient,
+            subject=self.subject,
+            date=self.date,
+            labels=table.labels(self.label_mask),
+            snippet=snippet,
+            is_unread=self.is_unread,
+            size_estimate=self.size_estimate
+        )
+
+    def __repr__(self) -> str:
+        return f"CompactMessage(id={self.id!r}, sender={self.sender!r})"
+
+
+class MessageTable:
+    """Columnar store of message metadata for bulk work.
+
+    Every field lives in its own list or typed array, and strings that
+    repeat across messages (senders, recipients) are interned, so holding
+    a whole mailbox costs a small fraction of the equivalent EmailMessage
+    objects. Rows are materialized as CompactMessage on access.
+    """
+
+    def __init__(self, label_table: Optional[LabelTable] = None):
+        """Initialize an empty table.
+
+        Args:
+            label_table: Label table of the account (created if None)
+        """
+        self.label_table = label_table or LabelTable()
+
+        self.ids: List[str] = []
+        self.thread_ids: List[str] = []
+        self.senders: List[str] = []
+        self.recipients: List[str] = []
+        self.subjects: List[str] = []
+        self.label_masks: List[int] = []
+        self.timestamps = array('d')  # NaN when undated
+        self.sizes = array('Q')
+        self.unread = array('B')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, message: EmailMessage) -> None:
+        """Append a message."""
+        self.ids.append(message.id)
+        self.thread_ids.append(message.thread_id)
+        self.senders.append(sys.intern(message.sender))
+        self.recipients.append(sys.intern(message.recipient))
+        self.subjects.append(message.subject)
+        self.label_masks.append(self.label_table.mask(message.labels))
+        self.timestamps.append(message.date.timestamp() if message.date else float('nan'))
+        self.sizes.append(message.size_estimate or 0)
+        self.unread.append(1 if message.is_unread else 0)
+
+    def add_many(self, messages: Iterable[EmailMessage]) -> None:
+        """Append an iterable of messages."""
+        for message in messages:
+            self.add(message)
+
+    def __getitem__(self, index: int) -> CompactMessage:
+        timestamp = self.timestamps[index]
+        return CompactMessage(
+            id=self.ids[index],
+            thread_id=self.thread_ids[index],
+            sender=self.senders[index],
+            recipient=self.recipients[index],
+            subject=self.subjects[index],
+            timestamp=None if timestamp != timestamp else timestamp,
+            label_mask=self.label_masks[index],
+            size_estimate=self.sizes[index],
+            is_unread=bool(self.unread[index])
+        )
+
+    def __iter__(self) -> Iterator[CompactMessage]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def with_labels(self, label_ids: Iterable[str]) -> List[int]:
+        """Get row indices of messages carrying every given label.
+
+        Args:
+            label_ids: Label IDs that must all be present
+
+        Returns:
+            List of matching row indices
+        """
+        label_ids = list(label_ids)
+        mask = self.label_table.query_mask(label_ids)
+        if any(label_id not in self.label_table for label_id in label_ids):
+            return []
+        return [i for i, row_mask in enumerate(self.label_masks) if row_mask & mask == mask]
+
+    def label_counts(self) -> Dict[str, int]:
+        """Count messages per label ID."""
+        counts = [0] * len(self.label_table)
+        for mask in self.label_masks:
+            position = 0
+            while mask:
+                if mask & 1:
+                    counts[position] += 1
+                mask >>= 1
+                position += 1
+        return {
+            label_id: counts[position]
+            for position, label_id in enumerate(self.label_table.labels((1 << len(counts)) - 1))
+        }
@@ -0,0 +1,516 @@
+"""Event-driven processing from Gmail push notifications."""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+from urllib.parse import urlsplit, parse_qs
+
+from googleapiclient.errors import HttpError
+
+from .processor import EmailProcessor, ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MailboxNotification:
+    """A Gmail push notification: the mailbox changed up to ``history_id``."""
+    email_address: str
+    history_id: int
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> 'MailboxNotification':
+        """Parse a notification.
+
+        Accepts a Pub/Sub push request body, a Pub/Sub message, or the bare
+        Gmail notification data ({"emailAddress": ..., "historyId": ...}).
+
+        Args:
+            payload: Decoded JSON payload
+
+        Returns:
+            MailboxNotification
+
+        Raises:
+            ValueError: If the payload is not a Gmail notification
+        """
+        if not isinstance(payload, dict):
+            raise ValueError(f"Not a Gmail notification: {payload!r}")
+        if 'message' in payload:
+            payload = payload['message']
+        if 'data' in payload:
+            payload = json.loads(base64.b64decode(payload['data']))
+
+        try:
+            return cls(
+                email_address=payload.get('emailAddress', ''),
+                history_id=int(payload['historyId'])
+            )
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Not a Gmail notification: {payload!r}")
+
+
+class Subscriber:
+    """Source of mailbox notifications.
+
+    Subclasses deliver notifications by calling publish() from the event
+    loop; the watcher awaits get(). Implement start() and close() to hook up
+    another transport.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        """Start receiving notifications."""
+        self._queue = asyncio.Queue()
+
+    async def close(self) -> None:
+        """Stop receiving notifications."""
+
+    def publish(self, notification: MailboxNotification) -> None:
+        """Hand a received notification to the consumer."""
+        self._queue.put_nowait(notification)
+
+    async def get(self) -> MailboxNotification:
+        """Wait for the next notification."""
+        return await self._queue.get()
+
+    def drain(self) -> List[MailboxNotification]:
+        """Take every notification already queued, without waiting."""
+        notifications = []
+        while not self._queue.empty():
+            notifications.append(self._queue.get_nowait())
+        return notifications
+
+
+class FileSubscriber(Subscriber):
+    """Reads notifications appended to a JSON-lines file.
+
+    Stand-in for Pub/Sub in development and tests: append a line such as
+    {"emailAddress": "me@example.com", "historyId": 12345} (or a full Pub/Sub
+    push body) to trigger processing.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0):
+        """Initialize the subscriber.
+
+        Args:
+            path: File to follow; only lines appended after start are read
+            poll_interval: Seconds between checks for new lines
+        """
+        super().__init__()
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await super().start()
+        offset = self.path.stat().st_size if self.path.exists() else 0
+        self._task = asyncio.ensure_future(self._follow(offset))
+        logger.info(f"Reading notifications from {self.path}")
+
+    async def _follow(self, offset: int) -> None:
+        while True:
+            try:
+                if self.path.stat().st_size < offset:
+                    offset = 0  # Truncated
+                with open(self.path, 'r') as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith('\n'):
+                            break  # Partially written; re-read next time
+                        offset += len(line.encode('utf-8'))
+                        self._publish_line(line)
+            except FileNotFoundError:
+                offset = 0
+
+            await asyncio.sleep(self.poll_interval)
+
+    def _publish_line(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        try:
+            self.publish(MailboxNotification.from_payload(json.loads(line)))
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid notification line: {e}")
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class HTTPPushSubscriber(Subscriber):
+    """Minimal HTTP endpoint for Pub/Sub push subscriptions.
+
+    Accepts POSTed Pub/Sub push bodies, so it can serve a real push
+    subscription behind a public URL, or stand in for one locally
+    (e.g. curl -d '{"historyId": 12345}' http://localhost:8085/).
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 8085,
+        path: str = '/',
+        token: Optional[str] = None
+    ):
+        """Initialize the endpoint.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            path: URL path accepting notifications
+            token: If set, require a matching ``?token=`` query parameter
+        """
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.path = path
+        self.token = token
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        await super().start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Listening for push notifications on http://{self.host}:{self.port}{self.path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        status = '400 Bad Request'
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status = self._accept(request_line, body)
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"Rejected push request: {e}")
+        finally:
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+            try:
+                await writer.drain()
+            finally:
+                writer.close()
+
+    def _accept(self, request_line: List[str], body: bytes) -> str:
+        """Validate and publish one request; returns the HTTP status."""
+        if len(request_line) != 3:
+            return '400 Bad Request'
+
+        method, target, _ = request_line
+        url = urlsplit(target)
+        if url.path != self.path:
+            return '404 Not Found'
+        if method != 'POST':
+            return '405 Method Not Allowed'
+        if self.token and parse_qs(url.query).get('token', [None])[0] != self.token:
+            return '403 Forbidden'
+
+        self.publish(MailboxNotification.from_payload(json.loads(body)))
+        return '204 No Content'
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class PubSubSubscriber(Subscriber):
+    """Streaming pull from a Cloud Pub/Sub subscription.
+
+    Requires the google-cloud-pubsub package.
+    """
+
+    def __init__(self, subscription: str, credentials=None):
+        """Initialize the subscriber.
+
+        Args:
+            subscription: Full subscription name,
+                e.g. 'projects/p/subscriptions/s'
+            credentials: Google credentials for Pub/Sub (defaults to
+                application default credentials)
+        """
+        super().__init__()
+        self.subscription = subscription
+        self.credentials = credentials
+        self._client = None
+        self._future = None
+
+    async def start(self) -> None:
+        try:
+            from google.cloud import pubsub_v1
+        except ImportError:
+            raise ImportError(
+                "google-cloud-pubsub is required for Pub/Sub subscriptions. "
+                "Install with: pip install gmail-cleanup[pubsub]"
+            )
+
+        await super().start()
+        loop = asyncio.get_event_loop()
+
+        def _callback(message):
+            try:
+                notification = MailboxNotification.from_payload(json.loads(message.data))
+                loop.call_soon_threadsafe(self.publish, notification)
+            except ValueError as e:
+                logger.warning(f"Ignoring invalid Pub/Sub message: {e}")
+            message.ack()
+
+        self._client = pubsub_v1.SubscriberClient(credentials=self.credentials)
+        self._future = self._client.subscribe(self.subscription, callback=_callback)
+        logger.info(f"Pulling notifications from {self.subscription}")
+
+    async def close(self) -> None:
+        if self._future:
+            self._future.cancel()
+            self._future = None
+        if self._client:
+            self._client.close()
+            self._client = None
+
+
+class MailboxWatcher:
+    """Processes new mail as Gmail push notifications arrive.
+
+    On each notification only the history delta since the last processed
+    history ID is fetched, and the new messages are run through
+    EmailProcessor.process_messages, which matches rules locally. While the
+    mailbox is quiet no API calls are made, apart from a daily watch renewal.
+    New messages whose metadata can't be fetched (e.g. still rate limited
+    after the client's retries) are kept as pending and fetched again with
+    the next delta, so moving past their history ID doesn't lose them.
+    """
+
+    # History types that bring in new mail
+    HISTORY_TYPES = ['messageAdded']
+
+    # New messages carrying these labels are not processed
+    SKIP_LABELS = frozenset(['DRAFT', 'SPAM', 'TRASH'])
+
+    def __init__(
+        self,
+        processor: EmailProcessor,
+        subscriber: Subscriber,
+        topic_name: Optional[str] = None,
+        label_ids: Optional[List[str]] = None,
+        state_file: Optional[str] = None,
+        dry_run: bool = False,
+        debounce: float = 1.0,
+        renew_interval: float = 24 * 3600
+    ):
+        """Initialize the watcher.
+
+        Args:
+            processor: Email processor holding the client and rules
+            subscriber: Notification source
+            topic_name: Pub/Sub topic to register with users.watch; if None,
+                notifications are assumed to be set up elsewhere
+            label_ids: Only watch changes to these labels (default INBOX)
+            state_file: File persisting the last processed history ID and
+                pending message IDs, so a restart resumes where it stopped
+            dry_run: If True, only analyze without making changes
+            debounce: Seconds to wait after a notification so bursts are
+                handled in one history fetch
+            renew_interval: Seconds between users.watch renewals
+        """
+        self.processor = processor
+        self.client = processor.gmail_client
+        self.subscriber = subscriber
+        self.topic_name = topic_name
+        self.label_ids = label_ids if label_ids is not None else ['INBOX']
+        self.state_file = Path(state_file) if state_file else None
+        self.dry_run = dry_run
+        self.debounce = debounce
+        self.renew_interval = renew_interval
+        self.history_id: Optional[int] = None
+        # New messages whose metadata couldn't be fetched yet
+        self.pending_ids: List[str] = []
+        self._renew_at = 0.0
+        self._stop_event: Optional[asyncio.Event] = None
+
+    async def _call(self, func, *args):
+        """Run a blocking client call in the processor's thread pool."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.processor.executor, func, *args)
+
+    def _load_state(self) -> Optional[int]:
+        if not self.state_file or not self.state_file.exists():
+            return None
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            history_id = int(state['history_id'])
+            self.pending_ids = [str(message_id) for message_id in state.get('pending_ids', [])]
+            return history_id
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable watch state {self.state_file}: {e}")
+            return None
+
+    def _save_state(self) -> None:
+        if not self.state_file:
+            return
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_file.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'history_id': self.history_id, 'pending_ids': self.pending_ids}, f)
+            os.replace(tmp_path, self.state_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def _renew_watch(self) -> None:
+        """Register (or re-register) the mailbox watch."""
+        result = await self._call(self.client.watch, self.topic_name, self.label_ids)
+        self._renew_at = time.monotonic() + self.renew_interval
+        if self.history_id is None:
+            self.history_id = int(result['historyId'])
+
+    async def start(self) -> None:
+        """Start the subscriber, register the watch and pick a start point."""
+        await self.subscriber.start()
+        self.history_id = self._load_state()
+
+        if self.topic_name:
+            await self._renew_watch()
+
+        if self.history_id is None:
+            profile = await self._call(self.client.get_profile)
+            self.history_id = int(profile['historyId'])
+
+        self._save_state()
+        logger.info(f"Watching for new mail after historyId {self.history_id}")
+
+    async def process_changes(self) -> List[ProcessingResult]:
+        """Fetch the history delta and run the rules on new messages.
+
+        Returns:
+            Processing results for rules that matched new messages
+        """
+        label_id = self.label_ids[0] if len(self.label_ids) == 1 else None
+
+        try:
+            history = await self._call(
+                self.client.list_history, self.history_id, self.HISTORY_TYPES, label_id
+            )
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            # The start point fell out of Gmail's history window; the gap has
+            # to be covered by a regular (scheduled) run
+            profile = await self._call(self.client.get_profile)
+            logger.warning(
+                f"History {self.history_id} is no longer available; "
+                f"resuming from {profile['historyId']}"
+            )
+            self.history_id = int(profile['historyId'])
+            self._save_state()
+            return []
+
+        message_ids = list(dict.fromkeys(self.pending_ids + self._added_message_ids(history['history'])))
+        results: List[ProcessingResult] = []
+
+        if message_ids:
+            messages, failed = await self._call(self.client.fetch_messages_metadata, message_ids)
+            if failed:
+                logger.warning(f"Couldn't fetch {len(failed)} new messages; retrying them with the next changes")
+            self.pending_ids = failed
+            # Labels may have changed since the message was added
+            messages = [m for m in messages if not self.SKIP_LABELS.intersection(m.labels)]
+            logger.info(f"Processing {len(messages)} new messages")
+            if messages:
+                results = await self.processor.process_messages(messages, dry_run=self.dry_run)
+
+        self.history_id = max(self.history_id, int(history['historyId']))
+        self._save_state()
+        return results
+
+    def _added_message_ids(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """Collect IDs of newly added messages from history records."""
+        message_ids: Dict[str, None] = {}
+        for record in records:
+            for added in record.get('messagesAdded', []):
+                message = added['message']
+                if not self.SKIP_LABELS.intersection(message.get('labelIds', [])):
+                    message_ids[message['id']] = None
+        return list(message_ids)
+
+    async def handle(self, notification: MailboxNotification) -> List[ProcessingResult]:
+        """Process a notification unless it is already covered.
+
+        Args:
+            notification: Received notification
+
+        Returns:
+            Processing results for rules that matched new messages
+        """
+        if notification.history_id <= self.history_id and not self.pending_ids:
+            return []
+        return await self.process_changes()
+
+    async def run_forever(self) -> None:
+        """Process notifications until stop() is called."""
+        self._stop_event = asyncio.Event()
+        await self.start()
+
+        try:
+            while not self._stop_event.is_set():
+                timeout = None
+                if self.topic_name:
+                    timeout = max(0.0, self._renew_at - time.monotonic())
+
+                next_notification = asyncio.ensure_future(self.subscriber.get())
+                stopped = asyncio.ensure_future(self._stop_event.wait())
+                done, _ = await asyncio.wait(
+                    [next_notification, stopped],
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                stopped.cancel()
+
+                try:
+                    if next_notification not in done:
+                        next_notification.cancel()
+                        if not self._stop_event.is_set():
+                            await self._renew_watch()
+                        continue
+
+                    # Let a burst of notifications settle into one fetch
+                    await asyncio.sleep(self.debounce)
+                    notifications = [next_notification.result()] + self.subscriber.drain()
+                    latest = max(notifications, key=lambda n: n.history_id)
+                    await self.handle(latest)
+                except Exception as e:
+                    logger.error(f"Failed to process notification: {e}")
+        finally:
+            await self.close()
+
+    def stop(self) -> None:
+        """Ask run_forever() to return."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def close(self) -> None:
+        """Stop the subscriber and, if this watcher registered it, the watch."""
+        await self.subscriber.close()
+        if self.topic_name:
+            try:
+                await self._call(self.client.stop_watch)
+            except HttpError:
+                pass
@@ -2,13 +2,32 @@
 
 from ..core.client import GmailClient, EmailMessage, BatchResult
 from ..core.processor import EmailProcessor, ProcessingStats, ProcessingResult
-from ..auth.oauth import GoogleAuthManager, CredentialsManager, AuthenticationError
-from ..rules.engine import RulesEngine, RuleValidationError
+from ..core.storage import LabelTable, CompactMessage, MessageTable
+from ..core.estimator import MatchEstimator, MatchEstimate
+from ..core.journal import ActionJournal, JournalEntry, JournalRun
+from ..core.metrics import REGISTRY, MetricsRegistry, Histogram, CallRecord
+from ..core.quota import QuotaLimiter
+from ..core.fleet import FleetRunner, Account, AccountResult, load_accounts
+from ..core.scheduler import RuleScheduler, next_run
+from ..core.watch import (
+    MailboxWatcher, MailboxNotification, Subscriber,
+    FileSubscriber, HTTPPushSubscriber, PubSubSubscriber
+)
+from ..auth.oauth import GoogleAuthManager, CredentialsManager, CredentialHolder, AuthenticationError
+from ..rules.engine import (
+    RulesEngine, RuleValidationError, BulkOperationError, RuleChanges, parse_rule_operations
+)
 from ..rules.models import (
-    Rule, RuleCriteria, RuleAction, RuleSet, ActionType,
-    RuleExecutionResult
+    Rule, RuleCriteria, RuleAction, RuleSchedule, RuleSet, ActionType,
+    Granularity, RuleExecutionResult
 )
+from ..rules.matcher import CompiledRule, compile_rules
 from ..rules.templates import RuleTemplates
+from ..rules.analyzer import RuleAnalyzer, RuleAnalysis, RuleFinding
+from ..rules.generator import (
+    RuleGenerator, DomainPolicy, GeneratedRule, GenerationResult, DEFAULT_POLICIES,
+    estimate_quota_units
+)
 
 __all__ = [
     # Core client
@@ -21,23 +40,85 @@ __all__ = [
     "ProcessingStats",
     "ProcessingResult",
     
+    # Compact storage
+    "LabelTable",
+    "CompactMessage",
+    "MessageTable",
+    
+    # Match counting
+    "MatchEstimator",
+    "MatchEstimate",
+    
+    # Undo journal
+    "ActionJournal",
+    "JournalEntry",
+    "JournalRun",
+    
+    # Metrics
+    "REGISTRY",
+    "MetricsRegistry",
+    "Histogram",
+    "CallRecord",
+    
+    # Multi-account runs
+    "FleetRunner",
+    "Account",
+    "AccountResult",
+    "load_accounts",
+    "QuotaLimiter",
+    
+    # Scheduling
+    "RuleScheduler",
+    "next_run",
+    
+    # Push notifications
+    "MailboxWatcher",
+    "MailboxNotification",
+    "Subscriber",
+    "FileSubscriber",
+    "HTTPPushSubscriber",
+    "PubSubSubscriber",
+    
     # Authentication
     "GoogleAuthManager",
     "CredentialsManager",
+    "CredentialHolder",
     "AuthenticationError",
     
     # Rules engine
     "RulesEngine",
     "RuleValidationError",
+    "BulkOperationError",
+    "RuleChanges",
+    "parse_rule_operations",
     
     # Rules models
     "Rule",
     "RuleCriteria",
     "RuleAction",
+    "RuleSchedule",
     "RuleSet",
     "ActionType",
+    "Granularity",
     "RuleExecutionResult",
     
+    # Local rule matching
+    "CompiledRule",
+    "compile_rules",
+    
     # Templates
     "RuleTemplates",
+    
+    # Rule generation
+    "RuleGenerator",
+    "DomainPolicy",
+    "GeneratedRule",
+    "GenerationResult",
+    "DEFAULT_POLICIES",
+    "estimate_quota_units",
+    
+    # Rule analysis
+    "RuleAnalyzer",
+    "RuleAnalysis",
+    "RuleFinding",
 ]
\ No newline at end of file
@@ -0,0 +1,415 @@
+"""Find duplicate, redundant and conflicting rules in a rule set."""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .matcher import _phrase_pattern
+from .models import ActionType, Rule, RuleCriteria
+
+logger = logging.getLogger(__name__)
+
+# Actions that take messages out of every later search
+_REMOVING_ACTIONS = (ActionType.DELETE, ActionType.MOVE_TO_TRASH, ActionType.PERMANENT_DELETE)
+
+# How findings describe what a rule does to its messages
+_ACTION_PHRASES = {
+    ActionType.DELETE: 'deletes',
+    ActionType.MOVE_TO_TRASH: 'trashes',
+    ActionType.PERMANENT_DELETE: 'permanently deletes',
+    ActionType.MARK_READ: 'marks read',
+    ActionType.ADD_LABEL: 'labels',
+    ActionType.REMOVE_LABEL: 'unlabels',
+    ActionType.ARCHIVE: 'archives',
+}
+
+# Finding kinds
+DUPLICATE = 'duplicate'
+SUBSUMED = 'subsumed'
+SHADOWED = 'shadowed'
+UNSATISFIABLE = 'unsatisfiable'
+CONFLICT = 'conflict'
+
+
+@dataclass
+class RuleFinding:
+    """One problem found in a rule set."""
+    kind: str
+    rule_id: str
+    message: str
+    # Rule that covers or conflicts with rule_id
+    other_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'rule_id': self.rule_id,
+            'other_id': self.other_id,
+            'message': self.message,
+        }
+
+
+@dataclass
+class RuleAnalysis:
+    """Findings for a rule set, with the operations that resolve them."""
+    rules: int = 0
+    findings: List[RuleFinding] = field(default_factory=list)
+
+    @property
+    def redundant_rule_ids(self) -> List[str]:
+        """Rules whose searches can be dropped without changing the outcome."""
+        return [f.rule_id for f in self.findings if f.kind != CONFLICT]
+
+    def by_kind(self, kind: str) -> List[RuleFinding]:
+        return [f for f in self.findings if f.kind == kind]
+
+    def merge_operations(self) -> List[Dict[str, Any]]:
+        """Operations for RulesEngine.apply_operations that resolve the findings.
+
+        Duplicate and subsumed rules are deleted, since another rule does
+        the same work. Shadowed and unsatisfiable rules are disabled rather
+        than deleted, as their criteria may have been meant differently.
+        Conflicts are left for the user.
+        """
+        operations = []
+        for finding in self.findings:
+            if finding.kind in (DUPLICATE, SUBSUMED):
+                operations.append({'op': 'delete', 'id': finding.rule_id})
+            elif finding.kind in (SHADOWED, UNSATISFIABLE):
+                operations.append({'op': 'update', 'id': finding.rule_id, 'rule': {'enabled': False}})
+        return operations
+
+
+# Bounds are exclusive; None means unbounded
+_Interval = Tuple[Optional[float], Optional[float]]
+
+
+def _within(inner: _Interval, outer: _Interval) -> bool:
+    """Whether every value in inner is also in outer."""
+    low, high = inner
+    outer_low, outer_high = outer
+    if outer_low is not None and (low is None or low < outer_low):
+        return False
+    if outer_high is not None and (high is None or high > outer_high):
+        return False
+    return True
+
+
+def _is_empty(interval: _Interval) -> bool:
+    low, high = interval
+    return low is not None and high is not None and high <= low
+
+
+def _intersects(a: _Interval, b: _Interval) -> bool:
+    low = max((v for v in (a[0], b[0]) if v is not None), default=None)
+    high = min((v for v in (a[1], b[1]) if v is not None), default=None)
+    return not _is_empty((low, high))
+
+
+class _Terms:
+    """A rule's criteria in a form that can be compared symbolically.
+
+    Each field constrains the matched messages independently, so a rule
+    matches a subset of another's messages when each of the other's
+    constraints is implied by one of its own.
+    """
+
+    __slots__ = (
+        'rule', 'sender', 'sender_pattern', 'domains', 'to', 'phrases', 'excluded_phrases', 'flags',
+        'age', 'size', 'labels', 'exclude_labels', 'scope'
+    )
+
+    def __init__(self, rule: Rule):
+        criteria: RuleCriteria = rule.criteria
+        self.rule = rule
+
+        # The query uses from_domain only without from_email, and
+        # from_domains only without either
+        email = criteria.from_email.casefold() if criteria.from_email else None
+        self.sender = email
+        # from: matches on word boundaries, as in CompiledRule
+        self.sender_pattern = _phrase_pattern(email) if email else None
+        # Sender domains the rule is limited to, None for any
+        self.domains: Optional[FrozenSet[str]] = None
+        if email:
+            local, _, domain = email.rpartition('@')
+            if local and '.' in domain:
+                self.domains = frozenset([domain])
+        else:
+            domains = [criteria.from_domain] if criteria.from_domain else criteria.from_domains
+            if domains:
+                self.domains = frozenset(domain.casefold().lstrip('@') for domain in domains)
+
+        self.to = criteria.to_email.casefold() if criteria.to_email else None
+        self.phrases: FrozenSet[Tuple[str, str]] = frozenset(
+            (name, value) for name, value in (
+                ('subject', criteria.subject_contains),
+                ('subject_regex', criteria.subject_regex),
+                ('body', criteria.body_contains),
+                ('body_regex', criteria.body_regex),
+                ('words', criteria.has_words),
+            ) if value
+        )
+        self.excluded_phrases = frozenset([criteria.exclude_words] if criteria.exclude_words else [])
+        self.flags = {
+            name: value for name, value in (
+                ('has_attachment', criteria.has_attachment),
+                ('is_unread', criteria.is_unread),
+            ) if value is not None
+        }
+        # Age in days and size in bytes
+        self.age: _Interval = (criteria.older_than_days, criteria.newer_than_days)
+        self.size: _Interval = (criteria.size_larger_than, criteria.size_smaller_than)
+        self.labels = frozenset(criteria.labels or [])
+        self.exclude_labels = frozenset(criteria.exclude_labels or [])
+
+        # Rules only cover each other if they run together on the same units,
+        # and a dry-run rule changes nothing, so it can't stand in for a live one
+        schedule = rule.schedule.to_dict() if rule.schedule else None
+        self.scope = (rule.granularity, repr(schedule), rule.dry_run)
+
+    @property
+    def unsatisfiable(self) -> Optional[str]:
+        """Why the criteria can never match, if they can't."""
+        if _is_empty(self.age):
+            return "its age range is empty (older_than_days >= newer_than_days)"
+        if _is_empty(self.size):
+            return "its size range is empty (size_larger_than >= size_smaller_than)"
+        overlap = self.labels & self.exclude_labels
+        if overlap:
+            return f"it both requires and excludes label {sorted(overlap)[0]}"
+        if self.criteria_words() & self.excluded_phrases:
+            return "it both requires and excludes the same words"
+        return None
+
+    def criteria_words(self) -> FrozenSet[str]:
+        return frozenset(value for name, value in self.phrases if name == 'words')
+
+    @property
+    def identity(self) -> Tuple[Any, ...]:
+        """Key equal for rules matching exactly the same messages."""
+        return (
+            self.scope, self.sender, None if self.sender else self.domains, self.to,
+            self.phrases, self.excluded_phrases, tuple(sorted(self.flags.items())),
+            self.age, self.size, self.labels, self.exclude_labels
+        )
+
+    def implies_sender(self, other: '_Terms') -> bool:
+        if other.sender:
+            return self._sender_within(other)
+        if other.domains:
+            return self.domains is not None and self.domains <= other.domains
+        return True
+
+    def _sender_within(self, other: '_Terms') -> bool:
+        """Whether every sender matching this rule's from: matches other's.
+
+        Holds when other's address occurs in this one on word boundaries,
+        e.g. 'shop.com' in 'bob@shop.com' but not 'bob@shop.com' in
+        'jimbob@shop.com'.
+        """
+        return bool(self.sender) and other.sender_pattern.search(self.sender) is not None
+
+    def within(self, other: '_Terms') -> bool:
+        """Whether every message this rule matches also matches other."""
+        return (
+            self.scope == other.scope
+            and self.implies_sender(other)
+            and (other.to is None or other.to == self.to)
+            and other.phrases <= self.phrases
+            and other.excluded_phrases <= self.excluded_phrases
+            and all(self.flags.get(name) == value for name, value in other.flags.items())
+            and _within(self.age, other.age)
+            and _within(self.size, other.size)
+            and other.labels <= self.labels
+            and other.exclude_labels <= self.exclude_labels
+        )
+
+    def overlaps(self, other: '_Terms') -> bool:
+        """Whether some message could match both rules."""
+        if self.domains and other.domains and not self.domains & other.domains:
+            return False
+        if (self.sender and other.sender and '@' in self.sender and '@' in other.sender
+                and not self._sender_within(other) and not other._sender_within(self)):
+            return False
+        if any(other.flags.get(name, value) != value for name, value in self.flags.items()):
+            return False
+        if self.labels & other.exclude_labels or other.labels & self.exclude_labels:
+            return False
+        if self.criteria_words() & other.excluded_phrases or other.criteria_words() & self.excluded_phrases:
+            return False
+        return _intersects(self.age, other.age) and _intersects(self.size, other.size)
+
+
+def _action_key(rule: Rule) -> Tuple[Any, ...]:
+    labels = tuple(sorted(rule.action.parameters.get('labels', [])))
+    return rule.action.type, labels
+
+
+def _removes_for(remover: Rule, rule: Rule) -> bool:
+    """Whether remover's action leaves nothing for rule's action to do."""
+    if remover.action.type not in _REMOVING_ACTIONS:
+        return False
+    # Trashing doesn't cover a permanent delete
+    return rule.action.type != ActionType.PERMANENT_DELETE or remover.action.type == ActionType.PERMANENT_DELETE
+
+
+def _conflict(earlier: _Terms, later: _Terms) -> Optional[str]:
+    """Describe how two overlapping rules' actions conflict, if they do."""
+    first, second = earlier.rule, later.rule
+    if (first.action.type in _REMOVING_ACTIONS and second.action.type not in _REMOVING_ACTIONS
+            and earlier.domains and later.domains and earlier.domains & later.domains):
+        return (
+            f"Runs after '{first.name}' {_ACTION_PHRASES[first.action.type]} some of the "
+            f"messages it matches from {sorted(earlier.domains & later.domains)[0]}"
+        )
+    if {first.action.type, second.action.type} == {ActionType.ADD_LABEL, ActionType.REMOVE_LABEL}:
+        shared = set(first.action.parameters.get('labels', [])) & set(second.action.parameters.get('labels', []))
+        if shared:
+            return f"Adds or removes label {sorted(shared)[0]} on messages '{first.name}' also changes"
+    return None
+
+
+class RuleAnalyzer:
+    """Compares every pair of rules symbolically, without searching Gmail.
+
+    Criteria are read as sets of messages: sender addresses and domains,
+    age and size intervals, required and excluded labels, flags and
+    phrases. Rules can only cover or conflict with rules sharing their
+    sender domain or having no sender criteria, so rules are bucketed by
+    domain and large rule sets are compared in far fewer than n² steps.
+    Phrases and regexes are compared by equality, which errs towards
+    reporting less rather than wrongly.
+
+    Findings:
+        duplicate: Same criteria and action as a rule that runs earlier
+        subsumed: Matches a subset of another rule with the same action
+        shadowed: Matches a subset of a rule that deletes or trashes
+            its messages, so its own action is wasted
+        unsatisfiable: Criteria that can never match
+        conflict: A rule running after another rule on the same sender
+            trashed some of its messages, or two overlapping rules adding
+            and removing the same label
+    """
+
+    def __init__(self, include_disabled: bool = False):
+        """Initialize the analyzer.
+
+        Args:
+            include_disabled: Also analyze disabled rules (by default only
+                rules that run are compared)
+        """
+        self.include_disabled = include_disabled
+
+    def analyze(self, rules: Iterable[Rule]) -> RuleAnalysis:
+        """Analyze a list of rules.
+
+        Args:
+            rules: Rules to compare, e.g. RulesEngine.get_rules()
+
+        Returns:
+            Findings, at most one per redundant rule
+        """
+        # Run order: highest priority first, as RuleSet.get_enabled_rules()
+        ordered = sorted(
+            (rule for rule in rules if rule.enabled or self.include_disabled),
+            key=lambda rule: rule.priority,
+            reverse=True
+        )
+        analysis = RuleAnalysis(rules=len(ordered))
+        redundant = set()
+
+        terms: List[_Terms] = []
+        for rule in ordered:
+            term = _Terms(rule)
+            reason = term.unsatisfiable
+            if reason:
+                analysis.findings.append(RuleFinding(UNSATISFIABLE, rule.id, f"Never matches: {reason}"))
+                redundant.add(rule.id)
+            else:
+                terms.append(term)
+
+        # Exact duplicates: keep the first rule to run
+        first_by_identity: Dict[Tuple[Any, ...], _Terms] = {}
+        for term in terms:
+            key = term.identity + (_action_key(term.rule),)
+            first = first_by_identity.setdefault(key, term)
+            if first is not term:
+                analysis.findings.append(RuleFinding(
+                    DUPLICATE, term.rule.id,
+                    f"Same criteria and action as '{first.rule.name}'", first.rule.id
+                ))
+                redundant.add(term.rule.id)
+
+        terms = [term for term in terms if term.rule.id not in redundant]
+
+        # Rules without a sender domain can cover or conflict with any rule
+        buckets: Dict[Optional[str], List[_Terms]] = {}
+        for term in terms:
+            for domain in term.domains or [None]:
+                buckets.setdefault(domain, []).append(term)
+        wildcard = buckets.get(None, [])
+
+        position = {term.rule.id: index for index, term in enumerate(terms)}
+        conflicts = set()
+        for term in terms:
+            candidates = list(wildcard)
+            if term.domains:
+                # A rule over several domains shares buckets with each of them
+                candidates = list({
+                    id(other): other for domain in sorted(term.domains) for other in buckets[domain]
+                }.values()) + candidates
+            for other in candidates:
+                if other is term or other.rule.id in redundant:
+                    continue
+
+                if term.within(other):
+                    finding = self._covering(term.rule, other)
+                    # Of two rules covering each other, the one that runs first stays
+                    if (finding and other.within(term) and position[term.rule.id] < position[other.rule.id]
+                            and self._covering(other.rule, term)):
+                        finding = None
+                    if finding:
+                        analysis.findings.append(finding)
+                        redundant.add(term.rule.id)
+                        break
+
+                pair = tuple(sorted((term.rule.id, other.rule.id)))
+                if pair not in conflicts and term.overlaps(other):
+                    earlier, later = (term, other) if position[term.rule.id] < position[other.rule.id] else (other, term)
+                    reason = _conflict(earlier, later)
+                    if reason:
+                        conflicts.add(pair)
+                        analysis.findings.append(RuleFinding(CONFLICT, later.rule.id, reason, earlier.rule.id))
+
+        # Drop conflicts involving rules that auto-merge removes anyway
+        analysis.findings = [
+            f for f in analysis.findings
+            if f.kind != CONFLICT or not ({f.rule_id, f.other_id} & redundant)
+        ]
+
+        logger.info(
+            f"Analyzed {analysis.rules} rules: {len(redundant)} redundant, "
+            f"{len(analysis.by_kind(CONFLICT))} conflicts"
+        )
+        return analysis
+
+    @staticmethod
+    def _covering(rule: Rule, other: _Terms) -> Optional[RuleFinding]:
+        """Finding for a rule matching a subset of other's messages, if redundant."""
+        if other.rule.max_messages is not None:
+            # A capped rule may stop before reaching the rule's messages
+            return None
+        if _action_key(rule) == _action_key(other.rule):
+            return RuleFinding(
+                SUBSUMED, rule.id,
+                f"Only matches messages '{other.rule.name}' already {_ACTION_PHRASES[rule.action.type]}",
+                other.rule.id
+            )
+        if _removes_for(other.rule, rule):
+            return RuleFinding(
+                SHADOWED, rule.id,
+                f"Only matches messages '{other.rule.name}' {_ACTION_PHRASES[other.rule.action.type]}",
+                other.rule.id
+            )
+        return None
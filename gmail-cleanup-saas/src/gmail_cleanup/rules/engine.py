@@ -1,7 +1,12 @@
 """Rules engine for processing email filtering rules."""
 
 import logging
+import os
 import re
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Generator
 from datetime import datetime
 from pathlib import Path
@@ -17,6 +22,78 @@ class RuleValidationError(Exception):
     pass
 
 
+class BulkOperationError(RuleValidationError):
+    """Raised when operations of a bulk change are invalid; none are applied."""
+    
+    def __init__(self, errors: List[Dict[str, Any]]):
+        """Initialize the error.
+        
+        Args:
+            errors: One entry per invalid operation, with its 'index' in
+                the batch, 'op', rule 'id' (if known) and 'error' message
+        """
+        self.errors = errors
+        summary = "; ".join(f"#{e['index']}: {e['error']}" for e in errors[:5])
+        more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(f"{len(errors)} invalid operation(s): {summary}{more}")
+
+
+# Operations accepted by RulesEngine.apply_operations()
+RULE_OPERATIONS = ('create', 'update', 'upsert', 'delete')
+
+
+@dataclass
+class RuleChanges:
+    """IDs of the rules changed by a bulk operation."""
+    created: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+
+def parse_rule_operations(text: str) -> List[Dict[str, Any]]:
+    """Parse bulk rule operations from JSON or NDJSON.
+    
+    Accepts a JSON array of operations, one operation per line (NDJSON), or
+    a rules file or export (an object with a "rules" list). Operations look
+    like {"op": "create", "rule": {...}} or {"op": "delete", "id": "..."};
+    an entry without "op" is a rule to upsert.
+    
+    Args:
+        text: JSON or NDJSON document
+        
+    Returns:
+        List of operations, each with an "op" key
+        
+    Raises:
+        ValueError: If the text isn't valid JSON or NDJSON
+    """
+    if not text.strip():
+        return []
+    
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                try:
+                    data.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {number}: {e}")
+    
+    if isinstance(data, dict):
+        data = data['rules'] if isinstance(data.get('rules'), list) else [data]
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of rule operations")
+    
+    operations = []
+    for number, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise ValueError(f"Operation {number} is not an object")
+        operations.append(item if 'op' in item else {'op': 'upsert', 'rule': item})
+    return operations
+
+
 class RulesEngine:
     """Engine for managing and executing email filtering rules."""
     
@@ -28,6 +105,8 @@ class RulesEngine:
         """
         self.rules_file = rules_file
         self._rule_set: Optional[RuleSet] = None
+        self._lock = threading.RLock()
+        self._revision = 0
         
         if rules_file:
             self.load_rules_from_file(rules_file)
@@ -52,6 +131,7 @@ class RulesEngine:
         
         self._rule_set = RuleSet.from_dict(data)
         self.rules_file = file_path
+        self._changed()
         
         # Validate all rules
         for rule in self._rule_set.rules:
@@ -59,6 +139,16 @@ class RulesEngine:
         
         logger.info(f"Loaded {len(self._rule_set.rules)} rules from {file_path}")
     
+    @property
+    def revision(self) -> int:
+        """Counter increased by every change to the rules, including run stats."""
+        return self._revision
+    
+    def _changed(self) -> None:
+        """Record a change to the rules."""
+        with self._lock:
+            self._revision += 1
+    
     def save_rules_to_file(self, file_path: Optional[str] = None) -> None:
         """Save current rules to JSON file.
         
@@ -72,14 +162,24 @@ class RulesEngine:
         if not save_path:
             raise ValueError("No file path specified")
         
-        # Update timestamp
-        self._rule_set.updated_at = datetime.now()
-        
         # Ensure directory exists
-        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        directory = Path(save_path).parent
+        directory.mkdir(parents=True, exist_ok=True)
         
-        with open(save_path, 'w') as f:
-            json.dump(self._rule_set.to_dict(), f, indent=2)
+        with self._lock:
+            # Update timestamp
+            self._rule_set.updated_at = datetime.now()
+            
+            # Write to a temporary file and rename it over the old one, so
+            # readers never see a partially written rules file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.rules-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._rule_set.to_dict(), f, indent=2)
+                os.replace(tmp_path, save_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
         
         logger.info(f"Saved {len(self._rule_set.rules)} rules to {save_path}")
     
@@ -96,6 +196,7 @@ class RulesEngine:
             created_at=datetime.now(),
             updated_at=datetime.now()
         )
+        self._changed()
     
     def get_rules(self) -> List[Rule]:
         """Get all rules.
@@ -141,8 +242,97 @@ class RulesEngine:
         rule.updated_at = datetime.now()
         
         self._rule_set.add_rule(rule)
+        self._changed()
         logger.info(f"Added rule: {rule.name}")
     
+    def apply_operations(self, operations: List[Dict[str, Any]], dry_run: bool = False) -> RuleChanges:
+        """Create, update and delete many rules in one transaction.
+        
+        Every operation is validated before any is applied; if one is
+        invalid, the rule set is left unchanged. Updates merge the given
+        fields into the existing rule. Rules are looked up by ID once, so a
+        batch costs the same per operation however many rules there are.
+        Call save_rules_to_file() afterwards to persist the changes.
+        
+        Args:
+            operations: Operations as returned by parse_rule_operations()
+            dry_run: Only validate the operations
+            
+        Returns:
+            IDs of the created, updated and deleted rules
+            
+        Raises:
+            BulkOperationError: If any operation is invalid
+        """
+        with self._lock:
+            slots: List[Optional[Rule]] = list(self.get_rules())
+            index = {rule.id: position for position, rule in enumerate(slots)}
+            changes = RuleChanges()
+            errors = []
+            now = datetime.now()
+            
+            for number, operation in enumerate(operations):
+                op = operation.get('op')
+                data = operation.get('rule')
+                rule_id = operation.get('id') or (data.get('id') if isinstance(data, dict) else None)
+                
+                try:
+                    if op not in RULE_OPERATIONS:
+                        raise RuleValidationError(f"Unknown operation: {op!r}")
+                    
+                    if op == 'delete':
+                        if rule_id not in index:
+                            raise RuleValidationError(f"Rule not found: {rule_id}")
+                        slots[index.pop(rule_id)] = None
+                        changes.deleted.append(rule_id)
+                        continue
+                    
+                    if not isinstance(data, dict):
+                        raise RuleValidationError("Missing 'rule' object")
+                    
+                    existing = slots[index[rule_id]] if rule_id in index else None
+                    if op == 'create' and existing is not None:
+                        raise RuleValidationError(f"Rule with ID '{rule_id}' already exists")
+                    if op == 'update' and existing is None:
+                        raise RuleValidationError(f"Rule not found: {rule_id}")
+                    
+                    if existing is not None:
+                        rule = Rule.from_dict({**existing.to_dict(), **data, 'id': rule_id})
+                        rule.created_at = existing.created_at
+                        rule.updated_at = now
+                        self.validate_rule(rule)
+                        slots[index[rule_id]] = rule
+                        changes.updated.append(rule_id)
+                    else:
+                        rule = Rule.from_dict({**data, 'id': rule_id or str(uuid.uuid4())})
+                        rule.created_at = now
+                        rule.updated_at = now
+                        self.validate_rule(rule)
+                        index[rule.id] = len(slots)
+                        slots.append(rule)
+                        changes.created.append(rule.id)
+                
+                except KeyError as e:
+                    errors.append({'index': number, 'op': op, 'id': rule_id, 'error': f"Missing field: {e.args[0]}"})
+                except (RuleValidationError, TypeError, ValueError) as e:
+                    errors.append({'index': number, 'op': op, 'id': rule_id, 'error': str(e)})
+            
+            if errors:
+                raise BulkOperationError(errors)
+            
+            if not dry_run and operations:
+                if not self._rule_set:
+                    self.create_empty_ruleset("Default", "Default rule set")
+                self._rule_set.rules = [rule for rule in slots if rule is not None]
+                self._rule_set.updated_at = now
+                self._changed()
+            
+            logger.info(
+                f"{'Validated' if dry_run else 'Applied'} {len(operations)} rule operations: "
+                f"{len(changes.created)} created, {len(changes.updated)} updated, {len(changes.deleted)} deleted"
+            )
+            return changes
+    
     def update_rule(self, rule_id: str, updated_rule: Rule) -> bool:
         """Update an existing rule.
         
@@ -171,12 +361,58 @@ class RulesEngine:
                 
                 self._rule_set.rules[i] = updated_rule
                 self._rule_set.updated_at = datetime.now()
+                self._changed()
                 
                 logger.info(f"Updated rule: {updated_rule.name}")
                 return True
         
         return False
     
+    def record_run(
+        self,
+        rule_id: str,
+        run_at: datetime,
+        matched: int,
+        succeeded: int,
+        failed: int,
+        duration: Optional[float] = None
+    ) -> bool:
+        """Record the outcome of a rule run.
+        
+        Updates ``last_run_at`` and the cumulative ``stats`` of the rule
+        together, replacing the stats dictionary rather than mutating it, so
+        concurrent readers see either the old or the new values.
+        
+        Args:
+            rule_id: ID of the rule that ran
+            run_at: When the run finished
+            matched: Number of messages matched
+            succeeded: Number of successful operations
+            failed: Number of failed operations
+            duration: Run duration in seconds
+            
+        Returns:
+            True if the rule was updated, False if not found
+        """
+        with self._lock:
+            rule = self.get_rule(rule_id)
+            if not rule:
+                return False
+            
+            stats = dict(rule.stats)
+            stats['runs'] = stats.get('runs', 0) + 1
+            stats['total_matched'] = stats.get('total_matched', 0) + matched
+            stats['total_succeeded'] = stats.get('total_succeeded', 0) + succeeded
+            stats['total_failed'] = stats.get('total_failed', 0) + failed
+            stats['last_matched'] = matched
+            if duration is not None:
+                stats['last_duration'] = duration
+            
+            rule.stats = stats
+            rule.last_run_at = run_at
+            self._changed()
+            return True
+    
     def remove_rule(self, rule_id: str) -> bool:
         """Remove a rule by ID.
         
@@ -189,7 +425,10 @@ class RulesEngine:
         if not self._rule_set:
             return False
         
-        return self._rule_set.remove_rule(rule_id)
+        removed = self._rule_set.remove_rule(rule_id)
+        if removed:
+            self._changed()
+        return removed
     
     def get_rule(self, rule_id: str) -> Optional[Rule]:
         """Get rule by ID.
@@ -273,6 +512,8 @@ class RulesEngine:
             query_parts.append(f'from:"{criteria.from_email}"')
         elif criteria.from_domain:
             query_parts.append(f'from:@{criteria.from_domain}')
+        elif criteria.from_domains:
+            query_parts.append(f"from:({' OR '.join(f'@{domain}' for domain in criteria.from_domains)})")
         
         if criteria.to_email:
             query_parts.append(f'to:"{criteria.to_email}"')
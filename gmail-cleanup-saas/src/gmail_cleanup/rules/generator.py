@@ -0,0 +1,441 @@
+"""Generate cleanup rules in bulk from mailbox analysis."""
+
+import logging
+import math
+import re
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .engine import RulesEngine
+from .models import ActionType, Rule, RuleAction, RuleCriteria
+from .templates import RuleTemplates
+from ..core.quota import QUOTA_UNITS
+
+logger = logging.getLogger(__name__)
+
+# Messages per messages.list page and per batchModify call
+LIST_PAGE_SIZE = 500
+MODIFY_BATCH_SIZE = 1000
+
+# Sender domains per combined rule, keeping its from:(...) query short
+DOMAINS_PER_RULE = 25
+
+# Verbs used in generated rule names
+_ACTION_VERBS = {
+    ActionType.DELETE: 'Delete',
+    ActionType.MOVE_TO_TRASH: 'Trash',
+    ActionType.MARK_READ: 'Mark read',
+    ActionType.ADD_LABEL: 'Label',
+    ActionType.REMOVE_LABEL: 'Unlabel',
+    ActionType.ARCHIVE: 'Archive',
+    ActionType.PERMANENT_DELETE: 'Permanently delete',
+}
+
+
+@dataclass
+class DomainPolicy:
+    """Template applied to every sender domain meeting its thresholds.
+
+    Thresholds left as None aren't checked. Unread ratios are fractions of
+    a domain's messages, and idle days count from its newest message.
+    """
+    template_id: str
+    min_messages: int = 1
+    min_unread_ratio: Optional[float] = None
+    max_unread_ratio: Optional[float] = None
+    min_idle_days: Optional[int] = None
+    # Criteria overriding the template's, e.g. {"older_than_days": 90}
+    criteria: Dict[str, Any] = field(default_factory=dict)
+    enabled: bool = True
+
+    def matches(self, row: Dict[str, Any], now: datetime) -> bool:
+        """Check whether a domain table row meets the thresholds."""
+        messages = row.get('messages', 0)
+        if messages < self.min_messages or not messages:
+            return False
+
+        unread_ratio = row.get('unread', 0) / messages
+        if self.min_unread_ratio is not None and unread_ratio < self.min_unread_ratio:
+            return False
+        if self.max_unread_ratio is not None and unread_ratio > self.max_unread_ratio:
+            return False
+
+        if self.min_idle_days is not None:
+            newest = _month_end(row.get('newest_month'))
+            if newest is None or (now - newest).days < self.min_idle_days:
+                return False
+        return True
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DomainPolicy':
+        """Create a DomainPolicy from a dictionary."""
+        return cls(
+            template_id=data['template_id'],
+            min_messages=data.get('min_messages', 1),
+            min_unread_ratio=data.get('min_unread_ratio'),
+            max_unread_ratio=data.get('max_unread_ratio'),
+            min_idle_days=data.get('min_idle_days'),
+            criteria=data.get('criteria', {}),
+            enabled=data.get('enabled', True),
+        )
+
+
+# Policies used when none are given, tried in order
+DEFAULT_POLICIES = [
+    # Notifications that are almost never opened
+    DomainPolicy('auto_read_notifications', min_messages=20, min_unread_ratio=0.8),
+    # Senders that stopped writing over a year ago
+    DomainPolicy('delete_old_emails', min_messages=10, min_idle_days=365, criteria={'older_than_days': 365}),
+    # High-volume senders that are mostly left unread
+    DomainPolicy('delete_old_emails', min_messages=50, min_unread_ratio=0.5, criteria={'older_than_days': 90}),
+    # High-volume senders that are read
+    DomainPolicy('organize_by_domain', min_messages=100, max_unread_ratio=0.2),
+]
+
+
+@dataclass
+class GeneratedRule:
+    """A generated rule with its projected size and cost."""
+    rule: Rule
+    # Sender domains the rule covers, more than one for a combined rule
+    domains: List[str]
+    template_id: str
+    estimated_messages: int
+    # Quota units to list the matches and apply the action once
+    quota_units: int
+
+
+@dataclass
+class GenerationResult:
+    """Rules generated from a domain table."""
+    rules: List[GeneratedRule] = field(default_factory=list)
+    domains: int = 0
+    # Policy matches folded into an earlier rule with the same domain and action
+    merged: int = 0
+    # Rules already in the rule set under another ID
+    duplicates: int = 0
+    # Domain rules folded into combined rules with the same query and action
+    combined: int = 0
+    # IDs of earlier generated rules replaced by this generation's rules
+    stale: List[str] = field(default_factory=list)
+
+    @property
+    def quota_units(self) -> int:
+        return sum(generated.quota_units for generated in self.rules)
+
+    @property
+    def estimated_messages(self) -> int:
+        return sum(generated.estimated_messages for generated in self.rules)
+
+    def operations(self) -> List[Dict[str, Any]]:
+        """Upsert and delete operations for RulesEngine.apply_operations."""
+        operations = [{'op': 'upsert', 'rule': generated.rule.to_dict()} for generated in self.rules]
+        operations.extend({'op': 'delete', 'id': rule_id} for rule_id in self.stale)
+        return operations
+
+
+def estimate_quota_units(action: ActionType, messages: int) -> int:
+    """Project the quota units a rule spends on one run.
+
+    Counts listing the matching messages in full pages and applying the
+    action: batchModify calls for label changes and trashing, one delete
+    call per message for permanent deletion.
+
+    Args:
+        action: Rule action
+        messages: Messages the rule is expected to match
+
+    Returns:
+        Projected quota units
+    """
+    units = max(1, math.ceil(messages / LIST_PAGE_SIZE)) * QUOTA_UNITS['messages.list']
+    if action == ActionType.PERMANENT_DELETE:
+        units += messages * QUOTA_UNITS['messages.delete']
+    else:
+        units += math.ceil(messages / MODIFY_BATCH_SIZE) * QUOTA_UNITS['messages.batchModify']
+    return units
+
+
+def _month_start(label: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM month label as the month's first day."""
+    if not label:
+        return None
+    year, month = label.split('-')
+    return datetime(int(year), int(month), 1)
+
+
+def _month_end(label: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM month label as the next month's first day."""
+    start = _month_start(label)
+    if start is None:
+        return None
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+class RuleGenerator:
+    """Turns a sender domain table into rules, one pass over all domains.
+
+    Every policy is checked against every domain; a domain gets at most one
+    rule per action, from the first policy that produces it. Domains whose
+    rules differ only in the sender domain are folded into combined rules
+    of up to DOMAINS_PER_RULE domains each, searched with one
+    from:(@a.com OR @b.com ...) query, so a run lists and modifies them
+    together instead of spending a query per domain.
+
+    Single-domain rules get IDs derived from their template and domain, and
+    combined rules from their template, shared query and chunk number, so
+    generating again updates the same rules. Earlier generated rules of the
+    same group that aren't produced again, such as a trailing chunk after
+    the group shrank, are deleted. Rules duplicating an existing rule's
+    query and action are skipped.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[List[DomainPolicy]] = None,
+        rules_engine: Optional[RulesEngine] = None,
+        now: Optional[datetime] = None
+    ):
+        """Initialize the generator.
+
+        Args:
+            policies: Policies tried in order (DEFAULT_POLICIES by default)
+            rules_engine: Rule set checked for duplicates (empty by default)
+            now: Reference time for idle days and age criteria
+
+        Raises:
+            ValueError: If a policy names an unknown template
+        """
+        self.policies = [p for p in (policies or DEFAULT_POLICIES) if p.enabled]
+        self.rules_engine = rules_engine or RulesEngine()
+        self.now = now or datetime.now()
+
+        templates = {t['id']: t for t in RuleTemplates.get_all_templates()}
+        for policy in self.policies:
+            if policy.template_id not in templates:
+                raise ValueError(f"Template '{policy.template_id}' not found")
+        self._templates = templates
+
+    def generate(self, domains: Union[Dict[str, Any], Iterable[Dict[str, Any]]]) -> GenerationResult:
+        """Generate rules for a domain table.
+
+        Args:
+            domains: Rows of MailboxAnalytics.domain_table(), or an analytics
+                report (its 'all_domains' rows, else its 'domains' rows)
+
+        Returns:
+            Generated rules, largest estimated matches first
+        """
+        if isinstance(domains, dict):
+            domains = domains.get('all_domains') or domains.get('domains') or []
+
+        existing: Dict[Tuple[str, str], str] = {}
+        for rule in self.rules_engine.get_rules():
+            existing[self._key(rule)] = rule.id
+
+        # Rules left after dropping a domain's repeated actions, by shared effect
+        groups: Dict[Tuple[str, str], List[GeneratedRule]] = {}
+        result = GenerationResult()
+        for row in domains:
+            domain = row.get('domain')
+            if not domain:
+                continue
+            result.domains += 1
+
+            actions = set()
+            for policy in self.policies:
+                if not policy.matches(row, self.now):
+                    continue
+
+                generated = self._build(policy, row)
+                if generated.rule.action.type in actions:
+                    result.merged += 1
+                    continue
+                actions.add(generated.rule.action.type)
+                if generated.estimated_messages:
+                    groups.setdefault(self._key(generated.rule, any_domain=True), []).append(generated)
+
+        seen = set()
+        produced: Dict[Tuple[str, str], List[GeneratedRule]] = {}
+        # Existing rules standing in for generated ones, which must stay
+        kept: Set[str] = set()
+        for group_key, members in groups.items():
+            members.sort(key=lambda generated: generated.domains[0])
+            chunks = [members[i:i + DOMAINS_PER_RULE] for i in range(0, len(members), DOMAINS_PER_RULE)]
+            for number, chunk in enumerate(chunks, 1):
+                if len(chunk) == 1:
+                    generated = chunk[0]
+                else:
+                    generated = self._combine(chunk, group_key, number)
+                    result.combined += len(chunk) - 1
+                produced.setdefault(group_key, []).append(generated)
+
+                key = self._key(generated.rule)
+                if key in seen:
+                    result.merged += 1
+                    continue
+                seen.add(key)
+                if existing.get(key, generated.rule.id) != generated.rule.id:
+                    result.duplicates += 1
+                    kept.add(existing[key])
+                    continue
+                result.rules.append(generated)
+
+        result.stale = self._stale(produced, kept)
+        result.rules.sort(key=lambda generated: -generated.estimated_messages)
+        logger.info(
+            f"Generated {len(result.rules)} rules for {result.domains} domains "
+            f"({result.merged} merged, {result.combined} combined, {result.duplicates} duplicates, "
+            f"{len(result.stale)} stale, ~{result.quota_units} quota units)"
+        )
+        return result
+
+    def _stale(self, produced: Dict[Tuple[str, str], List[GeneratedRule]], kept: Set[str]) -> List[str]:
+        """Find earlier generated rules that this generation replaces.
+
+        A rule is stale when it has the same query and action as one of the
+        groups apart from its domains, and is either a combined chunk of
+        that group that isn't produced again or covers only domains the
+        group's new rules cover. Generated rules whose domains no longer
+        meet a policy are left alone, as before.
+        """
+        kept = kept | {generated.rule.id for rules in produced.values() for generated in rules}
+        stale = []
+        for rule in self.rules_engine.get_rules():
+            if not rule.id.startswith('gen_') or rule.id in kept:
+                continue
+            group_key = self._key(rule, any_domain=True)
+            rules = produced.get(group_key)
+            if not rules:
+                continue
+
+            chunk = any(
+                rule.id.startswith(self._chunk_prefix(generated.template_id, group_key)) for generated in rules
+            )
+            criteria = rule.criteria
+            domains = [criteria.from_domain] if criteria.from_domain else criteria.from_domains or []
+            covered = {domain for generated in rules for domain in generated.domains}
+            if chunk or (domains and set(domains) <= covered):
+                stale.append(rule.id)
+        return stale
+
+    @staticmethod
+    def _chunk_prefix(template_id: str, key: Tuple[str, str]) -> str:
+        """ID prefix of a group's combined rules, followed by the chunk number."""
+        return f"gen_{template_id}_{zlib.crc32(repr(key).encode()):08x}_"
+
+    def _key(self, rule: Rule, any_domain: bool = False) -> Tuple[str, str]:
+        """Identity of a rule's effect: its query and action.
+
+        With any_domain, the sender domain is left out of the query, so
+        rules differing only in their domain share a key.
+        """
+        action = rule.action.to_dict()
+        criteria = rule.criteria
+        if any_domain:
+            criteria = RuleCriteria.from_dict({**criteria.to_dict(), 'from_domain': None, 'from_domains': None})
+        return (
+            self.rules_engine.build_gmail_query(criteria),
+            f"{action['type']}:{sorted(action.get('parameters', {}).items())}"
+        )
+
+    def _build(self, policy: DomainPolicy, row: Dict[str, Any]) -> GeneratedRule:
+        """Build the rule a policy produces for a domain."""
+        domain = row['domain']
+        template = RuleTemplates.apply_domain(self._templates[policy.template_id], domain, set_domain=True)
+        criteria = RuleCriteria.from_dict({**template['criteria'], **policy.criteria})
+        action = RuleAction.from_dict(template['action'])
+        messages = self._estimate_matches(criteria, row)
+
+        unread_ratio = row.get('unread', 0) / max(row.get('messages', 0), 1)
+        rule = Rule(
+            id=f"gen_{policy.template_id}_{re.sub(r'[^a-z0-9]+', '_', domain.lower()).strip('_')}",
+            name=self._name(criteria, action, domain),
+            description=(
+                f"Generated from the {policy.template_id} template for {domain} "
+                f"({row.get('messages', 0)} messages, {unread_ratio:.0%} unread)"
+            ),
+            criteria=criteria,
+            action=action,
+            created_at=self.now,
+            updated_at=self.now,
+            category=template.get('category')
+        )
+        return GeneratedRule(
+            rule=rule,
+            domains=[domain],
+            template_id=policy.template_id,
+            estimated_messages=messages,
+            quota_units=estimate_quota_units(action.type, messages)
+        )
+
+    def _combine(self, chunk: List[GeneratedRule], key: Tuple[str, str], number: int) -> GeneratedRule:
+        """Fold single-domain rules with the same query and action into one rule."""
+        first = chunk[0]
+        domains = [generated.domains[0] for generated in chunk]
+        criteria = RuleCriteria.from_dict({**first.rule.criteria.to_dict(), 'from_domain': None})
+        criteria.from_domains = domains
+        messages = sum(generated.estimated_messages for generated in chunk)
+
+        rule = Rule(
+            id=f"{self._chunk_prefix(first.template_id, key)}{number}",
+            name=self._name(criteria, first.rule.action, f"{len(domains)} domains"),
+            description=(
+                f"Generated from the {first.template_id} template for {', '.join(domains)} "
+                f"(~{messages} matching messages)"
+            ),
+            criteria=criteria,
+            action=first.rule.action,
+            created_at=self.now,
+            updated_at=self.now,
+            category=first.rule.category
+        )
+        return GeneratedRule(
+            rule=rule,
+            domains=domains,
+            template_id=first.template_id,
+            estimated_messages=messages,
+            quota_units=estimate_quota_units(rule.action.type, messages)
+        )
+
+    @staticmethod
+    def _name(criteria: RuleCriteria, action: RuleAction, senders: str) -> str:
+        """Describe a generated rule, e.g. 'Trash unread mail from shop.com'."""
+        verb = _ACTION_VERBS.get(action.type, action.type.value)
+        unread = criteria.is_unread and action.type != ActionType.MARK_READ
+        name = f"{verb} {'unread ' if unread else ''}mail from {senders}"
+        if criteria.older_than_days:
+            name += f" older than {criteria.older_than_days} days"
+        return name
+
+    def _estimate_matches(self, criteria: RuleCriteria, row: Dict[str, Any]) -> int:
+        """Estimate a domain's messages matching criteria from its table row.
+
+        Read state is exact. Age criteria assume the domain's messages are
+        spread evenly between its oldest and newest months; domains without
+        dated messages count in full.
+        """
+        messages = row.get('messages', 0)
+        unread = row.get('unread', 0)
+        if criteria.is_unread is True:
+            messages = unread
+        elif criteria.is_unread is False:
+            messages -= unread
+
+        if criteria.older_than_days is None or not messages:
+            return messages
+
+        oldest = _month_start(row.get('oldest_month'))
+        newest = _month_end(row.get('newest_month'))
+        if oldest is None or newest is None:
+            return messages
+
+        cutoff = self.now.timestamp() - criteria.older_than_days * 86400
+        if cutoff >= newest.timestamp():
+            return messages
+        if cutoff <= oldest.timestamp():
+            return 0
+        share = (cutoff - oldest.timestamp()) / (newest.timestamp() - oldest.timestamp())
+        return math.ceil(messages * share)
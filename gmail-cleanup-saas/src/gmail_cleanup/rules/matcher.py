@@ -0,0 +1,155 @@
+"""Local evaluation of rule criteria against message metadata."""
+
+import re
+from typing import FrozenSet, List, Optional, Callable, Pattern, Iterable
+from datetime import datetime, timedelta, timezone
+
+from .models import Rule, RuleCriteria
+from ..core.client import EmailMessage
+from ..core.aggregator import extract_domain, to_utc
+
+
+# Criteria that need the message body or MIME structure, which metadata
+# doesn't include; these are left to a Gmail search
+SEARCH_ONLY_FIELDS = ('body_contains', 'has_words', 'exclude_words', 'has_attachment')
+
+
+def _phrase_pattern(phrase: str) -> Pattern:
+    """Case-insensitive pattern matching a phrase on word boundaries."""
+    return re.compile(r'(?<!\w)' + re.escape(phrase) + r'(?!\w)', re.IGNORECASE)
+
+
+class CompiledRule:
+    """A rule prepared for matching message metadata without an API call.
+
+    Header, label, date and size criteria are evaluated locally. Criteria
+    that need the message body are split off into ``residual_query``;
+    messages passing the local checks must also match that query.
+    """
+
+    def __init__(
+        self,
+        rule: Rule,
+        resolve_label: Optional[Callable[[str], Optional[str]]] = None,
+        build_query: Optional[Callable[[RuleCriteria], str]] = None
+    ):
+        """Compile a rule.
+
+        Args:
+            rule: Rule to compile
+            resolve_label: Maps a label name to its ID (names are used as
+                IDs if not given)
+            build_query: Builds a Gmail query from criteria, normally
+                RulesEngine.build_gmail_query; required for rules with
+                search-only criteria
+        """
+        criteria = rule.criteria
+        resolve_label = resolve_label or (lambda name: name)
+
+        self.rule = rule
+        self._from = _phrase_pattern(criteria.from_email) if criteria.from_email else None
+        # As in the Gmail query, from_domain only applies without from_email,
+        # and from_domains only without either. Like from:@shop.com, a domain
+        # matches the sender address's domain exactly, not its subdomains
+        self._from_domains: FrozenSet[str] = frozenset()
+        if not criteria.from_email:
+            domains = [criteria.from_domain] if criteria.from_domain else criteria.from_domains or []
+            self._from_domains = frozenset(domain.lower().lstrip('@') for domain in domains)
+        self._to = _phrase_pattern(criteria.to_email) if criteria.to_email else None
+        self._subject = _phrase_pattern(criteria.subject_contains) if criteria.subject_contains else None
+        self._subject_regex = re.compile(criteria.subject_regex) if criteria.subject_regex else None
+
+        # A required label that doesn't exist can never match
+        self._labels: Optional[List[str]] = []
+        for name in criteria.labels or []:
+            label_id = resolve_label(name)
+            if label_id is None:
+                self._labels = None
+                break
+            self._labels.append(label_id)
+
+        self._exclude_labels = [
+            label_id for label_id in (resolve_label(name) for name in criteria.exclude_labels or [])
+            if label_id
+        ]
+
+        residual = RuleCriteria(**{name: getattr(criteria, name) for name in SEARCH_ONLY_FIELDS})
+        self.residual_query = ''
+        if residual.to_dict():
+            if build_query is None:
+                raise ValueError(f"Rule '{rule.name}' needs a query builder for its body criteria")
+            self.residual_query = build_query(residual)
+
+    @property
+    def is_local(self) -> bool:
+        """Whether the rule can be decided from metadata alone."""
+        return not self.residual_query
+
+    def matches(self, message: EmailMessage, now: Optional[datetime] = None) -> bool:
+        """Check the locally decidable criteria against a message.
+
+        Args:
+            message: Message metadata
+            now: Reference time for age criteria (defaults to current UTC time)
+
+        Returns:
+            True if every local criterion matches
+        """
+        criteria = self.rule.criteria
+
+        if self._labels is None:
+            return False
+        if self._from and not self._from.search(message.sender):
+            return False
+        if self._from_domains and extract_domain(message.sender) not in self._from_domains:
+            return False
+        if self._to and not self._to.search(message.recipient):
+            return False
+        if self._subject and not self._subject.search(message.subject):
+            return False
+        if self._subject_regex and not self._subject_regex.search(message.subject):
+            return False
+
+        if criteria.is_unread is not None and message.is_unread != criteria.is_unread:
+            return False
+
+        if any(label_id not in message.labels for label_id in self._labels):
+            return False
+        if any(label_id in message.labels for label_id in self._exclude_labels):
+            return False
+
+        size = message.size_estimate or 0
+        if criteria.size_larger_than is not None and not size > criteria.size_larger_than:
+            return False
+        if criteria.size_smaller_than is not None and size > criteria.size_smaller_than:
+            return False
+
+        if criteria.older_than_days is not None or criteria.newer_than_days is not None:
+            if message.date is None:
+                return False
+            age = (now or datetime.now(timezone.utc)) - to_utc(message.date)
+            if criteria.older_than_days is not None and age <= timedelta(days=criteria.older_than_days):
+                return False
+            if criteria.newer_than_days is not None and age >= timedelta(days=criteria.newer_than_days):
+                return False
+
+        return True
+
+
+def compile_rules(
+    rules: Iterable[Rule],
+    resolve_label: Optional[Callable[[str], Optional[str]]] = None,
+    build_query: Optional[Callable[[RuleCriteria], str]] = None
+) -> List[CompiledRule]:
+    """Compile enabled rules, highest priority first.
+
+    Args:
+        rules: Rules to compile
+        resolve_label: Maps a label name to its ID
+        build_query: Builds a Gmail query from criteria
+
+    Returns:
+        List of compiled rules
+    """
+    enabled = sorted((r for r in rules if r.enabled), key=lambda r: r.priority, reverse=True)
+    return [CompiledRule(rule, resolve_label, build_query) for rule in enabled]
@@ -18,6 +18,12 @@ class ActionType(str, Enum):
     PERMANENT_DELETE = "permanent_delete"
 
 
+class Granularity(str, Enum):
+    """Unit a rule searches for and acts on."""
+    MESSAGE = "message"
+    THREAD = "thread"  # Acts on every message of each matching thread
+
+
 @dataclass
 class RuleCriteria:
     """Criteria for matching emails."""
@@ -34,6 +40,7 @@ class RuleCriteria:
     labels: Optional[List[str]] = None
     exclude_labels: Optional[List[str]] = None
     from_domain: Optional[str] = None
+    from_domains: Optional[List[str]] = None  # Any of these, without from_domain
     size_larger_than: Optional[int] = None  # in bytes
     size_smaller_than: Optional[int] = None  # in bytes
     has_words: Optional[str] = None
@@ -56,6 +63,7 @@ class RuleCriteria:
                 'labels': self.labels,
                 'exclude_labels': self.exclude_labels,
                 'from_domain': self.from_domain,
+                'from_domains': self.from_domains,
                 'size_larger_than': self.size_larger_than,
                 'size_smaller_than': self.size_smaller_than,
                 'has_words': self.has_words,
@@ -80,6 +88,7 @@ class RuleCriteria:
             labels=data.get('labels'),
             exclude_labels=data.get('exclude_labels'),
             from_domain=data.get('from_domain'),
+            from_domains=data.get('from_domains'),
             size_larger_than=data.get('size_larger_than'),
             size_smaller_than=data.get('size_smaller_than'),
             has_words=data.get('has_words'),
@@ -157,6 +166,8 @@ class Rule:
     updated_at: Optional[datetime] = None
     last_run_at: Optional[datetime] = None
     stats: Dict[str, Any] = field(default_factory=dict)
+    granularity: Granularity = Granularity.MESSAGE
+    category: Optional[str] = None  # Template category, e.g. 'newsletters'
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -169,12 +180,16 @@ class Rule:
             'enabled': self.enabled,
             'priority': self.priority,
             'dry_run': self.dry_run,
+            'granularity': self.granularity.value,
             'stats': self.stats,
         }
         
         if self.max_messages is not None:
             result['max_messages'] = self.max_messages
         
+        if self.category is not None:
+            result['category'] = self.category
+        
         if self.schedule is not None:
             result['schedule'] = self.schedule.to_dict()
         
@@ -207,6 +222,8 @@ class Rule:
             updated_at=datetime.fromisoformat(data['updated_at']) if 'updated_at' in data else None,
             last_run_at=datetime.fromisoformat(data['last_run_at']) if 'last_run_at' in data else None,
             stats=data.get('stats', {}),
+            granularity=Granularity(data.get('granularity', Granularity.MESSAGE.value)),
+            category=data.get('category'),
         )
 
 
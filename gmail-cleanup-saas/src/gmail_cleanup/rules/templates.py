@@ -254,7 +254,8 @@ class RuleTemplates:
             criteria=RuleCriteria.from_dict(template['criteria']),
             action=RuleAction.from_dict(template['action']),
             created_at=datetime.now(),
-            updated_at=datetime.now()
+            updated_at=datetime.now(),
+            category=template.get('category')
         )
     
     @staticmethod
@@ -300,14 +301,34 @@ class RuleTemplates:
         if template_id not in templates:
             raise ValueError(f"Template '{template_id}' not found")
         
-        template = templates[template_id].copy()
+        return RuleTemplates.apply_domain(templates[template_id], domain)
+    
+    @staticmethod
+    def apply_domain(template: Dict[str, Any], domain: str, set_domain: bool = False) -> Dict[str, Any]:
+        """Copy a template with its example domain replaced.
+        
+        The template itself is left unchanged, so one template can be
+        applied to many domains.
+        
+        Args:
+            template: Template dict to customize
+            domain: Domain to customize for
+            set_domain: Restrict the criteria to the domain even if the
+                template has no from_domain
+            
+        Returns:
+            Customized template dict
+        """
+        template = template.copy()
+        template['criteria'] = dict(template['criteria'])
+        template['action'] = dict(template['action'])
         
         # Update name and description
         template['name'] = template['name'].replace('example.com', domain)
         template['description'] = template['description'].replace('example.com', domain)
         
         # Update criteria
-        if 'from_domain' in template['criteria']:
+        if set_domain or 'from_domain' in template['criteria']:
             template['criteria']['from_domain'] = domain
         
         # Update action parameters if needed
@@ -322,6 +343,9 @@ class RuleTemplates:
                     updated_labels.append(label.replace('example', domain.split('.')[0]))
                 else:
                     updated_labels.append(label)
-            template['action']['parameters']['labels'] = updated_labels
+            template['action']['parameters'] = {
+                **template['action']['parameters'],
+                'labels': updated_labels
+            }
         
-        return template
\ No newline at end of file
+        return template
@@ -0,0 +1,152 @@
+"""Tests for the rule analyzer."""
+
+from datetime import datetime
+
+from gmail_cleanup.core.client import EmailMessage
+from gmail_cleanup.rules.analyzer import (
+    CONFLICT, DUPLICATE, SHADOWED, SUBSUMED, UNSATISFIABLE, RuleAnalyzer
+)
+from gmail_cleanup.rules.matcher import CompiledRule
+from gmail_cleanup.rules.models import ActionType, Rule, RuleAction, RuleCriteria
+
+
+def make_rule(rule_id, action=ActionType.MOVE_TO_TRASH, priority=0, act_labels=None, **criteria):
+    parameters = {'labels': act_labels} if act_labels else {}
+    return Rule(
+        id=rule_id,
+        name=rule_id,
+        description='',
+        criteria=RuleCriteria(**criteria),
+        action=RuleAction(type=action, parameters=parameters),
+        priority=priority,
+    )
+
+
+def kinds(analysis):
+    return {finding.rule_id: finding.kind for finding in analysis.findings}
+
+
+def test_duplicate_keeps_first_rule_to_run():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('low', from_email='news@shop.com'),
+        make_rule('high', from_email='news@shop.com', priority=5),
+    ])
+
+    assert kinds(analysis) == {'low': DUPLICATE}
+    assert analysis.findings[0].other_id == 'high'
+
+
+def test_narrower_rule_with_same_action_is_subsumed():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('domain', from_domain='shop.com'),
+        make_rule('old', from_domain='shop.com', older_than_days=30),
+    ])
+
+    assert kinds(analysis) == {'old': SUBSUMED}
+
+
+def test_rule_after_trash_rule_is_shadowed():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('trash', from_domain='shop.com', priority=1),
+        make_rule('read', action=ActionType.MARK_READ, from_domain='shop.com', is_unread=True),
+    ])
+
+    assert kinds(analysis) == {'read': SHADOWED}
+
+
+def test_empty_age_range_is_unsatisfiable():
+    analysis = RuleAnalyzer().analyze([make_rule('never', older_than_days=30, newer_than_days=7)])
+
+    assert kinds(analysis) == {'never': UNSATISFIABLE}
+
+
+def test_sender_subset_uses_word_boundaries():
+    bob = make_rule('bob', from_email='bob@shop.com')
+    jimbob = make_rule('jimbob', from_email='jimbob@shop.com')
+
+    analysis = RuleAnalyzer().analyze([bob, jimbob])
+
+    assert analysis.findings == []
+    # Agrees with the local matcher: bob's rule doesn't match jimbob
+    message = EmailMessage(
+        id='1', thread_id='1', sender='jimbob@shop.com', recipient='me@example.com',
+        subject='', date=datetime(2024, 1, 1), labels=[], snippet='', is_unread=False
+    )
+    assert not CompiledRule(bob).matches(message)
+
+
+def test_sender_domain_fragment_covers_address():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('domain', from_email='shop.com'),
+        make_rule('bob', from_email='bob@shop.com'),
+    ])
+
+    assert kinds(analysis) == {'bob': SUBSUMED}
+
+
+def test_domain_rule_within_combined_rule_is_subsumed():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('combined', from_domains=['shop.com', 'news.com']),
+        make_rule('shop', from_domain='shop.com', older_than_days=30),
+        make_rule('other', from_domain='other.com', older_than_days=30),
+    ])
+
+    assert kinds(analysis) == {'shop': SUBSUMED}
+
+
+def test_label_add_and_remove_conflict():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('add', action=ActionType.ADD_LABEL, act_labels=['Deals'], priority=1, from_domain='shop.com'),
+        make_rule('remove', action=ActionType.REMOVE_LABEL, act_labels=['Deals'], from_domain='shop.com',
+                  is_unread=True),
+    ])
+
+    assert kinds(analysis) == {'remove': CONFLICT}
+    assert analysis.merge_operations() == []
+
+
+def test_capped_rule_does_not_cover_others():
+    capped = make_rule('capped', from_domain='shop.com')
+    capped.max_messages = 100
+
+    analysis = RuleAnalyzer().analyze([capped, make_rule('old', from_domain='shop.com', older_than_days=30)])
+
+    assert analysis.findings == []
+
+
+def test_dry_run_rule_does_not_cover_live_rule():
+    broad = make_rule('broad', from_domain='shop.com', priority=1)
+    broad.dry_run = True
+    copy = make_rule('copy', from_domain='shop.com', priority=1)
+    copy.dry_run = True
+    analysis = RuleAnalyzer().analyze([
+        broad,
+        copy,
+        make_rule('narrow', from_domain='shop.com', older_than_days=30),
+        make_rule('live', from_domain='shop.com'),
+    ])
+
+    assert kinds(analysis) == {'copy': DUPLICATE, 'narrow': SUBSUMED}
+    assert analysis.by_kind(SUBSUMED)[0].other_id == 'live'
+
+
+def test_disabled_rules_are_skipped_by_default():
+    disabled = make_rule('disabled', from_email='news@shop.com')
+    disabled.enabled = False
+    rules = [make_rule('enabled', from_email='news@shop.com'), disabled]
+
+    assert RuleAnalyzer().analyze(rules).findings == []
+    assert kinds(RuleAnalyzer(include_disabled=True).analyze(rules)) == {'disabled': DUPLICATE}
+
+
+def test_merge_operations_delete_redundant_and_disable_unsatisfiable():
+    analysis = RuleAnalyzer().analyze([
+        make_rule('keep', from_email='news@shop.com', priority=1),
+        make_rule('copy', from_email='news@shop.com'),
+        make_rule('never', from_domain='other.com', older_than_days=30, newer_than_days=7),
+    ])
+
+    assert sorted(analysis.merge_operations(), key=lambda op: op['id']) == [
+        {'op': 'delete', 'id': 'copy'},
+        {'op': 'update', 'id': 'never', 'rule': {'enabled': False}},
+    ]
@@ -0,0 +1,76 @@
+"""Tests for the rule generator."""
+
+from datetime import datetime
+
+from gmail_cleanup.rules.engine import RulesEngine
+from gmail_cleanup.rules.generator import DOMAINS_PER_RULE, DomainPolicy, RuleGenerator
+
+NOW = datetime(2026, 10, 1)
+POLICIES = [DomainPolicy('auto_read_notifications', min_messages=20, min_unread_ratio=0.8)]
+
+
+def row(domain, messages=100, unread=90):
+    return {
+        'domain': domain, 'messages': messages, 'unread': unread,
+        'oldest_month': '2025-01', 'newest_month': '2026-09',
+    }
+
+
+def test_domains_with_same_policy_and_action_are_combined():
+    engine = RulesEngine()
+    domains = [f'shop{i:02d}.com' for i in range(DOMAINS_PER_RULE + 2)]
+
+    result = RuleGenerator(POLICIES, engine, now=NOW).generate([row(d) for d in domains])
+
+    assert [len(generated.domains) for generated in result.rules] == [DOMAINS_PER_RULE, 2]
+    assert result.combined == DOMAINS_PER_RULE + 2 - 2
+    assert result.estimated_messages == 90 * len(domains)
+    assert engine.build_gmail_query(result.rules[1].rule.criteria) == (
+        f'from:(@{domains[-2]} OR @{domains[-1]}) is:unread'
+    )
+
+
+def test_single_domain_keeps_its_own_rule():
+    result = RuleGenerator(POLICIES, now=NOW).generate([row('shop.com')])
+
+    generated, = result.rules
+    assert generated.rule.id == 'gen_auto_read_notifications_shop_com'
+    assert generated.rule.criteria.from_domain == 'shop.com'
+    assert result.combined == 0
+
+
+def test_generating_again_updates_combined_rules():
+    engine = RulesEngine()
+    rows = [row('a.com'), row('b.com')]
+    engine.apply_operations(RuleGenerator(POLICIES, engine, now=NOW).generate(rows).operations())
+
+    result = RuleGenerator(POLICIES, engine, now=NOW).generate(rows)
+
+    assert [generated.rule.id for generated in result.rules] == [rule.id for rule in engine.get_rules()]
+    assert result.duplicates == 0
+
+
+def test_chunks_no_longer_generated_are_deleted():
+    engine = RulesEngine()
+    domains = [f'shop{i:02d}.com' for i in range(DOMAINS_PER_RULE + 2)]
+    engine.apply_operations(RuleGenerator(POLICIES, engine, now=NOW).generate([row(d) for d in domains]).operations())
+    ids = [rule.id for rule in engine.get_rules()]
+
+    # Down to one chunk: the second chunk's rule goes
+    result = RuleGenerator(POLICIES, engine, now=NOW).generate([row(d) for d in domains[2:]])
+    engine.apply_operations(result.operations())
+
+    assert result.stale == [ids[1]]
+    assert [rule.id for rule in engine.get_rules()] == [ids[0]]
+    assert engine.get_rules()[0].criteria.from_domains == domains[2:]
+
+
+def test_single_domain_rule_folded_into_chunk_is_deleted():
+    engine = RulesEngine()
+    engine.apply_operations(RuleGenerator(POLICIES, engine, now=NOW).generate([row('a.com')]).operations())
+
+    result = RuleGenerator(POLICIES, engine, now=NOW).generate([row('a.com'), row('b.com')])
+    engine.apply_operations(result.operations())
+
+    assert result.stale == ['gen_auto_read_notifications_a_com']
+    assert [rule.criteria.from_domains for rule in engine.get_rules()] == [['a.com', 'b.com']]
@@ -0,0 +1,45 @@
+"""Tests for local rule matching."""
+
+from datetime import datetime
+
+import pytest
+
+from gmail_cleanup.core.client import EmailMessage
+from gmail_cleanup.rules.matcher import CompiledRule
+from gmail_cleanup.rules.models import ActionType, Rule, RuleAction, RuleCriteria
+
+
+def make_rule(**criteria):
+    return Rule(
+        id='rule', name='rule', description='',
+        criteria=RuleCriteria(**criteria),
+        action=RuleAction(type=ActionType.MOVE_TO_TRASH),
+    )
+
+
+def message(sender):
+    return EmailMessage(
+        id='1', thread_id='1', sender=sender, recipient='me@example.com',
+        subject='', date=datetime(2024, 1, 1), labels=[], snippet='', is_unread=False
+    )
+
+
+@pytest.mark.parametrize('sender, expected', [
+    ('bob@shop.co', True),
+    ('Shop <News@Shop.CO>', True),
+    ('bob@shop.com', False),
+    ('bob@shop.co.evil.io', False),
+    ('bob@mail.shop.co', False),
+    ('shop.co <bob@evil.io>', False),
+])
+def test_from_domain_matches_address_domain_exactly(sender, expected):
+    assert CompiledRule(make_rule(from_domain='shop.co')).matches(message(sender)) is expected
+
+
+def test_from_domains_match_any_listed_domain_exactly():
+    rule = CompiledRule(make_rule(from_domains=['a.com', '@b.com']))
+
+    assert rule.matches(message('x@a.com'))
+    assert rule.matches(message('x@b.com'))
+    assert not rule.matches(message('x@a.com.evil.io'))
+    assert not rule.matches(message('x@ba.com'))
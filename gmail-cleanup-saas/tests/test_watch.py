@@ -0,0 +1,69 @@
+"""Tests for the mailbox watcher."""
+
+import asyncio
+import json
+from datetime import datetime
+
+from gmail_cleanup.core.client import EmailMessage
+from gmail_cleanup.core.watch import MailboxWatcher, Subscriber
+
+
+def message(message_id):
+    return EmailMessage(
+        id=message_id, thread_id=message_id, sender='news@shop.com', recipient='me@example.com',
+        subject='', date=datetime(2024, 1, 1), labels=['INBOX'], snippet='', is_unread=True
+    )
+
+
+class FakeClient:
+    """Serves one history delta, failing to fetch some IDs once."""
+
+    def __init__(self, added, history_id, fail_once):
+        self.history = [{'messagesAdded': [{'message': {'id': i, 'labelIds': ['INBOX']}} for i in added]}]
+        self.history_id = history_id
+        self.fail_once = set(fail_once)
+        self.fetched = []
+
+    def list_history(self, start_history_id, history_types, label_id):
+        history, self.history = self.history, []
+        return {'history': history, 'historyId': str(self.history_id)}
+
+    def fetch_messages_metadata(self, message_ids):
+        self.fetched.append(list(message_ids))
+        failed = [i for i in message_ids if i in self.fail_once]
+        self.fail_once.clear()
+        return [message(i) for i in message_ids if i not in failed], failed
+
+
+class FakeProcessor:
+    executor = None
+
+    def __init__(self, client):
+        self.gmail_client = client
+        self.processed = []
+
+    async def process_messages(self, messages, dry_run=False):
+        self.processed.extend(m.id for m in messages)
+        return []
+
+
+def test_failed_messages_are_retried_with_next_changes(tmp_path):
+    state_file = tmp_path / 'watch.json'
+    client = FakeClient(['m1', 'm2'], history_id=110, fail_once=['m2'])
+    processor = FakeProcessor(client)
+    watcher = MailboxWatcher(processor, Subscriber(), state_file=str(state_file))
+    watcher.history_id = 100
+
+    asyncio.run(watcher.process_changes())
+
+    assert processor.processed == ['m1']
+    assert json.loads(state_file.read_text()) == {'history_id': 110, 'pending_ids': ['m2']}
+
+    # A restarted watcher picks the pending message up with the next delta
+    restarted = MailboxWatcher(processor, Subscriber(), state_file=str(state_file))
+    restarted.history_id = restarted._load_state()
+    asyncio.run(restarted.process_changes())
+
+    assert processor.processed == ['m1', 'm2']
+    assert client.fetched[-1] == ['m2']
+    assert restarted.pending_ids == []
@@ -1,6 +1,9 @@
+import argparse
 import imaplib
 import datetime
 import json
+import queue
+import sys
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
 
@@ -15,6 +18,26 @@ SCOPES = ['https://mail.google.com/']
 CREDENTIALS_FILE = Path(__file__).parent / 'credentials.json'
 TOKEN_FILE = Path(__file__).parent / 'token.json'
 
+# UID STORE arguments for each bulk action. FLAGS.SILENT stops the server
+# echoing a FETCH response back for every message it updates.
+STORE_ACTIONS = {
+    "trash": ("+X-GM-LABELS", "\\Trash"),
+    "mark_read": ("+FLAGS.SILENT", "(\\Seen)"),
+}
+
+# Parallel IMAP connections; Gmail allows up to 15 per account
+POOL_SIZE = 4
+
+# Longest sender list folded into one X-GM-RAW search, in characters
+MAX_QUERY_SENDERS_LENGTH = 700
+
+# Longest UID set sent in one command, in characters. Compressed ranges keep
+# tens of thousands of UIDs within a few commands of this size.
+MAX_UID_SET_LENGTH = 8000
+
+# A SEARCH response lists every matching UID on a single line
+imaplib._MAXLINE = 10000000
+
 
 def get_oauth2_credentials():
     """Get OAuth2 credentials, refreshing or creating new ones as needed."""
@@ -59,7 +82,7 @@ def generate_oauth2_string(username, access_token):
     return auth_string
 
 
-def connect_imap():
+def connect_imap(username=None):
     """Connect to Gmail IMAP using OAuth2 authentication."""
     print(
         "{0} Connecting to mailbox via IMAP...".format(
@@ -72,13 +95,11 @@ def connect_imap():
 
     # Get the email address from the token info
     # User needs to provide their email since it's not in the credentials
-    if TOKEN_FILE.exists():
+    if not username and TOKEN_FILE.exists():
         with open(TOKEN_FILE) as f:
             token_data = json.load(f)
             # Try to get email from token, otherwise ask
             username = token_data.get('_email')
-    else:
-        username = None
 
     if not username:
         username = input("Enter your Gmail address: ")
@@ -101,29 +122,95 @@ def connect_imap():
     return m
 
 
+def select_folder(m, folder):
+    """Select a folder unless it is already the connection's selected mailbox."""
+    if m.state != "SELECTED" or getattr(m, "selected_folder", None) != folder:
+        typ, data = m.select(f'"{folder}"')
+        if typ != "OK":
+            raise imaplib.IMAP4.error("SELECT {0} failed: {1}".format(folder, data))
+        m.selected_folder = folder
+
+
+def compress_uids(uids):
+    """Collapse UIDs into IMAP ranges, e.g. [1..500, 502, 510..900] -> ['1:500', '502', '510:900']."""
+    ranges = []
+    start = prev = None
+    for uid in sorted(set(int(u) for u in uids)):
+        if prev is not None and uid == prev + 1:
+            prev = uid
+            continue
+        if start is not None:
+            ranges.append(str(start) if start == prev else f"{start}:{prev}")
+        start = prev = uid
+    if start is not None:
+        ranges.append(str(start) if start == prev else f"{start}:{prev}")
+    return ranges
+
+
+def uid_sets(uids, max_length=MAX_UID_SET_LENGTH):
+    """Yield comma-separated UID sets of at most max_length characters."""
+    chunk, length = [], 0
+    for uid_range in compress_uids(uids):
+        if chunk and length + len(uid_range) > max_length:
+            yield ",".join(chunk)
+            chunk, length = [], 0
+        chunk.append(uid_range)
+        length += len(uid_range) + 1
+    if chunk:
+        yield ",".join(chunk)
+
+
+def quote_imap(value):
+    """Quote a string argument for an IMAP command."""
+    return '"{0}"'.format(value.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def uid_search(m, *criteria):
+    """Run UID SEARCH in the selected folder and return the matching UIDs."""
+    typ, data = m.uid("SEARCH", *criteria)
+    if typ != "OK":
+        raise imaplib.IMAP4.error("UID SEARCH failed: {0}".format(data))
+    return data[0].split() if data and data[0] else []
+
+
+def gmail_search(m, query):
+    """Search the selected folder with Gmail syntax, e.g. 'category:promotions older_than:1y'."""
+    return uid_search(m, "X-GM-RAW", quote_imap(query))
+
+
+def uid_store(m, uids, action):
+    """Apply a STORE_ACTIONS action to UIDs, one UID STORE per UID set.
+
+    Returns the number of commands sent.
+    """
+    command, flags = STORE_ACTIONS[action]
+    commands = 0
+    for uid_set in uid_sets(uids):
+        typ, data = m.uid("STORE", uid_set, command, flags)
+        if typ != "OK":
+            raise imaplib.IMAP4.error("UID STORE failed: {0}".format(data))
+        commands += 1
+    return commands
+
+
 def mark_read(m, folder, from_string):
     try:
-        no_of_msgs = int(
-            m.select(f'"{folder}"')[1][0]
+        select_folder(
+            m, folder
         )  # required to perform search, m.list() for all labels, '[Gmail]/Sent Mail'
-        # print("- Found a total of {1} messages in '{0}'.".format(folder, no_of_msgs))
 
-        # typ, data = m.search(None, '(FROM {0})'.format(from_string))  # search pointer for msgs
-        typ, data = m.search(
-            None, '(FROM "{0}" UNSEEN)'.format(from_string)
-        )  # search pointer for msgs
+        uids = uid_search(
+            m, '(FROM {0} UNSEEN)'.format(quote_imap(from_string))
+        )  # UIDs stay valid while other jobs change the folder
 
-        if data != [""]:  # if not empty list means messages exist
-            index_messages = data[0].split()
+        if uids:  # if not empty list means messages exist
+            commands = uid_store(m, uids, "mark_read")
             print(
-                "- Marked {0} messages read from {1} in '{2}'.".format(
-                    len(index_messages), from_string, folder
+                "- Marked {0} messages read from {1} in '{2}' ({3} commands).".format(
+                    len(uids), from_string, folder, commands
                 )
             )
-            for i in index_messages:
-                m.store(i, "+FLAGS", "\Seen")  # mark as read
-                # m.store(i.replace(' ',','),'+FLAGS','\Seen') # mark as read
-            return len(index_messages)
+            return len(uids)
         else:
             # print("- Nothing to mark read.")
             return None
@@ -133,27 +220,23 @@ def mark_read(m, folder, from_string):
 
 def move_to_trash_before_date(m, folder, days_before):
     try:
-        no_of_msgs = int(
-            m.select(f'"{folder}"')[1][0]
+        select_folder(
+            m, folder
         )  # required to perform search, m.list() for all lables, '[Gmail]/Sent Mail'
-        # print("- Found a total of {1} messages in '{0}'.".format(folder, no_of_msgs))
 
         before_date = (
             datetime.date.today() - datetime.timedelta(days_before)
         ).strftime(
             "%d-%b-%Y"
         )  # date string, 04-Jan-2013
-        typ, data = m.search(
-            None, "(BEFORE {0})".format(before_date)
-        )  # search pointer for msgs before before_date
-
-        if data != [""]:  # if not empty list means messages exist
-            no_msgs_del = data[0].split()[-1]  # last msg id in the list
-            # print("- Marked {0} messages for removal with dates before {1} in '{2}'.".format(no_msgs_del, before_date, folder))
-            m.store(
-                "1:{0}".format(no_msgs_del), "+X-GM-LABELS", "\\Trash"
-            )  # move to trash
-            # print("Deleted {0} messages.".format(no_msgs_del))
+        uids = uid_search(
+            m, "(BEFORE {0})".format(before_date)
+        )  # UIDs of msgs before before_date
+
+        if uids:  # if not empty list means messages exist
+            # print("- Marked {0} messages for removal with dates before {1} in '{2}'.".format(len(uids), before_date, folder))
+            uid_store(m, uids, "trash")  # move to trash
+            # print("Deleted {0} messages.".format(len(uids)))
         # else:
         # print("- Nothing to remove.")
 
@@ -164,27 +247,22 @@ def move_to_trash_before_date(m, folder, days_before):
 
 def move_to_trash_from(m, folder, from_string):
     try:
-        no_of_msgs = int(
-            m.select(f'"{folder}"')[1][0]
+        select_folder(
+            m, folder
         )  # required to perform search, m.list() for all labels, '[Gmail]/Sent Mail'
-        # print("- Found a total of {1} messages in '{0}'.".format(folder, no_of_msgs))
 
-        # typ, data = m.search(None, '(FROM {0})'.format(from_string))  # search pointer for msgs
-        typ, data = m.search(
-            None, '(OR (TO "{0}") (FROM "{0}"))'.format(from_string)
-        )  # search pointer for msgs
+        uids = uid_search(
+            m, '(OR (TO {0}) (FROM {0}))'.format(quote_imap(from_string))
+        )  # UIDs stay valid while other jobs change the folder
 
-        if data != [""]:  # if not empty list means messages exist
-            index_messages_to_delete = data[0].split()
+        if uids:  # if not empty list means messages exist
+            commands = uid_store(m, uids, "trash")  # move to trash
             print(
-                "- Marked {0} messages for removal from {1} in '{2}'.".format(
-                    len(index_messages_to_delete), from_string, folder
+                "- Marked {0} messages for removal from {1} in '{2}' ({3} commands).".format(
+                    len(uids), from_string, folder, commands
                 )
             )
-            for i in index_messages_to_delete:
-                m.store(i, "+X-GM-LABELS", "\\Trash")  # move to trash
-            # print("Deleted {0} messages.".format(no_msgs_del))
-            return len(index_messages_to_delete)
+            return len(uids)
         else:
             # print("- Nothing to remove.")
             return None
@@ -192,9 +270,31 @@ def move_to_trash_from(m, folder, from_string):
         print(e)
 
 
+def apply_to_query(m, folder, query, action):
+    """Apply a STORE_ACTIONS action to every message matching a Gmail search.
+
+    e.g. apply_to_query(m, "[Gmail]/All Mail", "from:@linkedin.com older_than:30d", "trash")
+
+    IMAP errors are raised, so run_batch can count the failed searches.
+    """
+    select_folder(m, folder)
+    uids = gmail_search(m, query)
+
+    if uids:
+        commands = uid_store(m, uids, action)
+        print(
+            "- Applied {0} to {1} messages matching '{2}' in '{3}' ({4} commands).".format(
+                action, len(uids), query, folder, commands
+            )
+        )
+        return len(uids)
+    else:
+        return None
+
+
 def empty_folder(m, folder, do_expunge=True):
     # print("- Empty '{0}' & Expunge all mail...".format(folder))
-    m.select(f'"{folder}"')  # select all trash
+    select_folder(m, folder)  # select all trash
     m.store("1:*", "+FLAGS", "\\Deleted")  # Flag all Trash as Deleted
     if do_expunge:  # See Gmail Settings -> Forwarding and POP/IMAP -> Auto-Expunge
         m.expunge()  # not need if auto-expunge enabled
@@ -208,157 +308,342 @@ def disconnect_imap(m):
             datetime.datetime.today().strftime("%Y-%m-%d %H:%M:%S")
         )
     )
-    m.close()
-    m.logout()
+    logout_imap(m)
     # print "All Done."
     return
 
 
+def logout_imap(m):
+    """Close the selected folder, if any, and log out."""
+    if m.state == "SELECTED":
+        m.close()
+    m.logout()
+
+
+class IMAPPool:
+    """A few authenticated IMAP connections running queued jobs in parallel.
+
+    Each job borrows one connection for its whole run, so commands never
+    interleave on a connection and its selected folder can't change under
+    the job. Jobs are the functions above, which take the connection first.
+    """
+
+    def __init__(self, size=POOL_SIZE, username=None):
+        self.connections = [connect_imap(username) for _ in range(size)]
+        self._idle = queue.Queue()
+        for m in self.connections:
+            self._idle.put(m)
+        self._threads = ThreadPool(size)
+
+    def run(self, func, *args, **kwargs):
+        """Run a job on the next idle connection."""
+        m = self._idle.get()
+        try:
+            return func(m, *args, **kwargs)
+        finally:
+            self._idle.put(m)
+
+    def apply_async(self, func, args=()):
+        """Queue a job; args are everything after the connection."""
+        return self._threads.apply_async(self.run, (func,) + tuple(args))
+
+    def close(self):
+        self._threads.close()
+
+    def join(self):
+        self._threads.join()
+
+    def disconnect(self):
+        print(
+            "{0} Done. Closing {1} connections & logging out.".format(
+                datetime.datetime.today().strftime("%Y-%m-%d %H:%M:%S"),
+                len(self.connections),
+            )
+        )
+        for m in self.connections:
+            logout_imap(m)
+
+
+# Example batch config (cleanup.yaml), run with
+# python gmail_clean_up_script.py --config cleanup.yaml
+#
+#   email: me@gmail.com
+#   batches:
+#     - action: trash
+#       senders: ["@linkedin.com", "newsletter@techcrunch.com"]
+#     - action: mark_read
+#       senders: ["venmo@venmo.com"]
+#     - action: trash
+#       query: "category:promotions"
+#       older_than_days: 365
+def load_config(path):
+    """Load a batch config from a .yaml/.yml (needs PyYAML) or .json file."""
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required for YAML configs. Install with: pip install pyyaml")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def sender_term(sender):
+    """Format a sender for a Gmail search, quoting it if it has spaces."""
+    sender = sender.strip()
+    return '"{0}"'.format(sender) if " " in sender else sender
+
+
+def build_queries(batch):
+    """Fold a batch's senders into as few Gmail searches as possible.
+
+    A batch is a dict with an 'action' from STORE_ACTIONS and either a
+    'senders' list or a raw Gmail 'query'. Optional 'older_than_days' limits
+    either to old mail. Senders are joined into 'from:(a OR b OR c)'
+    searches of up to MAX_QUERY_SENDERS_LENGTH characters; trash batches
+    also match mail sent to the senders, like move_to_trash_from.
+
+    Returns a list of Gmail search strings.
+    """
+    action = batch.get("action")
+    if action not in STORE_ACTIONS:
+        raise ValueError(
+            "Unknown action {0!r}, expected one of: {1}".format(action, ", ".join(STORE_ACTIONS))
+        )
+
+    suffix = ""
+    if batch.get("older_than_days"):
+        suffix += " older_than:{0}d".format(int(batch["older_than_days"]))
+    if action == "mark_read":
+        suffix += " is:unread"
+
+    if batch.get("query"):
+        return [batch["query"] + suffix]
+
+    groups, group, length = [], [], 0
+    for sender in dict.fromkeys(sender_term(s) for s in batch.get("senders", []) if s.strip()):
+        if group and length + len(sender) > MAX_QUERY_SENDERS_LENGTH:
+            groups.append(group)
+            group, length = [], 0
+        group.append(sender)
+        length += len(sender) + 4  # " OR "
+    if group:
+        groups.append(group)
+
+    queries = []
+    for group in groups:
+        senders = " OR ".join(group)
+        if action == "trash":
+            query = "{{from:({0}) to:({0})}}".format(senders)
+        else:
+            query = "from:({0})".format(senders)
+        queries.append(query + suffix)
+    return queries
+
+
+def run_batch(config, dry_run=False):
+    """Run every batch in a config through the connection pool.
+
+    Config keys: 'batches' (see build_queries), and optionally 'folder'
+    (default '[Gmail]/All Mail'), 'email' (skips the address prompt, for
+    cron) and 'pool_size'.
+
+    Returns (messages updated, number of batches with a failed search).
+    """
+    folder = config.get("folder", "[Gmail]/All Mail")
+    jobs = [
+        (index, query, batch["action"])
+        for index, batch in enumerate(config.get("batches", []))
+        for query in build_queries(batch)
+    ]
+    print("{0} searches for {1} batches.".format(len(jobs), len(config.get("batches", []))))
+
+    if dry_run:
+        for _, query, action in jobs:
+            print("- {0}: {1}".format(action, query))
+        return 0, 0
+
+    pool = IMAPPool(min(config.get("pool_size", POOL_SIZE), max(len(jobs), 1)), config.get("email"))
+    results = [
+        pool.apply_async(apply_to_query, args=(folder, query, action))
+        for _, query, action in jobs
+    ]
+    pool.close()
+    pool.join()
+    pool.disconnect()
+
+    updated, failed_batches, failed_searches = 0, set(), 0
+    for (index, query, action), result in zip(jobs, results):
+        try:
+            updated += result.get() or 0
+        except Exception as e:
+            print("- Failed to apply {0} to '{1}': {2}".format(action, query, e))
+            failed_batches.add(index)
+            failed_searches += 1
+    if failed_searches:
+        print("{0} of {1} searches failed.".format(failed_searches, len(jobs)))
+    return updated, len(failed_batches)
+
+
 if __name__ == "__main__":
-    pool = ThreadPool(1)
-    m_con = connect_imap()
+    parser = argparse.ArgumentParser(description="Clean up a Gmail mailbox over IMAP.")
+    parser.add_argument(
+        "--config", help="YAML/JSON batch config; runs non-interactively, e.g. from cron"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the batch searches without connecting"
+    )
+    cli_args = parser.parse_args()
+
+    if cli_args.config:
+        updated, failed = run_batch(load_config(cli_args.config), dry_run=cli_args.dry_run)
+        print("Updated {0} messages.".format(updated))
+        if failed:
+            print("{0} batches failed.".format(failed))
+        sys.exit(1 if failed else 0)
+
+    pool = IMAPPool(POOL_SIZE)
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "@otta.com"),
+        args=("[Gmail]/All Mail", "@otta.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "@volumeone.org"),
+        args=("[Gmail]/All Mail", "@volumeone.org"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "@inbox.kaymbu.com"),
+        args=("[Gmail]/All Mail", "@inbox.kaymbu.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "@kaymbu.com"),
+        args=("[Gmail]/All Mail", "@kaymbu.com"),
     )
     pool.apply_async(
         mark_read,
-        args=(m_con, "[Gmail]/All Mail", "do-not-reply@allegis-marketplace.com"),
+        args=("[Gmail]/All Mail", "do-not-reply@allegis-marketplace.com"),
     )
     pool.apply_async(
         mark_read,
-        args=(m_con, "[Gmail]/All Mail", "do-not-reply@allegis-marketplace.com"),
+        args=("[Gmail]/All Mail", "do-not-reply@allegis-marketplace.com"),
     )
-    pool.apply_async(mark_read, args=(m_con, "[Gmail]/All Mail", "venmo@venmo.com"))
-    pool.apply_async(mark_read, args=(m_con, "[Gmail]/All Mail", "jeff.sproul@rcu.org"))
+    pool.apply_async(mark_read, args=("[Gmail]/All Mail", "venmo@venmo.com"))
+    pool.apply_async(mark_read, args=("[Gmail]/All Mail", "jeff.sproul@rcu.org"))
     pool.apply_async(
-        mark_read, args=(m_con, "[Gmail]/All Mail", "TimeAndExpense@allegisgroup.com")
+        mark_read, args=("[Gmail]/All Mail", "TimeAndExpense@allegisgroup.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "team@mint.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "team@mint.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@indeed.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@indeed.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@linkedin.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@linkedin.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "newsletter@techcrunch.com"),
+        args=("[Gmail]/All Mail", "newsletter@techcrunch.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "capitalone@notification.capitalone.com"),
+        args=("[Gmail]/All Mail", "capitalone@notification.capitalone.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "kaggle.intercom-mail.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "kaggle.intercom-mail.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "calendar-notification@google.com"),
+        args=("[Gmail]/All Mail", "calendar-notification@google.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "vehiclediagnostics@onstar.com"),
+        args=("[Gmail]/All Mail", "vehiclediagnostics@onstar.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@spotify.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@spotify.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "subscriptions@subscriptions.usa.gov"),
+        args=("[Gmail]/All Mail", "subscriptions@subscriptions.usa.gov"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "email@et.npr.org")
+        move_to_trash_from, args=("[Gmail]/All Mail", "email@et.npr.org")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "customerservice@emcom.bankofamerica.com"),
+        args=("[Gmail]/All Mail", "customerservice@emcom.bankofamerica.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "ebanking@bankpeoples.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "ebanking@bankpeoples.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "matthew.dassow@footlocker.com"),
+        args=("[Gmail]/All Mail", "matthew.dassow@footlocker.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "USPSInformedDelivery@usps.gov"),
+        args=("[Gmail]/All Mail", "USPSInformedDelivery@usps.gov"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "theskimm.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "theskimm.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "engagesupport@daxkoengage.com"),
+        args=("[Gmail]/All Mail", "engagesupport@daxkoengage.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "americanexpress@member.americanexpress.com"),
+        args=("[Gmail]/All Mail", "americanexpress@member.americanexpress.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "discover@service.discover.com"),
+        args=("[Gmail]/All Mail", "discover@service.discover.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@gowild.wi.gov")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@gowild.wi.gov")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "citicards@info4.citi.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "citicards@info4.citi.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "dave@ustvnow.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "dave@ustvnow.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@covepointlodge.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@covepointlodge.com")
     )
     pool.apply_async(
         move_to_trash_from,
         args=(
-            m_con,
             "[Gmail]/All Mail",
             "empowerhernet@gmail.com via mailchimpapp.net",
         ),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "goto@docker.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "goto@docker.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "HomeDepotCustomerCare@email.homedepot.com"),
+        args=("[Gmail]/All Mail", "HomeDepotCustomerCare@email.homedepot.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "mknowlan@aflag.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "mknowlan@aflag.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "no-reply@alertsp.chase.com"),
+        args=("[Gmail]/All Mail", "no-reply@alertsp.chase.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "widnr@service.govdelivery.com"),
+        args=("[Gmail]/All Mail", "widnr@service.govdelivery.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "citicards@info6.citi.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "citicards@info6.citi.com")
     )
     pool.apply_async(
         move_to_trash_from,
         args=(
-            m_con,
             "[Gmail]/All Mail",
             "wellsfargoretirementplans@retire1.wellsfargo.com",
         ),
@@ -366,332 +651,329 @@ if __name__ == "__main__":
     pool.apply_async(
         move_to_trash_from,
         args=(
-            m_con,
             "[Gmail]/All Mail",
             "wellsfargoretirementplans@retire2.wellsfargo.com",
         ),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "news@onxmaps.today")
+        move_to_trash_from, args=("[Gmail]/All Mail", "news@onxmaps.today")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "Yahoo@communications.yahoo.com"),
+        args=("[Gmail]/All Mail", "Yahoo@communications.yahoo.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "no-reply@email.homedepot.com"),
+        args=("[Gmail]/All Mail", "no-reply@email.homedepot.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "Atlassian@eastbay.com ")
+        move_to_trash_from, args=("[Gmail]/All Mail", "Atlassian@eastbay.com ")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "participant_services@eonline.e-vanguard.com"),
+        args=("[Gmail]/All Mail", "participant_services@eonline.e-vanguard.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "do-not-reply@stackoverflow.email"),
+        args=("[Gmail]/All Mail", "do-not-reply@stackoverflow.email"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "support@codewithmosh.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "support@codewithmosh.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "gmb1983@gmail.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "gmb1983@gmail.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "support@github.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "support@github.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "partners@mail.outdoorlife.com"),
+        args=("[Gmail]/All Mail", "partners@mail.outdoorlife.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "ParticipantServices@vanguard.com"),
+        args=("[Gmail]/All Mail", "ParticipantServices@vanguard.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "EDELIVERY@ivyinvestments.com"),
+        args=("[Gmail]/All Mail", "EDELIVERY@ivyinvestments.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@statuspage.io")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@statuspage.io")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "hello@news.gemini.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "hello@news.gemini.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "discover@card-e.em.discover.com"),
+        args=("[Gmail]/All Mail", "discover@card-e.em.discover.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "no-reply@updates.coinbase.com"),
+        args=("[Gmail]/All Mail", "no-reply@updates.coinbase.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "billpay@billpay.bankofamerica.com"),
+        args=("[Gmail]/All Mail", "billpay@billpay.bankofamerica.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "Chase@e.chase.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "Chase@e.chase.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "Travel.Wisconsin@public.govdelivery.com"),
+        args=("[Gmail]/All Mail", "Travel.Wisconsin@public.govdelivery.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "aws-marketing-email-replies@amazon.com"),
+        args=("[Gmail]/All Mail", "aws-marketing-email-replies@amazon.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@milwaukeetool.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@milwaukeetool.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "focusinfo@focusonenergy.com"),
+        args=("[Gmail]/All Mail", "focusinfo@focusonenergy.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "account@nest.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "account@nest.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "noreply@mailer.bitbucket.org"),
+        args=("[Gmail]/All Mail", "noreply@mailer.bitbucket.org"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "discover@e.discover.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "discover@e.discover.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@sports.yahoo.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@sports.yahoo.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "myaccount@we-energies.com"),
+        args=("[Gmail]/All Mail", "myaccount@we-energies.com"),
     )
-    pool.apply_async(move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "web@cex.io"))
+    pool.apply_async(move_to_trash_from, args=("[Gmail]/All Mail", "web@cex.io"))
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "ecards@123greetings.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "ecards@123greetings.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@johnkasich.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@johnkasich.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@email.skype.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@email.skype.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@email.kraken.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@email.kraken.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@atlassian.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@atlassian.com")
     )
-    pool.apply_async(move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "fitbit.com"))
+    pool.apply_async(move_to_trash_from, args=("[Gmail]/All Mail", "fitbit.com"))
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "email@messages.autotrader.com"),
+        args=("[Gmail]/All Mail", "email@messages.autotrader.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@datascience.smu.edu")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@datascience.smu.edu")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "homedepotdecor@email.homedepot.com"),
+        args=("[Gmail]/All Mail", "homedepotdecor@email.homedepot.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@docker.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@docker.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "hello@talkpython.fm")
+        move_to_trash_from, args=("[Gmail]/All Mail", "hello@talkpython.fm")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "ambassador@anaconda.com ")
+        move_to_trash_from, args=("[Gmail]/All Mail", "ambassador@anaconda.com ")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "team@kaggle.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "team@kaggle.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@lake-link.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@lake-link.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "email@mail.onedrive.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "email@mail.onedrive.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@northernresort.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@northernresort.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "no-reply@dropboxmail.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "no-reply@dropboxmail.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@quantopian.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@quantopian.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "paypal@mail.paypal.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "paypal@mail.paypal.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "noreply@wisconsinpublicservice.com"),
+        args=("[Gmail]/All Mail", "noreply@wisconsinpublicservice.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "connect@quandl.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "connect@quandl.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@windscribe.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@windscribe.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@twitter.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@twitter.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@messages.cargurus.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@messages.cargurus.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@namecheap.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@namecheap.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@email.cbssports.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@email.cbssports.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "wisconsinpublicservice@us.confirmit.com"),
+        args=("[Gmail]/All Mail", "wisconsinpublicservice@us.confirmit.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@mystubhub.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@mystubhub.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "AmericanExpress@welcome.aexp.com"),
+        args=("[Gmail]/All Mail", "AmericanExpress@welcome.aexp.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "help@walmart.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "help@walmart.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@mail.zillow.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@mail.zillow.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "info@meetup.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "info@meetup.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@emails.chase.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@emails.chase.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@qemailserver.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@qemailserver.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@getipass.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@getipass.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "amazon-move@amazon.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "amazon-move@amazon.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "no-reply@mymove.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "no-reply@mymove.com")
     )
-    pool.apply_async(move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "siriusxm"))
+    pool.apply_async(move_to_trash_from, args=("[Gmail]/All Mail", "siriusxm"))
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@robinhood.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@robinhood.com")
     )
-    pool.apply_async(move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "stitcher"))
+    pool.apply_async(move_to_trash_from, args=("[Gmail]/All Mail", "stitcher"))
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "camelcamelcamel")
+        move_to_trash_from, args=("[Gmail]/All Mail", "camelcamelcamel")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@email.ticketmaster.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@email.ticketmaster.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "no-reply@gdax.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "no-reply@gdax.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "maillist.codeproject.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "maillist.codeproject.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "cabelas@emails.cabelas.com"),
+        args=("[Gmail]/All Mail", "cabelas@emails.cabelas.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "support@allclearid.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "support@allclearid.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "upwork@e.upwork.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "upwork@e.upwork.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "@news.digitalocean.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "@news.digitalocean.com")
     )
     pool.apply_async(
         move_to_trash_from,
         args=(
-            m_con,
             "[Gmail]/All Mail",
             "Participant_Education@eonline.e-vanguard.com",
         ),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "podcast@talkpython.fm")
+        move_to_trash_from, args=("[Gmail]/All Mail", "podcast@talkpython.fm")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "mailout@maillist.codeproject.com"),
+        args=("[Gmail]/All Mail", "mailout@maillist.codeproject.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "editor@toptal.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "editor@toptal.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "Kwikrewards@kwiktrip.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "Kwikrewards@kwiktrip.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "digest-noreply@quora.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "digest-noreply@quora.com")
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "RANWW@northwestmatrixmail.com"),
+        args=("[Gmail]/All Mail", "RANWW@northwestmatrixmail.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "newsletter@news.farmandfleet.com"),
+        args=("[Gmail]/All Mail", "newsletter@news.farmandfleet.com"),
     )
     pool.apply_async(
         move_to_trash_from,
-        args=(m_con, "[Gmail]/All Mail", "offers@your.offers.dominos.com"),
+        args=("[Gmail]/All Mail", "offers@your.offers.dominos.com"),
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "email@nl.npr.org")
+        move_to_trash_from, args=("[Gmail]/All Mail", "email@nl.npr.org")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "eTalk@bankpeoples.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "eTalk@bankpeoples.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "email@nl.npr.org")
+        move_to_trash_from, args=("[Gmail]/All Mail", "email@nl.npr.org")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "noreply@glassdoor.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "noreply@glassdoor.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "alert@indeed.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "alert@indeed.com")
     )
     pool.apply_async(
-        move_to_trash_from, args=(m_con, "[Gmail]/All Mail", "surveys@google.com")
+        move_to_trash_from, args=("[Gmail]/All Mail", "surveys@google.com")
     )
 
     # Mark read
     pool.apply_async(
-        mark_read, args=(m_con, "[Gmail]/All Mail", "support.allclearid@allclearid.com")
+        mark_read, args=("[Gmail]/All Mail", "support.allclearid@allclearid.com")
     )
     pool.apply_async(
         mark_read,
         args=(
-            m_con,
             "[Gmail]/All Mail",
             "ComputershareOnlineServices@cpucommunication.com",
         ),
     )
     pool.apply_async(
         mark_read,
-        args=(m_con, "[Gmail]/All Mail", "onlinebanking@ealerts.bankofamerica.com"),
+        args=("[Gmail]/All Mail", "onlinebanking@ealerts.bankofamerica.com"),
     )
     pool.apply_async(
-        mark_read, args=(m_con, "[Gmail]/All Mail", "donotreply@upwork.com")
+        mark_read, args=("[Gmail]/All Mail", "donotreply@upwork.com")
     )
     pool.apply_async(
         mark_read,
-        args=(m_con, "[Gmail]/All Mail", "duluthtrading@duluthtradingemail.com"),
+        args=("[Gmail]/All Mail", "duluthtrading@duluthtradingemail.com"),
     )
 
-    # move_to_trash_before_date(m_con, '[Gmail]/All Mail', 365)  # inbox cleanup, before 1 yr
+    # pool.apply_async(move_to_trash_before_date, args=('[Gmail]/All Mail', 365))  # inbox cleanup, before 1 yr
     while True:
         try:
             from_string = input(
@@ -699,7 +981,7 @@ if __name__ == "__main__":
             )
             if from_string.lower() != "stop":
                 pool.apply_async(
-                    move_to_trash_from, args=(m_con, "[Gmail]/All Mail", from_string)
+                    move_to_trash_from, args=("[Gmail]/All Mail", from_string)
                 )
             else:
                 break
@@ -709,6 +991,6 @@ if __name__ == "__main__":
     pool.close()
     pool.join()
 
-    # empty_folder(m_con, '[Gmail]/Trash', do_expunge=True)  # can send do_expunge=False, default True
+    # pool.run(empty_folder, '[Gmail]/Trash', do_expunge=True)  # can send do_expunge=False, default True
 
-    disconnect_imap(m_con)
+    pool.disconnect()